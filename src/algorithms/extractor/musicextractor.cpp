@@ -182,6 +182,26 @@ void MusicExtractor::setExtractorDefaultOptions() {
 
 
 void MusicExtractor::compute() {
+  // the decoded audio is only needed while computing, make sure it does not
+  // outlive this call, even if one of the analysis steps throws
+  try {
+    computeDescriptors();
+  }
+  catch (...) {
+    releaseAudio();
+    throw;
+  }
+  releaseAudio();
+}
+
+
+void MusicExtractor::releaseAudio() {
+  vector<Real>().swap(_audio);
+  _audioDownmix.clear();
+}
+
+
+void MusicExtractor::computeDescriptors() {
   const string& audioFilename = _audiofile.get();
 
   Pool& resultsStats = _resultsStats.get();
@@ -190,8 +210,6 @@ void MusicExtractor::compute() {
   Pool results;
   Pool stats;
 
-  streaming::AlgorithmFactory& factory = streaming::AlgorithmFactory::instance();
-
   results.set("metadata.version.essentia", essentia::version);
   results.set("metadata.version.essentia_git_sha", essentia::version_git_sha);
   results.set("metadata.version.extractor", MUSIC_EXTRACTOR_VERSION);
@@ -235,23 +253,19 @@ void MusicExtractor::compute() {
   // normalize the audio with replay gain and compute as many lowlevel, rhythm,
   // and tonal descriptors as possible
   
-  streaming::Algorithm* loader = factory.create("EasyLoader",
-                                    "filename",   audioFilename,
-                                    "sampleRate", analysisSampleRate,
-                                    "startTime",  startTime,
-                                    "endTime",    endTime,
-                                    "replayGain", replayGain,
-                                    "downmix",    downmix);
+  // the audio has already been decoded by computeAudioMetadata, the networks
+  // below reuse it instead of reading the file again
+  SourceBase* source;
+  streaming::Algorithm* loader = createLoader(source, replayGain);
   MusicLowlevelDescriptors *lowlevel = new MusicLowlevelDescriptors(options);
   MusicRhythmDescriptors *rhythm = new MusicRhythmDescriptors(options);
   MusicTonalDescriptors *tonal = new MusicTonalDescriptors(options);
   
-  SourceBase& source = loader->output("audio");
-  lowlevel->createNetworkNeqLoud(source, results);
-  lowlevel->createNetworkEqLoud(source, results);
-  lowlevel->createNetworkLoudness(source, results);
-  rhythm->createNetwork(source, results);
-  tonal->createNetworkTuningFrequency(source, results);
+  lowlevel->createNetworkNeqLoud(*source, results);
+  lowlevel->createNetworkEqLoud(*source, results);
+  lowlevel->createNetworkLoudness(*source, results);
+  rhythm->createNetwork(*source, results);
+  tonal->createNetworkTuningFrequency(*source, results);
 
   scheduler::Network network(loader);
   network.run();
@@ -259,17 +273,11 @@ void MusicExtractor::compute() {
   // Descriptors that require values from other descriptors in the previous chain
   lowlevel->computeAverageLoudness(results);  // requires 'loudness'
 
-  streaming::Algorithm* loader_2 = factory.create("EasyLoader",
-                                       "filename",   audioFilename,
-                                       "sampleRate", analysisSampleRate,
-                                       "startTime",  startTime,
-                                       "endTime",    endTime,
-                                       "replayGain", replayGain,
-                                       "downmix",    downmix);
+  SourceBase* source_2;
+  streaming::Algorithm* loader_2 = createLoader(source_2, replayGain);
 
-  SourceBase& source_2 = loader_2->output("audio");
-  rhythm->createNetworkBeatsLoudness(source_2, results);  // requires 'beat_positions'
-  tonal->createNetwork(source_2, results);                // requires 'tuning frequency'
+  rhythm->createNetworkBeatsLoudness(*source_2, results);  // requires 'beat_positions'
+  tonal->createNetwork(*source_2, results);                // requires 'tuning frequency'
 
   scheduler::Network network_2(loader_2);
   network_2.run();
@@ -481,6 +489,8 @@ void MusicExtractor::computeAudioMetadata(const string& audioFilename, Pool& res
   streaming::Algorithm* resampleL = factory.create("Resample");
   streaming::Algorithm* trimmer = factory.create("StereoTrimmer");
   streaming::Algorithm* loudness = factory.create("LoudnessEBUR128");
+  streaming::Algorithm* mixer = factory.create("MonoMixer", "type", downmix);
+  streaming::Algorithm* resample = factory.create("Resample");
 
   Real inputSampleRate = lastTokenProduced<Real>(loader->output("sampleRate"));
   resampleR->configure("inputSampleRate", inputSampleRate,
@@ -490,6 +500,9 @@ void MusicExtractor::computeAudioMetadata(const string& audioFilename, Pool& res
   trimmer->configure("sampleRate", analysisSampleRate,
                      "startTime", startTime,
                      "endTime", endTime);
+  // same as in MonoLoader
+  resample->configure("inputSampleRate", (Real)(int)inputSampleRate,
+                      "outputSampleRate", analysisSampleRate);
 
   // TODO implement StereoLoader algorithm instead of hardcoding this chain
   loader->output("audio")      >> demuxer->input("audio");
@@ -504,6 +517,14 @@ void MusicExtractor::computeAudioMetadata(const string& audioFilename, Pool& res
   loudness->output("shortTermLoudness") >> PC(results, "lowlevel.loudness_ebu128.short_term");
   loudness->output("loudnessRange") >> PC(results, "lowlevel.loudness_ebu128.loudness_range");
 
+  // keep the mono audio for the rest of the analysis while we are at it
+  _audio.clear();
+  _audioDownmix = downmix;
+  loader->output("audio")           >> mixer->input("audio");
+  loader->output("numberChannels")  >> mixer->input("numberChannels");
+  mixer->output("audio")            >> resample->input("signal");
+  resample->output("signal")        >> _audio;
+
   scheduler::Network network(loader);
   network.run();
   
@@ -543,15 +564,14 @@ void MusicExtractor::computeReplayGain(const string& audioFilename, Pool& result
   //int length = 0;
 
   while (true) {
-    streaming::Algorithm* audio = factory.create("EqloudLoader",
-                                      "filename",   audioFilename,
-                                      "sampleRate", analysisSampleRate,
-                                      "startTime",  startTime,
-                                      "endTime",    endTime,
-                                      "downmix",    downmix);
+    loadAudio(audioFilename);
+
+    // EqloudLoader with its default replayGain (unit scaling)
+    SourceBase* signal;
+    streaming::Algorithm* audio = createLoader(signal, -6.0, true);
     streaming::Algorithm* rgain = factory.create("ReplayGain", "applyEqloud", false);
 
-    audio->output("audio")      >> rgain->input("signal");
+    *signal                     >> rgain->input("signal");
     rgain->output("replayGain") >> PC(results, "metadata.audio_properties.replay_gain");
 
     try {
@@ -598,6 +618,50 @@ void MusicExtractor::computeReplayGain(const string& audioFilename, Pool& result
 }
 
 
+void MusicExtractor::loadAudio(const string& audioFilename) {
+  // computeAudioMetadata already decoded the file with the default downmix,
+  // we only need to decode it again if computeReplayGain changed it
+  if (downmix == _audioDownmix) return;
+
+  Algorithm* audio = standard::AlgorithmFactory::create("MonoLoader",
+                                                        "filename", audioFilename,
+                                                        "sampleRate", analysisSampleRate,
+                                                        "downmix", downmix);
+  audio->output("audio").set(_audio);
+  audio->compute();
+  delete audio;
+
+  _audioDownmix = downmix;
+}
+
+
+streaming::Algorithm* MusicExtractor::createLoader(SourceBase*& audio, Real gain, bool eqloud) {
+  // same chain as EasyLoader (or EqloudLoader), reading from the decoded audio
+  streaming::AlgorithmFactory& factory = streaming::AlgorithmFactory::instance();
+
+  streaming::VectorInput<Real>* input = new streaming::VectorInput<Real>(&_audio);
+  input->setAcquireSize(4096);
+  streaming::Algorithm* trimmer = factory.create("Trimmer",
+                                                 "sampleRate", analysisSampleRate,
+                                                 "startTime",  startTime,
+                                                 "endTime",    endTime);
+  // apply a 6dB preamp, as done by all audio players.
+  streaming::Algorithm* scale = factory.create("Scale", "factor", db2amp(gain + 6.0));
+
+  input->output("data")     >> trimmer->input("signal");
+  trimmer->output("signal") >> scale->input("signal");
+  audio = &scale->output("signal");
+
+  if (eqloud) {
+    streaming::Algorithm* eqloudness = factory.create("EqualLoudness", "sampleRate", analysisSampleRate);
+    scale->output("signal") >> eqloudness->input("signal");
+    audio = &eqloudness->output("signal");
+  }
+
+  return input;
+}
+
+
 void MusicExtractor::setExtractorOptions(const std::string& filename) {
 
   if (filename.empty()) return;
@@ -614,24 +678,18 @@ void MusicExtractor::setExtractorOptions(const std::string& filename) {
 void MusicExtractor::computeChromaPrint(const string& audioFilename, Pool& results) {
   AlgorithmFactory& factory = standard::AlgorithmFactory::instance();
 
-  Algorithm* audio = factory.create("MonoLoader",
-                                    "filename", audioFilename,
-                                    "sampleRate", analysisSampleRate,
-                                    "downmix", downmix);
   Algorithm* chromaprinter = factory.create("Chromaprinter",
                                             "sampleRate", analysisSampleRate,
                                             "maxLength", chromaprintDuration);
 
-  vector<Real> siganl;
   string chromaprint;
 
-  audio->output("audio").set(siganl);
-  chromaprinter->input("signal").set(siganl);
+  chromaprinter->input("signal").set(_audio);
 
   chromaprinter->output("fingerprint").set(chromaprint);
 
   try {
-    audio->compute();
+    loadAudio(audioFilename);
     chromaprinter->compute();
 
     results.add("chromaprint.string", chromaprint);
@@ -27,6 +27,7 @@
 #include "extractor_music/MusicRhythmDescriptors.h"
 #include "extractor_music/MusicTonalDescriptors.h"
 #include "extractor_music/extractor_version.h"
+#include "vectoroutput.h"
 
 namespace essentia {
 namespace standard {
@@ -82,12 +83,21 @@ class MusicExtractor : public Algorithm {
   std::string downmix;
   standard::Algorithm* _svms;
 
+  // mono audio resampled to analysisSampleRate, decoded once per file and
+  // shared by all the analysis networks; released at the end of compute()
+  std::vector<Real> _audio;
+  std::string _audioDownmix;
+
   void setExtractorOptions(const std::string& filename);
   void setExtractorDefaultOptions();
   void mergeValues(Pool &pool);
   void readMetadata(const std::string& audioFilename, Pool& results);
   void computeAudioMetadata(const std::string& audioFilename, Pool& results);
   void computeReplayGain(const std::string& audioFilename, Pool& results);
+  void loadAudio(const std::string& audioFilename);
+  void releaseAudio();
+  void computeDescriptors();
+  streaming::Algorithm* createLoader(streaming::SourceBase*& audio, Real gain, bool eqloud=false);
 
 #if HAVE_LIBCHROMAPRINT
   void computeChromaPrint(const std::string& audioFilename, Pool& results);
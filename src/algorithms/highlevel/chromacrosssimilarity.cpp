@@ -30,6 +30,7 @@ std::vector<Real> globalAverageChroma(std::vector<std::vector<Real> >& inputFeat
 int optimalTranspositionIndex(std::vector<std::vector<Real> >& chromaA, std::vector<std::vector<Real> >& chromaB, int nshifts);
 std::vector<std::vector<Real> > stackChromaFrames(std::vector<std::vector<Real> >& frames, int frameStackSize, int frameStackStride);
 std::vector<std::vector<Real> > chromaBinarySimMatrix(std::vector<std::vector<Real> >& chromaA, std::vector<std::vector<Real> >& chromaB, int nshifts, Real matchCoef, Real mismatchCoef);
+void binarizeDistances(const std::vector<Real>& pdistances, size_t queryFeatureSize, size_t referenceFeatureSize, Real binarizePercentile, std::vector<std::vector<Real> >& csm);
 
 namespace essentia {
 namespace standard {
@@ -92,93 +93,30 @@ void ChromaCrossSimilarity::compute() {
     // construct stacked chroma feature matrices from specified 'frameStackSize' and 'frameStackStride'
     _queryFeatureStack = stackChromaFrames(queryFeature, _frameStackSize, _frameStackStride);
     _referenceFeatureStack = stackChromaFrames(referenceFeature, _frameStackSize, _frameStackStride);
-    // pairwise euclidean distance
-    _pdistances = pairwiseDistance(_queryFeatureStack, _referenceFeatureStack);
-    queryFeatureSize = _pdistances.size();
-    referenceFeatureSize = _pdistances[0].size();
+    // pairwise euclidean distances, as a contiguous (queryFeature, referenceFeature) matrix
+    pairwiseDistance(_queryFeatureStack, _referenceFeatureStack, _pdistances);
+    referenceFeatureSize = _referenceFeatureStack.size();
 
     // if streaming=True, accumulate the pdistances matrix for each compute method call.
     if (_streaming) {
       // accumulate the similarity matrix in every compute method call
-      for (size_t i=0; i<queryFeatureSize; i++) {
-        _accumEucDistances.push_back(_pdistances[i]);
-      }
-      queryFeatureSize = _accumEucDistances.size();
-      referenceFeatureSize = _accumEucDistances[0].size();
-      csm.assign(queryFeatureSize, std::vector<Real>(referenceFeatureSize, 0));
-      _thresholdQuery.assign(queryFeatureSize, 0);
-      _thresholdReference.assign(referenceFeatureSize, 0);
-      // compute the binary output similarity matrix by multiplying with the thresholds computed along the referenceFeature axis
-      for (size_t j=0; j<referenceFeatureSize; j++) {
-        _status = true;
-        for (size_t i=0; i<queryFeatureSize; i++) {
-          // here we only compute the thresholdReference at index j once 
-          if (_status) _thresholdReference[j] = percentile(getColsAtVecIndex(_accumEucDistances, j), _binarizePercentile*100);
-          if (_accumEucDistances[i][j] <= _thresholdReference[j]) {
-            csm[i][j] = 1;
-          }
-          _status = false;
-        }
-      }
-      // update the binary output similarity matrix using the thresholds computed along the queryFeature axis
-      for (size_t k=0; k<queryFeatureSize; k++) {
-        _thresholdQuery[k] = percentile(_accumEucDistances[k], _binarizePercentile*100);
-        for (size_t l=0; l<referenceFeatureSize; l++) {
-          if (_accumEucDistances[k][l] > _thresholdQuery[k]) {
-            csm[k][l] = 0;
-          }
-        }
-      }
+      _accumEucDistances.insert(_accumEucDistances.end(), _pdistances.begin(), _pdistances.end());
+      queryFeatureSize = _accumEucDistances.size() / referenceFeatureSize;
+      binarizeDistances(_accumEucDistances, queryFeatureSize, referenceFeatureSize, _binarizePercentile, csm);
       _iterIdx++;
       // clear the internal states after each compute() method call
       _queryFeatureStack.clear();
       _referenceFeatureStack.clear();
       _pdistances.clear();
-      _thresholdQuery.clear();
-      _thresholdReference.clear();
     }
     else { // no streaming
-      _thresholdQuery.assign(queryFeatureSize, 0);
-      _thresholdReference.assign(referenceFeatureSize, 0);
-      csm.assign(queryFeatureSize, std::vector<Real>(referenceFeatureSize, 0));
-      // compute the binary output similarity matrix by multiplying with the thresholds computed along the referenceFeature axis
-      for (size_t j=0; j<referenceFeatureSize; j++) {
-        _status = true;
-        for (size_t i=0; i<queryFeatureSize; i++) {
-          // here we only compute the thresholdReference at index j once 
-          if (_status) _thresholdReference[j] = percentile(getColsAtVecIndex(_pdistances, j), _binarizePercentile*100);
-          if (_pdistances[i][j] <= _thresholdReference[j]) {
-            csm[i][j] = 1;
-          }
-          _status = false;
-        }
-      }
-      // update the binary output similarity matrix using the thresholds computed along the queryFeature axis
-      for (size_t k=0; k<queryFeatureSize; k++) {
-        _thresholdQuery[k] = percentile(_pdistances[k], _binarizePercentile*100);
-        for (size_t l=0; l<referenceFeatureSize; l++) {
-          if (_pdistances[k][l] > _thresholdQuery[k]) {
-            csm[k][l] = 0;
-          }
-        }
-      }
+      queryFeatureSize = _queryFeatureStack.size();
+      binarizeDistances(_pdistances, queryFeatureSize, referenceFeatureSize, _binarizePercentile, csm);
     }
   }
 }
 
 
-// returns a column corresponding to a specified index in the given 2D input matrix
-std::vector<Real> ChromaCrossSimilarity::getColsAtVecIndex(std::vector<std::vector<Real> >& inputMatrix, int index) const {
-  
-  std::vector<Real> cols;
-  cols.reserve(inputMatrix.size());
-  for (size_t i=0; i<inputMatrix.size(); i++) {
-    cols.push_back(inputMatrix[i][index]);
-  }
-  return cols;
-}
-
-
 void ChromaCrossSimilarity::reset() {
   // clear the accumulated euclidean similarit matrix in the streaming mode
   _accumEucDistances.clear();
@@ -277,21 +215,19 @@ AlgorithmStatus ChromaCrossSimilarity::process() {
   else { // no otiBinary method
     std::vector<std::vector<Real> > queryFeatureStack = stackChromaFrames(inputFramesCopy, _frameStackSize, _frameStackStride);
     // here we compute the pairwsie euclidean distances between query and reference song time embedding and finally tranpose the resulting matrix.
-    std::vector<std::vector<Real> > pdistances = pairwiseDistance(queryFeatureStack, _referenceFeatureStack);
-    size_t queryFeatureSize = pdistances.size();
-    size_t referenceFeatureSize = pdistances[0].size();
+    std::vector<Real> pdistances;
+    pairwiseDistance(queryFeatureStack, _referenceFeatureStack, pdistances);
+    size_t queryFeatureSize = queryFeatureStack.size();
+    size_t referenceFeatureSize = _referenceFeatureStack.size();
 
-    // optimise the threshold computation by iniatilizing it to a matrix of ones
-    _outputSimMatrix.assign(queryFeatureSize, std::vector<Real>(referenceFeatureSize, 1));
+    // thresholds computed along the referenceFeature axis
+    std::vector<Real> thresholdQuery = rowPercentiles(pdistances, queryFeatureSize, referenceFeatureSize, _binarizePercentile*100);
 
-    std::vector<Real> thresholdQuery(queryFeatureSize);
-    // update the binary output similarity matrix by multiplying with the thresholds computed along the referenceFeature axis
+    // the binary output similarity matrix is 1 where the distance is below the threshold
+    _outputSimMatrix.assign(queryFeatureSize, std::vector<Real>(referenceFeatureSize));
     for (size_t i=0; i<queryFeatureSize; i++) {
-      thresholdQuery[i] = percentile(pdistances[i], _binarizePercentile*100);
       for (size_t j=0; j<referenceFeatureSize; j++) {
-        if (pdistances[i][j] > thresholdQuery[i]) {
-          _outputSimMatrix[i][j] = 0;
-        }
+        _outputSimMatrix[i][j] = (pdistances[i*referenceFeatureSize + j] <= thresholdQuery[i]) ? 1 : 0;
       }
     }
     csmOutput[0] = _outputSimMatrix[0];
@@ -371,23 +307,44 @@ std::vector<std::vector<Real> > stackChromaFrames(std::vector<std::vector<Real>
 
 // Computes a binary similarity matrix from two chroma vector inputs using OTI as described in [3]
 std::vector<std::vector<Real> > chromaBinarySimMatrix(std::vector<std::vector<Real> >& chromaA, std::vector<std::vector<Real> >& chromaB, int nshifts, Real matchCoef, Real mismatchCoef) {
+  typedef Eigen::Matrix<Real, Eigen::Dynamic, Eigen::Dynamic, Eigen::RowMajor> RowMajorMatrix;
+
+  RowMajorMatrix a = toRowMajorMatrix(chromaA);
+  RowMajorMatrix b = toRowMajorMatrix(chromaB);
+  if (a.cols() != b.cols()) {
+    throw EssentiaException("ChromaCrossSimilarity: the query and reference features should have the same number of bins");
+  }
+  int nbins = b.cols();
+
+  // the dot products of all the frames of chromaA and the frames of chromaB
+  // circularly shifted by k bins are computed at once as a matrix product, keeping
+  // the shift giving the maximum value for each pair of frames (the OTI)
+  RowMajorMatrix shiftedB(b.rows(), nbins);
+  RowMajorMatrix values(a.rows(), b.rows());
+  RowMajorMatrix maxValues;
+  Eigen::Matrix<int, Eigen::Dynamic, Eigen::Dynamic, Eigen::RowMajor> otiIndex = Eigen::Matrix<int, Eigen::Dynamic, Eigen::Dynamic, Eigen::RowMajor>::Zero(a.rows(), b.rows());
+  for (int k=0; k<=nshifts; k++) {
+    // same as std::rotate(frame.begin(), frame.end() - k, frame.end()) on each frame
+    int shift = nbins ? k % nbins : 0;
+    shiftedB.leftCols(shift) = b.rightCols(shift);
+    shiftedB.rightCols(nbins - shift) = b.leftCols(nbins - shift);
+
+    values.noalias() = a * shiftedB.transpose();
+    if (k == 0) {
+      maxValues = values;
+    }
+    else {
+      // only a strictly greater value changes the index, as argmax returns the first maximum
+      otiIndex = (values.array() > maxValues.array()).select(k, otiIndex);
+      maxValues = maxValues.cwiseMax(values);
+    }
+  }
 
-  int otiIndex;
-  std::vector<Real> valueAtShifts;
-  std::vector<Real> chromaBcopy;
   std::vector<std::vector<Real> > simMatrix(chromaA.size(), std::vector<Real>(chromaB.size()));
   for (size_t i=0; i<chromaA.size(); i++) {
     for (size_t j=0; j<chromaB.size(); j++) {
-      // compute OTI-based similarity for each frame of chromaA and chromaB
-      for(int k=0; k<=nshifts; k++) {
-        chromaBcopy = chromaB[j];
-        std::rotate(chromaBcopy.begin(), chromaBcopy.end() - k, chromaBcopy.end());
-        valueAtShifts.push_back(dotProduct(chromaA[i], chromaBcopy));
-      }
-      otiIndex = argmax(valueAtShifts);
-      valueAtShifts.clear();
       // assign matchCoef to similarity matrix if the OTI is 0 or 1 semitone
-      if (otiIndex == 0 || otiIndex == 1) {
+      if (otiIndex(i, j) == 0 || otiIndex(i, j) == 1) {
         simMatrix[i][j] = matchCoef;
       }
       else {
@@ -399,3 +356,20 @@ std::vector<std::vector<Real> > chromaBinarySimMatrix(std::vector<std::vector<Re
 }
 
 
+// Computes the binary cross-similarity matrix from a contiguous (queryFeature,
+// referenceFeature) matrix of euclidean distances as described in [2]: it is 1
+// where the distance is below both the percentile of its row and of its column
+void binarizeDistances(const std::vector<Real>& pdistances, size_t queryFeatureSize, size_t referenceFeatureSize, Real binarizePercentile, std::vector<std::vector<Real> >& csm) {
+  // the thresholds along the referenceFeature axis are computed on the rows of the transposed matrix
+  std::vector<Real> thresholdQuery = rowPercentiles(pdistances, queryFeatureSize, referenceFeatureSize, binarizePercentile*100);
+  std::vector<Real> thresholdReference = rowPercentiles(transposeMatrix(pdistances, queryFeatureSize, referenceFeatureSize),
+                                                        referenceFeatureSize, queryFeatureSize, binarizePercentile*100);
+
+  csm.assign(queryFeatureSize, std::vector<Real>(referenceFeatureSize));
+  for (size_t i=0; i<queryFeatureSize; i++) {
+    const Real* distances = &pdistances[i*referenceFeatureSize];
+    for (size_t j=0; j<referenceFeatureSize; j++) {
+      csm[i][j] = (distances[j] <= thresholdQuery[i] && distances[j] <= thresholdReference[j]) ? 1 : 0;
+    }
+  }
+}
@@ -64,7 +64,6 @@ class ChromaCrossSimilarity : public Algorithm {
    bool _streaming;
    Real _mathcCoef;
    Real _mismatchCoef;
-   bool _status;
    int _otiIdx;
    int _iterIdx;
    size_t queryFeatureSize;
@@ -73,11 +72,8 @@ class ChromaCrossSimilarity : public Algorithm {
    std::vector<std::vector<Real> > referenceFeature;
    std::vector<std::vector<Real> >  _queryFeatureStack;
    std::vector<std::vector<Real> >  _referenceFeatureStack;
-   std::vector<Real> _thresholdQuery;
-   std::vector<Real> _thresholdReference;
-   std::vector<std::vector<Real> > _pdistances;
-   std::vector<std::vector<Real> > _accumEucDistances;
-   std::vector<Real> getColsAtVecIndex(std::vector<std::vector<Real> >& inputMatrix, int index) const; 
+   std::vector<Real> _pdistances;
+   std::vector<Real> _accumEucDistances;
 };
 
 } // namespace standard
@@ -27,7 +27,6 @@
 
 using namespace essentia;
 
-Real maxElementArray(std::vector<std::vector<Real> >& inputMatrix);
 Real gammaState(Real value, const Real disOnset, const Real disExtension);
 
 namespace essentia {
@@ -56,82 +55,97 @@ void CoverSongSimilarity::configure() {
   if      (distanceType == "symmetric") _distanceType = SYMMETRIC;
   else if (distanceType == "asymmetric") _distanceType = ASYMMETRIC;
   else throw EssentiaException("CoverSongSimilarity: Invalid distance type: ", simType);
+  _outputScoreMatrix = parameter("outputScoreMatrix").toBool();
 }
 
 void CoverSongSimilarity::compute() {
   // get input and output
-  const std::vector<std::vector<Real> > simMatrix = _inputArray.get();
+  const std::vector<std::vector<Real> >& simMatrix = _inputArray.get();
   std::vector<std::vector<Real> >& scoreMatrix = _scoreMatrix.get();
   Real& distance = _distance.get();
 
-  if (simMatrix.empty())
+  if (simMatrix.empty() || simMatrix[0].empty())
       throw EssentiaException("CoverSongSimilarity: Input similarity matrix is empty");
 
   size_t xFrames = simMatrix.size();
   size_t yFrames = simMatrix[0].size();
-  // assign the output scoreMatrix with zeros
-  scoreMatrix.assign(xFrames, std::vector<Real>(yFrames, 0));
-  Real c1 = 0;
-  Real c2 = 0;
-  Real c3 = 0;
-  Real c4 = 0;
-  Real c5 = 0;
-
-  if (_simType == SERRA09) {
-    // iterate through the similarity matrix to recursively construct the qmax scoring cumilative matrix
-    for(size_t i = 2; i < xFrames; i++) {
-      for(size_t j = 2; j < yFrames; j++) {
-        // measure the diagonal when a similarity is found in the input matrix
-        if (int(simMatrix[i][j]) == 1) {
-          c1 = scoreMatrix[i-1][j-1];
-          c2 = scoreMatrix[i-2][j-1];
-          c3 = scoreMatrix[i-1][j-2];
-          Real row[3] = {c1, c2 , c3};
-          scoreMatrix[i][j] = *std::max_element(row, row+3) + 1;
-        }
-        else {
-        // apply gap penalty onset for disruption and extension when similarity is not found in the input matrix
-          c1 = scoreMatrix[i-1][j-1] - gammaState(simMatrix[i-1][j-1], _disOnset, _disExtension);
-          c2 = scoreMatrix[i-2][j-1] - gammaState(simMatrix[i-2][j-1], _disOnset, _disExtension);
-          c3 = scoreMatrix[i-1][j-2] - gammaState(simMatrix[i-1][j-2], _disOnset, _disExtension);
-          Real row2[4] = {0, c1, c2, c3};
-          scoreMatrix[i][j] = *std::max_element(row2, row2+4);
-        }
+
+  // the score of a row only depends on the previous 'history' rows, so only
+  // these are kept in memory unless the whole score matrix is requested
+  const size_t history = (_simType == SERRA09) ? 2 : 3;
+  const size_t start = history;
+  if (_outputScoreMatrix) {
+    scoreMatrix.assign(xFrames, std::vector<Real>(yFrames, 0));
+  }
+  else {
+    scoreMatrix.clear();
+    _rows.assign(history + 1, std::vector<Real>(yFrames, 0));
+  }
+  // gap penalties of the last rows of the input matrix, and whether the
+  // elements of the current row are similar (1) or not (0)
+  _penalties.assign(history + 1, std::vector<Real>(yFrames, 0));
+  _matches.resize(yFrames);
+
+  Real maxScore = 0;
+  for (size_t i=0; i<xFrames; i++) {
+    const std::vector<Real>& sim = simMatrix[i];
+    if (sim.size() != yFrames)
+      throw EssentiaException("CoverSongSimilarity: Input similarity matrix rows have different sizes");
+
+    Real* penalty = &_penalties[i % (history+1)][0];
+    for (size_t j=0; j<yFrames; j++) {
+      int value = int(sim[j]);
+      if (value != 0 && value != 1)
+        throw EssentiaException("CoverSongSimilarity:Non-binary elements found in the input similarity matrix. Expected a binary similarity matrix!");
+      _matches[j] = Real(value);
+      penalty[j] = value == 1 ? _disOnset : _disExtension;
+    }
+    if (i < start) continue;
+
+    Real* score = _outputScoreMatrix ? &scoreMatrix[i][0] : &_rows[i % (history+1)][0];
+    const Real* s1 = _outputScoreMatrix ? &scoreMatrix[i-1][0] : &_rows[(i-1) % (history+1)][0];
+    const Real* s2 = _outputScoreMatrix ? &scoreMatrix[i-2][0] : &_rows[(i-2) % (history+1)][0];
+    const Real* p1 = &_penalties[(i-1) % (history+1)][0];
+    const Real* p2 = &_penalties[(i-2) % (history+1)][0];
+    const Real* m = &_matches[0];
+
+    // an element similar to the current one continues the alignment from
+    // the best previous score, otherwise the previous scores are penalized
+    // (m[j] == 1 cancels the penalties, m[j] == 0 adds nothing to the score)
+    if (_simType == SERRA09) {
+      for (size_t j=start; j<yFrames; j++) {
+        Real gap = 1 - m[j];
+        Real c1 = s1[j-1] - gap * p1[j-1];
+        Real c2 = s2[j-1] - gap * p2[j-1];
+        Real c3 = s1[j-2] - gap * p1[j-2];
+        score[j] = std::max(Real(0), std::max(c1, std::max(c2, c3)) + m[j]);
       }
     }
-  }
-  else if (_simType == CHEN17) {
-    // iterate through the similarity matrix to recursively construct the dmax scoring cumilative matrix
-    for(size_t i = 3; i < xFrames; i++) {
-      for(size_t j = 3; j < yFrames; j++) {
-        // measure the diagonal when a similarity is found in the input matrix
-        if (int(simMatrix[i][j]) == 1) {
-          c2 = scoreMatrix[i-2][j-1] + simMatrix[i-1][j];
-          c3 = scoreMatrix[i-1][j-2] + simMatrix[i][j-1];
-          c4 = scoreMatrix[i-3][j-1] + simMatrix[i-2][j] + simMatrix[i-1][j];
-          c5 = scoreMatrix[i-1][j-3] + simMatrix[i][j-2] + simMatrix[i][j-1];
-          Real row[5] = {scoreMatrix[i-1][j-1], c2, c3, c4, c5};
-          scoreMatrix[i][j] = *std::max_element(row, row+5) + 1;
-        }
-        else {
-          // apply gap penalty onset for disruption and extension when similarity is not found in the input matrix
-          c1 = scoreMatrix[i-1][j-1] - gammaState(simMatrix[i-1][j-1], _disOnset, _disExtension);
-          c2 = (scoreMatrix[i-2][j-1] + simMatrix[i-1][j]) - gammaState(simMatrix[i-2][j-1], _disOnset, _disExtension);
-          c3 = (scoreMatrix[i-1][j-2] + simMatrix[i][j-1]) - gammaState(simMatrix[i-1][j-2], _disOnset, _disExtension);
-          c4 = (scoreMatrix[i-3][j-1] + simMatrix[i-2][j] + simMatrix[i-1][j]) - gammaState(simMatrix[i-3][j-1], _disOnset, _disExtension);
-          c5 = (scoreMatrix[i-1][j-3] + simMatrix[i][j-2] + simMatrix[i][j-1]) - gammaState(simMatrix[i-1][j-3], _disOnset, _disExtension);
-          Real row2[6] = {0, c1, c2, c3, c4, c5};
-          scoreMatrix[i][j] = *std::max_element(row2, row2+6);
-        }
+    else if (_simType == CHEN17) {
+      const Real* s3 = _outputScoreMatrix ? &scoreMatrix[i-3][0] : &_rows[(i-3) % (history+1)][0];
+      const Real* p3 = &_penalties[(i-3) % (history+1)][0];
+      const Real* x0 = &sim[0];
+      const Real* x1 = &simMatrix[i-1][0];
+      const Real* x2 = &simMatrix[i-2][0];
+      for (size_t j=start; j<yFrames; j++) {
+        Real gap = 1 - m[j];
+        Real c1 = s1[j-1] - gap * p1[j-1];
+        Real c2 = (s2[j-1] + x1[j]) - gap * p2[j-1];
+        Real c3 = (s1[j-2] + x0[j-1]) - gap * p1[j-2];
+        Real c4 = (s3[j-1] + x2[j] + x1[j]) - gap * p3[j-1];
+        Real c5 = (s1[j-3] + x0[j-2] + x0[j-1]) - gap * p1[j-3];
+        score[j] = std::max(Real(0), std::max(std::max(c1, c2), std::max(c3, std::max(c4, c5))) + m[j]);
       }
     }
+    if (yFrames > start) maxScore = std::max(maxScore, *std::max_element(score + start, score + yFrames));
   }
+
   if (_distanceType == SYMMETRIC) {
-    distance = maxElementArray(scoreMatrix);
+    distance = maxScore;
   }
   else if (_distanceType == ASYMMETRIC) {
     // compute cover song similarity distance by normalising it with the length of reference song as described in [2].
-    distance = sqrt(yFrames) / maxElementArray(scoreMatrix);
+    distance = sqrt(yFrames) / maxScore;
   }
 }
 
@@ -209,11 +223,15 @@ AlgorithmStatus CoverSongSimilarity::process() {
   _xFrames = inputFramesCopy.size();
   _yFrames = inputFramesCopy[0].size();
 
+  // only the last 3 rows of the score matrix are needed by the alignment,
+  // the maximum score of the previous rows is kept to compute the distance
   if (_iterIdx == 0) {
     _mainScoreMatrix.assign(_xFrames, std::vector<Real>(_yFrames, 0));
+    _maxScore = 0;
   }
   else {
-    _mainScoreMatrix.push_back(std::vector<Real>(_yFrames, 0));
+    std::rotate(_mainScoreMatrix.begin(), _mainScoreMatrix.begin() + 1, _mainScoreMatrix.end());
+    _mainScoreMatrix.back().assign(_yFrames, 0);
   }
 
   // compute qmax alignment score matrix for each 3 sub frames of input stream 
@@ -221,11 +239,11 @@ AlgorithmStatus CoverSongSimilarity::process() {
 
   // compute distance
   if (_distanceType == SYMMETRIC) {
-    distance[0] = maxElementArray(_mainScoreMatrix);
+    distance[0] = _maxScore;
   }
   else if (_distanceType == ASYMMETRIC) {
     // compute cover song similarity distance by normalising it with the length of reference song as described in [2].
-    distance[0] = sqrt(_yFrames) / maxElementArray(_mainScoreMatrix);
+    distance[0] = sqrt(_yFrames) / _maxScore;
   }
   if (_pipeDistance) E_INFO(distance[0]);
   _iterIdx++;
@@ -240,26 +258,30 @@ void CoverSongSimilarity::subFrameQmax(std::vector<std::vector<Real> >& inputFra
   
   if (int(_xFrames) != _minFrameAcquireSize) throw EssentiaException("CoverSongSimilarity: Wrong input frame size!");
   int i = 2;
+  // the last row of _mainScoreMatrix is the one being computed
+  std::vector<Real>& score = _mainScoreMatrix[2];
+  const std::vector<Real>& score1 = _mainScoreMatrix[1];
+  const std::vector<Real>& score2 = _mainScoreMatrix[0];
   for (size_t j=2; j<_yFrames; j++) {
     // measure the diagonal when a similarity is found in the input matrix
     if (int(inputFrames[i][j]) == 1) {
-      _c1 = _mainScoreMatrix[_iterRow-1][j-1];
-      _c2 = _mainScoreMatrix[_iterRow-2][j-1];
-      _c3 = _mainScoreMatrix[_iterRow-1][j-2];
+      _c1 = score1[j-1];
+      _c2 = score2[j-1];
+      _c3 = score1[j-2];
       Real row[3] = {_c1, _c2 , _c3};
-      _mainScoreMatrix[_iterRow][j] = *std::max_element(row, row+3) + 1;
+      score[j] = *std::max_element(row, row+3) + 1;
     }
     else {
     // apply gap penalty onset for disruption and extension when similarity is not found in the input matrix
-    _c1 = _mainScoreMatrix[_iterRow-1][j-1] - gammaState(inputFrames[i-1][j-1], _disOnset, _disExtension);
-    _c2 = _mainScoreMatrix[_iterRow-2][j-1] - gammaState(inputFrames[i-2][j-1], _disOnset, _disExtension);
-    _c3 = _mainScoreMatrix[_iterRow-1][j-2] - gammaState(inputFrames[i-1][j-2], _disOnset, _disExtension);
+    _c1 = score1[j-1] - gammaState(inputFrames[i-1][j-1], _disOnset, _disExtension);
+    _c2 = score2[j-1] - gammaState(inputFrames[i-2][j-1], _disOnset, _disExtension);
+    _c3 = score1[j-2] - gammaState(inputFrames[i-1][j-2], _disOnset, _disExtension);
     Real row2[4] = {0, _c1, _c2, _c3};
-    _mainScoreMatrix[_iterRow][j] = *std::max_element(row2, row2+4);
+    score[j] = *std::max_element(row2, row2+4);
     }
+    if (score[j] > _maxScore) _maxScore = score[j];
   }
-  _perFrameScoreMatrix.push_back(_mainScoreMatrix[_iterRow]);
-  _iterRow++;
+  _perFrameScoreMatrix.push_back(score);
 };
 
 
@@ -274,17 +296,3 @@ Real gammaState(Real value, const Real disOnset, const Real disExtension) {
   else throw EssentiaException("CoverSongSimilarity:Non-binary elements found in the input similarity matrix. Expected a binary similarity matrix!");
 }
 
-
-// returns the maximum element in the given 2D vector
-Real maxElementArray(std::vector<std::vector<Real> >& inputMatrix) {
-
-  Real maxElement = INT_MIN;
-  for (size_t i=0; i<inputMatrix.size(); i++) {
-    for (size_t j=0; j<inputMatrix[i].size(); j++) {
-      if (inputMatrix[i][j] > maxElement) maxElement = inputMatrix[i][j];
-    }
-  }
-  return maxElement;
-}
-
-
@@ -43,6 +43,7 @@ namespace standard {
      declareParameter("disExtension", "penalty for disruption extension", "[0,inf)", 0.5);
      declareParameter("alignmentType", "choose either one of the given local-alignment constraints for smith-waterman algorithm as described in [2] or [3] respectively.", "{serra09,chen17}", "serra09");
      declareParameter("distanceType", "choose the type of distance. By default the algorithm outputs a asymmetric distance which is obtained by normalising the maximum score in the alignment score matrix with length of reference song", "{asymmetric,symmetric}", "asymmetric");
+     declareParameter("outputScoreMatrix", "whether to output the alignment score matrix. If false, 'scoreMatrix' is empty and only the last rows of the score matrix are kept in memory to compute the distance", "{true,false}", true);
    }
 
    void configure();
@@ -62,6 +63,11 @@ namespace standard {
      SERRA09, CHEN17
    };
    SimType _simType;
+   bool _outputScoreMatrix;
+   // last rows of the score matrix and gap penalties, and similar elements of the current row
+   std::vector<std::vector<Real> > _rows;
+   std::vector<std::vector<Real> > _penalties;
+   std::vector<Real> _matches;
 };
 
 } // namespace standard
@@ -89,7 +95,6 @@ class CoverSongSimilarity : public Algorithm {
    int _minFrameAcquireSize = 3;
    int _minFrameReleaseSize = 2;
    int _iterIdx = 0;
-   int _iterRow = 2;
    Real _c1;
    Real _c2;
    Real _c3;
@@ -97,6 +102,7 @@ class CoverSongSimilarity : public Algorithm {
    size_t _yFrames;
    std::vector<std::vector<Real> > _perFrameScoreMatrix;
    std::vector<std::vector<Real> > _mainScoreMatrix;
+   Real _maxScore;
 
   public:
    CoverSongSimilarity() : Algorithm() {
@@ -86,33 +86,24 @@ void CrossSimilarityMatrix::compute() {
 
   // check whether to binarize the euclidean cross-similarity matrix using the given threshold kappa
   if (_binarize) {
-    // pairwise euclidean distance
-    std::vector<std::vector<Real> > pdistances = pairwiseDistance(queryFeatureStack, referenceFeatureStack);
-    size_t queryFeatureSize = pdistances.size();
-    size_t referenceFeatureSize = pdistances[0].size();
+    // pairwise euclidean distances, as a contiguous (queryFeature, referenceFeature) matrix
+    std::vector<Real> pdistances;
+    pairwiseDistance(queryFeatureStack, referenceFeatureStack, pdistances);
+    size_t queryFeatureSize = queryFeatureStack.size();
+    size_t referenceFeatureSize = referenceFeatureStack.size();
 
-    std::vector<Real> thresholdQuery(queryFeatureSize);
-    std::vector<Real> thresholdReference(referenceFeatureSize);
+    // thresholds computed along the queryFeature axis (rows) and along the
+    // referenceFeature axis (rows of the transposed matrix)
+    std::vector<Real> thresholdQuery = rowPercentiles(pdistances, queryFeatureSize, referenceFeatureSize, _binarizePercentile*100);
+    std::vector<Real> thresholdReference = rowPercentiles(transposeMatrix(pdistances, queryFeatureSize, referenceFeatureSize),
+                                                          referenceFeatureSize, queryFeatureSize, _binarizePercentile*100);
 
-    csm.assign(queryFeatureSize, std::vector<Real>(referenceFeatureSize, 1));
-    // construct the binary output similarity matrix using the thresholds computed along the queryFeature axis
-    for (size_t k=0; k<queryFeatureSize; k++) {
-      thresholdQuery[k] = percentile(pdistances[k], _binarizePercentile*100);
-      for (size_t l=0; l<referenceFeatureSize; l++) {
-        if (pdistances[k][l] > thresholdQuery[k]) {
-          csm[k][l] = 0;
-        }
-      }
-    }
-    // update the binary output similarity matrix by multiplying with the thresholds computed along the referenceFeature axis
-    for (size_t j=0; j<referenceFeatureSize; j++) {
-      _status = true;
-      for (size_t i=0; i<queryFeatureSize; i++) {
-        if (_status) thresholdReference[j] = percentile(getColsAtVecIndex(pdistances, j), _binarizePercentile * 100);
-        if (pdistances[i][j] > thresholdReference[j]) {
-          csm[i][j] = 0;
-        }
-        _status = false;
+    // construct the binary output similarity matrix, which is 1 where the distance is below both thresholds
+    csm.assign(queryFeatureSize, std::vector<Real>(referenceFeatureSize));
+    for (size_t i=0; i<queryFeatureSize; i++) {
+      const Real* distances = &pdistances[i*referenceFeatureSize];
+      for (size_t j=0; j<referenceFeatureSize; j++) {
+        csm[i][j] = (distances[j] <= thresholdQuery[i] && distances[j] <= thresholdReference[j]) ? 1 : 0;
       }
     }
   }
@@ -123,16 +114,5 @@ void CrossSimilarityMatrix::compute() {
   }
 }
 
-// returns a column corresponding to a specified index in the given 2D input matrix
-std::vector<Real> CrossSimilarityMatrix::getColsAtVecIndex(std::vector<std::vector<Real> >& inputMatrix, int index) const {
-  
-  std::vector<Real> cols;
-  cols.reserve(inputMatrix.size());
-  for (size_t i=0; i<inputMatrix.size(); i++) {
-    cols.push_back(inputMatrix[i][index]);
-  }
-  return cols;
-}
-
 } // namespace standard
 } // namespace essentia
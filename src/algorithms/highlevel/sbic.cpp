@@ -36,6 +36,8 @@ const char* SBic::description = DOC("This algorithm segments audio using the Bay
 "\n"
 "An exception is thrown if the input only contains one frame of features (i.e. second dimension is less than 2).\n"
 "\n"
+"By default, the sums of the features over any range of frames are computed from cumulative sums in double precision, so that each candidate split point costs O(features). Previous versions summed every window in single precision, at a cost of O(frames * features) per split point, which can be reproduced exactly by setting 'cumulativeSums' to false. Both can give a different segmentation for features with large values or offsets (e.g. MFCC coefficient 0), where single precision sums lose accuracy.\n"
+"\n"
 "References:\n"
 "  [1] Audioseg, http://audioseg.gforge.inria.fr\n\n"
 "  [2] G. Gravier, M. Betser, and M. Ben, Audio Segmentation Toolkit,\n"
@@ -44,25 +46,54 @@ const char* SBic::description = DOC("This algorithm segments audio using the Bay
 
 
 
-Array2D<Real> subarray(const Array2D<Real>& matrix, int i0, int i1, int j0, int j1) {
-   int dim1 = i1 - i0 + 1, dim2 = j1 - j0 + 1;
-   if (dim1<1 || dim2 <1) return Array2D<Real>();
-   Array2D<Real> subMatrix = Array2D<Real>(dim1,dim2);
+// This function adds the frames j0 to j1 (both included) of each feature, and their squares, to mp and vp.
+// The sums are accumulated in single precision one frame after the other, as they have always been computed,
+// so that extending the sums of a window with the following frames gives exactly the same values as summing
+// the whole window again.
+void SBic::accumulate(int j0, int j1, vector<Real>& mp, vector<Real>& vp) const {
+  const Array2D<Real>& features = _features.get();
+  int dim1 = features.dim1();
+  Real a, m, v;
+
+  for (int i=0; i<dim1; ++i) {
+    const Real* row = features[i];
+    m = mp[i];
+    v = vp[i];
+    for (int j=j0; j<=j1; ++j) {
+      a = row[j];
+      m += a;
+      v += a * a;
+    }
+    mp[i] = m;
+    vp[i] = v;
+  }
+}
 
-   for (int i=0; i<dim1; ++i) {
-     for (int j=0; j<dim2; ++j) {
-       subMatrix[i][j] = matrix[i+i0][j+j0];
-     }
-   }
+// This function sets mp and vp to the sums of each feature, and of their squares, over the frames j0 to j1 (both
+// included). With cumulativeSums, they are the difference of two rows of the cumulative sums, which only costs
+// O(nFeatures) for any number of frames. Otherwise they are accumulated frame after frame.
+void SBic::sums(int j0, int j1, vector<Real>& mp, vector<Real>& vp) const {
+  if (_cumulativeSums) {
+    const double* sum0 = &_cumSum[j0 * _nFeatures];
+    const double* sum1 = &_cumSum[(j1+1) * _nFeatures];
+    const double* squares0 = &_cumSquares[j0 * _nFeatures];
+    const double* squares1 = &_cumSquares[(j1+1) * _nFeatures];
+    for (int i=0; i<_nFeatures; ++i) {
+      mp[i] = Real(sum1[i] - sum0[i]);
+      vp[i] = Real(squares1[i] - squares0[i]);
+    }
+    return;
+  }
 
-   return subMatrix;
+  fill(mp.begin(), mp.end(), 0.0);
+  fill(vp.begin(), vp.end(), 0.0);
+  if (j1 >= j0) accumulate(j0, j1, mp, vp);
 }
 
 // This function returns the logarithm of the determinant of (the covariance) matrix
+// of dim2 frames, given the sums of each feature (mp) and of their squares (vp) over those frames.
 // Seems kind of magic that all together can be computed in just few lines...
-Real SBic::logDet(const Array2D<Real>& matrix) const {
-
-  // Remember dimensions are swapped: dim1 is the number of features and dim2 is the number of frames!
+Real SBic::logDet(const vector<Real>& mp, const vector<Real>& vp, int dim2) const {
 
   // As we are computing the determinant of the covariance matrix and this matrix is known to be symmetric
   // and positive definite, we can apply  the cholesky decomposition: A = LL*.
@@ -73,12 +104,11 @@ Real SBic::logDet(const Array2D<Real>& matrix) const {
   // Due to computing the log_determinant, then log(prod(a_ii])) = sum(log(a_ii))
   // http://en.wikipedia.org/wiki/Cholesky_decomposition
 
-  int dim1 = matrix.dim1();
-  int dim2 = matrix.dim2();
+  // an empty matrix
+  if (dim2 < 1) return 0.0;
 
-  vector<Real> mp(dim1, 0.0);
-  vector<Real> vp(dim1, 0.0);
-  Real a, logd = 0.0;
+  int dim1 = mp.size();
+  Real logd = 0.0;
   Real z = 1.0 / Real(dim2);
   Real zz = z * z;
 
@@ -88,14 +118,6 @@ Real SBic::logDet(const Array2D<Real>& matrix) const {
   // 1/n(sum(x_i^2) - 2*n*mu_i*mu_i + n*mu_i^2) = 1/n(sum(x_i^2) - n*mu^2) = 1/n*sum(x_i^2)+ mu_i^2
   // where mu_i is the mean of feature i, and n is the number of frames
 
-  for (int i=0; i<dim1; ++i) {
-    for (int j=0; j<dim2; ++j) {
-      a = matrix[i][j];
-      mp[i] += a;
-      vp[i] += a * a;
-    }
-  }
-
   // this code accumulates rounding errors which causes bad behaviour when input features are constant.
   // A possible soultion would be to check for a higher threshold (1e-6), as constant features should
   // give a covariance of zero, because (x_i - mu)^2 = 0
@@ -109,31 +131,36 @@ Real SBic::logDet(const Array2D<Real>& matrix) const {
   }
 
   return logd;
+}
+
+// This function returns the logarithm of the determinant of the covariance matrix of the frames j0 to j1
+// (both included).
+Real SBic::logDet(int j0, int j1) const {
+  // an empty matrix
+  if (j1 < j0) return 0.0;
+
+  int nFeatures = _features.get().dim1();
+  vector<Real> mp(nFeatures), vp(nFeatures);
+  sums(j0, j1, mp, vp);
 
-  // another way of computing the same as above, with possibly less rounding errors, but more expensive.
-  //vector<Real> cov(dim1, 0.0);
-  //for (int i=0; i<dim1; ++i) {
-  //  Real mean = mp[i]/dim2;
-  //  Real cov = 0.0;
-  //  for (int j=0; j<dim2; ++j) {
-  //    a = matrix[i][j];
-  //    cov += (a-mean)*(a-mean);
-  //  }
-  //  cov /= dim2;
-  //  logd += cov > 0 ? log(cov):-30;
-  //}
+  return logDet(mp, vp, j1 - j0 + 1);
 }
 
-// This function finds the next change in matrix
-int SBic::bicChangeSearch(const Array2D<Real>& matrix, int inc, int current) const {
-  int nFeatures = matrix.dim1();
-  int nFrames = matrix.dim2();
+// This function finds the next change in the frames j0 to j1 (both included)
+int SBic::bicChangeSearch(int j0, int j1, int inc) const {
+  int nFeatures = _features.get().dim1();
+  int nFrames = j1 - j0 + 1;
 
   Real d, dmin, penalty;
   Real s, s1, s2;
-  Array2D<Real> half;
   int n1, n2, seg = 0, shift = inc-1;
 
+  // sums of the first part, which are extended with the next inc frames at each mid position,
+  // and of the second part
+  vector<Real> mp1(nFeatures, 0.0), vp1(nFeatures, 0.0);
+  vector<Real> mp2(nFeatures), vp2(nFeatures);
+  int end1 = j0 - 1;
+
   // according to the paper the penalty coefficient should be the following:
   // penalty = 0.5*(3*nFeatures + nFeatures*nFeatures);
 
@@ -141,19 +168,26 @@ int SBic::bicChangeSearch(const Array2D<Real>& matrix, int inc, int current) con
   dmin = numeric_limits<Real>::max();
 
   // log-determinant for the entire window
-  s = logDet(matrix);
+  s = logDet(j0, j1);
 
   // loop on all mid positions
   while (shift < nFrames - inc) {
     // first part
     n1 = shift + 1;
-    half = subarray(matrix, 0, nFeatures-1, 0, shift);
-    s1 = logDet(half);
+    if (_cumulativeSums) {
+      sums(j0, j0 + shift, mp1, vp1);
+    }
+    else {
+      accumulate(end1 + 1, j0 + shift, mp1, vp1);
+      end1 = j0 + shift;
+    }
+    s1 = logDet(mp1, vp1, n1);
 
-    // second part
+    // second part, summed from its first frame without cumulativeSums, as the rounding errors of the sums
+    // depend on their order
     n2 = nFrames - n1;
-    half = subarray(matrix, 0, nFeatures-1, shift+1, nFrames-1);
-    s2 = logDet(half);
+    sums(j0 + shift + 1, j1, mp2, vp2);
+    s2 = logDet(mp2, vp2, n2);
 
     d = 0.5 * (n1*s1 + n2*s2 - nFrames*s + penalty);
 
@@ -166,29 +200,25 @@ int SBic::bicChangeSearch(const Array2D<Real>& matrix, int inc, int current) con
 
   if (dmin > 0) return 0;
 
-  return current + seg;
+  return j0 + seg;
 }
 
 // This function computes the delta bic. It is actually used to determine
 // whether two consecutive segments have the same probability distribution
 // or not. In such case, these segments are joined.
-Real SBic::delta_bic(const Array2D<Real>& matrix, Real segPoint) const{
+Real SBic::delta_bic(int j0, int j1, Real segPoint) const{
 
-  int nFeatures = matrix.dim1();
-  int nFrames = matrix.dim2();
-  Array2D<Real> half;
+  int nFrames = j1 - j0 + 1;
   Real s, s1, s2;
 
   // entire segment
-  s = logDet(matrix);
+  s = logDet(j0, j1);
 
   // first half
-  half = subarray(matrix, 0, nFeatures-1, 0, int(segPoint));
-  s1 = logDet(half);
+  s1 = logDet(j0, j0 + int(segPoint));
 
   // second half
-  half = subarray(matrix, 0, nFeatures-1, int(segPoint + 1), nFrames-1);
-  s2 = logDet(half);
+  s2 = logDet(j0 + int(segPoint + 1), j1);
 
   return 0.5 * ( segPoint*s1 + (nFrames - segPoint)*s2 - nFrames*s + _cpw*_cp*log(Real(nFrames)) );
 }
@@ -201,12 +231,12 @@ void SBic::configure() {
   _inc2 = parameter("inc2").toInt();
   _cpw = parameter("cpw").toReal();
   _minLength = parameter("minLength").toInt();
+  _cumulativeSums = parameter("cumulativeSums").toBool();
 }
 
 void SBic::compute() {
   const Array2D<Real>& features = _features.get();
   vector<Real>& segmentation = _segmentation.get();
-  Array2D<Real> window;
 
   int currSeg = 0, endSeg = 0, currIdx, prevSeg, nextSeg, i;
 
@@ -228,6 +258,20 @@ void SBic::compute() {
 
   _cp = 2 * nFeatures;
 
+  if (_cumulativeSums) {
+    // cumulative sums of the features and of their squares, with a row per frame
+    _nFeatures = nFeatures;
+    _cumSum.assign((nFrames+1) * nFeatures, 0.0);
+    _cumSquares.assign((nFrames+1) * nFeatures, 0.0);
+    for (int j=0; j<nFrames; ++j) {
+      for (int i=0; i<nFeatures; ++i) {
+        double a = features[i][j];
+        _cumSum[(j+1)*nFeatures + i] = _cumSum[j*nFeatures + i] + a;
+        _cumSquares[(j+1)*nFeatures + i] = _cumSquares[j*nFeatures + i] + a * a;
+      }
+    }
+  }
+
   ///////////////////////////////////
   // first pass - coarse segmentation
   endSeg = -1; // so the very first pass becomes _size1 - 1
@@ -235,10 +279,8 @@ void SBic::compute() {
     endSeg += _size1;
     if (endSeg >= nFrames) endSeg = nFrames-1;
 
-    window = subarray(features, 0, nFeatures-1, currSeg, endSeg);
-
     // A change has been found
-    if ((i = bicChangeSearch(window, _inc1, currSeg))) {
+    if ((i = bicChangeSearch(currSeg, endSeg, _inc1))) {
       segmentation.push_back(i);
       currSeg = (i + _inc1);
       endSeg = currSeg - 1;
@@ -259,10 +301,8 @@ void SBic::compute() {
 
     if (endSeg >= nFrames) endSeg = nFrames-1;
 
-    window = subarray(features, 0, nFeatures-1, currSeg, endSeg);
-
     // A change has been found
-    if ((i = bicChangeSearch(window, _inc2, currSeg))) {
+    if ((i = bicChangeSearch(currSeg, endSeg, _inc2))) {
       prevSeg = (currIdx == 0) ? 0 : int(segmentation[currIdx-1]);
       nextSeg = (currIdx + 1 >= int(segmentation.size())) ? nFrames - 1 : int(segmentation[currIdx + 1]);
 
@@ -326,8 +366,7 @@ void SBic::compute() {
   // verify delta_bic is negative between consecutive segments
   for (i=1; i<int(segmentation.size())-1; ++i) {
     endSeg = int(segmentation[i+1]);
-    window = subarray(features, 0, nFeatures-1, currSeg, endSeg);
-    if (delta_bic(window, segmentation[i] - segmentation[i - 1]) > 0) {
+    if (delta_bic(currSeg, endSeg, segmentation[i] - segmentation[i - 1]) > 0) {
       segmentation.erase(segmentation.begin() + i);
       --i;
       continue;
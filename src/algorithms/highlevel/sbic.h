@@ -38,8 +38,14 @@ class SBic : public Algorithm {
   int _inc2;
   Real _cpw;
   int _minLength;
+  bool _cumulativeSums;
   Real _cp; // complexity penalty
 
+  // cumulative sums of the features and of their squares, with a row per frame (only with cumulativeSums)
+  int _nFeatures;
+  std::vector<double> _cumSum;
+  std::vector<double> _cumSquares;
+
  public:
   SBic() {
     declareInput(_features, "features", "extracted features matrix (rows represent features, and columns represent frames of audio)");
@@ -55,6 +61,7 @@ class SBic : public Algorithm {
     declareParameter("inc2", "second pass increment [frames]", "[1,inf)", 20);
     declareParameter("cpw", "complexity penalty weight", "[0,inf)", 1.5);
     declareParameter("minLength", "minimum length of a segment [frames]", "[1,inf)", 10);
+    declareParameter("cumulativeSums", "compute the sums of the features over each window from cumulative sums in double precision, instead of summing every window in single precision as previous versions (see the description)", "{true,false}", true);
   }
 
   void compute();
@@ -65,9 +72,12 @@ class SBic : public Algorithm {
   static const char* description;
 
  private:
-  Real logDet(const TNT::Array2D<Real>& matrix) const;
-  int bicChangeSearch(const TNT::Array2D<Real>& matrix, int inc, int current) const;
-  Real delta_bic(const TNT::Array2D<Real>& matrix, Real segPoint) const;
+  void accumulate(int j0, int j1, std::vector<Real>& mp, std::vector<Real>& vp) const;
+  void sums(int j0, int j1, std::vector<Real>& mp, std::vector<Real>& vp) const;
+  Real logDet(const std::vector<Real>& mp, const std::vector<Real>& vp, int dim2) const;
+  Real logDet(int j0, int j1) const;
+  int bicChangeSearch(int j0, int j1, int inc) const;
+  Real delta_bic(int j0, int j1, Real segPoint) const;
 
 };
 
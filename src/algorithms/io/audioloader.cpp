@@ -20,6 +20,7 @@
 #include "audioloader.h"
 #include "algorithmfactory.h"
 #include <iomanip>  //  setw()
+#include <limits>
 
 using namespace std;
 
@@ -46,6 +47,13 @@ void AudioLoader::configure() {
     //av_log_set_level(AV_LOG_VERBOSE);
     _computeMD5 = parameter("computeMD5").toBool();
     _selectedStream = parameter("audioStream").toInt();
+    _startTime = parameter("startTime").toReal();
+    _endTime = parameter("endTime").toReal();
+
+    if (_endTime >= 0 && _startTime > _endTime) {
+        throw EssentiaException("AudioLoader: startTime should be smaller than endTime");
+    }
+
     reset();
 }
 
@@ -168,6 +176,37 @@ void AudioLoader::closeAudioFile() {
 }
 
 
+void AudioLoader::seekToStart() {
+    int sampleRate = _audioCtx->sample_rate;
+    _position = 0;
+    _seeking = false;
+    _startSample = (int64_t)(_startTime * sampleRate + 0.5);
+    _endSample = _endTime < 0 ? numeric_limits<int64_t>::max() : (int64_t)(_endTime * sampleRate + 0.5);
+
+    // The MD5 checksum is computed over the whole payload, so we cannot skip
+    // any part of the file in that case.
+    if (_startSample == 0 || _computeMD5) return;
+
+    // Seek to a keyframe a bit before startTime. The samples decoded before
+    // startTime are discarded in copyFFmpegOutput(), which makes the slice
+    // sample accurate as long as the container timestamps are.
+    AVStream* stream = _demuxCtx->streams[_streamIdx];
+    Real seekTime = max(_startTime - SEEK_PREROLL, (Real)0.);
+    int64_t timestamp = av_rescale((int64_t)(seekTime * 1000), stream->time_base.den,
+                                   (int64_t)stream->time_base.num * 1000);
+    if (stream->start_time != AV_NOPTS_VALUE) timestamp += stream->start_time;
+
+    if (av_seek_frame(_demuxCtx, _streamIdx, timestamp, AVSEEK_FLAG_BACKWARD) < 0) {
+        // not seekable, decode from the beginning of the file
+        E_DEBUG(EAlgorithm, "AudioLoader: could not seek, decoding from the beginning of the file");
+        return;
+    }
+
+    avcodec_flush_buffers(_audioCtx);
+    _seeking = true;
+}
+
+
 void AudioLoader::pushChannelsSampleRateInfo(int nChannels, Real sampleRate) {
     if (nChannels > 2) {
         throw EssentiaException("AudioLoader: could not load audio. Audio file has more than 2 channels.");
@@ -198,11 +237,33 @@ string uint8_t_to_hex(uint8_t* input, int size) {
 }
 
 
+AlgorithmStatus AudioLoader::finish() {
+    shouldStop(true);
+    flushPacket();
+    closeAudioFile();
+    if (_computeMD5) {
+        av_md5_final(_md5Encoded, _checksum);
+        _md5.push(uint8_t_to_hex(_checksum, 16));
+    }
+    else {
+        string md5 = "";
+        _md5.push(md5);
+    }
+    return FINISHED;
+}
+
+
 AlgorithmStatus AudioLoader::process() {
     if (!parameter("filename").isConfigured()) {
         throw EssentiaException("AudioLoader: Trying to call process() on an AudioLoader algo which hasn't been correctly configured.");
     }
 
+    // stop as soon as we reach endTime, unless we need to read the whole
+    // payload for the MD5 checksum
+    if (_position >= _endSample && !_computeMD5) {
+        return finish();
+    }
+
     // read frames until we get a good one
     do {
         int result = av_read_frame(_demuxCtx, &_packet);
@@ -218,28 +279,39 @@ AlgorithmStatus AudioLoader::process() {
             }
             // TODO: should try reading again on EAGAIN error?
             //       https://github.com/FFmpeg/FFmpeg/blob/master/ffmpeg.c
-            shouldStop(true);
-            flushPacket();
-            closeAudioFile();
-            if (_computeMD5) {
-                av_md5_final(_md5Encoded, _checksum);
-                _md5.push(uint8_t_to_hex(_checksum, 16));
-            }
-            else {
-                string md5 = "";
-                _md5.push(md5);
-            }
-            return FINISHED;
+            return finish();
         }
     } while (_packet.stream_index != _streamIdx);
 
+    // after a seek, the position in the file is given by the timestamp of the
+    // first packet we read
+    if (_seeking) {
+        _seeking = false;
+        int64_t pts = _packet.pts != AV_NOPTS_VALUE ? _packet.pts : _packet.dts;
+
+        if (pts == AV_NOPTS_VALUE) {
+            // we do not know where we are, decode from the beginning instead
+            E_DEBUG(EAlgorithm, "AudioLoader: no timestamp after seeking, decoding from the beginning of the file");
+            av_free_packet(&_packet);
+            closeAudioFile();
+            openAudioFile(parameter("filename").toString());
+            _position = 0;
+            return OK;
+        }
+
+        AVStream* stream = _demuxCtx->streams[_streamIdx];
+        if (stream->start_time != AV_NOPTS_VALUE) pts -= stream->start_time;
+        _position = av_rescale(pts, (int64_t)stream->time_base.num * _audioCtx->sample_rate,
+                               stream->time_base.den);
+    }
+
     // compute md5 first
     if (_computeMD5) {
         av_md5_update(_md5Encoded, _packet.data, _packet.size);
     }
 
     // decode frames in packet
-    while(_packet.size > 0) {
+    while(_packet.size > 0 && _position < _endSample) {
         if (!decodePacket()) break;
         copyFFmpegOutput();
     }
@@ -429,6 +501,15 @@ void AudioLoader::copyFFmpegOutput() {
     int nsamples = _dataSize / (av_get_bytes_per_sample(AV_SAMPLE_FMT_FLT)  * _nChannels);
     if (nsamples == 0) return;
 
+    // only output the decoded samples within [startTime, endTime)
+    int first = (int)min(max(_startSample - _position, (int64_t)0), (int64_t)nsamples);
+    int last = (int)min(_endSample - _position, (int64_t)nsamples);
+    _position += nsamples;
+    if (last <= first) return;
+
+    float* buffer = _buffer + first * _nChannels;
+    nsamples = last - first;
+
     // acquire necessary data
     bool ok = _audio.acquire(nsamples);
     if (!ok) {
@@ -439,15 +520,15 @@ void AudioLoader::copyFFmpegOutput() {
 
     if (_nChannels == 1) {
         for (int i=0; i<nsamples; i++) {
-          audio[i].left() = _buffer[i];
+          audio[i].left() = buffer[i];
           //audio[i].left() = scale(_buffer[i]);
         }
     }
     else { // _nChannels == 2
       // The output format is always AV_SAMPLE_FMT_FLT, which is interleaved
       for (int i=0; i<nsamples; i++) {
-        audio[i].left() = _buffer[2*i];
-        audio[i].right() = _buffer[2*i+1];
+        audio[i].left() = buffer[2*i];
+        audio[i].right() = buffer[2*i+1];
         //audio[i].left() = scale(_buffer[2*i]);
         //audio[i].right() = scale(_buffer[2*i+1]);
       }
@@ -476,6 +557,8 @@ void AudioLoader::reset() {
 
     pushChannelsSampleRateInfo(_audioCtx->channels, _audioCtx->sample_rate);
     pushCodecInfo(_audioCodec->name, _audioCtx->bit_rate);
+
+    seekToStart();
 }
 
 } // namespace streaming
@@ -489,6 +572,8 @@ const char* AudioLoader::name = "AudioLoader";
 const char* AudioLoader::category = "Input/output";
 const char* AudioLoader::description = DOC("This algorithm loads the single audio stream contained in a given audio or video file. Supported formats are all those supported by the FFmpeg library including wav, aiff, flac, ogg and mp3.\n"
 "\n"
+"A slice of the file can be loaded with the startTime and endTime parameters. Instead of decoding the whole file, the demuxer seeks close to startTime, and the samples decoded before startTime are discarded. Decoding stops once endTime is reached (by default, the file is loaded until its end), so the cost of loading a slice depends on its length rather than on its position in the file. The slice is sample accurate for formats with exact timestamps (e.g., wav, aiff, flac). For lossy formats, its boundaries are only as accurate as the timestamps and seeking of the container: they can be off by a whole frame or more (e.g., for VBR MP3 files without a seek table, where the seek position is estimated). If the file is not seekable, it is decoded from the beginning. Seeking is disabled when computing the MD5 checksum, which is always computed over the whole audio payload.\n"
+"\n"
 "This algorithm will throw an exception if it was not properly configured which is normally due to not specifying a valid filename. Invalid names comprise those with extensions different than the supported  formats and non existent files. If using this algorithm on Windows, you must ensure that the filename is encoded as UTF-8\n\n"
 "Note: ogg files are decoded in reverse phase, due to be using ffmpeg library.\n"
 "\n"
@@ -521,7 +606,9 @@ void AudioLoader::createInnerNetwork() {
 void AudioLoader::configure() {
     _loader->configure(INHERIT("filename"),
                        INHERIT("computeMD5"),
-                       INHERIT("audioStream"));
+                       INHERIT("audioStream"),
+                       INHERIT("startTime"),
+                       INHERIT("endTime"));
 }
 
 void AudioLoader::compute() {
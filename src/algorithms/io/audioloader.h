@@ -48,6 +48,10 @@ class AudioLoader : public Algorithm {
   // each time we decode a frame we need to have at least a full buffer of free space.
   const static int FFMPEG_BUFFER_SIZE = MAX_AUDIO_FRAME_SIZE * 2;
 
+  // seconds of audio decoded and discarded before startTime when seeking, so
+  // that the decoder has recovered from the seek once we reach startTime
+  const static int SEEK_PREROLL = 1;
+
   float* _buffer;
   int _dataSize;
 
@@ -67,9 +71,18 @@ class AudioLoader : public Algorithm {
   int _selectedStream;
   bool _configured;
 
+  Real _startTime;
+  Real _endTime;
+  int64_t _startSample;
+  int64_t _endSample;
+  int64_t _position; // index of the next decoded sample in the file
+  bool _seeking;     // _position is unknown until we read the first packet after a seek
+
 
   void openAudioFile(const std::string& filename);
   void closeAudioFile();
+  void seekToStart();
+  AlgorithmStatus finish();
 
   void pushChannelsSampleRateInfo(int nChannels, Real sampleRate);
   void pushCodecInfo(std::string codec, int bit_rate);
@@ -83,7 +96,7 @@ class AudioLoader : public Algorithm {
  public:
   AudioLoader() : Algorithm(), _buffer(0),  _demuxCtx(0),
 	          _audioCtx(0), _audioCodec(0), _decodedFrame(0),
-            _convertCtxAv(0), _configured(false) {
+            _convertCtxAv(0), _configured(false), _position(0), _seeking(false) {
 
     declareOutput(_audio, 1, "audio", "the input audio signal");
     declareOutput(_sampleRate, 0, "sampleRate", "the sampling rate of the audio signal [Hz]");
@@ -115,6 +128,8 @@ class AudioLoader : public Algorithm {
     declareParameter("filename", "the name of the file from which to read", "", Parameter::STRING);
     declareParameter("computeMD5", "compute the MD5 checksum", "{true,false}", false);
     declareParameter("audioStream", "audio stream index to be loaded. Other streams are not taken into account (e.g. if stream 0 is video and 1 is audio use index 0 to access it.)", "[0,inf)", 0);
+    declareParameter("startTime", "the start time of the slice to be loaded [s]", "[0,inf)", 0.0);
+    declareParameter("endTime", "the end time of the slice to be loaded [s]. Negative values (default) load until the end of the file", "[-1,inf)", -1.0);
   }
 
   void configure();
@@ -176,6 +191,8 @@ class AudioLoader : public Algorithm {
     declareParameter("filename", "the name of the file from which to read", "", Parameter::STRING);
     declareParameter("computeMD5", "compute the MD5 checksum", "{true,false}", false);
     declareParameter("audioStream", "audio stream index to be loaded. Other streams are no taken into account (e.g. if stream 0 is video and 1 is audio use index 0 to access it.)", "[0,inf)", 0);
+    declareParameter("startTime", "the start time of the slice to be loaded [s]", "[0,inf)", 0.0);
+    declareParameter("endTime", "the end time of the slice to be loaded [s]. Negative values (default) load until the end of the file", "[-1,inf)", -1.0);
   }
 
   void configure();
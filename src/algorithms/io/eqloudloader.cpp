@@ -57,11 +57,19 @@ void EqloudLoader::configure() {
 
   _monoLoader->configure(INHERIT("filename"),
                          INHERIT("sampleRate"),
-                         INHERIT("downmix"));
+                         INHERIT("downmix"),
+                         INHERIT("startTime"),
+                         INHERIT("endTime"));
+
+  // MonoLoader only decodes the requested slice, but its boundaries depend on
+  // the accuracy of the seek and on the resampling, so we still trim the
+  // output to get the exact number of samples
+  Real startTime = parameter("startTime").toReal();
+  Real endTime = parameter("endTime").toReal();
 
   _trimmer->configure(INHERIT("sampleRate"),
-                      INHERIT("startTime"),
-                      INHERIT("endTime"));
+                      "startTime", 0.0,
+                      "endTime", endTime - startTime);
 
   // apply a 6dB preamp, as done by all audio players.
   Real scalingFactor = db2amp(parameter("replayGain").toReal() + 6.0);
@@ -81,7 +89,7 @@ const char* EqloudLoader::name = "EqloudLoader";
 const char* EqloudLoader::category = "Input/output";
 const char* EqloudLoader::description = DOC("This algorithm loads the raw audio data from an audio file, downmixes it to mono and normalizes using replayGain and equal-loudness filter. Audio is resampled in case the given sampling rate does not match the sampling rate of the input signal and normalized by the given replayGain gain. In addition, audio data is filtered through an equal-loudness filter.\n"
 "\n"
-"This algorithm uses MonoLoader and thus inherits all of its input requirements and exceptions.\n"
+"This algorithm uses MonoLoader and thus inherits all of its input requirements and exceptions. In particular, only the slice of the file between startTime and endTime is decoded.\n"
 "\n"
 "References:\n"
 "  [1] Replay Gain - A Proposed Standard,\n"
@@ -60,7 +60,9 @@ void MonoLoader::configure() {
 
   _audioLoader->configure("filename", filename,
                           "computeMD5", false,
-                          INHERIT("audioStream"));
+                          INHERIT("audioStream"),
+                          INHERIT("startTime"),
+                          INHERIT("endTime"));
 
   int inputSampleRate = (int)lastTokenProduced<Real>(_audioLoader->output("sampleRate"));
 
@@ -89,6 +91,8 @@ const char* MonoLoader::name = "MonoLoader";
 const char* MonoLoader::category = "Input/output";
 const char* MonoLoader::description = DOC("This algorithm loads the raw audio data from an audio file and downmixes it to mono. Audio is resampled using Resample in case the given sampling rate does not match the sampling rate of the input signal.\n"
 "\n"
+"A slice of the file can be loaded with the startTime and endTime parameters, which are passed to AudioLoader so that only that part of the file is decoded.\n"
+"\n"
 "This algorithm uses AudioLoader and thus inherits all of its input requirements and exceptions.");
 
 
@@ -109,7 +113,9 @@ void MonoLoader::configure() {
                      INHERIT("sampleRate"),
                      INHERIT("downmix"),
                      INHERIT("audioStream"),
-                     INHERIT("resampleQuality"));
+                     INHERIT("resampleQuality"),
+                     INHERIT("startTime"),
+                     INHERIT("endTime"));
 }
 
 void MonoLoader::compute() {
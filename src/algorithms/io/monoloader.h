@@ -57,6 +57,8 @@ class MonoLoader : public AlgorithmComposite {
     declareParameter("downmix", "the mixing type for stereo files", "{left,right,mix}", "mix");
     declareParameter("audioStream", "audio stream index to be loaded. Other streams are no taken into account (e.g. if stream 0 is video and 1 is audio use index 0 to access it.)", "[0,inf)", 0);
     declareParameter("resampleQuality", "the resampling quality, 0 for best quality, 4 for fast linear approximation", "[0,4]", 1);
+    declareParameter("startTime", "the start time of the slice to be loaded [s]", "[0,inf)", 0.0);
+    declareParameter("endTime", "the end time of the slice to be loaded [s]. Negative values (default) load until the end of the file", "[-1,inf)", -1.0);
   }
 
   void declareProcessOrder() {
@@ -110,6 +112,8 @@ class MonoLoader : public Algorithm {
     declareParameter("downmix", "the mixing type for stereo files", "{left,right,mix}", "mix");
     declareParameter("audioStream", "audio stream index to be loaded. Other streams are no taken into account (e.g. if stream 0 is video and 1 is audio use index 0 to access it.)", "[0,inf)", 0);
     declareParameter("resampleQuality", "the resampling quality, 0 for best quality, 4 for fast linear approximation", "[0,4]", 1);
+    declareParameter("startTime", "the start time of the slice to be loaded [s]", "[0,inf)", 0.0);
+    declareParameter("endTime", "the end time of the slice to be loaded [s]. Negative values (default) load until the end of the file", "[-1,inf)", -1.0);
   }
 
   void configure();
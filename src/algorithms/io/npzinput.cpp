@@ -0,0 +1,201 @@
+/*
+ * Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#include "npzinput.h"
+#include "npz.h"
+#include <cstring>
+
+using namespace std;
+using namespace essentia;
+using namespace standard;
+
+const char* NpzInput::name = "NpzInput";
+const char* NpzInput::category = "Input/output";
+const char* NpzInput::description = DOC("This algorithm reads a Pool from a .npz file written by NpzOutput. See the documentation of NpzOutput for more information on the format of the file.\n"
+"\n"
+"Only the descriptors in `descriptorNames` are read from the file, or all of them if it is empty.\n"
+"\n"
+"Files written with numpy.savez can be read as well. As they do not contain the type of each descriptor, it is deduced from the arrays: floating point or integer arrays with 0 to 5 dimensions are read as a single Real, Reals, vectors of Reals, matrices, a single tensor and tensors, and byte string arrays with 0 to 2 dimensions as a single string, strings and vectors of strings.");
+
+
+void NpzInput::configure() {
+  if (parameter("filename").isConfigured()) {
+    _filename = parameter("filename").toString();
+  }
+  _descriptorNames = parameter("descriptorNames").toVectorString();
+}
+
+
+// deduces the Pool type of a descriptor from its array, for files that do
+// not have the __types__ array
+string deduceType(const NpyArray& array) {
+  const char* realTypes[] = { "SingleReal", "Real", "VectorReal", "Array2DReal",
+                              "SingleTensorReal", "TensorReal" };
+  const char* stringTypes[] = { "SingleString", "String", "VectorString" };
+  size_t rank = array.shape.size();
+
+  if (array.descr.compare(0, 2, "|S") == 0) {
+    if (rank < ARRAY_SIZE(stringTypes)) return stringTypes[rank];
+  }
+  else if (rank < ARRAY_SIZE(realTypes)) {
+    return realTypes[rank];
+  }
+  throw EssentiaException("NpzInput: cannot read an array of type '", array.descr,
+                          "' with this number of dimensions: ", (int)rank);
+}
+
+
+void NpzInput::compute() {
+  if (!parameter("filename").isConfigured()) {
+    throw EssentiaException("NpzInput: 'filename' parameter has not been configured");
+  }
+
+  Pool& p = _pool.get();
+  NpzReader reader(_filename);
+
+  map<string, string> types;
+  vector<string> names;
+  if (reader.contains("__types__")) {
+    vector<string> t = reader.read("__types__").toStrings();
+    for (size_t i=0; i+1<t.size(); i+=2) {
+      types[t[i]] = t[i+1];
+      names.push_back(t[i]);
+    }
+  }
+  else {
+    vector<string> all = reader.names();
+    for (size_t i=0; i<all.size(); i++) {
+      if (all[i].compare(0, 11, "__shapes__/") != 0) names.push_back(all[i]);
+    }
+  }
+
+  if (!_descriptorNames.empty()) {
+    for (size_t i=0; i<_descriptorNames.size(); i++) {
+      if (!reader.contains(_descriptorNames[i])) {
+        throw EssentiaException("NpzInput: there is no descriptor named '", _descriptorNames[i], "' in ", _filename);
+      }
+    }
+    names = _descriptorNames;
+  }
+
+  for (size_t d=0; d<names.size(); d++) {
+    const string& name = names[d];
+    NpyArray array = reader.read(name);
+    string type = types.count(name) ? types[name] : deduceType(array);
+
+    // the shape of each item, either stored separately if the items have
+    // different shapes or given by the dimensions after the first one
+    vector<vector<int64_t> > shapes;
+    if (reader.contains("__shapes__/" + name)) {
+      NpyArray s = reader.read("__shapes__/" + name);
+      vector<int64_t> dims = s.toInts();
+      int64_t rank = s.shape.size() == 2 ? s.shape[1] : 1;
+      for (size_t i=0; i<dims.size(); i+=rank) {
+        shapes.push_back(vector<int64_t>(dims.begin() + i, dims.begin() + i + rank));
+      }
+    }
+    else if (!array.shape.empty()) {
+      shapes.assign(array.shape[0], vector<int64_t>(array.shape.begin() + 1, array.shape.end()));
+    }
+
+    if (type == "SingleString" || type == "String" ||
+        type == "SingleVectorString" || type == "VectorString") {
+      vector<string> values = array.toStrings();
+
+      if (type == "SingleString") {
+        if (values.size() != 1) throw EssentiaException("NpzInput: '", name, "' should contain a single string");
+        p.set(name, values[0]);
+      }
+      else if (type == "String") p.merge(name, values);
+      else if (type == "SingleVectorString") p.set(name, values);
+      else {
+        vector<vector<string> > rows(shapes.size());
+        size_t pos = 0;
+        for (size_t i=0; i<shapes.size(); i++) {
+          rows[i].assign(values.begin() + pos, values.begin() + pos + shapes[i][0]);
+          pos += shapes[i][0];
+        }
+        p.merge(name, rows);
+      }
+      continue;
+    }
+
+    vector<Real> values = array.toReals();
+
+    if (type == "SingleReal") {
+      if (values.size() != 1) throw EssentiaException("NpzInput: '", name, "' should contain a single Real");
+      p.set(name, values[0]);
+    }
+    else if (type == "Real") p.merge(name, values);
+    else if (type == "SingleVectorReal") p.set(name, values);
+    else if (type == "VectorReal") {
+      vector<vector<Real> > rows(shapes.size());
+      size_t pos = 0;
+      for (size_t i=0; i<shapes.size(); i++) {
+        rows[i].assign(values.begin() + pos, values.begin() + pos + shapes[i][0]);
+        pos += shapes[i][0];
+      }
+      p.merge(name, rows);
+    }
+    else if (type == "Array2DReal") {
+      vector<TNT::Array2D<Real> > matrices(shapes.size());
+      size_t pos = 0;
+      for (size_t i=0; i<shapes.size(); i++) {
+        matrices[i] = TNT::Array2D<Real>(shapes[i][0], shapes[i][1]);
+        for (int r=0; r<shapes[i][0]; r++) {
+          memcpy(matrices[i][r], &values[pos], shapes[i][1] * sizeof(Real));
+          pos += shapes[i][1];
+        }
+      }
+      p.merge(name, matrices);
+    }
+    else if (type == "StereoSample") {
+      vector<StereoSample> samples(values.size() / 2);
+      for (size_t i=0; i<samples.size(); i++) {
+        samples[i].left() = values[2*i];
+        samples[i].right() = values[2*i+1];
+      }
+      p.merge(name, samples);
+    }
+    else if (type == "SingleTensorReal") {
+      if (array.shape.size() != TENSORRANK) {
+        throw EssentiaException("NpzInput: '", name, "' should be a tensor with 4 dimensions");
+      }
+      Tensor<Real> tensor(array.shape[0], array.shape[1], array.shape[2], array.shape[3]);
+      if (tensor.size()) memcpy(tensor.data(), &values[0], tensor.size() * sizeof(Real));
+      p.set(name, tensor);
+    }
+    else if (type == "TensorReal") {
+      vector<Tensor<Real> > tensors(shapes.size());
+      size_t pos = 0;
+      for (size_t i=0; i<shapes.size(); i++) {
+        if (shapes[i].size() != TENSORRANK) {
+          throw EssentiaException("NpzInput: '", name, "' should contain tensors with 4 dimensions");
+        }
+        tensors[i] = Tensor<Real>(shapes[i][0], shapes[i][1], shapes[i][2], shapes[i][3]);
+        if (tensors[i].size()) memcpy(tensors[i].data(), &values[pos], tensors[i].size() * sizeof(Real));
+        pos += tensors[i].size();
+      }
+      p.merge(name, tensors);
+    }
+    else {
+      throw EssentiaException("NpzInput: unknown type '", type, "' for descriptor ", name);
+    }
+  }
+}
@@ -0,0 +1,243 @@
+/*
+ * Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#include "npzoutput.h"
+#include "npz.h"
+#include <cstring>
+
+using namespace std;
+using namespace essentia;
+using namespace standard;
+
+const char* NpzOutput::name = "NpzOutput";
+const char* NpzOutput::category = "Input/output";
+const char* NpzOutput::description = DOC("This algorithm writes a Pool to a binary .npz file, which is much more compact and faster to write and read than YAML or JSON for large pools (e.g., frame-level descriptors).\n"
+  "\n"
+  "The file is a zip archive as written by numpy.savez, with one .npy array per descriptor, which can be read back with NpzInput or loaded directly with numpy.load. "
+  "The arrays are stored as is, so that they can be memory-mapped when loading them from Python, or compressed with deflate if `compress` is true (this requires Essentia to be built with zlib).\n"
+  "\n"
+  "Each descriptor is stored as a single contiguous array: Reals as float32 and strings as UTF-8 byte strings. "
+  "The values of a descriptor holding several items (e.g., a vector of frames) are stacked along the first dimension when they all have the same shape. "
+  "Otherwise, they are concatenated in a flat array and the shape of each item is stored in an integer array named `__shapes__/<descriptor name>`. "
+  "The Pool type of each descriptor is stored in the `__types__` array as (name, type) pairs, so that NpzInput can restore the Pool exactly.\n"
+  "\n"
+  "Files larger than 4GB are not supported.");
+
+
+void NpzOutput::configure() {
+  _filename = "";
+  if (parameter("filename").isConfigured()) {
+    _filename = parameter("filename").toString();
+    if (_filename == "") throw EssentiaException("NpzOutput: please provide a valid filename");
+  }
+  _compress = parameter("compress").toBool();
+}
+
+
+// Adds a descriptor made of several items (e.g., the frames of a vector of
+// Reals), given as a flat array with the concatenation of their values and
+// the shape of each item.
+static void addItems(NpzWriter& writer, const string& name, NpyArray& values,
+                     const vector<vector<int64_t> >& shapes) {
+  bool regular = true;
+  for (size_t i=1; i<shapes.size() && regular; i++) {
+    regular = shapes[i] == shapes[0];
+  }
+
+  if (regular) {
+    vector<int64_t> shape(1, shapes.size());
+    if (!shapes.empty()) shape.insert(shape.end(), shapes[0].begin(), shapes[0].end());
+    values.shape = shape;
+    writer.add(name, values);
+    return;
+  }
+
+  writer.add(name, values);
+
+  vector<int64_t> dims;
+  for (size_t i=0; i<shapes.size(); i++) {
+    dims.insert(dims.end(), shapes[i].begin(), shapes[i].end());
+  }
+  vector<int64_t> shape(2);
+  shape[0] = shapes.size();
+  shape[1] = shapes[0].size();
+  writer.add("__shapes__/" + name, NpyArray::fromInts(shape, dims));
+}
+
+
+static vector<int64_t> shape1D(int64_t n) {
+  return vector<int64_t>(1, n);
+}
+
+
+void NpzOutput::compute() {
+  if (!parameter("filename").isConfigured()) {
+    throw EssentiaException("NpzOutput: 'filename' parameter has not been configured");
+  }
+
+  const Pool& p = _pool.get();
+
+  NpzWriter writer(_filename, _compress);
+  vector<string> types;
+
+  #define ADD_TYPE(tname) types.push_back(it->first); types.push_back(#tname)
+
+  for (map<string, Real>::const_iterator it = p.getSingleRealPool().begin();
+       it != p.getSingleRealPool().end(); ++it) {
+    writer.add(it->first, NpyArray::fromReals(vector<int64_t>(), &it->second));
+    ADD_TYPE(SingleReal);
+  }
+
+  for (map<string, vector<Real> >::const_iterator it = p.getRealPool().begin();
+       it != p.getRealPool().end(); ++it) {
+    writer.add(it->first, NpyArray::fromReals(shape1D(it->second.size()), it->second.empty() ? NULL : &it->second[0]));
+    ADD_TYPE(Real);
+  }
+
+  for (map<string, vector<Real> >::const_iterator it = p.getSingleVectorRealPool().begin();
+       it != p.getSingleVectorRealPool().end(); ++it) {
+    writer.add(it->first, NpyArray::fromReals(shape1D(it->second.size()), it->second.empty() ? NULL : &it->second[0]));
+    ADD_TYPE(SingleVectorReal);
+  }
+
+  for (map<string, vector<vector<Real> > >::const_iterator it = p.getVectorRealPool().begin();
+       it != p.getVectorRealPool().end(); ++it) {
+    const vector<vector<Real> >& rows = it->second;
+    vector<vector<int64_t> > shapes(rows.size());
+    int64_t total = 0;
+    for (size_t i=0; i<rows.size(); i++) {
+      shapes[i] = shape1D(rows[i].size());
+      total += rows[i].size();
+    }
+    NpyArray values("<f4", shape1D(total));
+    char* data = values.data.empty() ? NULL : &values.data[0];
+    for (size_t i=0; i<rows.size(); i++) {
+      if (rows[i].empty()) continue;
+      memcpy(data, &rows[i][0], rows[i].size() * sizeof(Real));
+      data += rows[i].size() * sizeof(Real);
+    }
+    addItems(writer, it->first, values, shapes);
+    ADD_TYPE(VectorReal);
+  }
+
+  for (map<string, string>::const_iterator it = p.getSingleStringPool().begin();
+       it != p.getSingleStringPool().end(); ++it) {
+    writer.add(it->first, NpyArray::fromStrings(vector<int64_t>(), vector<string>(1, it->second)));
+    ADD_TYPE(SingleString);
+  }
+
+  for (map<string, vector<string> >::const_iterator it = p.getStringPool().begin();
+       it != p.getStringPool().end(); ++it) {
+    writer.add(it->first, NpyArray::fromStrings(shape1D(it->second.size()), it->second));
+    ADD_TYPE(String);
+  }
+
+  for (map<string, vector<string> >::const_iterator it = p.getSingleVectorStringPool().begin();
+       it != p.getSingleVectorStringPool().end(); ++it) {
+    writer.add(it->first, NpyArray::fromStrings(shape1D(it->second.size()), it->second));
+    ADD_TYPE(SingleVectorString);
+  }
+
+  for (map<string, vector<vector<string> > >::const_iterator it = p.getVectorStringPool().begin();
+       it != p.getVectorStringPool().end(); ++it) {
+    const vector<vector<string> >& rows = it->second;
+    vector<vector<int64_t> > shapes(rows.size());
+    vector<string> strings;
+    for (size_t i=0; i<rows.size(); i++) {
+      shapes[i] = shape1D(rows[i].size());
+      strings.insert(strings.end(), rows[i].begin(), rows[i].end());
+    }
+    NpyArray values = NpyArray::fromStrings(shape1D(strings.size()), strings);
+    addItems(writer, it->first, values, shapes);
+    ADD_TYPE(VectorString);
+  }
+
+  for (map<string, vector<TNT::Array2D<Real> > >::const_iterator it = p.getArray2DRealPool().begin();
+       it != p.getArray2DRealPool().end(); ++it) {
+    const vector<TNT::Array2D<Real> >& matrices = it->second;
+    vector<vector<int64_t> > shapes(matrices.size(), vector<int64_t>(2));
+    int64_t total = 0;
+    for (size_t i=0; i<matrices.size(); i++) {
+      shapes[i][0] = matrices[i].dim1();
+      shapes[i][1] = matrices[i].dim2();
+      total += shapes[i][0] * shapes[i][1];
+    }
+    NpyArray values("<f4", shape1D(total));
+    char* data = values.data.empty() ? NULL : &values.data[0];
+    for (size_t i=0; i<matrices.size(); i++) {
+      if (matrices[i].dim2() == 0) continue;
+      // the rows of a TNT::Array2D are not necessarily contiguous
+      for (int r=0; r<matrices[i].dim1(); r++) {
+        memcpy(data, matrices[i][r], matrices[i].dim2() * sizeof(Real));
+        data += matrices[i].dim2() * sizeof(Real);
+      }
+    }
+    addItems(writer, it->first, values, shapes);
+    ADD_TYPE(Array2DReal);
+  }
+
+  for (map<string, vector<StereoSample> >::const_iterator it = p.getStereoSamplePool().begin();
+       it != p.getStereoSamplePool().end(); ++it) {
+    const vector<StereoSample>& samples = it->second;
+    vector<Real> values(2 * samples.size());
+    for (size_t i=0; i<samples.size(); i++) {
+      values[2*i] = samples[i].left();
+      values[2*i+1] = samples[i].right();
+    }
+    vector<int64_t> shape(2, 2);
+    shape[0] = samples.size();
+    writer.add(it->first, NpyArray::fromReals(shape, values.empty() ? NULL : &values[0]));
+    ADD_TYPE(StereoSample);
+  }
+
+  for (map<string, Tensor<Real> >::const_iterator it = p.getSingleTensorRealPool().begin();
+       it != p.getSingleTensorRealPool().end(); ++it) {
+    const Tensor<Real>& tensor = it->second;
+    vector<int64_t> shape(tensor.dimensions().begin(), tensor.dimensions().end());
+    writer.add(it->first, NpyArray::fromReals(shape, tensor.data()));
+    ADD_TYPE(SingleTensorReal);
+  }
+
+  for (map<string, vector<Tensor<Real> > >::const_iterator it = p.getTensorRealPool().begin();
+       it != p.getTensorRealPool().end(); ++it) {
+    const vector<Tensor<Real> >& tensors = it->second;
+    vector<vector<int64_t> > shapes(tensors.size());
+    int64_t total = 0;
+    for (size_t i=0; i<tensors.size(); i++) {
+      shapes[i].assign(tensors[i].dimensions().begin(), tensors[i].dimensions().end());
+      total += tensors[i].size();
+    }
+    NpyArray values("<f4", shape1D(total));
+    char* data = values.data.empty() ? NULL : &values.data[0];
+    for (size_t i=0; i<tensors.size(); i++) {
+      if (tensors[i].size() == 0) continue;
+      memcpy(data, tensors[i].data(), tensors[i].size() * sizeof(Real));
+      data += tensors[i].size() * sizeof(Real);
+    }
+    addItems(writer, it->first, values, shapes);
+    ADD_TYPE(TensorReal);
+  }
+
+  #undef ADD_TYPE
+
+  vector<int64_t> shape(2, 2);
+  shape[0] = types.size() / 2;
+  writer.add("__types__", NpyArray::fromStrings(shape, types));
+  writer.close();
+}
@@ -0,0 +1,60 @@
+/*
+ * Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#ifndef ESSENTIA_NPZ_OUTPUT_H
+#define ESSENTIA_NPZ_OUTPUT_H
+
+#include "algorithm.h"
+#include "pool.h"
+
+namespace essentia {
+namespace standard {
+
+class NpzOutput : public Algorithm {
+
+ protected:
+  Input<Pool> _pool;
+  std::string _filename;
+  bool _compress;
+
+ public:
+
+  NpzOutput() {
+    declareInput(_pool, "pool", "Pool to serialize into a .npz file");
+  }
+
+  void declareParameters() {
+    declareParameter("filename", "output filename", "", Parameter::STRING);
+    declareParameter("compress", "whether to compress the arrays with deflate (requires Essentia to be built with zlib)", "{true,false}", false);
+  }
+
+  void compute();
+  void configure();
+
+  static const char* name;
+  static const char* category;
+  static const char* description;
+
+};
+
+} // namespace standard
+} // namespace essentia
+
+
+#endif // ESSENTIA_NPZ_OUTPUT_H
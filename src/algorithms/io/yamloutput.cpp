@@ -19,9 +19,9 @@
 
 #include "yamloutput.h"
 #include "essentia.h"
-#include "output.h" // ../utils/output
-#include <fstream>
-#include <sstream> // escapeJsonString
+#include <cstdlib>
+#include <cstring>
+#include <map>
 
 
 using namespace std;
@@ -46,27 +46,24 @@ const char* YamlOutput::description = DOC("This algorithm emits a YAML or JSON r
   "    foo:\n"
   "        bar:\n"
   "            some:\n"
-  "                thing: [23.1, 65.2, 21.3]");
+  "                thing: [23.1, 65.2, 21.3]\n"
+  "\n"
+  "The values are written directly from the Pool to the file, without being copied, so that "
+  "the memory used does not grow with the size of the Pool. Real values are written with 12 "
+  "significant digits, or with the fewest digits that read back to the same value if "
+  "\"shortestFloats\" is enabled.");
 
 // TODO arrange keys in alphabetical order and make sure to add that to the
 // dictionary, when implementing this, it should be made general enough to
 // add other sorting mechanisms (eg numerically, by size, custom ordering).
 
-// Defined here because the json helper functions are
-// not part of the YamlOutput class
-string _jsonN;
-
 void YamlOutput::configure() {
   _filename = parameter("filename").toString();
   _doubleCheck = parameter("doubleCheck").toBool();
   _outputJSON = (parameter("format").toLower() == "json");
   _indent = parameter("indent").toInt();
-  if (_indent > 0) {
-    _jsonN = "\n";
-  } else {
-    _jsonN = "";
-  }
   _writeVersion = parameter("writeVersion").toBool();
+  _shortestFloats = parameter("shortestFloats").toBool();
 
   if (_filename == "") throw EssentiaException("please provide a valid filename");
 }
@@ -115,69 +112,158 @@ vector<string> split(const string& s) {
 // correct utf-8 strings for the names of descriptors in the Pool. This
 // function is called for both Pool descriptor names and string values.
 string escapeJsonString(const string& input) {
-  ostringstream escaped;
+  string escaped;
+  escaped.reserve(input.size());
   for (string::const_iterator i = input.begin(); i != input.end(); i++) {
     switch (*i) {
-      case '\n': escaped << "\\n"; break;
-      case '\r': escaped << "\\r"; break;
-      case '\t': escaped << "\\t"; break;
-      case '\f': escaped << "\\f"; break;
-      case '\b': escaped << "\\b"; break;
-      case '"': escaped << "\\\""; break;
-      case '/': escaped << "\\/"; break;
-      case '\\': escaped << "\\\\"; break;
-      default: escaped << *i; break;
+      case '\n': escaped += "\\n"; break;
+      case '\r': escaped += "\\r"; break;
+      case '\t': escaped += "\\t"; break;
+      case '\f': escaped += "\\f"; break;
+      case '\b': escaped += "\\b"; break;
+      case '"': escaped += "\\\""; break;
+      case '/': escaped += "\\/"; break;
+      case '\\': escaped += "\\\\"; break;
+      default: escaped += *i; break;
     }
   }
-  return escaped.str();
+  return escaped;
+}
+
+
+// 64-bit FNV-1a hash, used to double-check the written file without having
+// to keep (or generate again) the whole output in memory
+uint64 updateChecksum(uint64 checksum, const char* data, size_t size) {
+  for (size_t i=0; i<size; ++i) {
+    checksum = (checksum ^ (unsigned char)data[i]) * 1099511628211ULL;
+  }
+  return checksum;
 }
 
+const uint64 initialChecksum = 14695981039346656037ULL;
+
+
+// Buffered writer to a FILE*. The text is accumulated in a fixed size buffer
+// which is written to the file in blocks, and all the written bytes are
+// accounted for in a checksum.
+class OutputBuffer {
+ public:
+  static const size_t bufferSize = 1 << 16;
+
+  OutputBuffer(FILE* file, bool shortestFloats) :
+      _file(file), _shortestFloats(shortestFloats), _size(0), _checksum(initialChecksum) {
+    _buffer.reserve(bufferSize + 64);
+  }
+
+  void write(const char* s, size_t n) {
+    _buffer.append(s, n);
+    if (_buffer.size() >= bufferSize) flush();
+  }
+
+  OutputBuffer& operator<<(const string& s) { write(s.data(), s.size()); return *this; }
+  OutputBuffer& operator<<(const char* s) { write(s, strlen(s)); return *this; }
+  OutputBuffer& operator<<(char c) { write(&c, 1); return *this; }
+
+  OutputBuffer& operator<<(Real x) {
+    char buf[32];
+    int n = 0;
+    if (_shortestFloats) {
+      // %g drops the trailing zeros, so the first precision that reads back to
+      // the same value gives the shortest representation (9 digits always do)
+      for (int precision=6; precision<=9; ++precision) {
+        n = snprintf(buf, sizeof(buf), "%.*g", precision, (double)x);
+        if (strtof(buf, NULL) == x) break;
+      }
+    }
+    else {
+      // same as writing to a stream with a precision of 12, which is what
+      // Parameter::toString does
+      n = snprintf(buf, sizeof(buf), "%.12g", (double)x);
+    }
+    write(buf, n);
+    return *this;
+  }
+
+  void flush() {
+    if (_buffer.empty()) return;
+    _checksum = updateChecksum(_checksum, _buffer.data(), _buffer.size());
+    _size += _buffer.size();
+    if (fwrite(_buffer.data(), 1, _buffer.size(), _file) != _buffer.size()) {
+      throw EssentiaException("YamlOutput: error when writing the output file");
+    }
+    _buffer.clear();
+  }
+
+  uint64 size() const { return _size; }
+  uint64 checksum() const { return _checksum; }
+
+ protected:
+  FILE* _file;
+  bool _shortestFloats;
+  string _buffer;
+  uint64 _size;
+  uint64 _checksum;
+};
+
+
+// Type of the value of a YamlNode, that is, the Pool map it comes from
+enum YamlValueType {
+  NO_VALUE,
+  SINGLE_REAL,
+  VECTOR_REAL,
+  VECTOR_VECTOR_REAL,
+  SINGLE_STRING,
+  VECTOR_STRING,
+  VECTOR_VECTOR_STRING,
+  VECTOR_ARRAY2D_REAL,
+  VECTOR_STEREOSAMPLE
+};
+
 // A YamlNode represents a node in the YAML tree. A YamlNode without any value
 // is valid, it is simply a namespace identifier. It is required that every
-// *leaf* node in a YAML tree have a defined value though.
+// *leaf* node in a YAML tree have a defined value though. The value is not
+// copied: it points to the value stored in the Pool.
 struct YamlNode {
   string name;
-  Parameter* value;
+  YamlValueType type;
+  const void* value;
   vector<YamlNode*> children;
+  map<string, YamlNode*> childrenByName;
 
-  YamlNode(const string& n) : name(n), value(0) {}
+  YamlNode(const string& n) : name(n), type(NO_VALUE), value(0) {}
 
   ~YamlNode () {
-    delete value;
     for (int i=0; i<(int)children.size(); ++i) {
       delete children[i];
     }
   }
+
+  // returns the child with the given name, creating it if needed. Children
+  // are kept in order of insertion
+  YamlNode* child(const string& childName) {
+    map<string, YamlNode*>::const_iterator it = childrenByName.find(childName);
+    if (it != childrenByName.end()) return it->second;
+
+    YamlNode* newNode = new YamlNode(childName);
+    children.push_back(newNode);
+    childrenByName[childName] = newNode;
+    return newNode;
+  }
 };
 
 
-template <typename IterType>
-void fillYamlTreeHelper(YamlNode* root, const IterType it) {
-  vector<string> pathparts = split(it->first);
+void fillYamlTreeHelper(YamlNode* root, const string& key, YamlValueType type, const void* value) {
+  vector<string> pathparts = split(key);
   YamlNode* currNode = root;
 
   // iterate over each of the pieces of the path
   for (int i=0; i<(int)pathparts.size(); ++i) {
-    bool newNode = true;
-
-    // search to see if the path part is already in the tree
-    for (int j=0; j<(int)currNode->children.size(); ++j) {
-      if (currNode->children[j]->name == pathparts[i]) { // already in the tree
-        newNode = false;
-        currNode = currNode->children[j];
-        break;
-      }
-    }
-
-    if (newNode) { // path part was not found in the tree
-      YamlNode* newNode = new YamlNode(pathparts[i]);
-      currNode->children.push_back(newNode);
-      currNode = newNode;
-    }
+    currNode = currNode->child(pathparts[i]);
   }
 
   // end of the path
-  currNode->value = new Parameter(it->second);
+  currNode->type = type;
+  currNode->value = value;
 }
 
 /*
@@ -213,23 +299,23 @@ void fillYamlTreeHelper(YamlNode* root, const IterType it) {
 */
 
 void fillYamlTree (const Pool& p, YamlNode* root) {
-  #define FILL_YAML_TREE_MACRO(type, tname)                                    \
+  #define FILL_YAML_TREE_MACRO(type, tname, valueType)                         \
   for (map<string, type >::const_iterator it = p.get##tname##Pool().begin();   \
        it != p.get##tname##Pool().end(); ++it) {                               \
-    fillYamlTreeHelper(root, it);                                              \
+    fillYamlTreeHelper(root, it->first, valueType, &it->second);               \
   }
 
-  FILL_YAML_TREE_MACRO(Real, SingleReal);
-  FILL_YAML_TREE_MACRO(vector<Real>, Real);
-  FILL_YAML_TREE_MACRO(vector<Real>, SingleVectorReal);
-  FILL_YAML_TREE_MACRO(vector<vector<Real> >, VectorReal);
+  FILL_YAML_TREE_MACRO(Real, SingleReal, SINGLE_REAL);
+  FILL_YAML_TREE_MACRO(vector<Real>, Real, VECTOR_REAL);
+  FILL_YAML_TREE_MACRO(vector<Real>, SingleVectorReal, VECTOR_REAL);
+  FILL_YAML_TREE_MACRO(vector<vector<Real> >, VectorReal, VECTOR_VECTOR_REAL);
 
-  FILL_YAML_TREE_MACRO(string, SingleString);
-  FILL_YAML_TREE_MACRO(vector<string>, String);
-  FILL_YAML_TREE_MACRO(vector<vector<string> >, VectorString);
+  FILL_YAML_TREE_MACRO(string, SingleString, SINGLE_STRING);
+  FILL_YAML_TREE_MACRO(vector<string>, String, VECTOR_STRING);
+  FILL_YAML_TREE_MACRO(vector<vector<string> >, VectorString, VECTOR_VECTOR_STRING);
 
-  FILL_YAML_TREE_MACRO(vector<TNT::Array2D<Real> >, Array2DReal);
-  FILL_YAML_TREE_MACRO(vector<StereoSample>, StereoSample);
+  FILL_YAML_TREE_MACRO(vector<TNT::Array2D<Real> >, Array2DReal, VECTOR_ARRAY2D_REAL);
+  FILL_YAML_TREE_MACRO(vector<StereoSample>, StereoSample, VECTOR_STEREOSAMPLE);
 
   if (p.getSingleTensorRealPool().begin() != p.getSingleTensorRealPool().end() ||
       p.getTensorRealPool().begin() != p.getTensorRealPool().end() ) {
@@ -241,15 +327,77 @@ void fillYamlTree (const Pool& p, YamlNode* root) {
 }
 
 
+// The emitValue functions write the values in the same way as a Parameter
+// holding them would be written to a stream.
+void emitValue(OutputBuffer& out, Real x) {
+  out << x;
+}
+
+// strings are enclosed in double quotes, with any double quotes and
+// backslashes inside them escaped
+void emitValue(OutputBuffer& out, const string& s) {
+  out << '"';
+  for (int i=0; i<int(s.size()); ++i) {
+    if (s[i] == '\"' || s[i] == '\\') out << '\\';
+    out << s[i];
+  }
+  out << '"';
+}
+
+void emitValue(OutputBuffer& out, const StereoSample& s) {
+  out << "{left: " << s.left() << ", right: " << s.right() << "}";
+}
+
+template <typename T>
+void emitValue(OutputBuffer& out, const vector<T>& v) {
+  out << '[';
+  for (int i=0; i<(int)v.size(); ++i) {
+    if (i > 0) out << ", ";
+    emitValue(out, v[i]);
+  }
+  out << ']';
+}
+
+void emitValue(OutputBuffer& out, const TNT::Array2D<Real>& mat) {
+  out << '[';
+  for (int i=0; i<mat.dim1(); ++i) {
+    if (i > 0) out << ", ";
+    out << '[';
+    for (int j=0; j<mat.dim2(); ++j) {
+      if (j > 0) out << ", ";
+      out << mat[i][j];
+    }
+    out << ']';
+  }
+  out << ']';
+}
+
+void emitValue(OutputBuffer& out, const YamlNode* n) {
+  switch (n->type) {
+    case SINGLE_REAL:          emitValue(out, *(const Real*)n->value); break;
+    case VECTOR_REAL:          emitValue(out, *(const vector<Real>*)n->value); break;
+    case VECTOR_VECTOR_REAL:   emitValue(out, *(const vector<vector<Real> >*)n->value); break;
+    case SINGLE_STRING:        emitValue(out, *(const string*)n->value); break;
+    case VECTOR_STRING:        emitValue(out, *(const vector<string>*)n->value); break;
+    case VECTOR_VECTOR_STRING: emitValue(out, *(const vector<vector<string> >*)n->value); break;
+    case VECTOR_ARRAY2D_REAL:  emitValue(out, *(const vector<TNT::Array2D<Real> >*)n->value); break;
+    case VECTOR_STEREOSAMPLE:  emitValue(out, *(const vector<StereoSample>*)n->value); break;
+    default:
+      throw EssentiaException("YamlOutput: unknown type of value for key ", n->name);
+  }
+}
+
+
 // Emits YAML given a YamlNode root to a specified stream.
 // This is a recursive solution.
-template <typename StreamType>
-void emitYaml(StreamType* s, YamlNode* n, const string& indent) {
-  *s << indent << n->name << ":";
+void emitYaml(OutputBuffer& s, YamlNode* n, const string& indent) {
+  s << indent << n->name << ":";
 
   if (n->children.empty()) { // if there are no children, emit the value here
-    if (n->value != NULL) {
-      *s << " " << *(n->value) << "\n";  // Parameters know how to be emitted to streams
+    if (n->type != NO_VALUE) {
+      s << " ";
+      emitValue(s, n);
+      s << "\n";
     }
     else { // you should never have this case: a key without any children or associated value
       throw EssentiaException("YamlOutput: input pool is invalid, contains key with no associated value");
@@ -258,13 +406,13 @@ void emitYaml(StreamType* s, YamlNode* n, const string& indent) {
   else {
     // we can make the assumption that this node has no value because the pool
     // doesn't not allow parent nodes to have values
-    if (n->value != NULL) {
+    if (n->type != NO_VALUE) {
       throw EssentiaException(
           "YamlOutput: input pool is invalid, a parent key should not have a"
           "value in addition to child keys");
     }
 
-    *s << "\n";
+    s << "\n";
 
     // and then emit the yaml for all of its children, recursive call
     for (int i=0; i<(int)n->children.size(); ++i) {
@@ -274,31 +422,27 @@ void emitYaml(StreamType* s, YamlNode* n, const string& indent) {
 }
 
 
-template <typename StreamType>
-void emitJson(StreamType* s, YamlNode* n, int indentsize, int indentincr) {
+void emitJson(OutputBuffer& s, YamlNode* n, int indentsize, int indentincr) {
+  const char* jsonN = indentincr > 0 ? "\n" : "";
   const string indent = string(indentsize, ' ');
-  *s << indent << "\"" << escapeJsonString(n->name) << "\": ";
+  s << indent << "\"" << escapeJsonString(n->name) << "\": ";
 
   if (n->children.empty()) { // if there are no children, emit the value here
-    if (n->value != NULL) {
-
-      // Escape string or vector of strings values for json compatibility
-      // FIXME Instead, is it possible to add an option to escape strings inside '<<'
-      // implementation for Parameters themselves?
-      Parameter::ParamType nodeType = (*(n->value)).type();
-      if (nodeType == Parameter::STRING) {
-        *s << "\"" << escapeJsonString((*(n->value)).toString()) << "\"";
-      }
-      else if (nodeType == Parameter::VECTOR_STRING) {
-        vector<string> escaped = (*(n->value)).toVectorString();
-        for (size_t i=0; i<escaped.size(); ++i) {
-          escaped[i] = "\"" + escapeJsonString(escaped[i]) + "\"";
-        }
-        *s << escaped;
-      }
-      else {
-        *s << *(n->value); // Parameters know how to be emitted to streams
+    // Escape string or vector of strings values for json compatibility
+    if (n->type == SINGLE_STRING) {
+      s << "\"" << escapeJsonString(*(const string*)n->value) << "\"";
+    }
+    else if (n->type == VECTOR_STRING) {
+      const vector<string>& v = *(const vector<string>*)n->value;
+      s << '[';
+      for (int i=0; i<(int)v.size(); ++i) {
+        if (i > 0) s << ", ";
+        s << "\"" << escapeJsonString(v[i]) << "\"";
       }
+      s << ']';
+    }
+    else if (n->type != NO_VALUE) {
+      emitValue(s, n);
     }
     else { // you should never have this case: a key without any children or associated value
       throw EssentiaException("JsonOutput: input pool is invalid, contains key with no associated value");
@@ -307,110 +451,124 @@ void emitJson(StreamType* s, YamlNode* n, int indentsize, int indentincr) {
   else {
     // we can make the assumption that this node has no value because the pool
     // doesn't not allow parent nodes to have values
-    if (n->value != NULL) {
+    if (n->type != NO_VALUE) {
       throw EssentiaException(
           "JsonOutput: input pool is invalid, a parent key should not have a"
           "value in addition to child keys");
     }
 
-    *s << "{" << _jsonN;
+    s << "{" << jsonN;
 
     // and then emit the json for all of its children, recursive call
     int childrensize = (int)n->children.size();
     for (int i=0; i<childrensize; ++i) {
       emitJson(s, n->children[i], indentsize + indentincr, indentincr);
       if (i < childrensize-1) {
-          *s << ",";
+          s << ",";
       }
-      *s << _jsonN;
+      s << jsonN;
     }
 
-    *s << indent << "}";
+    s << indent << "}";
   }
 }
 
 
-void outputYamlToStream(YamlNode& root, ostream* out) {
+void outputYamlToStream(YamlNode& root, OutputBuffer& out) {
   for (int i=0; i<(int)root.children.size(); ++i) {
-    *out << "\n";
+    out << "\n";
     emitYaml(out, root.children[i], "");
   }
 }
 
 
-void outputJsonToStream(YamlNode& root, ostream* out, int indentincr) {
-  *out << "{" << _jsonN;
+void outputJsonToStream(YamlNode& root, OutputBuffer& out, int indentincr) {
+  const char* jsonN = indentincr > 0 ? "\n" : "";
+  out << "{" << jsonN;
   for (int i=0; i<(int)root.children.size(); ++i) {
     emitJson(out, root.children[i], 0, indentincr);
     if (i < (int)root.children.size()-1) {
-        *out << ",";
+        out << ",";
     }
-    *out << _jsonN;
+    out << jsonN;
   }
-  *out << "}";
+  out << "}";
 }
 
 
-void YamlOutput::outputToStream(ostream* out) {
-  // set precision to be high enough
-  out->precision(12);
-
+void YamlOutput::outputToFile(FILE* file, uint64& size, uint64& checksum) {
   const Pool& p = _pool.get();
+  const string version(essentia::version);
 
   // create the YamlNode Tree
   YamlNode root("doesn't matter what I put here, it's not getting emitted");
 
   // add metadata.version.essentia to the tree
   if (_writeVersion) {
-      YamlNode* essentiaNode = new YamlNode("essentia");
-
-      essentiaNode->value = new Parameter(essentia::version);
-
-      YamlNode* versionNode = new YamlNode("version");
-      versionNode->children.push_back(essentiaNode);
-
-      YamlNode* metadataNode = new YamlNode("metadata");
-      metadataNode->children.push_back(versionNode);
-
-      root.children.push_back(metadataNode);
+    fillYamlTreeHelper(&root, "metadata.version.essentia", SINGLE_STRING, &version);
   }
 
   // fill the YAML tree with the values form the pool
   fillYamlTree(p, &root);
 
+  OutputBuffer out(file, _shortestFloats);
+
   if (_outputJSON) {
-      outputJsonToStream(root, out, _indent);
+    outputJsonToStream(root, out, _indent);
   } else {
-      outputYamlToStream(root, out);
+    outputYamlToStream(root, out);
   }
+
+  out.flush();
+  size = out.size();
+  checksum = out.checksum();
 }
 
 
 void YamlOutput::compute() {
+  uint64 size, checksum;
+
   if (_filename == "-") {
-    outputToStream(&cout);
+    outputToFile(stdout, size, checksum);
+    fflush(stdout);
+    return;
   }
-  else {
-    ofstream out(_filename.c_str());
-    outputToStream(&out);
-    out.close();
-
-    if (_doubleCheck) {
-      ostringstream expected;
-      outputToStream(&expected);
-
-      // read the file we just wrote...
-      ifstream f(_filename.c_str());
-      if (!f.good()) {
-        throw EssentiaException("YamlOutput: error when double-checking the output file; it doesn't look like it was written at all");
-      }
-      ostringstream written;
-      // we need to compare using streambuffers or otherwise
-      // the check fails on windows due to new lines
-      written << f.rdbuf();
-      if (written.str() != expected.str()) {
-        throw EssentiaException("YamlOutput: error when double-checking the output file; it doesn't match the expected output");
-      }
+
+  FILE* out = fopen(_filename.c_str(), "w");
+  if (!out) {
+    throw EssentiaException("YamlOutput: could not open file for writing: ", _filename);
+  }
+  try {
+    outputToFile(out, size, checksum);
+  }
+  catch (...) {
+    fclose(out);
+    throw;
+  }
+  if (fclose(out) != 0) {
+    throw EssentiaException("YamlOutput: error when writing the output file ", _filename);
+  }
+
+  if (_doubleCheck) {
+    // read the file we just wrote, in text mode as it was written so that the
+    // check doesn't fail on windows due to new lines, and compare it with
+    // what we have written
+    FILE* f = fopen(_filename.c_str(), "r");
+    if (!f) {
+      throw EssentiaException("YamlOutput: error when double-checking the output file; it doesn't look like it was written at all");
+    }
+    vector<char> buffer(OutputBuffer::bufferSize);
+    uint64 writtenSize = 0;
+    uint64 writtenChecksum = initialChecksum;
+    size_t n;
+    while ((n = fread(&buffer[0], 1, buffer.size(), f)) > 0) {
+      writtenChecksum = updateChecksum(writtenChecksum, &buffer[0], n);
+      writtenSize += n;
+    }
+    fclose(f);
+
+    if (writtenSize != size || writtenChecksum != checksum) {
+      throw EssentiaException("YamlOutput: error when double-checking the output file; it doesn't match the expected output");
     }
   }
 }
@@ -20,6 +20,7 @@
 #ifndef ESSENTIA_YAML_OUTPUT_H
 #define ESSENTIA_YAML_OUTPUT_H
 
+#include <cstdio>
 #include "algorithm.h"
 #include "pool.h"
 
@@ -35,8 +36,9 @@ class YamlOutput : public Algorithm {
   bool _outputJSON;
   int _indent;
   bool _writeVersion;
+  bool _shortestFloats;
 
-  void outputToStream(std::ostream* out);
+  void outputToFile(FILE* file, uint64& size, uint64& checksum);
 
  public:
 
@@ -50,6 +52,7 @@ class YamlOutput : public Algorithm {
     declareParameter("writeVersion", "whether to write the essentia version to the output file", "", true);
     declareParameter("doubleCheck", "whether to double-check if the file has been correctly written to the disk", "", false);
     declareParameter("format", "whether to output data in JSON or YAML format", "{json,yaml}", "yaml");
+    declareParameter("shortestFloats", "whether to write real values with the fewest digits that read back to the same value, instead of 12 significant digits", "{true,false}", false);
   }
 
   void compute();
@@ -51,8 +51,20 @@ const char* TensorflowPredict::description = DOC("This algorithm runs a Tensorfl
 "To print a list with all the available nodes in the graph set the first element of `outputs` as an empty string (i.e., \"\")."
 "\n"
 "This algorithm is a wrapper for the Tensorflow C API [3]. The first time it is configured with a non-empty `graphFilename` it will try to load the contained graph and to attach a Tensorflow session to it. "
-"The reset method deletes the current session (and the resources attached to it) and creates a new one relying on the available graph. "
-"By reconfiguring the algorithm the graph is reloaded and the reset method is called.\n"
+"Loaded graphs and their sessions are kept in a process-wide cache and shared by all the instances configured with the same model (and `tags`), "
+"so creating or reconfiguring instances with a model that is already loaded does not read it again. "
+"Models that are no longer used by any instance stay in the cache until the total size of such unused models exceeds the capacity of the cache, "
+"in which case the least recently used ones are released. "
+"In Python, the cache can be inspected and controlled with `essentia.modelCacheInfo()`, `essentia.setModelCacheCapacity()` and `essentia.clearModelCache()`.\n"
+"\n"
+"The `intraOpThreads`, `interOpThreads`, `threadPool` and `optimizeGraph` parameters set the options of the TensorFlow session. "
+"By default, TensorFlow uses as many threads as CPU cores, which oversubscribes the CPU when running several models or "
+"other processing in parallel. Sessions configured with the same `threadPool` name share a single pool of `interOpThreads` threads. "
+"In Python, default values for these parameters can be set for all the algorithms with `essentia.setTensorflowOptions()`.\n"
+"\n"
+"The input tensors are allocated once and reused by the following computations as long as their shapes do not change. "
+"When `stats` is true, the batch size, the duration of the session run and the resulting throughput are stored in the output pool, "
+"which is useful to monitor real-time applications.\n"
 "\n"
 "References:\n"
 "  [1] TensorFlow - An open source machine learning library for research and production.\n"
@@ -68,6 +80,38 @@ static void DeallocateBuffer(void* data, size_t) {
 }
 
 
+// The C API only accepts session options as a serialized tensorflow.ConfigProto
+// message, so we encode by hand the few fields that we expose.
+static void appendVarint(string& buffer, uint64_t value) {
+  while (value >= 0x80) {
+    buffer += (char)((value & 0x7f) | 0x80);
+    value >>= 7;
+  }
+  buffer += (char)value;
+}
+
+static void appendTag(string& buffer, int field, int wireType) {
+  appendVarint(buffer, ((uint64_t)field << 3) | wireType);
+}
+
+static void appendMessage(string& buffer, int field, const string& message) {
+  appendTag(buffer, field, 2);
+  appendVarint(buffer, message.size());
+  buffer += message;
+}
+
+
+TensorflowModel::~TensorflowModel() {
+  TF_Status* status = TF_NewStatus();
+  if (session) {
+    TF_CloseSession(session, status);
+    TF_DeleteSession(session, status);
+  }
+  TF_DeleteGraph(graph);
+  TF_DeleteStatus(status);
+}
+
+
 void TensorflowPredict::configure() {
   _savedModel = parameter("savedModel").toString();
   _graphFilename = parameter("graphFilename").toString();
@@ -87,26 +131,75 @@ void TensorflowPredict::configure() {
   _isTraining = parameter("isTraining").toBool();
   _isTrainingName = parameter("isTrainingName").toString();
   _squeeze = parameter("squeeze").toBool();
+  _stats = parameter("stats").toBool();
 
   (_isTrainingName == "") ? _isTrainingSet = false : _isTrainingSet = true;
 
+  _sessionConfig = sessionConfig();
+  TF_SetConfig(_sessionOptions, _sessionConfig.data(), _sessionConfig.size(), _status);
+  if (TF_GetCode(_status) != TF_OK) {
+    throw EssentiaException("TensorflowPredict: Error setting the session options. ", TF_Message(_status));
+  }
+
   _nInputs = _inputNames.size();
   _nOutputs = _outputNames.size();
 
   // Allocate input and output tensors.
-  _inputTensors.resize(_nInputs + int(_isTrainingSet));
+  clearInputTensors();
+  _inputTensors.resize(_nInputs + int(_isTrainingSet), NULL);
   _inputNodes.resize(_nInputs + int(_isTrainingSet));
 
   _outputTensors.resize(_nOutputs);
   _outputNodes.resize(_nOutputs);
 
-  TF_DeleteGraph(_graph);
-  _graph = TF_NewGraph();
+  // Reuse the graph and the session of the instances configured with the same
+  // model, if any. The model of the previous configuration is only released
+  // once the new one is held, so that it is not evicted if it is the same.
+  string key = modelKey();
+  ModelCache::ModelPtr previous;
+  previous.swap(_model);
+  _model = ModelCache::get(key);
+  ModelCache::release(previous);
+
+  if (!_model) {
+    TensorflowModel* model = new TensorflowModel();
+    ModelCache::ModelPtr newModel(model);
+    _graph = model->graph;
+
+    try {
+      openGraph();
+    }
+    catch (EssentiaException&) {
+      _graph = NULL;
+      _session = NULL;
+      _isConfigured = false;
+      throw;
+    }
 
-  openGraph();
+    model->session = TF_NewSession(_graph, _sessionOptions, _status);
+    if (TF_GetCode(_status) != TF_OK) {
+      _graph = NULL;
+      _session = NULL;
+      _isConfigured = false;
+      throw EssentiaException("TensorflowPredict: Error creating new session. ", TF_Message(_status));
+    }
+
+    // Use the size of the serialized graph as an estimate of the memory used.
+    TF_Buffer* graphDef = TF_NewBuffer();
+    TF_GraphToGraphDef(_graph, graphDef, _status);
+    if (TF_GetCode(_status) == TF_OK) {
+      model->size = graphDef->length;
+    }
+    TF_DeleteBuffer(graphDef);
+
+    _model = ModelCache::add(key, newModel);
+  }
+
+  TensorflowModel* model = static_cast<TensorflowModel*>(_model.get());
+  _graph = model->graph;
+  _session = model->session;
 
   _isConfigured = true;
-  reset();
 
   // If the first output name is empty just print out the list of nodes and return.
   if (_outputNames[0] == "") {
@@ -206,23 +299,81 @@ void TensorflowPredict::openGraph() {
 }
 
 
-void TensorflowPredict::reset() {
-  if (!_isConfigured) return;
+string TensorflowPredict::modelKey() {
+  // Models are shared only among instances that would load them in the same way.
+  if (!_savedModel.empty()) {
+    string key = "savedModel:" + _savedModel;
+    for (size_t i = 0; i < _tags.size(); i++) {
+      key += ":" + _tags[i];
+    }
+    return key + ":" + _sessionConfig;
+  }
+  return "graphFilename:" + _graphFilename + ":" + _sessionConfig;
+}
 
-  TF_CloseSession(_session, _status);
-  if (TF_GetCode(_status) != TF_OK) {
-    throw EssentiaException("TensorflowPredict: Error closing session. ", TF_Message(_status));
+
+string TensorflowPredict::sessionConfig() {
+  int intraOpThreads = parameter("intraOpThreads").toInt();
+  int interOpThreads = parameter("interOpThreads").toInt();
+  string threadPool = parameter("threadPool").toString();
+  bool optimizeGraph = parameter("optimizeGraph").toBool();
+
+  // Fields of tensorflow.ConfigProto (tensorflow/core/protobuf/config.proto).
+  string config;
+
+  if (intraOpThreads) {
+    appendTag(config, 2, 0);  // intra_op_parallelism_threads
+    appendVarint(config, intraOpThreads);
   }
 
-  TF_DeleteSession(_session, _status);
-  if (TF_GetCode(_status) != TF_OK) {
-    throw EssentiaException("TensorflowPredict: Error deleting session. ", TF_Message(_status));
+  if (!threadPool.empty()) {
+    // ThreadPoolOptionProto: num_threads and global_name
+    string pool;
+    appendTag(pool, 1, 0);
+    appendVarint(pool, interOpThreads);
+    appendTag(pool, 2, 2);
+    appendVarint(pool, threadPool.size());
+    pool += threadPool;
+    appendMessage(config, 12, pool);  // session_inter_op_thread_pool
+  }
+  else if (interOpThreads) {
+    appendTag(config, 5, 0);  // inter_op_parallelism_threads
+    appendVarint(config, interOpThreads);
   }
 
-  _session = TF_NewSession(_graph, _sessionOptions, _status);
-  if (TF_GetCode(_status) != TF_OK) {
-    throw EssentiaException("TensorflowPredict: Error creating new session after reset. ", TF_Message(_status));
+  if (!optimizeGraph) {
+    // OptimizerOptions: opt_level = L0 (-1)
+    string optimizerOptions;
+    appendTag(optimizerOptions, 3, 0);
+    appendVarint(optimizerOptions, (uint64_t)-1);
+
+    // RewriterConfig: disable_meta_optimizer = true
+    string rewriteOptions;
+    appendTag(rewriteOptions, 19, 0);
+    appendVarint(rewriteOptions, 1);
+
+    string graphOptions;
+    appendMessage(graphOptions, 3, optimizerOptions);  // optimizer_options
+    appendMessage(graphOptions, 10, rewriteOptions);   // rewrite_options
+    appendMessage(config, 10, graphOptions);           // graph_options
+  }
+
+  return config;
+}
+
+
+void TensorflowPredict::clearInputTensors() {
+  for (size_t i = 0; i < _inputTensors.size(); i++) {
+    if (_inputTensors[i]) TF_DeleteTensor(_inputTensors[i]);
   }
+  _inputTensors.clear();
+}
+
+
+void TensorflowPredict::reset() {
+  // The session is shared with the other instances configured with the same
+  // model, so it is kept. It holds no state between computations as the
+  // models are only used for inference.
 }
 
 
@@ -235,11 +386,12 @@ void TensorflowPredict::compute() {
   const Pool& poolIn = _poolIn.get();
   Pool& poolOut = _poolOut.get();
 
-  // Parse the input tensors from the pool into Tensorflow tensors.
+  // Parse the input tensors from the pool into Tensorflow tensors. The tensors
+  // of the previous computation are reused if their shapes did not change.
   for (size_t i = 0; i < _nInputs; i++) {
     const Tensor<Real>& inputData =
         poolIn.value<Tensor<Real> >(_inputNames[i]);
-    _inputTensors[i] = TensorToTF(inputData);
+    _inputTensors[i] = TensorToTF(inputData, _inputTensors[i]);
   }
 
   // Initialize output tensors.
@@ -247,6 +399,8 @@ void TensorflowPredict::compute() {
     _outputTensors[i] = NULL;
   }
 
+  chrono::steady_clock::time_point start = chrono::steady_clock::now();
+
   // Run the Tensorflow session.
   TF_SessionRun(_session,
                 NULL,                            // Run options.
@@ -265,16 +419,21 @@ void TensorflowPredict::compute() {
     throw EssentiaException("TensorflowPredict: Error running the Tensorflow session. ", TF_Message(_status));
   }
 
+  chrono::duration<double> latency = chrono::steady_clock::now() - start;
+
   // Copy the desired tensors into the output pool.
   for (size_t i = 0; i < _nOutputs; i++) {
     poolOut.set(_outputNames[i], TFToTensor(_outputTensors[i], _outputNodes[i]));
   }
 
-  // Deallocate tensors.
-  for (size_t i = 0; i < _nInputs; i++) {
-    TF_DeleteTensor(_inputTensors[i]);
+  if (_stats) {
+    Real batchSize = _nInputs ? (Real)TF_Dim(_inputTensors[0], 0) : 0;
+    poolOut.set("stats.batchSize", batchSize);
+    poolOut.set("stats.latency", (Real)latency.count());
+    poolOut.set("stats.throughput", latency.count() > 0 ? (Real)(batchSize / latency.count()) : 0);
   }
 
+  // Deallocate the output tensors. The input ones are kept for the next call.
   for (size_t i = 0; i < _nOutputs; i++) {
     TF_DeleteTensor(_outputTensors[i]);
   }
@@ -282,7 +441,7 @@ void TensorflowPredict::compute() {
 
 
 TF_Tensor* TensorflowPredict::TensorToTF(
-    const Tensor<Real>& tensorIn) {
+    const Tensor<Real>& tensorIn, TF_Tensor* tensorOut) {
   int dims = 1;
   vector<int64_t> shape;
 
@@ -310,9 +469,24 @@ TF_Tensor* TensorflowPredict::TensorToTF(
       }
   }
 
-  TF_Tensor* tensorOut = TF_AllocateTensor(
-      TF_FLOAT, &shape[0], dims,
-      (size_t)tensorIn.size() * sizeof(Real));
+  // Reuse the given tensor if it has the same shape.
+  if (tensorOut) {
+    bool sameShape = (TF_NumDims(tensorOut) == dims);
+    for (int i = 0; sameShape && i < dims; i++) {
+      sameShape = (TF_Dim(tensorOut, i) == shape[i]);
+    }
+
+    if (!sameShape) {
+      TF_DeleteTensor(tensorOut);
+      tensorOut = NULL;
+    }
+  }
+
+  if (tensorOut == NULL) {
+    tensorOut = TF_AllocateTensor(
+        TF_FLOAT, &shape[0], dims,
+        (size_t)tensorIn.size() * sizeof(Real));
+  }
 
   if (tensorOut == NULL) {
     throw EssentiaException("TensorflowPredict: Error generating input tensor.");
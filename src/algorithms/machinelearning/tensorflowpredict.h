@@ -22,12 +22,27 @@
 
 #include "algorithm.h"
 #include "pool.h"
+#include "modelcache.h"
+#include <chrono>
 #include <tensorflow/c/c_api.h>
 
 
 namespace essentia {
 namespace standard {
 
+/**
+ * A graph and the session attached to it, shared through the ModelCache by all
+ * the TensorflowPredict instances configured with the same model.
+ */
+class TensorflowModel : public CachedModel {
+ public:
+  TF_Graph* graph;
+  TF_Session* session;
+
+  TensorflowModel() : graph(TF_NewGraph()), session(NULL) {}
+  ~TensorflowModel();
+};
+
 class TensorflowPredict : public Algorithm {
 
  protected:
@@ -47,6 +62,8 @@ class TensorflowPredict : public Algorithm {
   size_t _nInputs;
   size_t _nOutputs;
 
+  // _graph and _session belong to _model
+  ModelCache::ModelPtr _model;
   TF_Graph* _graph;
   TF_Status* _status;
   TF_ImportGraphDefOptions* _options;
@@ -62,11 +79,17 @@ class TensorflowPredict : public Algorithm {
   std::string _isTrainingName;
 
   bool _squeeze;
+  bool _stats;
+
+  std::string _sessionConfig;
 
   bool _isConfigured;
 
   void openGraph();
-  TF_Tensor* TensorToTF(const Tensor<Real>& tensorIn);
+  std::string modelKey();
+  std::string sessionConfig();
+  void clearInputTensors();
+  TF_Tensor* TensorToTF(const Tensor<Real>& tensorIn, TF_Tensor* tensorOut=NULL);
   const Tensor<Real> TFToTensor(const TF_Tensor* tensor, TF_Output node);
   TF_Output graphOperationByName(const std::string nodeName);
   std::vector<std::string> nodeNames();
@@ -79,21 +102,20 @@ class TensorflowPredict : public Algorithm {
   }
 
  public:
-  TensorflowPredict() : _graph(TF_NewGraph()), _status(TF_NewStatus()),
+  TensorflowPredict() : _graph(NULL), _status(TF_NewStatus()),
       _options(TF_NewImportGraphDefOptions()), _sessionOptions(TF_NewSessionOptions()),
-      _session(TF_NewSession(_graph, _sessionOptions, _status)), _runOptions(NULL),
-      _isConfigured(false) {
+      _session(NULL), _runOptions(NULL), _isConfigured(false) {
     declareInput(_poolIn, "poolIn", "the pool where to get the feature tensors");
     declareOutput(_poolOut, "poolOut", "the pool where to store the output tensors");
   }
 
   ~TensorflowPredict(){
-    TF_CloseSession(_session, _status);
+    // the graph and the session are released with the model
+    ModelCache::release(_model);
+    clearInputTensors();
     TF_DeleteSessionOptions(_sessionOptions);
-    TF_DeleteSession(_session, _status);
     TF_DeleteImportGraphDefOptions(_options);
     TF_DeleteStatus(_status);
-    TF_DeleteGraph(_graph);
     TF_DeleteBuffer(_runOptions);
   }
 
@@ -109,6 +131,11 @@ class TensorflowPredict : public Algorithm {
     declareParameter("isTraining", "run the model in training mode (normalized with statistics of the current batch) instead of inference mode (normalized with moving statistics). This only applies to some models", "{true,false}", false);
     declareParameter("isTrainingName", "the name of an additional input node indicating whether the model is to be run in a training mode (for models with a training mode, leave it empty otherwise)", "", "");
     declareParameter("squeeze", "remove singleton dimensions of the inputs tensors. Does not apply to the batch dimension", "{true,false}", true);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
+    declareParameter("stats", "store the batch size, the duration in seconds and the throughput in batch items per second of each session run in the output pool under `stats.batchSize`, `stats.latency` and `stats.throughput`", "{true,false}", false);
   }
 
   void configure();
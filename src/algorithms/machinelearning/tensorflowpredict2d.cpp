@@ -118,7 +118,11 @@ void TensorflowPredict2D::configure() {
                                 "savedModel", savedModel,
                                 "inputs", vector<string>({input}),
                                 "outputs", vector<string>({output}),
-                                "isTrainingName", isTrainingName);
+                                "isTrainingName", isTrainingName,
+                                INHERIT("intraOpThreads"),
+                                INHERIT("interOpThreads"),
+                                INHERIT("threadPool"),
+                                INHERIT("optimizeGraph"));
 }
 
 } // namespace streaming
@@ -200,7 +204,11 @@ void TensorflowPredict2D::configure() {
                                        INHERIT("lastPatchMode"),
                                        INHERIT("patchSize"),
                                        INHERIT("batchSize"),
-                                       "dimensions", _dimensions);
+                                       "dimensions", _dimensions,
+                                       INHERIT("intraOpThreads"),
+                                       INHERIT("interOpThreads"),
+                                       INHERIT("threadPool"),
+                                       INHERIT("optimizeGraph"));
 }
 
 
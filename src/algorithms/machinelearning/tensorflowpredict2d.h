@@ -63,6 +63,10 @@ class TensorflowPredict2D : public AlgorithmComposite {
     declareParameter("batchSize", "batch size for prediction. This allows parallelization when GPUs are available. Set it to -1 or 0 to accumulate all the patches and run a single TensorFlow session at the end of the stream", "[-1,inf)", 64);
     declareParameter("patchSize", "number of timestamps required for each inference. This parameter should match the model's expected input shape.", "[0,inf)", 1);
     declareParameter("dimensions", "number of dimensions on the input features. This parameter should match the model's expected input shape", "[0,inf)", 200);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
   }
 
   void declareProcessOrder() {
@@ -120,6 +124,10 @@ class TensorflowPredict2D : public Algorithm {
     declareParameter("batchSize", "batch size for prediction. This allows parallelization when GPUs are available. Set it to -1 or 0 to accumulate all the patches and run a single TensorFlow session at the end of the stream", "[-1,inf)", 64);
     declareParameter("patchSize", "number of timestamps required for each inference. This parameter should match the model's expected input shape.", "[0,inf)", 1);
     declareParameter("dimensions", "number of dimensions on the input features. This parameter is overridden by the shape of the input data", "[0,inf)", 200);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
   }
 
   void configure();
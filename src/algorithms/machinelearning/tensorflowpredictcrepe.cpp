@@ -124,7 +124,11 @@ void TensorflowPredictCREPE::configure() {
   _tensorflowPredict->configure("graphFilename", graphFilename,
                                 "savedModel", savedModel,
                                 "inputs", vector<string>({input}),
-                                "outputs", vector<string>({output}));
+                                "outputs", vector<string>({output}),
+                                INHERIT("intraOpThreads"),
+                                INHERIT("interOpThreads"),
+                                INHERIT("threadPool"),
+                                INHERIT("optimizeGraph"));
 }
 
 } // namespace streaming
@@ -198,7 +202,11 @@ void TensorflowPredictCREPE::configure() {
                                      INHERIT("input"),
                                      INHERIT("output"),
                                      INHERIT("hopSize"),
-                                     INHERIT("batchSize"));
+                                     INHERIT("batchSize"),
+                                     INHERIT("intraOpThreads"),
+                                     INHERIT("interOpThreads"),
+                                     INHERIT("threadPool"),
+                                     INHERIT("optimizeGraph"));
 }
 
 
@@ -64,6 +64,10 @@ class TensorflowPredictCREPE : public AlgorithmComposite {
     declareParameter("output", "the name of the node from which to retrieve the output tensors", "", "model/classifier/Sigmoid");
     declareParameter("hopSize", "the hop size in milliseconds for running pitch estimations", "(0,inf)", 10.0);
     declareParameter("batchSize", "the batch size for prediction. This allows parallelization when a GPU is available. Set it to -1 or 0 to accumulate all the patches and run a single TensorFlow session at the end of the stream", "[-1,inf)", 64);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
   }
 
   void declareProcessOrder() {
@@ -114,6 +118,10 @@ class TensorflowPredictCREPE : public Algorithm {
     declareParameter("output", "the name of the node from which to retrieve the output tensors", "", "model/classifier/Sigmoid");
     declareParameter("hopSize", "the hop size in milliseconds for running pitch estimations", "(0,inf)", 10.0);
     declareParameter("batchSize", "the batch size for prediction. This allows parallelization when a GPU is available. Set it to -1 or 0 to accumulate all the patches and run a single TensorFlow session at the end of the stream", "[-1,inf)", 16);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
   }
 
   void configure();
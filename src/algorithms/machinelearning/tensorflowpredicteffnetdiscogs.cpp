@@ -106,7 +106,8 @@ void TensorflowPredictEffnetDiscogs::configure() {
   _vectorRealToTensor->configure("shape", inputShape,
                                  "lastPatchMode", lastPatchMode,
                                  "patchHopSize", patchHopSize,
-                                 "lastBatchMode", "discard");
+                                 "lastBatchMode", "discard",
+                                 INHERIT("maxLatency"));
 
   _configured = true;
 
@@ -123,7 +124,15 @@ void TensorflowPredictEffnetDiscogs::configure() {
   _tensorflowPredict->configure("graphFilename", graphFilename,
                                 "savedModel", savedModel,
                                 "inputs", vector<string>({input}),
-                                "outputs", vector<string>({output}));
+                                "outputs", vector<string>({output}),
+                                INHERIT("intraOpThreads"),
+                                INHERIT("interOpThreads"),
+                                INHERIT("threadPool"),
+                                INHERIT("optimizeGraph"),
+                                INHERIT("stats"));
+
+  configureStatsOutput(*this, _outputs, _stats, _tensorflowPredict->output("poolOut"),
+                       parameter("stats").toBool());
 }
 
 } // namespace streaming
@@ -143,6 +152,12 @@ const char* TensorflowPredictEffnetDiscogs::description = DOC(
   "(mel-spectrograms). It feeds the model with patches of 128 frames and "
   "jumps a constant amount of frames determined by `patchHopSize`.\n"
   "\n"
+  "When `stats` is true, the batch size, the duration of the session run in "
+  "seconds and the throughput of each batch are returned in an additional "
+  "`stats` pool, as `stats.batchSize`, `stats.latency` and `stats.throughput`. "
+  "In streaming mode, this output is only available when `stats` is true and "
+  "carries the output pool of each TensorFlow session.\n"
+  "\n"
   "By setting the `batchSize` parameter to -1 or 0 the patches are stored to run a single "
   "TensorFlow session at the end of the stream. This allows to take advantage "
   "of parallelization when GPUs are available, but at the same time it can be "
@@ -180,12 +195,22 @@ void TensorflowPredictEffnetDiscogs::createInnerNetwork() {
 
   *_vectorInput  >> _tensorflowPredictEffnetDiscogs->input("signal");
   _tensorflowPredictEffnetDiscogs->output("predictions") >>  PC(_pool, "predictions");
+  _statsStorage = 0;
 
   _network = new scheduler::Network(_vectorInput);
 }
 
 
 void TensorflowPredictEffnetDiscogs::configure() {
+  bool stats = parameter("stats").toBool();
+
+  // The streaming algorithm has no `stats` output to connect the storage to
+  // when the stats are disabled, so the inner network is created again.
+  if (_statsStorage && !stats) {
+    delete _network;
+    createInnerNetwork();
+  }
+
   _tensorflowPredictEffnetDiscogs->configure(INHERIT("graphFilename"),
                                              INHERIT("savedModel"),
                                              INHERIT("input"),
@@ -193,7 +218,26 @@ void TensorflowPredictEffnetDiscogs::configure() {
                                              INHERIT("patchHopSize"),
                                              INHERIT("lastPatchMode"),
                                              INHERIT("batchSize"),
-                                             INHERIT("patchSize"));
+                                             INHERIT("maxLatency"),
+                                             INHERIT("patchSize"),
+                                             INHERIT("intraOpThreads"),
+                                             INHERIT("interOpThreads"),
+                                             INHERIT("threadPool"),
+                                             INHERIT("optimizeGraph"),
+                                             INHERIT("stats"));
+
+  if (stats && !_statsStorage) {
+    _statsStorage = new streaming::VectorOutput<Pool>(&_batchPools);
+    _tensorflowPredictEffnetDiscogs->output("stats") >> _statsStorage->input("data");
+    _network->update();
+  }
+
+  if (!stats) {
+    removeStatsOutput(_outputs, outputDescription);
+  }
+  else if (!contains(_outputs, "stats")) {
+    declareOutput(_stats, "stats", tensorflowStatsDescription);
+  }
 
   _patchHopSize = parameter("patchHopSize").toInt();
   _patchSize = parameter("patchSize").toInt();
@@ -236,6 +280,10 @@ void TensorflowPredictEffnetDiscogs::compute() {
     predictions.clear();
   }
 
+  if (_statsStorage) {
+    collectStats(_batchPools, _stats.get());
+  }
+
   reset();
 }
 
@@ -243,6 +291,7 @@ void TensorflowPredictEffnetDiscogs::compute() {
 void TensorflowPredictEffnetDiscogs::reset() {
   _network->reset();
   _pool.remove("predictions");
+  _batchPools.clear();
 }
 
 int TensorflowPredictEffnetDiscogs::padSignal(const std::vector<Real> &signal, std::vector<Real> &paddedSignal) {
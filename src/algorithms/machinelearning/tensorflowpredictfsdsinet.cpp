@@ -127,7 +127,11 @@ void TensorflowPredictFSDSINet::configure() {
                                 "inputs", vector<string>({input}),
                                 "outputs", vector<string>({output}),
                                 "squeeze", false,
-                                "isTrainingName", "");
+                                "isTrainingName", "",
+                                INHERIT("intraOpThreads"),
+                                INHERIT("interOpThreads"),
+                                INHERIT("threadPool"),
+                                INHERIT("optimizeGraph"));
 }
 
 } // namespace streaming
@@ -208,7 +212,11 @@ void TensorflowPredictFSDSINet::configure() {
                                        INHERIT("output"),
                                        INHERIT("patchHopSize"),
                                        INHERIT("lastPatchMode"),
-                                       INHERIT("batchSize"));
+                                       INHERIT("batchSize"),
+                                       INHERIT("intraOpThreads"),
+                                       INHERIT("interOpThreads"),
+                                       INHERIT("threadPool"),
+                                       INHERIT("optimizeGraph"));
 }
 
 
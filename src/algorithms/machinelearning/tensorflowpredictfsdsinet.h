@@ -61,6 +61,10 @@ class TensorflowPredictFSDSINet : public AlgorithmComposite {
     declareParameter("patchHopSize", "the number of frames between the beginnings of adjacent patches. 0 to avoid overlap", "[0,inf)", 50);
     declareParameter("lastPatchMode", "what to do with the last frames: `repeat` them to fill the last patch or `discard` them", "{discard,repeat}", "discard");
     declareParameter("batchSize", "the batch size for prediction. This allows parallelization when GPUs are available. Set it to -1 or 0 to accumulate all the patches and run a single TensorFlow session at the end of the stream", "[-1,inf)", 64);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
   }
 
   void declareProcessOrder() {
@@ -115,6 +119,10 @@ class TensorflowPredictFSDSINet : public Algorithm {
     declareParameter("lastPatchMode", "what to do with the last frames: `repeat` them to fill the last patch or `discard` them", "{discard,repeat}", "discard");
     declareParameter("batchSize", "the batch size for prediction. This allows parallelization when GPUs are available. Set it to -1 or 0 to accumulate all the patches and run a single TensorFlow session at the end of the stream", "[-1,inf)", 64);
     declareParameter("normalize", "whether to normalize the input audio signal. Note that this parameter is only available in standard mode", "{false,true}", true);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
   }
 
   void configure();
@@ -0,0 +1,222 @@
+/*
+ * Copyright (C) 2006-2022  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#include "tensorflowpredictheads.h"
+#include "algorithmfactory.h"
+#include <set>
+
+using namespace std;
+using namespace essentia;
+using namespace standard;
+
+const char* TensorflowPredictHeads::name = "TensorflowPredictHeads";
+const char* TensorflowPredictHeads::category = "Machine Learning";
+const char* TensorflowPredictHeads::description = DOC(
+  "This algorithm makes predictions with several classification or regression heads on the same embeddings.\n"
+  "\n"
+  "It is equivalent to running a TensorflowPredict2D per head on the same input, but the graphs of all the "
+  "heads are loaded once in configure and stay resident for the lifetime of the algorithm, and the input "
+  "patches are built once per call and shared by all the heads. "
+  "This makes it suitable for tagging large collections with many heads trained on the same embedding model.\n"
+  "\n"
+  "The input is a matrix of embeddings with shape (timestamps, dimensions), as produced by the "
+  "TensorflowPredict* embedding extractors. It is cut in patches with shape (patchSize, dimensions) "
+  "every `patchHopSize` timestamps, which are fed to the heads in batches of `batchSize` patches. "
+  "All the heads must expect the same input node and patch shape.\n"
+  "\n"
+  "The predictions of each head are stored in the output pool as a matrix, under the name given in `names` "
+  "or, by default, the graph filename without path and extension (e.g., `danceability-msd-musicnn-1`).\n"
+  "\n"
+  "A possible pipeline is as follows::\n"
+  "\n"
+  "  embeddings = TensorflowPredictMusiCNN(graphFilename='msd-musicnn-1.pb', output='model/dense/BiasAdd')(audio)\n"
+  "  heads = TensorflowPredictHeads(graphFilenames=['danceability-msd-musicnn-1.pb', 'mood_happy-msd-musicnn-1.pb'], outputs=['model/Softmax'])\n"
+  "  predictions = heads(embeddings)\n"
+  "\n"
+  "Note: This algorithm does not make any check on the input models so it is "
+  "the user's responsibility to make sure they are valid ones.\n"
+  "\n"
+  "References:\n"
+  "\n"
+  "1. Supported models at https://essentia.upf.edu/models/\n\n");
+
+
+void TensorflowPredictHeads::clearHeads() {
+  for (size_t i = 0; i < _heads.size(); i++) {
+    delete _heads[i];
+  }
+  _heads.clear();
+}
+
+
+void TensorflowPredictHeads::configure() {
+  vector<string> graphFilenames = parameter("graphFilenames").toVectorString();
+
+  // Do not do anything if we did not get any model, as TensorflowPredict does.
+  if (graphFilenames.empty()) return;
+
+  _names = parameter("names").toVectorString();
+  _outputs = parameter("outputs").toVectorString();
+  _input = parameter("input").toString();
+  _patchSize = parameter("patchSize").toInt();
+  _patchHopSize = parameter("patchHopSize").toInt();
+  _batchSize = parameter("batchSize").toInt();
+  _lastPatchMode = parameter("lastPatchMode").toString();
+
+  if (_patchSize == 0) {
+    throw EssentiaException("TensorflowPredictHeads: `patchSize` should be greater than 0");
+  }
+  if (_patchHopSize == 0) {
+    _patchHopSize = _patchSize;
+  }
+  if (_patchHopSize > _patchSize) {
+    throw EssentiaException("TensorflowPredictHeads: `patchHopSize` has to be smaller than `patchSize`");
+  }
+
+  if (_names.empty()) {
+    for (size_t i = 0; i < graphFilenames.size(); i++) {
+      string name = graphFilenames[i];
+      string::size_type n = name.find_last_of("/\\");
+      if (n != string::npos) name = name.substr(n + 1);
+      n = name.rfind('.');
+      if (n != string::npos && n > 0) name = name.substr(0, n);
+      _names.push_back(name);
+    }
+  }
+  if (_names.size() != graphFilenames.size()) {
+    throw EssentiaException("TensorflowPredictHeads: `names` should have as many elements as `graphFilenames`");
+  }
+  if (set<string>(_names.begin(), _names.end()).size() != _names.size()) {
+    throw EssentiaException("TensorflowPredictHeads: the names of the heads should be unique");
+  }
+
+  if (_outputs.size() == 1) {
+    _outputs.assign(graphFilenames.size(), _outputs[0]);
+  }
+  if (_outputs.size() != graphFilenames.size()) {
+    throw EssentiaException("TensorflowPredictHeads: `outputs` should have either one element or as many as `graphFilenames`");
+  }
+
+  clearHeads();
+
+  for (size_t i = 0; i < graphFilenames.size(); i++) {
+    _heads.push_back(AlgorithmFactory::create("TensorflowPredict"));
+    _heads.back()->configure("graphFilename", graphFilenames[i],
+                             "inputs", vector<string>(1, _input),
+                             "outputs", vector<string>(1, _outputs[i]),
+                             INHERIT("isTrainingName"),
+                             INHERIT("intraOpThreads"),
+                             INHERIT("interOpThreads"),
+                             INHERIT("threadPool"),
+                             INHERIT("optimizeGraph"));
+  }
+}
+
+
+vector<pair<int, int> > TensorflowPredictHeads::patches(int nFrames) {
+  // (start, length) of each patch, following VectorRealToTensor
+  vector<pair<int, int> > patches;
+  int start = 0;
+  for (; start + _patchSize <= nFrames; start += _patchHopSize) {
+    patches.push_back(make_pair(start, _patchSize));
+  }
+
+  if (_lastPatchMode == "repeat" && start < nFrames) {
+    patches.push_back(make_pair(start, nFrames - start));
+  }
+
+  if (patches.empty()) {
+    throw EssentiaException("TensorflowPredictHeads: The input has not enough timestamps to "
+                            "produce a patch of the desired size. Consider setting the `lastPatchMode` "
+                            "parameter to `repeat` in order to produce a batch.");
+  }
+  return patches;
+}
+
+
+void TensorflowPredictHeads::compute() {
+  if (_heads.empty()) {
+    throw EssentiaException("TensorflowPredictHeads: This algorithm is not configured. To configure this algorithm you "
+                            "should specify a non-empty list of `graphFilenames` as input parameter.");
+  }
+
+  const TNT::Array2D<Real>& embeddings = _embeddings.get();
+  Pool& predictions = _predictions.get();
+
+  if (!embeddings.dim1()) {
+    throw EssentiaException("TensorflowPredictHeads: empty input signal");
+  }
+
+  for (size_t h = 0; h < _names.size(); h++) {
+    predictions.remove(_names[h]);
+  }
+
+  int dimensions = embeddings.dim2();
+  vector<pair<int, int> > patchList = patches(embeddings.dim1());
+  int nPatches = (int)patchList.size();
+  int batchSize = _batchSize > 0 ? _batchSize : nPatches;
+
+  Pool poolIn;
+  Pool poolOut;
+
+  for (int b = 0; b < nPatches; b += batchSize) {
+    int batch = min(batchSize, nPatches - b);
+
+    // The input tensor is built once and fed to all the heads.
+    Tensor<Real> tensor(batch, 1, _patchSize, dimensions);
+    for (int i = 0; i < batch; i++) {
+      int start = patchList[b + i].first;
+      int length = patchList[b + i].second;
+      for (int j = 0; j < _patchSize; j++) {
+        // the last patch repeats its timestamps in `repeat` mode
+        int row = start + j % length;
+        for (int k = 0; k < dimensions; k++) {
+          tensor(i, 0, j, k) = embeddings[row][k];
+        }
+      }
+    }
+    poolIn.set(_input, tensor);
+
+    for (size_t h = 0; h < _heads.size(); h++) {
+      _heads[h]->input("poolIn").set(poolIn);
+      _heads[h]->output("poolOut").set(poolOut);
+      _heads[h]->compute();
+
+      const Tensor<Real>& out = poolOut.value<Tensor<Real> >(_outputs[h]);
+      vector<Real> frame(out.dimension(3));
+      for (int i = 0; i < out.dimension(0); i++) {
+        for (int j = 0; j < out.dimension(1); j++) {
+          for (int k = 0; k < out.dimension(2); k++) {
+            for (int l = 0; l < out.dimension(3); l++) {
+              frame[l] = out(i, j, k, l);
+            }
+            predictions.add(_names[h], frame);
+          }
+        }
+      }
+    }
+  }
+}
+
+
+void TensorflowPredictHeads::reset() {
+  for (size_t i = 0; i < _heads.size(); i++) {
+    _heads[i]->reset();
+  }
+}
@@ -0,0 +1,91 @@
+/*
+ * Copyright (C) 2006-2022  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#ifndef ESSENTIA_TENSORFLOWPREDICTHEADS_H
+#define ESSENTIA_TENSORFLOWPREDICTHEADS_H
+
+#include "algorithm.h"
+#include "pool.h"
+#include "tnt/tnt.h"
+
+
+namespace essentia {
+namespace standard {
+
+class TensorflowPredictHeads : public Algorithm {
+
+ protected:
+  Input<TNT::Array2D<Real> > _embeddings;
+  Output<Pool> _predictions;
+
+  std::vector<Algorithm*> _heads;
+  std::vector<std::string> _names;
+  std::vector<std::string> _outputs;
+  std::string _input;
+
+  int _patchSize;
+  int _patchHopSize;
+  int _batchSize;
+  std::string _lastPatchMode;
+
+  void clearHeads();
+  std::vector<std::pair<int, int> > patches(int nFrames);
+
+ public:
+  TensorflowPredictHeads() {
+    declareInput(_embeddings, "embeddings", "the input embeddings, shared by all the heads");
+    declareOutput(_predictions, "predictions", "the pool where the predictions of each head are stored under its name");
+  }
+
+  ~TensorflowPredictHeads() {
+    clearHeads();
+  }
+
+  void declareParameters() {
+    const char* defaultOutputsC[] = { "model/Sigmoid" };
+    std::vector<std::string> defaultOutputs = arrayToVector<std::string>(defaultOutputsC);
+
+    declareParameter("graphFilenames", "the names of the files from which to load the TensorFlow graphs of the heads", "", std::vector<std::string>());
+    declareParameter("names", "the names under which to store the predictions of each head. If empty, the graph filenames without path and extension are used", "", std::vector<std::string>());
+    declareParameter("input", "name of the input node in the TensorFlow graphs", "", "model/Placeholder");
+    declareParameter("outputs", "names of the nodes from which to retrieve the output tensors, one per head. A single name is used for all the heads", "", defaultOutputs);
+    declareParameter("isTrainingName", "name of an additional input node to indicate the model if it is in training mode or not. Leave it empty when the model does not need such input", "", "");
+    declareParameter("patchHopSize", "number of timestamps between the beginning of adjacent patches. 0 to avoid overlap", "[0,inf)", 1);
+    declareParameter("lastPatchMode", "what to do with the last timestamps: `repeat` them to fill the last patch or `discard` them", "{discard,repeat}", "discard");
+    declareParameter("batchSize", "batch size for prediction. Set it to -1 or 0 to run all the patches in a single TensorFlow session", "[-1,inf)", 64);
+    declareParameter("patchSize", "number of timestamps required for each inference. This parameter should match the models' expected input shape", "[0,inf)", 1);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
+  }
+
+  void configure();
+  void compute();
+  void reset();
+
+  static const char* name;
+  static const char* category;
+  static const char* description;
+};
+
+} //namespace standard
+} //namespace essentia
+
+#endif // ESSENTIA_TENSORFLOWPREDICTHEADS_H
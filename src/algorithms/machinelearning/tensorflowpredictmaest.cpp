@@ -161,7 +161,11 @@ void TensorflowPredictMAEST::configure() {
                                 "savedModel", savedModel,
                                 "inputs", vector<string>({input}),
                                 "outputs", vector<string>({output}),
-                                "isTrainingName", isTrainingName);
+                                "isTrainingName", isTrainingName,
+                                INHERIT("intraOpThreads"),
+                                INHERIT("interOpThreads"),
+                                INHERIT("threadPool"),
+                                INHERIT("optimizeGraph"));
 }
 
 } // namespace streaming
@@ -249,7 +253,11 @@ void TensorflowPredictMAEST::configure() {
                                        INHERIT("patchHopSize"),
                                        INHERIT("lastPatchMode"),
                                        INHERIT("patchSize"),
-                                       INHERIT("batchSize"));
+                                       INHERIT("batchSize"),
+                                       INHERIT("intraOpThreads"),
+                                       INHERIT("interOpThreads"),
+                                       INHERIT("threadPool"),
+                                       INHERIT("optimizeGraph"));
 }
 
 
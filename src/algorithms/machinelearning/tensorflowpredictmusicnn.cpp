@@ -107,7 +107,8 @@ void TensorflowPredictMusiCNN::configure() {
 
   _vectorRealToTensor->configure("shape", inputShape,
                                  "lastPatchMode", lastPatchMode,
-                                 "patchHopSize", patchHopSize);
+                                 "patchHopSize", patchHopSize,
+                                 INHERIT("maxLatency"));
 
   _configured = true;
 
@@ -126,7 +127,15 @@ void TensorflowPredictMusiCNN::configure() {
                                 "savedModel", savedModel,
                                 "inputs", vector<string>({input}),
                                 "outputs", vector<string>({output}),
-                                "isTrainingName", isTrainingName);
+                                "isTrainingName", isTrainingName,
+                                INHERIT("intraOpThreads"),
+                                INHERIT("interOpThreads"),
+                                INHERIT("threadPool"),
+                                INHERIT("optimizeGraph"),
+                                INHERIT("stats"));
+
+  configureStatsOutput(*this, _outputs, _stats, _tensorflowPredict->output("poolOut"),
+                       parameter("stats").toBool());
 }
 
 } // namespace streaming
@@ -146,6 +155,12 @@ const char* TensorflowPredictMusiCNN::description = DOC(
   "(mel bands). It feeds the model with patches of 187 mel bands frames and "
   "jumps a constant amount of frames determined by `patchHopSize`.\n"
   "\n"
+  "When `stats` is true, the batch size, the duration of the session run in "
+  "seconds and the throughput of each batch are returned in an additional "
+  "`stats` pool, as `stats.batchSize`, `stats.latency` and `stats.throughput`. "
+  "In streaming mode, this output is only available when `stats` is true and "
+  "carries the output pool of each TensorFlow session.\n"
+  "\n"
   "By setting the `batchSize` parameter to -1 or 0 the patches are stored to run a single "
   "TensorFlow session at the end of the stream. This allows to take advantage "
   "of parallelization when GPUs are available, but at the same time it can be "
@@ -184,12 +199,22 @@ void TensorflowPredictMusiCNN::createInnerNetwork() {
 
   *_vectorInput  >> _tensorflowPredictMusiCNN->input("signal");
   _tensorflowPredictMusiCNN->output("predictions") >>  PC(_pool, "predictions");
+  _statsStorage = 0;
 
   _network = new scheduler::Network(_vectorInput);
 }
 
 
 void TensorflowPredictMusiCNN::configure() {
+  bool stats = parameter("stats").toBool();
+
+  // The streaming algorithm has no `stats` output to connect the storage to
+  // when the stats are disabled, so the inner network is created again.
+  if (_statsStorage && !stats) {
+    delete _network;
+    createInnerNetwork();
+  }
+
   _tensorflowPredictMusiCNN->configure(INHERIT("graphFilename"),
                                        INHERIT("savedModel"),
                                        INHERIT("input"),
@@ -199,7 +224,26 @@ void TensorflowPredictMusiCNN::configure() {
                                        INHERIT("accumulate"),
                                        INHERIT("lastPatchMode"),
                                        INHERIT("patchSize"),
-                                       INHERIT("batchSize"));
+                                       INHERIT("batchSize"),
+                                       INHERIT("maxLatency"),
+                                       INHERIT("intraOpThreads"),
+                                       INHERIT("interOpThreads"),
+                                       INHERIT("threadPool"),
+                                       INHERIT("optimizeGraph"),
+                                       INHERIT("stats"));
+
+  if (stats && !_statsStorage) {
+    _statsStorage = new streaming::VectorOutput<Pool>(&_batchPools);
+    _tensorflowPredictMusiCNN->output("stats") >> _statsStorage->input("data");
+    _network->update();
+  }
+
+  if (!stats) {
+    removeStatsOutput(_outputs, outputDescription);
+  }
+  else if (!contains(_outputs, "stats")) {
+    declareOutput(_stats, "stats", tensorflowStatsDescription);
+  }
 }
 
 
@@ -222,6 +266,10 @@ void TensorflowPredictMusiCNN::compute() {
     predictions.clear();
   }
 
+  if (_statsStorage) {
+    collectStats(_batchPools, _stats.get());
+  }
+
   reset();
 }
 
@@ -229,6 +277,7 @@ void TensorflowPredictMusiCNN::compute() {
 void TensorflowPredictMusiCNN::reset() {
   _network->reset();
   _pool.remove("predictions");
+  _batchPools.clear();
 }
 
 } // namespace standard
@@ -25,6 +25,8 @@
 #include "algorithmfactory.h"
 #include "algorithm.h"
 #include "network.h"
+#include "pool.h"
+#include "tensorflowpredictstats.h"
 
 namespace essentia {
 namespace streaming {
@@ -41,6 +43,7 @@ class TensorflowPredictMusiCNN : public AlgorithmComposite {
 
   SinkProxy<Real> _signal;
   SourceProxy<std::vector<Real> > _predictions;
+  SourceProxy<Pool> _stats;
 
   scheduler::Network* _network;
   bool _configured;
@@ -63,6 +66,12 @@ class TensorflowPredictMusiCNN : public AlgorithmComposite {
     declareParameter("accumulate", "(deprecated, use `batchSize`) when true it runs a single Tensorflow session at the end of the stream. Otherwise a session is run for every new patch", "{true,false}", false);
     declareParameter("batchSize", "the batch size for prediction. This allows parallelization when GPUs are available. Set it to -1 or 0 to accumulate all the patches and run a single TensorFlow session at the end of the stream", "[-1,inf)", 64);
     declareParameter("patchSize", "number of frames required for each inference. This parameter should match the model's expected input shape.", "[0,inf)", 187);
+    declareParameter("maxLatency", "the maximum time in seconds that a patch can wait for its batch to be completed before running a session on an incomplete batch. Use 0 to always wait for complete batches", "[0,inf)", 0.0);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
+    declareParameter("stats", "whether to output the batch size, latency and throughput of each TensorFlow session in an additional `stats` output", "{true,false}", false);
   }
 
   void declareProcessOrder() {
@@ -82,7 +91,7 @@ class TensorflowPredictMusiCNN : public AlgorithmComposite {
 } // namespace essentia
 
 #include "vectorinput.h"
-#include "pool.h"
+#include "vectoroutput.h"
 #include "poolstorage.h"
 
 namespace essentia {
@@ -94,11 +103,14 @@ class TensorflowPredictMusiCNN : public Algorithm {
  protected:
   Input<std::vector<Real> > _signal;
   Output<std::vector<std::vector<Real> > > _predictions;
+  Output<Pool> _stats;
 
   streaming::Algorithm* _tensorflowPredictMusiCNN;
   streaming::VectorInput<Real>* _vectorInput;
   scheduler::Network* _network;
   Pool _pool;
+  std::vector<Pool> _batchPools;
+  streaming::VectorOutput<Pool>* _statsStorage;
 
   void createInnerNetwork();
 
@@ -117,6 +129,12 @@ class TensorflowPredictMusiCNN : public Algorithm {
     declareParameter("accumulate", "(deprecated, use `batchSize`) when true it runs a single Tensorflow session at the end of the stream. Otherwise a session is run for every new patch", "{true,false}", false);
     declareParameter("batchSize", "the batch size for prediction. This allows parallelization when GPUs are available. Set it to -1 or 0 to accumulate all the patches and run a single TensorFlow session at the end of the stream", "[-1,inf)", 64);
     declareParameter("patchSize", "number of frames required for each inference. This parameter should match the model's expected input shape.", "[0,inf)", 187);
+    declareParameter("maxLatency", "the maximum time in seconds that a patch can wait for its batch to be completed before running a session on an incomplete batch. Use 0 to always wait for complete batches", "[0,inf)", 0.0);
+    declareParameter("intraOpThreads", "the number of threads used to parallelize the execution of each TensorFlow operation. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("interOpThreads", "the number of threads used to run independent TensorFlow operations concurrently. 0 to let TensorFlow decide", "[0,inf)", 0);
+    declareParameter("threadPool", "the name of an inter-op thread pool shared by all the sessions using the same name. Leave it empty to use TensorFlow's default pool", "", "");
+    declareParameter("optimizeGraph", "whether to let TensorFlow optimize the graph before running it (constant folding, common subexpression elimination, Grappler passes)", "{true,false}", true);
+    declareParameter("stats", "whether to output the batch size, latency and throughput of each TensorFlow session in an additional `stats` output", "{true,false}", false);
   }
 
   void configure();
@@ -135,7 +135,11 @@ void TensorflowPredictTempoCNN::configure() {
                                 "savedModel", savedModel,
                                 "squeeze", false,
                                 "inputs", vector<string>({input}),
-                                "outputs", vector<string>({output}));
+                                "outputs", vector<string>({output}),
+                                INHERIT("intraOpThreads"),
+                                INHERIT("interOpThreads"),
+                                INHERIT("threadPool"),
+                                INHERIT("optimizeGraph"));
 }
 
 } // namespace streaming
@@ -211,7 +215,11 @@ void TensorflowPredictTempoCNN::configure() {
                                         INHERIT("output"),
                                         INHERIT("patchHopSize"),
                                         INHERIT("batchSize"),
-                                        INHERIT("lastPatchMode"));
+                                        INHERIT("lastPatchMode"),
+                                        INHERIT("intraOpThreads"),
+                                        INHERIT("interOpThreads"),
+                                        INHERIT("threadPool"),
+                                        INHERIT("optimizeGraph"));
 }
 
 
@@ -20,6 +20,7 @@
 #include "beattrackermultifeature.h"
 #include "poolstorage.h"
 #include "algorithmfactory.h"
+#include <future>
 
 using namespace std;
 
@@ -31,11 +32,7 @@ const char* BeatTrackerMultiFeature::category = essentia::standard::BeatTrackerM
 const char* BeatTrackerMultiFeature::description = essentia::standard::BeatTrackerMultiFeature::description;
 
 
-BeatTrackerMultiFeature::BeatTrackerMultiFeature() : AlgorithmComposite(),
-    _frameCutter1(0), _windowing1(0), _fft1(0), _cart2polar1(0), _onsetRms1(0),
-    _onsetComplex1(0), _ticksRms1(0), _ticksComplex1(0), _onsetMelFlux1(0),
-    _ticksMelFlux1(0), _onsetBeatEmphasis3(0), _ticksBeatEmphasis3(0),
-    _onsetInfogain4(0), _ticksInfogain4(0), _scale(0), _configured(false) {
+BeatTrackerMultiFeature::BeatTrackerMultiFeature() : AlgorithmComposite() {
 
   declareInput(_signal, 1024, "signal", "input signal");
   declareOutput(_ticks, 0, "ticks", "the estimated tick locations [s]");
@@ -44,93 +41,75 @@ BeatTrackerMultiFeature::BeatTrackerMultiFeature() : AlgorithmComposite(),
   // Need to set the buffer type to multiple frames as all the ticks
   // are output all at once
   _ticks.setBufferType(BufferUsage::forMultipleFrames);
+
+  createInnerNetwork();
 }
 
 void BeatTrackerMultiFeature::createInnerNetwork() {
-  // internal algorithms
-  AlgorithmFactory& factory = AlgorithmFactory::instance();
-
-  _frameCutter1         = factory.create("FrameCutter");
-  _windowing1           = factory.create("Windowing");
-  _fft1                 = factory.create("FFT");
-  _cart2polar1          = factory.create("CartesianToPolar");
-  _onsetRms1            = factory.create("OnsetDetection");
-  _onsetComplex1        = factory.create("OnsetDetection");
-  _onsetMelFlux1        = factory.create("OnsetDetection");
-  _ticksRms1            = factory.create("TempoTapDegara");
-  _ticksComplex1        = factory.create("TempoTapDegara");
-  _ticksMelFlux1        = factory.create("TempoTapDegara");
-
-  _onsetBeatEmphasis3   = factory.create("OnsetDetectionGlobal");
-  _ticksBeatEmphasis3   = factory.create("TempoTapDegara");
-
-  _onsetInfogain4       = factory.create("OnsetDetectionGlobal");
-  _ticksInfogain4       = factory.create("TempoTapDegara");
+  // the onset detection functions of the 2048/512 branches need the whole
+  // signal, so it is stored and all the branches are computed at the end of
+  // the stream, where they can run in parallel
+  _scale = streaming::AlgorithmFactory::create("Scale");
+  _poolStorage = new PoolStorage<Real>(&_pool, "internal.signal");
+
+  // _scale is a dummy algorithm (scale factor = 1.) used so that the signal is
+  // stored by chunks, instead of token by token for generators producing one
+  // token at a time (e.g., VectorInput)
+  _signal                       >>  _scale->input("signal");
+  _scale->output("signal")      >>  _poolStorage->input("data");
+
+  _frameCutter1         = standard::AlgorithmFactory::create("FrameCutter");
+  _windowing1           = standard::AlgorithmFactory::create("Windowing");
+  _fft1                 = standard::AlgorithmFactory::create("FFT");
+  _cart2polar1          = standard::AlgorithmFactory::create("CartesianToPolar");
+  _onsetRms1            = standard::AlgorithmFactory::create("OnsetDetection");
+  _onsetComplex1        = standard::AlgorithmFactory::create("OnsetDetection");
+  _onsetMelFlux1        = standard::AlgorithmFactory::create("OnsetDetection");
+  _ticksRms1            = standard::AlgorithmFactory::create("TempoTapDegara");
+  _ticksComplex1        = standard::AlgorithmFactory::create("TempoTapDegara");
+  _ticksMelFlux1        = standard::AlgorithmFactory::create("TempoTapDegara");
+
+  _onsetBeatEmphasis3   = standard::AlgorithmFactory::create("OnsetDetectionGlobal");
+  _ticksBeatEmphasis3   = standard::AlgorithmFactory::create("TempoTapDegara");
+
+  _onsetInfogain4       = standard::AlgorithmFactory::create("OnsetDetectionGlobal");
+  _ticksInfogain4       = standard::AlgorithmFactory::create("TempoTapDegara");
 
   _tempoTapMaxAgreement = standard::AlgorithmFactory::create("TempoTapMaxAgreement");
-
-  _scale = factory.create("Scale");
-  // TODO this is a dummy algorithm (scale factor = 1.) used because SinkProxy
-  // cannot be attached to multiple algorithms, but we need several processing
-  // chains starting from the input.
-
-  // Connect internal algorithms
-  //_signal                                    >>   _frameCutter1->input("signal");
-  _signal                                    >>   _scale->input("signal");
-  _scale->output("signal")                   >>   _frameCutter1->input("signal");
-  _frameCutter1->output("frame")             >>   _windowing1->input("frame");
-  _windowing1->output("frame")               >>   _fft1->input("frame");
-  _fft1->output("fft")                       >>   _cart2polar1->input("complex");
-  _cart2polar1->output("magnitude")          >>   _onsetComplex1->input("spectrum");
-  _cart2polar1->output("phase")              >>   _onsetComplex1->input("phase");
-  _cart2polar1->output("magnitude")          >>   _onsetRms1->input("spectrum");
-  _cart2polar1->output("phase")              >>   _onsetRms1->input("phase");
-  _cart2polar1->output("magnitude")          >>   _onsetMelFlux1->input("spectrum");
-  _cart2polar1->output("phase")              >>   _onsetMelFlux1->input("phase");
-
-  _onsetComplex1->output("onsetDetection")   >>   _ticksComplex1->input("onsetDetections");
-  _ticksComplex1->output("ticks")            >>   PC(_pool, "internal.ticksComplex");
-  _onsetRms1->output("onsetDetection")       >>   _ticksRms1->input("onsetDetections");
-  _ticksRms1->output("ticks")                >>   PC(_pool, "internal.ticksRms");
-  _onsetMelFlux1->output("onsetDetection")   >>   _ticksMelFlux1->input("onsetDetections");
-  _ticksMelFlux1->output("ticks")            >>   PC(_pool, "internal.ticksMelFlux");
-
-  //_signal                                           >>   _onsetBeatEmphasis3->input("signal");
-  _scale->output("signal")                         >>  _onsetBeatEmphasis3->input("signal");
-  _onsetBeatEmphasis3->output("onsetDetections")   >>  _ticksBeatEmphasis3->input("onsetDetections");
-  _ticksBeatEmphasis3->output("ticks")             >>  PC(_pool, "internal.ticksBeatEmphasis");
-
-  //_signal                                           >> _onsetInfogain4->input("signal");
-  _scale->output("signal")  >> _onsetInfogain4->input("signal");
-  _onsetInfogain4->output("onsetDetections")        >> _ticksInfogain4->input("onsetDetections");
-  _ticksInfogain4->output("ticks")                  >> PC(_pool, "internal.ticksInfogain");
-
-  _network = new scheduler::Network(_scale);
-}
-
-void BeatTrackerMultiFeature::clearAlgos() {
-  if (!_configured) return;
-
-  delete _network;
-  delete _tempoTapMaxAgreement;
 }
 
 
 BeatTrackerMultiFeature::~BeatTrackerMultiFeature() {
-  clearAlgos();
+  delete _scale;
+  delete _poolStorage;
+
+  delete _frameCutter1;
+  delete _windowing1;
+  delete _fft1;
+  delete _cart2polar1;
+  delete _onsetRms1;
+  delete _onsetComplex1;
+  delete _onsetMelFlux1;
+  delete _ticksRms1;
+  delete _ticksComplex1;
+  delete _ticksMelFlux1;
+
+  delete _onsetBeatEmphasis3;
+  delete _ticksBeatEmphasis3;
+
+  delete _onsetInfogain4;
+  delete _ticksInfogain4;
+
+  delete _tempoTapMaxAgreement;
 }
 
 
 void BeatTrackerMultiFeature::configure() {
-  if (_configured) {
-    clearAlgos();
-  }
   _sampleRate = 44100.;
   // TODO will only work with _sampleRate = 44100, check what original
   // RhythmExtractor does with sampleRate parameter
 
   //_sampleRate   = parameter("sampleRate").toReal();
-  createInnerNetwork();
 
   // Configure internal algorithms
   int minTempo = parameter("minTempo").toInt();
@@ -144,12 +123,11 @@ void BeatTrackerMultiFeature::configure() {
   // (JZapata, DBogdanov)
 
   // _scale is used as a dummy algorithm, turn off clipping so that it goes faster
-  _scale->configure("factor", 1., 
+  _scale->configure("factor", 1.,
                     "clipping", false);
 
   _frameCutter1->configure("frameSize", frameSize1,
                           "hopSize", hopSize1,
-                          "silentFrames", "keep",
                           "startFromZero", true);
 
   _windowing1->configure("size", frameSize1, "type", "hann");
@@ -196,10 +174,92 @@ void BeatTrackerMultiFeature::configure() {
                              "resample", "none",
                              "minTempo", minTempo,
                              "maxTempo", maxTempo);
+}
+
 
-  _configured = true;
+void BeatTrackerMultiFeature::computeTicksSpectral(const vector<Real>& signal,
+                                                   vector<Real>& ticksComplex,
+                                                   vector<Real>& ticksRms,
+                                                   vector<Real>& ticksMelFlux) {
+  // the three onset detection functions share the same spectrum
+  vector<Real> frame, frameWindowed, magnitude, phase;
+  vector<complex<Real> > frameFFT;
+  Real complexValue, rmsValue, melFluxValue;
+  vector<Real> complexDetections, rmsDetections, melFluxDetections;
+
+  _frameCutter1->reset();
+  _onsetComplex1->reset();
+  _onsetRms1->reset();
+  _onsetMelFlux1->reset();
+
+  _frameCutter1->input("signal").set(signal);
+  _frameCutter1->output("frame").set(frame);
+  _windowing1->input("frame").set(frame);
+  _windowing1->output("frame").set(frameWindowed);
+  _fft1->input("frame").set(frameWindowed);
+  _fft1->output("fft").set(frameFFT);
+  _cart2polar1->input("complex").set(frameFFT);
+  _cart2polar1->output("magnitude").set(magnitude);
+  _cart2polar1->output("phase").set(phase);
+
+  _onsetComplex1->input("spectrum").set(magnitude);
+  _onsetComplex1->input("phase").set(phase);
+  _onsetComplex1->output("onsetDetection").set(complexValue);
+  _onsetRms1->input("spectrum").set(magnitude);
+  _onsetRms1->input("phase").set(phase);
+  _onsetRms1->output("onsetDetection").set(rmsValue);
+  _onsetMelFlux1->input("spectrum").set(magnitude);
+  _onsetMelFlux1->input("phase").set(phase);
+  _onsetMelFlux1->output("onsetDetection").set(melFluxValue);
+
+  while (true) {
+    _frameCutter1->compute();
+    if (!frame.size()) {
+      break;
+    }
+    _windowing1->compute();
+    _fft1->compute();
+    _cart2polar1->compute();
+
+    _onsetComplex1->compute();
+    _onsetRms1->compute();
+    _onsetMelFlux1->compute();
+    complexDetections.push_back(complexValue);
+    rmsDetections.push_back(rmsValue);
+    melFluxDetections.push_back(melFluxValue);
+  }
+
+  _ticksComplex1->input("onsetDetections").set(complexDetections);
+  _ticksComplex1->output("ticks").set(ticksComplex);
+  _ticksComplex1->compute();
+
+  _ticksRms1->input("onsetDetections").set(rmsDetections);
+  _ticksRms1->output("ticks").set(ticksRms);
+  _ticksRms1->compute();
+
+  _ticksMelFlux1->input("onsetDetections").set(melFluxDetections);
+  _ticksMelFlux1->output("ticks").set(ticksMelFlux);
+  _ticksMelFlux1->compute();
+}
+
+
+void BeatTrackerMultiFeature::computeTicksGlobal(standard::Algorithm* onsetDetection,
+                                                 standard::Algorithm* tempoTap,
+                                                 const vector<Real>& signal,
+                                                 vector<Real>& ticks) {
+  vector<Real> detections;
+
+  onsetDetection->reset();
+  onsetDetection->input("signal").set(signal);
+  onsetDetection->output("onsetDetections").set(detections);
+  onsetDetection->compute();
+
+  tempoTap->input("onsetDetections").set(detections);
+  tempoTap->output("ticks").set(ticks);
+  tempoTap->compute();
 }
 
+
 AlgorithmStatus BeatTrackerMultiFeature::process() {
   if (!shouldStop()) return PASS;
 
@@ -211,20 +271,26 @@ AlgorithmStatus BeatTrackerMultiFeature::process() {
 
   // ticks candidates might be empty for very short signals, but
   // it is ok to feed empty tick vetors to TempoTapMaxAgreement
-  if (_pool.contains<vector<Real> >("internal.ticksComplex")) {
-    tickCandidates[0] = _pool.value<vector<Real> >("internal.ticksComplex");
-  }
-  if (_pool.contains<vector<Real> >("internal.ticksRms")) {
-    tickCandidates[1] = _pool.value<vector<Real> >("internal.ticksRms");
-  }
-  if (_pool.contains<vector<Real> >("internal.ticksMelFlux")) {
-    tickCandidates[2] = _pool.value<vector<Real> >("internal.ticksMelFlux");
-  }
-  if (_pool.contains<vector<Real> >("internal.ticksBeatEmphasis")) {
-    tickCandidates[3] = _pool.value<vector<Real> >("internal.ticksBeatEmphasis");
-  }
-  if (_pool.contains<vector<Real> >("internal.ticksInfogain")) {
-    tickCandidates[4] = _pool.value<vector<Real> >("internal.ticksInfogain");
+  if (_pool.contains<vector<Real> >("internal.signal")) {
+    const vector<Real>& signal = _pool.value<vector<Real> >("internal.signal");
+
+    // the branches do not share any algorithm, so that they can run in
+    // parallel. Exceptions are rethrown by get()
+    future<void> beatEmphasis = async(launch::async,
+                                      &BeatTrackerMultiFeature::computeTicksGlobal, this,
+                                      _onsetBeatEmphasis3, _ticksBeatEmphasis3,
+                                      cref(signal), ref(tickCandidates[3]));
+    future<void> infogain = async(launch::async,
+                                  &BeatTrackerMultiFeature::computeTicksGlobal, this,
+                                  _onsetInfogain4, _ticksInfogain4,
+                                  cref(signal), ref(tickCandidates[4]));
+
+    computeTicksSpectral(signal, tickCandidates[0], tickCandidates[1], tickCandidates[2]);
+    beatEmphasis.get();
+    infogain.get();
+
+    // the whole signal is not needed anymore, free it right away
+    _pool.remove("internal.signal");
   }
 
   _tempoTapMaxAgreement->input("tickCandidates").set(tickCandidates);
@@ -242,6 +308,18 @@ AlgorithmStatus BeatTrackerMultiFeature::process() {
 
 void BeatTrackerMultiFeature::reset() {
   AlgorithmComposite::reset();
+  _pool.remove("internal.signal");
+  _frameCutter1->reset();
+  _onsetRms1->reset();
+  _onsetComplex1->reset();
+  _onsetMelFlux1->reset();
+  _ticksRms1->reset();
+  _ticksComplex1->reset();
+  _ticksMelFlux1->reset();
+  _onsetBeatEmphasis3->reset();
+  _ticksBeatEmphasis3->reset();
+  _onsetInfogain4->reset();
+  _ticksInfogain4->reset();
   _tempoTapMaxAgreement->reset();
 }
 
@@ -262,6 +340,8 @@ const char* BeatTrackerMultiFeature::description = DOC("This algorithm estimates
 "  - beat emphasis function (see 'beat_emphasis' method in OnsetDetectionGlobal algorithm, 2048/512)\n"
 "  - spectral flux between histogrammed spectrum frames, measured by the modified information gain (see 'infogain' method in OnsetDetectionGlobal algorithm, 2048/512)\n"
 "\n"
+"The detection functions are computed at the end of the stream, in parallel threads, with the three 2048/1024 ones sharing the same spectrum.\n"
+"\n"
 "You can follow these guidelines [2] to assess the quality of beats estimation based on the computed confidence value:\n"
 "  - [0, 1)      very low confidence, the input signal is hard for the employed candidate beat trackers\n"
 "  - [1, 1.5]    low confidence\n"
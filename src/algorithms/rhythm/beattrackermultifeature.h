@@ -36,34 +36,39 @@ class BeatTrackerMultiFeature : public AlgorithmComposite {
   Source<Real> _confidence;
 
   Pool _pool;
-
-  // algorithm numeration corresponds to the process chains
-  Algorithm* _frameCutter1;
-  Algorithm* _windowing1;
-  Algorithm* _fft1;
-  Algorithm* _cart2polar1;
-  Algorithm* _onsetRms1;
-  Algorithm* _onsetComplex1;
-  Algorithm* _ticksRms1;
-  Algorithm* _ticksComplex1;
-  Algorithm* _onsetMelFlux1;
-  Algorithm* _ticksMelFlux1;
-
-  Algorithm* _onsetBeatEmphasis3;
-  Algorithm* _ticksBeatEmphasis3;
-
-  Algorithm* _onsetInfogain4;
-  Algorithm* _ticksInfogain4;
-
-  standard::Algorithm* _tempoTapMaxAgreement;
-
   Algorithm* _scale;
+  Algorithm* _poolStorage;
+
+  // algorithm numeration corresponds to the processing branches, which are
+  // independent and run in parallel threads once the whole signal is stored
+  standard::Algorithm* _frameCutter1;
+  standard::Algorithm* _windowing1;
+  standard::Algorithm* _fft1;
+  standard::Algorithm* _cart2polar1;
+  standard::Algorithm* _onsetRms1;
+  standard::Algorithm* _onsetComplex1;
+  standard::Algorithm* _ticksRms1;
+  standard::Algorithm* _ticksComplex1;
+  standard::Algorithm* _onsetMelFlux1;
+  standard::Algorithm* _ticksMelFlux1;
+
+  standard::Algorithm* _onsetBeatEmphasis3;
+  standard::Algorithm* _ticksBeatEmphasis3;
+
+  standard::Algorithm* _onsetInfogain4;
+  standard::Algorithm* _ticksInfogain4;
 
-  scheduler::Network* _network;
-  bool _configured;
+  standard::Algorithm* _tempoTapMaxAgreement;
 
   void createInnerNetwork();
-  void clearAlgos();
+  void computeTicksSpectral(const std::vector<Real>& signal,
+                            std::vector<Real>& ticksComplex,
+                            std::vector<Real>& ticksRms,
+                            std::vector<Real>& ticksMelFlux);
+  void computeTicksGlobal(standard::Algorithm* onsetDetection,
+                          standard::Algorithm* tempoTap,
+                          const std::vector<Real>& signal,
+                          std::vector<Real>& ticks);
   Real _sampleRate;
 
  public:
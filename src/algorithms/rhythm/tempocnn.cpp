@@ -73,7 +73,11 @@ void TempoCNN::configure() {
                                         INHERIT("output"),
                                         INHERIT("patchHopSize"),
                                         INHERIT("lastPatchMode"),
-                                        INHERIT("batchSize"));
+                                        INHERIT("batchSize"),
+                                        INHERIT("intraOpThreads"),
+                                        INHERIT("interOpThreads"),
+                                        INHERIT("threadPool"),
+                                        INHERIT("optimizeGraph"));
 
   _aggregationMethod = parameter("aggregationMethod").toLower();
 }
@@ -19,6 +19,7 @@
 
 #include "fftw.h"
 #include "essentia.h"
+#include <cstdlib>
 
 using namespace std;
 using namespace essentia;
@@ -36,16 +37,66 @@ const char* FFTW::description = DOC("This algorithm computes the positive comple
 "  http://mathworld.wolfram.com/FastFourierTransform.html");
 
 ForcedMutex FFTW::globalFFTWMutex;
+map<pair<int, int>, fftwf_plan> FFTW::_plans;
 
-FFTW::~FFTW() {
+fftwf_plan FFTW::plan(int size, PlanType type) {
   ForcedMutexLocker lock(globalFFTWMutex);
 
+  map<pair<int, int>, fftwf_plan>::const_iterator it = _plans.find(make_pair(size, (int)type));
+  if (it != _plans.end()) return it->second;
+
+  // the wisdom file is read the first time a plan is created
+  static const char* wisdomFile = getenv("ESSENTIA_FFTW_WISDOM");
+  static bool wisdomLoaded = false;
+  if (wisdomFile && !wisdomLoaded) {
+    fftwf_import_wisdom_from_filename(wisdomFile);
+    wisdomLoaded = true;
+  }
+
+  // FFTW_MEASURE overwrites the arrays, so plan on temporary ones. They have
+  // the same alignment as the ones the algorithms allocate with fftwf_malloc
+  unsigned flags = wisdomFile ? FFTW_MEASURE : FFTW_ESTIMATE;
+  fftwf_complex* in = (fftwf_complex*)fftwf_malloc(sizeof(fftwf_complex)*size);
+  fftwf_complex* out = (fftwf_complex*)fftwf_malloc(sizeof(fftwf_complex)*size);
+  fftwf_plan result = 0;
+
+  switch (type) {
+    case REAL_FORWARD:
+      result = fftwf_plan_dft_r2c_1d(size, (float*)in, out, flags);
+      break;
+    case REAL_BACKWARD:
+      result = fftwf_plan_dft_c2r_1d(size, in, (float*)out, flags);
+      break;
+    case COMPLEX_FORWARD:
+      result = fftwf_plan_dft_1d(size, in, out, FFTW_FORWARD, flags);
+      break;
+    case COMPLEX_BACKWARD:
+      result = fftwf_plan_dft_1d(size, in, out, FFTW_BACKWARD, flags);
+      break;
+  }
+
+  fftwf_free(in);
+  fftwf_free(out);
+
+  if (result == 0) {
+    throw EssentiaException("FFT: could not create a plan for size ", size);
+  }
+
+  _plans[make_pair(size, (int)type)] = result;
+
+  if (wisdomFile) fftwf_export_wisdom_to_filename(wisdomFile);
+
+  return result;
+}
+
+
+FFTW::~FFTW() {
+  // plans are owned by the plan cache, only the buffers need to be freed
   // we might have called essentia::shutdown() before this algorithm goes out
   // of scope, so make sure we're not doing stupid things here
   // This will cause a memory leak then, but it is definitely a better choice
   // than a crash (right, right??? :-) )
   if (essentia::isInitialized()) {
-    fftwf_destroy_plan(_fftPlan);
     fftwf_free(_input);
     fftwf_free(_output);
   }
@@ -71,7 +122,7 @@ void FFTW::compute() {
   memcpy(_input, &signal[0], size*sizeof(Real));
 
   // calculate the fft
-  fftwf_execute(_fftPlan);
+  fftwf_execute_dft_r2c(_fftPlan, _input, (fftwf_complex*)_output);
 
   // copy result from plan to output vector
   fft.resize(size/2+1);
@@ -84,8 +135,6 @@ void FFTW::configure() {
 }
 
 void FFTW::createFFTObject(int size) {
-  ForcedMutexLocker lock(globalFFTWMutex);
-
   // This is only needed because at the moment we return half of the spectrum,
   // which means that there are 2 different input signals that could yield the
   // same FFT...
@@ -99,10 +148,6 @@ void FFTW::createFFTObject(int size) {
   _input = (Real*)fftwf_malloc(sizeof(Real)*size);
   _output = (complex<Real>*)fftwf_malloc(sizeof(complex<Real>)*size);
 
-  if (_fftPlan != 0) {
-    fftwf_destroy_plan(_fftPlan);
-  }
-
-  _fftPlan = fftwf_plan_dft_r2c_1d(size, _input, (fftwf_complex*)_output, FFTW_ESTIMATE);
+  _fftPlan = plan(size, REAL_FORWARD);
   _fftPlanSize = size;
 }
@@ -23,6 +23,7 @@
 #include "algorithm.h"
 #include "threading.h"
 #include <complex>
+#include <map>
 #include <fftw3.h>
 
 namespace essentia {
@@ -53,11 +54,31 @@ class FFTW : public Algorithm {
   static const char* category;
   static const char* description;
 
+  enum PlanType {
+    REAL_FORWARD,
+    REAL_BACKWARD,
+    COMPLEX_FORWARD,
+    COMPLEX_BACKWARD
+  };
+
+  /**
+   * Returns the plan for a transform of the given size and type, which is only
+   * created the first time it is requested. Plans are shared by all the FFTW
+   * algorithms in the process and are never destroyed, so they have to be run
+   * with the new-array execute functions (fftwf_execute_dft_r2c, ...) on
+   * buffers allocated with fftwf_malloc.
+   * If the ESSENTIA_FFTW_WISDOM environment variable is set, plans are measured
+   * instead of estimated, and the FFTW wisdom is loaded from and saved to the
+   * file it points to, so that the measurements are only done once.
+   */
+  static fftwf_plan plan(int size, PlanType type);
+
  protected:
   friend class IFFTW;
   friend class FFTWComplex;
   friend class IFFTWComplex;
   static ForcedMutex globalFFTWMutex;
+  static std::map<std::pair<int, int>, fftwf_plan> _plans;
 
   fftwf_plan _fftPlan;
   int _fftPlanSize;
@@ -38,14 +38,12 @@ const char* FFTWComplex::description = DOC("This algorithm computes the complex
 
 
 FFTWComplex::~FFTWComplex() {
-  ForcedMutexLocker lock(FFTW::globalFFTWMutex);
-
+  // plans are owned by the plan cache, only the buffers need to be freed
   // we might have called essentia::shutdown() before this algorithm goes out
   // of scope, so make sure we're not doing stupid things here
   // This will cause a memory leak then, but it is definitely a better choice
   // than a crash (right, right??? :-) )
   if (essentia::isInitialized()) {
-    fftwf_destroy_plan(_fftPlan);
     fftwf_free(_input);
     fftwf_free(_output);
   }
@@ -71,7 +69,7 @@ void FFTWComplex::compute() {
   memcpy(_input, &signal[0], size*sizeof(complex<Real>));
 
   // calculate the fft
-  fftwf_execute(_fftPlan);
+  fftwf_execute_dft(_fftPlan, (fftwf_complex*)_input, (fftwf_complex*)_output);
 
   // copy result from plan to output vector
   if (_negativeFrequencies){
@@ -90,8 +88,6 @@ void FFTWComplex::configure() {
 }
 
 void FFTWComplex::createFFTObject(int size) {
-  ForcedMutexLocker lock(FFTW::globalFFTWMutex);
-
   // This is only needed because at the moment we return half of the spectrum,
   // which means that there are 2 different input signals that could yield the
   // same FFT...
@@ -105,10 +101,6 @@ void FFTWComplex::createFFTObject(int size) {
   _input = (complex<Real>*)fftwf_malloc(sizeof(complex<Real>)*size);
   _output = (complex<Real>*)fftwf_malloc(sizeof(complex<Real>)*size);
 
-  if (_fftPlan != 0) {
-    fftwf_destroy_plan(_fftPlan);
-  }
-
-  _fftPlan = fftwf_plan_dft_1d(size, (fftwf_complex*)_input, (fftwf_complex*)_output, FFTW_FORWARD, FFTW_ESTIMATE);
+  _fftPlan = FFTW::plan(size, FFTW::COMPLEX_FORWARD);
   _fftPlanSize = size;
 }
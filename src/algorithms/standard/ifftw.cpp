@@ -38,9 +38,7 @@ const char* IFFTW::description = DOC("This algorithm calculates the inverse shor
 
 
 IFFTW::~IFFTW() {
-  ForcedMutexLocker lock(FFTW::globalFFTWMutex);
-
-  fftwf_destroy_plan(_fftPlan);
+  // plans are owned by the plan cache, only the buffers need to be freed
   fftwf_free(_input);
   fftwf_free(_output);
 }
@@ -64,7 +62,7 @@ void IFFTW::compute() {
   memcpy(_input, &fft[0], (size/2+1)*sizeof(complex<Real>));
 
   // calculate the fft
-  fftwf_execute(_fftPlan);
+  fftwf_execute_dft_c2r(_fftPlan, (fftwf_complex*)_input, _output);
 
   // copy result from plan to output vector
   signal.resize(size);
@@ -85,20 +83,13 @@ void IFFTW::configure() {
 }
 
 void IFFTW::createFFTObject(int size) {
-  ForcedMutexLocker lock(FFTW::globalFFTWMutex);
-
   // create the temporary storage array
   fftwf_free(_input);
   fftwf_free(_output);
   _input = (complex<Real>*)fftwf_malloc(sizeof(complex<Real>)*size);
   _output = (Real*)fftwf_malloc(sizeof(Real)*size);
 
-  if (_fftPlan != 0) {
-    fftwf_destroy_plan(_fftPlan);
-  }
-
-  //_fftPlan = fftwf_plan_dft_c2r_1d(size, (fftwf_complex*)_input, _output, FFTW_MEASURE);
-  _fftPlan = fftwf_plan_dft_c2r_1d(size, (fftwf_complex*)_input, _output, FFTW_ESTIMATE);
+  _fftPlan = FFTW::plan(size, FFTW::REAL_BACKWARD);
   _fftPlanSize = size;
 
 }
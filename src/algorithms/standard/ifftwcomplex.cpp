@@ -38,9 +38,7 @@ const char* IFFTWComplex::description = DOC("This algorithm calculates the inver
 
 
 IFFTWComplex::~IFFTWComplex() {
-  ForcedMutexLocker lock(FFTW::globalFFTWMutex);
-
-  fftwf_destroy_plan(_fftPlan);
+  // plans are owned by the plan cache, only the buffers need to be freed
   fftwf_free(_input);
   fftwf_free(_output);
 }
@@ -64,7 +62,7 @@ void IFFTWComplex::compute() {
   memcpy(_input, &fft[0], size*sizeof(complex<Real>));
 
   // calculate the fft
-  fftwf_execute(_fftPlan);
+  fftwf_execute_dft(_fftPlan, (fftwf_complex*)_input, (fftwf_complex*)_output);
 
   // copy result from plan to output vector
   signal.resize(size);
@@ -85,20 +83,13 @@ void IFFTWComplex::configure() {
 }
 
 void IFFTWComplex::createFFTObject(int size) {
-  ForcedMutexLocker lock(FFTW::globalFFTWMutex);
-
   // create the temporary storage array
   fftwf_free(_input);
   fftwf_free(_output);
   _input = (complex<Real>*)fftwf_malloc(sizeof(complex<Real>)*size);
   _output = (complex<Real>*)fftwf_malloc(sizeof(complex<Real>)*size);
 
-  if (_fftPlan != 0) {
-    fftwf_destroy_plan(_fftPlan);
-  }
-
-  //_fftPlan = fftwf_plan_dft_c2r_1d(size, (fftwf_complex*)_input, _output, FFTW_MEASURE);
-  _fftPlan = fftwf_plan_dft_1d(size, (fftwf_complex*)_input, (fftwf_complex*)_output, FFTW_BACKWARD, FFTW_ESTIMATE);
+  _fftPlan = FFTW::plan(size, FFTW::COMPLEX_BACKWARD);
   _fftPlanSize = size;
 
 }
@@ -33,7 +33,11 @@ const char* VectorRealToTensor::description = DOC("This algorithm generates tens
 "  - channels: Number of channels per tensor. Currently, only single-channel tensors are supported. Otherwise, an exception is thrown.\n"
 "  - patchSize: Number of timestamps (i.e., number of frames) per patch.\n"
 "  - featureSize: Expected number of features (e.g., mel bands) of every input frame. This algorithm throws an exception if the size of any frame is different from featureSize.\n"
-"Additionally, the patchHopSize and batchHopSize parameters provide control over the amount of overlap on those dimensions.");
+"Additionally, the patchHopSize and batchHopSize parameters provide control over the amount of overlap on those dimensions.\n"
+"\n"
+"For real-time applications, the `maxLatency` parameter bounds the time that the patches wait for a batch to be completed. "
+"When the first patch of the current batch has waited longer than `maxLatency` seconds, the patches accumulated so far are pushed as a smaller batch. "
+"The deadline is checked every time new frames arrive, and it does not apply when batchSize is -1 or 0.");
 
 
 void VectorRealToTensor::configure() {
@@ -42,6 +46,7 @@ void VectorRealToTensor::configure() {
   _batchHopSize = parameter("batchHopSize").toInt();
   _lastPatchMode = parameter("lastPatchMode").toString();
   _lastBatchMode = parameter("lastBatchMode").toString();
+  _maxLatency = parameter("maxLatency").toReal();
 
   _shape.resize(shape.size());
   for (size_t i = 0; i < shape.size(); i++) {
@@ -92,6 +97,14 @@ void VectorRealToTensor::configure() {
 }
 
 
+bool VectorRealToTensor::latencyExpired() {
+  if (_maxLatency <= 0 || _accumulate || _acc.empty()) return false;
+
+  chrono::duration<double> waited = chrono::steady_clock::now() - _batchStart;
+  return waited.count() >= _maxLatency;
+}
+
+
 AlgorithmStatus VectorRealToTensor::process() {
   EXEC_DEBUG("process()");
   if (_timeStamps != _frame.acquireSize()) {
@@ -105,6 +118,13 @@ AlgorithmStatus VectorRealToTensor::process() {
   int available = _frame.available();
   bool addPatch = (available >= _timeStamps);
 
+  // Push the patches accumulated so far if the oldest one has waited too long.
+  // The new patch, if any, is left for the next batch.
+  if (!_push && latencyExpired()) {
+    _push = true;
+    addPatch = false;
+  }
+
   // If we should stop just take the remaining frames.
   if (shouldStop() && (available < _timeStamps)) {
     _frame.setAcquireSize(available);
@@ -168,6 +188,10 @@ AlgorithmStatus VectorRealToTensor::process() {
       }
     }
 
+    if (_acc.empty()) {
+      _batchStart = chrono::steady_clock::now();
+    }
+
     // Add a regular patch.
     if ((int)frame.size() == _timeStamps) {
       _acc.push_back(frame);
@@ -206,6 +230,7 @@ AlgorithmStatus VectorRealToTensor::process() {
   // 1) we have filled a batch
   // 2) we have reached the end of the stream in accumulate mode
   // 3) we have reached the end of the stream with lastBatchMode = "push"
+  // 4) the oldest patch has waited longer than maxLatency
   if (_push) {
     vector<int> shape = _shape;
     int batchHopSize = _batchHopSize;
@@ -216,9 +241,10 @@ AlgorithmStatus VectorRealToTensor::process() {
     if (_accumulate) {
       reshapeBatch = true;
     
-    // or if we have reached the end of the stream with lastBatchModel = "push"
-    // and there are not enough patches to fill a regular batch.   
-    } else if (shouldStop() and _acc.size() < _shape[0]) {
+    // or if there are not enough patches to fill a regular batch, either
+    // because we have reached the end of the stream with lastBatchModel = "push"
+    // or because maxLatency has expired.
+    } else if ((int)_acc.size() < _shape[0]) {
       reshapeBatch = true;
     }
 
@@ -252,6 +278,9 @@ AlgorithmStatus VectorRealToTensor::process() {
     // Empty the accumulator.
     _acc.erase(_acc.begin(), _acc.begin() + batchHopSize);
 
+    // The patches kept for the next batch (batchHopSize overlap) start waiting now.
+    _batchStart = chrono::steady_clock::now();
+
     _push = false;
     outStatus = OK;
   }
@@ -20,6 +20,7 @@
 #ifndef ESSENTIA_VECTORREALTOTENSOR_H
 #define ESSENTIA_VECTORREALTOTENSOR_H
 
+#include <chrono>
 #include "streamingalgorithm.h"
 #include "vectoroutput.h"
 
@@ -39,9 +40,15 @@ class VectorRealToTensor : public Algorithm {
   bool _accumulate;
   std::string _lastPatchMode;
   std::string _lastBatchMode;
+  Real _maxLatency;
 
   std::vector<std::vector<std::vector<Real> > > _acc;
 
+  // time at which the oldest patch in _acc was added
+  std::chrono::steady_clock::time_point _batchStart;
+
+  bool latencyExpired();
+
  public:
   VectorRealToTensor() : _push(false), _accumulate(false) {
     declareInput(_frame, 187,"frame", "the input frames");
@@ -58,6 +65,7 @@ class VectorRealToTensor : public Algorithm {
     declareParameter("batchHopSize", "number of patches between the beginnings of adjacent batches. Use `0` to avoid overlap", "[0,inf)", 0);
     declareParameter("lastPatchMode", "what to do with the last frames: `repeat` them to fill the last patch or `discard` them", "{discard,repeat}", "repeat");
     declareParameter("lastBatchMode", "what to do with the last patches: `push` an incomplete batch (if the models accepts dynamic batches) or `discard` them", "{discard,push}", "push");
+    declareParameter("maxLatency", "maximum time in seconds that a patch can wait for its batch to be filled. When it expires an incomplete batch is pushed (if the models accepts dynamic batches). Use `0` to always wait for complete batches", "[0,inf)", 0.0);
   }
 
   void configure();
@@ -63,7 +63,11 @@ void PitchCREPE::configure() {
                                      INHERIT("input"),
                                      INHERIT("output"),
                                      INHERIT("hopSize"),
-                                     INHERIT("batchSize"));
+                                     INHERIT("batchSize"),
+                                     INHERIT("intraOpThreads"),
+                                     INHERIT("interOpThreads"),
+                                     INHERIT("threadPool"),
+                                     INHERIT("optimizeGraph"));
 
   _hopSize = parameter("hopSize").toFloat();
   // _viterbi = parameter("viterbi").toBool();
@@ -33,6 +33,7 @@
 #include <utility> // for pair
 #include <sstream>
 #include <algorithm> // for std::sort
+#include <iterator>
 #include <deque>
 #include "types.h"
 #include "utils/tnt/tnt.h"
@@ -1169,32 +1170,61 @@ T dotProduct(const std::vector<T>& xArray, const std::vector<T>& yArray) {
 }
 
 
-/**	
- * returns the q-th percentile of an 1D input array (same as numpy percentile implementation).	
- * Throws an exception if the input array is empty.	
- */ 
+/**
+ * returns the q-th percentile of the values in the range [first, last), which
+ * are reordered. The percentile is linearly interpolated between the closest
+ * values, as in numpy.percentile, which are found by selection (nth_element)
+ * instead of sorting all the values.
+ * The range should not be empty.
+ */
+template <typename RandomIterator>
+typename std::iterator_traits<RandomIterator>::value_type
+percentileInPlace(RandomIterator first, RandomIterator last, Real qpercentile) {
+  typedef typename std::iterator_traits<RandomIterator>::value_type T;
+  int size = int(last - first);
+
+  Real k = (size - 1) * qpercentile / 100.;
+  int lower = std::min(std::max(int(std::floor(k)), 0), size - 1);
+
+  std::nth_element(first, first + lower, last);
+  T result = first[lower];
+
+  // apply interpolation with the next value, the smallest of the values after lower
+  if (k > lower && lower + 1 < size) {
+    T upper = *std::min_element(first + lower + 1, last);
+    result += (upper - result) * (k - lower);
+  }
+  return result;
+}
+
+/**
+ * returns the q-th percentile of an 1D input array (same as numpy percentile implementation).
+ * Throws an exception if the input array is empty.
+ */
 template <typename T> T percentile(const std::vector<T>& array, Real qpercentile) {
   if (array.empty())
     throw EssentiaException("percentile: trying to calculate percentile of empty array");
 
-  std::vector<T> sorted_array = array;
-  // sort the array
-  std::sort(sorted_array.begin(), sorted_array.end());
-  qpercentile /= 100.;
+  std::vector<T> values = array;
+  return percentileInPlace(values.begin(), values.end(), qpercentile);
+}
 
-  Real k;
-  int sortArraySize = sorted_array.size();
-  if (sortArraySize > 1) {
-    k = (sortArraySize - 1) * qpercentile;
-  }
-  else {
-    // to avoid zero value in arrays with single element
-    k = sortArraySize * qpercentile;
+/**
+ * returns the q-th percentile of each row of a (rows, cols) matrix stored
+ * contiguously in row-major order.
+ */
+template <typename T>
+std::vector<T> rowPercentiles(const std::vector<T>& matrix, size_t rows, size_t cols, Real qpercentile) {
+  if (rows == 0 || cols == 0 || matrix.size() != rows * cols)
+    throw EssentiaException("rowPercentiles: the size of the input matrix does not match the given shape");
+
+  std::vector<T> result(rows);
+  std::vector<T> row(cols);
+  for (size_t i=0; i<rows; i++) {
+    std::copy(matrix.begin() + i*cols, matrix.begin() + (i+1)*cols, row.begin());
+    result[i] = percentileInPlace(row.begin(), row.end(), qpercentile);
   }
-  // apply interpolation
-  Real d0 = sorted_array[int(std::floor(k))] * (std::ceil(k) - k);
-  Real d1 = sorted_array[int(std::ceil(k))] * (k - std::floor(k));
-  return d0 + d1;
+  return result;
 }
 
 
@@ -1271,6 +1301,66 @@ void heavisideStepFunction(std::vector<std::vector<T> >& inputArray) {
 }
 
 
+/**
+ * Copies a 2D vector to a contiguous row-major Eigen matrix.
+ * Throws an exception if the rows have different sizes.
+ */
+template <typename T>
+Eigen::Matrix<T, Eigen::Dynamic, Eigen::Dynamic, Eigen::RowMajor> toRowMajorMatrix(const std::vector<std::vector<T> >& m) {
+  Eigen::Matrix<T, Eigen::Dynamic, Eigen::Dynamic, Eigen::RowMajor> result(m.size(), m.empty() ? 0 : m[0].size());
+  for (size_t i=0; i<m.size(); i++) {
+    if (m[i].size() != m[0].size())
+      throw EssentiaException("toRowMajorMatrix: all the rows of the input array should have the same size");
+    std::copy(m[i].begin(), m[i].end(), result.row(i).data());
+  }
+  return result;
+}
+
+/**
+ * Pairwise euclidean distances between two 2D vectors, written to `pdist` as a
+ * contiguous row-major (m.shape[0], n.shape[0]) matrix.
+ * The distances are computed as sqrt(|a|^2 + |b|^2 - 2ab), with all the dot
+ * products ab obtained with a single (blocked and vectorized) matrix product.
+ * As this expansion loses precision for close rows, the distances that are
+ * small relative to the norms are computed again directly as |a - b|.
+ * Throws an exception if the input array is empty or if the rows of the
+ * input arrays have different sizes.
+ */
+template <typename T>
+void pairwiseDistance(const std::vector<std::vector<T> >& m, const std::vector<std::vector<T> >& n, std::vector<T>& pdist) {
+  typedef Eigen::Matrix<T, Eigen::Dynamic, Eigen::Dynamic, Eigen::RowMajor> RowMajorMatrix;
+
+  if (m.empty() || n.empty())
+    throw EssentiaException("pairwiseDistance: found empty array as input!");
+  if (m[0].size() != n[0].size())
+    throw EssentiaException("pairwiseDistance: the input arrays should have the same number of columns");
+
+  RowMajorMatrix a = toRowMajorMatrix(m);
+  RowMajorMatrix b = toRowMajorMatrix(n);
+  Eigen::Matrix<T, Eigen::Dynamic, 1> aNorms = a.rowwise().squaredNorm();
+  Eigen::Matrix<T, 1, Eigen::Dynamic> bNorms = b.rowwise().squaredNorm().transpose();
+
+  pdist.resize(m.size() * n.size());
+  Eigen::Map<RowMajorMatrix> d(&pdist[0], m.size(), n.size());
+  d.noalias() = (T)-2 * a * b.transpose();
+  d.colwise() += aNorms;
+  d.rowwise() += bNorms;
+
+  // the cancellation in the expansion leaves a rounding error of the order of
+  // epsilon * (|a|^2 + |b|^2), which may even make the result negative: close
+  // rows (e.g. identical rows, that should have a zero distance) are computed
+  // directly instead
+  const T tolerance = std::sqrt(std::numeric_limits<T>::epsilon());
+  for (Eigen::Index i=0; i<d.rows(); i++) {
+    for (Eigen::Index j=0; j<d.cols(); j++) {
+      if (d(i, j) <= tolerance * (aNorms(i) + bNorms(j))) {
+        d(i, j) = (a.row(i) - b.row(j)).squaredNorm();
+      }
+    }
+  }
+  d = d.cwiseSqrt();
+}
+
 /**
  * Pairwise euclidean distances between two 2D vectors.
  * Throws an exception if the input array is empty.
@@ -1279,24 +1369,30 @@ void heavisideStepFunction(std::vector<std::vector<T> >& inputArray) {
  */
 template <typename T>
 std::vector<std::vector<T> > pairwiseDistance(const std::vector<std::vector<T> >& m, const std::vector<std::vector<T> >& n) {
+  std::vector<T> distances;
+  pairwiseDistance(m, n, distances);
 
-  if (m.empty() || n.empty())
-    throw EssentiaException("pairwiseDistance: found empty array as input!");
-
-  size_t mSize = m.size();
   size_t nSize = n.size();
-  std::vector<std::vector<T> > pdist(mSize, std::vector<T>(nSize));
-  for (size_t i=0; i<mSize; i++) {
-      for (size_t j=0; j<nSize; j++) {
-          Real item = dotProduct(m[i], m[i]) - 2*dotProduct(m[i], n[j]) + dotProduct(n[j], n[j]);
-          pdist[i][j] = sqrt(item);
-      }
+  std::vector<std::vector<T> > pdist(m.size());
+  for (size_t i=0; i<m.size(); i++) {
+    pdist[i].assign(distances.begin() + i*nSize, distances.begin() + (i+1)*nSize);
   }
-  if (pdist.empty())
-      throw EssentiaException("pairwiseDistance: outputs an empty similarity matrix!");
   return pdist;
 }
 
+/**
+ * Transposes a (rows, cols) matrix stored contiguously in row-major order.
+ */
+template <typename T>
+std::vector<T> transposeMatrix(const std::vector<T>& matrix, size_t rows, size_t cols) {
+  typedef Eigen::Matrix<T, Eigen::Dynamic, Eigen::Dynamic, Eigen::RowMajor> RowMajorMatrix;
+
+  std::vector<T> result(matrix.size());
+  if (matrix.empty()) return result;
+  Eigen::Map<RowMajorMatrix>(&result[0], cols, rows) = Eigen::Map<const RowMajorMatrix>(&matrix[0], rows, cols).transpose();
+  return result;
+}
+
 /**
  * Sets `squeezeShape`, `summarizerShape`, `broadcastShape` to perform operations 
  * on a Tensor with the shape of `tensor` along the `axis` dimension.
@@ -19,6 +19,7 @@
 
 #include "pool.h"
 #include "algorithmfactory.h"
+#include "roguevector.h"
 #include <algorithm> // for std::sort
 
 
@@ -27,8 +28,122 @@ using namespace TNT;
 
 namespace essentia {
 
+Pool::Pool(const Pool& p) : _listener(0) {
+  *this = p;
+}
+
+Pool& Pool::operator=(const Pool& p) {
+  if (this == &p) return *this;
+
+  if (_listener) _listener->beforeRemoveNamespace("");
+  GLOBAL_LOCK;
+  unshareAllFrames();
+
+  // the frames of p which point to its frame buffers are copied as any other
+  _poolSingleReal = p._poolSingleReal;
+  _poolSingleString = p._poolSingleString;
+  _poolSingleVectorReal = p._poolSingleVectorReal;
+  _poolSingleVectorString = p._poolSingleVectorString;
+  _poolSingleTensorReal = p._poolSingleTensorReal;
+  _poolReal = p._poolReal;
+  _poolVectorReal = p._poolVectorReal;
+  _poolString = p._poolString;
+  _poolVectorString = p._poolVectorString;
+  _poolArray2DReal = p._poolArray2DReal;
+  _poolTensorReal = p._poolTensorReal;
+  _poolStereoSample = p._poolStereoSample;
+
+  return *this;
+}
+
+Pool::~Pool() {
+  MutexLocker lock(mutexVectorReal);
+  unshareAllFrames();
+}
+
+void Pool::beforeChange(const string& name, bool removed) {
+  if (_listener) _listener->beforeChange(name, removed);
+
+  if (_frameBuffers.empty()) return;
+  MutexLocker lock(mutexVectorReal);
+  unshareFrames(name, !removed);
+}
+
+void Pool::unshareFrames(const string& name, bool keepValues) {
+  map<string, shared_ptr<vector<Real> > >::iterator buffer = _frameBuffers.find(name);
+  if (buffer == _frameBuffers.end()) return;
+
+  map<string, vector<vector<Real> > >::iterator it = _poolVectorReal.find(name);
+  if (it != _poolVectorReal.end()) {
+    // frames are only appended to a descriptor with a buffer, so its first
+    // frames are the ones in the buffer, all of the same (non-zero) size
+    vector<vector<Real> >& frames = it->second;
+    size_t frameSize = frames[0].size();
+    size_t nFrames = buffer->second->size() / frameSize;
+
+    for (size_t i=0; i<nFrames; i++) {
+      const Real* values = frames[i].data();
+      RogueVector<Real>::point(frames[i], 0, 0);
+      if (keepValues) frames[i].assign(values, values + frameSize);
+    }
+  }
+
+  _frameBuffers.erase(buffer);
+}
+
+void Pool::unshareAllFrames() {
+  while (!_frameBuffers.empty()) {
+    unshareFrames(_frameBuffers.begin()->first, false);
+  }
+}
+
+shared_ptr<const vector<Real> > Pool::contiguousFrames(const string& name) {
+  MutexLocker lock(mutexVectorReal);
+
+  map<string, vector<vector<Real> > >::iterator it = _poolVectorReal.find(name);
+  if (it == _poolVectorReal.end()) {
+    ostringstream msg;
+    msg << "Descriptor name '" << name << "' of type "
+        << nameOfType(typeid(vector<vector<Real> >)) << " not found";
+    throw EssentiaException(msg);
+  }
+
+  vector<vector<Real> >& frames = it->second;
+  size_t frameSize = frames.empty() ? 0 : frames[0].size();
+  for (size_t i=0; i<frames.size(); i++) {
+    if (frames[i].size() != frameSize) {
+      throw EssentiaException("Pool: the frames of '", name, "' have different sizes");
+    }
+  }
+
+  map<string, shared_ptr<vector<Real> > >::iterator buffer = _frameBuffers.find(name);
+  if (buffer != _frameBuffers.end() && buffer->second->size() == frames.size() * frameSize) {
+    return buffer->second;
+  }
+
+  shared_ptr<vector<Real> > result(new vector<Real>(frames.size() * frameSize));
+  if (result->empty()) return result;
+
+  for (size_t i=0; i<frames.size(); i++) {
+    fastcopy(&(*result)[i*frameSize], &frames[i][0], frameSize);
+  }
+
+  // the frames now point to the new buffer instead of the previous one (if
+  // any, which stays valid for the ones sharing it) or their own storage
+  unshareFrames(name, false);
+  for (size_t i=0; i<frames.size(); i++) {
+    vector<Real>().swap(frames[i]);
+    RogueVector<Real>::point(frames[i], &(*result)[i*frameSize], frameSize);
+  }
+  _frameBuffers[name] = result;
+
+  return result;
+}
+
 void Pool::clear() {
+  if (_listener) _listener->beforeRemoveNamespace("");
   GLOBAL_LOCK;
+  unshareAllFrames();
 
   _poolReal.clear();
   _poolVectorReal.clear();
@@ -65,6 +180,7 @@ void Pool::checkIntegrity() const {
 // this implementation makes the assumption that the key 'name' only exists in
 // one of the sub-pools, as enforced by checkIntegrity
 void Pool::remove(const string& name) {
+  beforeChange(name, true);
 
   #define SEARCH_AND_DESTROY(t, tname)                                         \
   {                                                                            \
@@ -94,6 +210,15 @@ void Pool::remove(const string& name) {
 }
 
 void Pool::removeNamespace(const string& ns) {
+  if (_listener) _listener->beforeRemoveNamespace(ns);
+  {
+    MutexLocker lock(mutexVectorReal);
+    map<string, shared_ptr<vector<Real> > >::iterator it = _frameBuffers.begin();
+    while (it != _frameBuffers.end()) {
+      string name = (it++)->first;
+      if (name.find(ns+".") == 0) unshareFrames(name, false);
+    }
+  }
 
   #define SEARCH_AND_DESTROY(t, tname)                              \
   {                                                                 \
@@ -270,6 +395,7 @@ void Pool::validateKey(const string& name) {
 
 #define SPECIALIZE_ADD_IMPL(type, tname)                                     \
 void Pool::add(const string& name, const type& value, bool validityCheck) {  \
+  beforeAdd(name);                                                           \
                                                                              \
   /* first check if the pool has ever seen this key before, if it has, we can
    * just add it, if not, we need to run some validation tests */            \
@@ -298,6 +424,7 @@ SPECIALIZE_ADD_IMPL(StereoSample, StereoSample);
 
 
 void Pool::add(const string& name, const Tensor<Real>& value, bool validityCheck) {
+  beforeAdd(name);
   /* first check if the pool has ever seen this key before, if it has, we can
    * just add it, if not, we need to run some validation tests */
   {
@@ -319,6 +446,7 @@ void Pool::add(const string& name, const Tensor<Real>& value, bool validityCheck
 // Array2D needs a special add that cannot be implemented in the macro because
 // we need to call the function copy(), or otherwise we only get references
 void Pool::add(const string& name, const Array2D<Real>& value, bool validityCheck) {
+  beforeAdd(name);
   /* first check if the pool has ever seen this key before, if it has, we can
    * just add it, if not, we need to run some validation tests */
   {
@@ -338,6 +466,7 @@ void Pool::add(const string& name, const Array2D<Real>& value, bool validityChec
 
 #define SPECIALIZE_SET_IMPL(type, tname)                                     \
 void Pool::set(const string& name, const type& value, bool validityCheck) {  \
+  beforeChange(name, false);                                                 \
                                                                              \
   /* first check if the pool has ever seen this key before, if it has, we can
    * just set it, if not, we need to run some validation tests */            \
@@ -363,6 +492,7 @@ SPECIALIZE_SET_IMPL(vector<string>, VectorString)
 
 // special set for Tensor<Real>
 void Pool::set(const string& name, const Tensor<Real>& value, bool validityCheck) {
+  beforeChange(name, false);
   /* first check if the pool has ever seen this key before, if it has, we can
    * just add it, if not, we need to run some validation tests */
   {
@@ -441,6 +571,7 @@ void Pool::merge(Pool& p, const string& mergeType) {
 #define SPECIALIZE_MERGE_IMPL(type, tname)                                                             \
 void Pool::merge(const string& name, const vector<type>& value, const string& mergeType) {             \
   if (value.empty()) return;                                                                           \
+  beforeChange(name, false);                                                                           \
                                                                                                        \
   /* first check if the pool has ever seen this key before, if it has, we can
    * just add it, if not, we need to run some validation tests */                                      \
@@ -502,6 +633,7 @@ SPECIALIZE_MERGE_IMPL(Tensor<Real>, TensorReal);
 
 #define SPECIALIZE_MERGE_SINGLE_IMPL(type, tname)                                                      \
 void Pool::mergeSingle(const string& name, const type& value, const string& mergeType) {               \
+  beforeChange(name, false);                                                                           \
                                                                                                        \
   /* first check if the pool has ever seen this key before, if it has, we can
    * just add it, if not, we need to run some validation tests */                                      \
@@ -534,6 +666,7 @@ SPECIALIZE_MERGE_SINGLE_IMPL(Tensor<Real>, TensorReal)
 
 
 void Pool::merge(const string& name, const vector<Array2D<Real> >& value, const string& mergeType) {
+  beforeChange(name, false);
   /* first check if the pool has ever seen this key before, if it has, we can
    * just add it, if not, we need to run some validation tests */
   {
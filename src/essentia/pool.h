@@ -24,6 +24,7 @@
 #include "threading.h"
 #include "utils/tnt/tnt.h"
 #include "essentiautil.h"
+#include <memory>
 
 namespace essentia {
 
@@ -34,6 +35,29 @@ namespace essentia {
 
 typedef std::string DescriptorName;
 
+/**
+ * Interface of the objects notified before the data of a Pool gets modified
+ * (see Pool::setListener). The Python bindings use it to keep the numpy arrays
+ * viewing the data of a Pool valid, whatever modifies the Pool (Python code, a
+ * streaming network or an algorithm).
+ */
+class PoolListener {
+ public:
+  virtual ~PoolListener() {}
+
+  /**
+   * Called before the values of descriptor @e name are modified, or removed if
+   * @e removed is true.
+   */
+  virtual void beforeChange(const std::string& name, bool removed) = 0;
+
+  /**
+   * Called before all the descriptors under namespace @e ns are removed (all
+   * the descriptors of the pool if @e ns is empty).
+   */
+  virtual void beforeRemoveNamespace(const std::string& ns) = 0;
+};
+
 /**
  * The pool is a storage structure which can hold frames of all kinds of
  * descriptors. A Pool instance is thread-safe.
@@ -112,6 +136,27 @@ class Pool {
   PoolOf(Tensor<Real>) _poolTensorReal;
   PoolOf(StereoSample) _poolStereoSample;
 
+  // buffers returned by contiguousFrames, which hold the values of the first
+  // frames of these descriptors (see unshareFrames)
+  std::map<std::string, std::shared_ptr<std::vector<Real> > > _frameBuffers;
+
+  PoolListener* _listener;
+
+  // notifies the listener before values are added to descriptor name
+  void beforeAdd(const std::string& name) {
+    if (_listener) _listener->beforeChange(name, false);
+  }
+
+  // notifies the listener before descriptor name is modified or removed, and
+  // gives back their own storage to its frames if they point to a buffer
+  void beforeChange(const std::string& name, bool removed);
+
+  // makes the frames of descriptor name which point to its frame buffer own
+  // their values again (copying them if keepValues), so that they can be
+  // modified or destroyed as any std::vector. Needs mutexVectorReal
+  void unshareFrames(const std::string& name, bool keepValues);
+  void unshareAllFrames();
+
   // WARNING: this function assumes that all sub-pools are locked
   std::vector<std::string> descriptorNamesNoLocking() const;
 
@@ -129,6 +174,16 @@ class Pool {
                 mutexSingleReal, mutexSingleString, mutexSingleVectorReal,
                 mutexSingleVectorString, mutexTensorReal, mutexSingleTensorReal;
 
+  Pool() : _listener(0) {}
+
+  /**
+   * Copies the data of another Pool, but not its listener
+   */
+  Pool(const Pool& p);
+  Pool& operator=(const Pool& p);
+
+  ~Pool();
+
   /**
    * Adds @e value to the Pool under @e name
    * @param name a descriptor name that identifies the collection of data to add
@@ -385,6 +440,25 @@ class Pool {
    */
   const std::map<std::string, Tensor<Real> >& getSingleTensorRealPool() const { return _poolSingleTensorReal; }
 
+  /**
+   * Returns the frames of descriptor @e name (a vector of vectors of Reals)
+   * one after the other in a single buffer, for instance to read them as a
+   * matrix without copying them. The first call copies the frames to this
+   * buffer, which then becomes their storage in the pool, so that the next
+   * calls return it without copying them again. Only the frames added after
+   * the buffer is created are copied to a new one. The buffer is shared with
+   * the caller: it is never modified by the pool and stays valid after the
+   * descriptor is modified or removed.
+   * Throws an EssentiaException if the frames have different sizes.
+   */
+  std::shared_ptr<const std::vector<Real> > contiguousFrames(const std::string& name);
+
+  /**
+   * Sets the listener notified before the data of the pool gets modified, or
+   * removes it if @e listener is 0. The pool does not own the listener.
+   */
+  void setListener(PoolListener* listener) { _listener = listener; }
+
   /**
    * Checks that no descriptor name is in two different inner pool types at
    * the same time, and throws an EssentiaException if there is
@@ -583,6 +657,7 @@ inline void Pool::append(const std::string& name, const std::vector<T>& values)
 #define SPECIALIZE_APPEND(type, tname)                                                \
 template <>                                                                           \
 inline void Pool::append(const std::string& name, const std::vector<type>& values) {  \
+  beforeAdd(name);                                                                    \
   {                                                                                   \
     MutexLocker lock(mutex##tname);                                                   \
     PoolOf(type)::iterator result = _pool##tname.find(name);                          \
@@ -54,6 +54,18 @@ class RogueVector : public std::vector<T> {
   // Those need to be implementation specific
   void setData(T* data);
   void setSize(size_t size);
+
+  /**
+   * Makes the std::vector @e v point to @e size elements at @e data, without
+   * owning them, or, if @e data is 0, releases the memory it points to without
+   * freeing it. @e v must not own any memory when pointing it to @e data, and
+   * it must be released before being destroyed or resized.
+   */
+  static void point(std::vector<T>& v, T* data, size_t size) {
+    RogueVector<T>& rogue = static_cast<RogueVector<T>&>(v);
+    rogue.setData(data);
+    rogue.setSize(size);
+  }
 };
 
 // Clang/LLVM implementation
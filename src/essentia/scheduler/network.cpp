@@ -18,10 +18,16 @@
  */
 
 #include <stack>
+#include <thread>
+#include <mutex>
+#include <condition_variable>
+#include <functional>
+#include <deque>
 #include "network.h"
 #include "graphutils.h"
 #include "../streaming/streamingalgorithm.h"
 #include "../streaming/streamingalgorithmcomposite.h"
+#include "../streaming/algorithms/poolstorage.h"
 using namespace std;
 using namespace essentia;
 using namespace essentia::streaming;
@@ -164,12 +170,91 @@ vector<NetworkNode*> NetworkNode::addVisibleDependencies(map<Algorithm*, Network
 }
 
 
+/**
+ * Pool of worker threads used by the Network to run the algorithms of a same
+ * execution level concurrently. The thread calling wait() also processes the
+ * queued tasks instead of sleeping, so a pool of N workers runs N+1 tasks at
+ * the same time.
+ * Tasks should not throw, they are expected to report errors by themselves.
+ */
+class ThreadPool {
+ public:
+  ThreadPool(int nWorkers) : _pending(0), _stop(false) {
+    for (int i=0; i<nWorkers; i++) {
+      _workers.push_back(thread(&ThreadPool::work, this));
+    }
+  }
+
+  ~ThreadPool() {
+    {
+      unique_lock<mutex> lock(_mutex);
+      _stop = true;
+    }
+    _taskAvailable.notify_all();
+    for (int i=0; i<(int)_workers.size(); i++) _workers[i].join();
+  }
+
+  void push(const function<void()>& task) {
+    {
+      unique_lock<mutex> lock(_mutex);
+      _tasks.push_back(task);
+      _pending++;
+    }
+    _taskAvailable.notify_one();
+  }
+
+  /**
+   * Returns once all the tasks pushed so far have been completed.
+   */
+  void wait() {
+    function<void()> task;
+    while (pop(task, false)) run(task);
+
+    unique_lock<mutex> lock(_mutex);
+    while (_pending > 0) _tasksDone.wait(lock);
+  }
+
+ protected:
+  vector<thread> _workers;
+  deque<function<void()> > _tasks;
+  int _pending;
+  bool _stop;
+  mutex _mutex;
+  condition_variable _taskAvailable;
+  condition_variable _tasksDone;
+
+  bool pop(function<void()>& task, bool block) {
+    unique_lock<mutex> lock(_mutex);
+    if (block) {
+      while (_tasks.empty() && !_stop) _taskAvailable.wait(lock);
+    }
+    if (_tasks.empty()) return false;
+    task = _tasks.front();
+    _tasks.pop_front();
+    return true;
+  }
+
+  void run(function<void()>& task) {
+    task();
+    unique_lock<mutex> lock(_mutex);
+    if (--_pending == 0) _tasksDone.notify_all();
+  }
+
+  void work() {
+    function<void()> task;
+    while (pop(task, true)) run(task);
+  }
+};
+
+
 Network* Network::lastCreated = 0;
 
 Network::Network(Algorithm* generator, bool takeOwnership) : _takeOwnership(takeOwnership),
                                                              _generator(generator),
                                                              _visibleNetworkRoot(0),
-                                                             _executionNetworkRoot(0) {
+                                                             _executionNetworkRoot(0),
+                                                             _nThreads(1),
+                                                             _threadPool(0) {
   lastCreated = this;
 
   // 1- find the simple list of algorithms connected in this network
@@ -184,6 +269,20 @@ Network::Network(Algorithm* generator, bool takeOwnership) : _takeOwnership(take
 Network::~Network() {
   if (lastCreated == this) lastCreated = 0;
   clear();
+  delete _threadPool;
+}
+
+void Network::setNumberOfThreads(int nThreads) {
+  if (nThreads < 1) {
+    throw EssentiaException("Network: the number of threads should be at least 1, got ", nThreads);
+  }
+  _nThreads = nThreads;
+
+  // the pool and the execution levels are (re)created the next time the network
+  // is prepared, until then the network runs sequentially
+  delete _threadPool;
+  _threadPool = 0;
+  _executionLevels.clear();
 }
 
 void Network::clear() {
@@ -209,6 +308,7 @@ void Network::clearExecutionNetwork() {
   vector<NetworkNode*> nodes = depthFirstSearch(_executionNetworkRoot);
   for (int i=0; i<(int)nodes.size(); i++) delete nodes[i];
   _executionNetworkRoot = 0;
+  _executionLevels.clear();
   E_DEBUG(ENetwork, "Network::clearExecutionNetwork() ok!");
 }
 
@@ -246,9 +346,17 @@ void Network::runPrepare() {
   //    algorithms might have changed since we constructed the Network
   buildExecutionNetwork();
 
-  // 2- get a linear ordering on the newly constructed execution network
+  // 2- get a linear ordering on the newly constructed execution network, and
+  //    group it in levels of independent algorithms if running in parallel
   topologicalSortExecutionNetwork();
 
+  _executionLevels.clear();
+  if (_nThreads > 1) computeExecutionLevels();
+
+  if (!_executionLevels.empty() && !_threadPool) {
+    _threadPool = new ThreadPool(_nThreads - 1);
+  }
+
   // 3- make sure all inputs/outputs are correctly connected
   checkConnections();
 
@@ -297,6 +405,13 @@ bool Network::runStep() {
   //printBufferFillState();
 #endif
 
+  if (!_executionLevels.empty()) {
+    runLevels(endOfStream);
+    E_DEBUG(EScheduler, dash << " Buffer states after running the generator and all the nodes " << dash);
+    printBufferFillState();
+    return true;
+  }
+
   // then run each algorithm as many times as needed for them to consume everything on their input
   stack<int> runStack;
   runStack.push(1);
@@ -344,6 +459,98 @@ bool Network::runStep() {
   return true;
 }
 
+bool Network::processAlgorithm(Algorithm* algo) {
+  AlgorithmStatus status;
+  bool reschedule = false;
+
+  do {
+    status = algo->process();
+
+#if DEBUGGING_ENABLED
+    if (status == OK || status == FINISHED) algo->nProcess++;
+#endif
+
+    if (status == NO_OUTPUT) {
+      reschedule = true;
+      E_DEBUG(EScheduler, "Rescheduling algorithm " << algo->name() <<
+              " to run later, output buffers temporarily full");
+    }
+  } while (status == OK);
+
+  return reschedule;
+}
+
+/**
+ * Algorithms that need to be run from the thread that runs the network.
+ */
+bool needsCallingThread(Algorithm* algo) {
+  // all the PoolStorage of a network usually write to the same Pool
+  return dynamic_cast<PoolStorageBase*>(algo) != 0;
+}
+
+void Network::runLevels(bool endOfStream) {
+  // same as the sequential version, except that we reschedule a subset of a
+  // level instead of a single algorithm. The algorithms in a level are
+  // independent, so running them in any order yields the same result.
+  typedef pair<int, vector<Algorithm*> > LevelTask;
+  stack<LevelTask> runStack;
+  runStack.push(LevelTask(1, vector<Algorithm*>()));
+
+  while (!runStack.empty()) {
+    int startLevel = runStack.top().first;
+    vector<Algorithm*> startAlgos = runStack.top().second;
+    runStack.pop();
+
+    for (int l=startLevel; l<(int)_executionLevels.size(); l++) {
+      const vector<Algorithm*>& algos = (l == startLevel && !startAlgos.empty()) ? startAlgos
+                                                                                  : _executionLevels[l];
+      int nAlgos = (int)algos.size();
+
+      // only propagate the end of stream marker as long as we don't have any
+      // algorithm rescheduled to run
+      for (int i=0; i<nAlgos; i++) algos[i]->shouldStop(endOfStream && runStack.empty());
+
+      vector<char> reschedule(nAlgos, false);
+      vector<string> errors(nAlgos);
+      vector<char> failed(nAlgos, false);
+
+      // launch the concurrent ones first, then work on the others in this thread
+      // while the pool takes care of them
+      for (int pass=0; pass<2; pass++) {
+        for (int i=0; i<nAlgos; i++) {
+          bool inCallingThread = (nAlgos == 1) || needsCallingThread(algos[i]);
+          if (inCallingThread != (pass == 1)) continue;
+
+          function<void()> task = [&algos, &reschedule, &errors, &failed, i]() {
+            try {
+              reschedule[i] = processAlgorithm(algos[i]);
+            }
+            catch (const exception& e) {
+              failed[i] = true;
+              errors[i] = e.what();
+            }
+          };
+
+          if (pass == 0) _threadPool->push(task);
+          else task();
+        }
+      }
+      _threadPool->wait();
+
+      vector<Algorithm*> rescheduled;
+      for (int i=0; i<nAlgos; i++) {
+        if (failed[i]) throw EssentiaException(errors[i]);
+        if (reschedule[i]) rescheduled.push_back(algos[i]);
+      }
+
+      if (!rescheduled.empty()) {
+        runStack.push(LevelTask(l, rescheduled));
+        printNetworkBufferFillState();
+      }
+    }
+  }
+}
+
 Algorithm* Network::findAlgorithm(const std::string& name) {
   NodeVector nodes = depthFirstSearch(_visibleNetworkRoot);
   for (NodeVector::iterator node = nodes.begin(); node != nodes.end(); ++node) {
@@ -915,6 +1122,56 @@ void Network::topologicalSortExecutionNetwork() {
 }
 
 
+void Network::computeExecutionLevels() {
+  _executionLevels.clear();
+
+  // composites which have not been expanded run their inner algorithms from
+  // their own process() method, we do not know how to parallelize those
+  for (int i=0; i<(int)_toposortedNetwork.size(); i++) {
+    if (dynamic_cast<AlgorithmComposite*>(_toposortedNetwork[i])) {
+      E_DEBUG(ENetwork, "Network: " << _toposortedNetwork[i]->name() << " is a composite, "
+              "running the network sequentially");
+      return;
+    }
+  }
+
+  NodeVector nodes = depthFirstSearch(_executionNetworkRoot);
+  map<Algorithm*, NetworkNode*> algoNodes;
+  map<NetworkNode*, int> levels;
+  for (int i=0; i<(int)nodes.size(); i++) {
+    algoNodes[nodes[i]->algorithm()] = nodes[i];
+    levels[nodes[i]] = 0;
+  }
+
+  // the toposort guarantees that all the parents of a node are visited before
+  // it, so its level is final once we get to it
+  int maxWidth = 0;
+  vector<vector<Algorithm*> > executionLevels;
+
+  for (int i=0; i<(int)_toposortedNetwork.size(); i++) {
+    NetworkNode* node = algoNodes[_toposortedNetwork[i]];
+    int level = levels[node];
+
+    if (level >= (int)executionLevels.size()) executionLevels.resize(level+1);
+    executionLevels[level].push_back(node->algorithm());
+    maxWidth = max(maxWidth, (int)executionLevels[level].size());
+
+    const NodeVector& children = node->children();
+    for (int j=0; j<(int)children.size(); j++) {
+      levels[children[j]] = max(levels[children[j]], level+1);
+    }
+  }
+
+  // nothing to gain if there are no independent algorithms
+  if (maxWidth < 2) return;
+
+  _executionLevels = executionLevels;
+
+  E_DEBUG(ENetwork, "Network: " << _executionLevels.size() << " execution levels, "
+          "up to " << maxWidth << " algorithms in parallel");
+}
+
+
 void Network::checkConnections() {
   vector<Algorithm*> algos = depthFirstMap(_visibleNetworkRoot, returnAlgorithm);
 
@@ -41,6 +41,8 @@ class SourceBase;
 namespace essentia {
 namespace scheduler {
 
+class ThreadPool;
+
 typedef std::vector<streaming::Algorithm*> AlgoVector;
 typedef std::set<streaming::Algorithm*> AlgoSet;
 
@@ -131,6 +133,24 @@ class Network {
    */
   bool runStep();
 
+  /**
+   * Sets the number of threads used to run the network (1 by default).
+   *
+   * With more than 1 thread, the execution network is split into levels, where
+   * each algorithm is placed one level after the last of the algorithms it
+   * depends on. The algorithms inside a same level are independent and are run
+   * concurrently, while the levels themselves are still run one after the
+   * other. PoolStorage algorithms are always run from the calling thread, as
+   * the Pool is not thread-safe.
+   *
+   * If the execution network contains composite algorithms that have not been
+   * expanded (ie: which are part of their own process order), the network is
+   * run sequentially, as if only 1 thread had been requested.
+   */
+  void setNumberOfThreads(int nThreads);
+
+  int numberOfThreads() const { return _nThreads; }
+
   /**
    * Rebuilds the visible and execution network.
    */
@@ -182,6 +202,13 @@ class Network {
    */
   const std::vector<streaming::Algorithm*>& linearExecutionOrder() const { return _toposortedNetwork; }
 
+  /**
+   * Return the algorithms of the execution network grouped in levels of
+   * algorithms that can be run concurrently (see setNumberOfThreads()).
+   * This is empty if the network is to be run sequentially.
+   */
+  const std::vector<std::vector<streaming::Algorithm*> >& executionLevels() const { return _executionLevels; }
+
 
   /**
    * Helper function that returns the list of visibly connected algorithms
@@ -208,6 +235,9 @@ class Network {
   NetworkNode* _visibleNetworkRoot;
   NetworkNode* _executionNetworkRoot;
   std::vector<streaming::Algorithm*> _toposortedNetwork;
+  std::vector<std::vector<streaming::Algorithm*> > _executionLevels;
+  int _nThreads;
+  ThreadPool* _threadPool;
 
   /**
    * Build the network of visibly connected algorithms (ie: do not enter composite
@@ -228,6 +258,27 @@ class Network {
    */
   void topologicalSortExecutionNetwork();
 
+  /**
+   * Group the topologically sorted algorithms into levels of independent
+   * algorithms and store them internally. The levels are left empty if the
+   * network cannot be run in parallel.
+   */
+  void computeExecutionLevels();
+
+  /**
+   * Run all the algorithms of the execution network once the generator has
+   * been processed, using the thread pool to run the algorithms of each level
+   * concurrently. This is the parallel counterpart of the main loop in runStep().
+   */
+  void runLevels(bool endOfStream);
+
+  /**
+   * Runs the given algorithm as many times as needed for it to consume
+   * everything on its input. Returns whether it should be run again later
+   * because its output buffers were full.
+   */
+  static bool processAlgorithm(streaming::Algorithm* algo);
+
   /**
    * Execution dependencies are stored inside the network nodes themselves, and
    * might enter/exit CompositeAlgorithms boundaries.
@@ -0,0 +1,150 @@
+/*
+ * Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#include "modelcache.h"
+
+using namespace std;
+
+namespace essentia {
+
+ForcedMutex ModelCache::_mutex;
+size_t ModelCache::_capacity = 512 * 1024 * 1024;
+ModelCache::Order ModelCache::_order;
+map<string, pair<ModelCache::ModelPtr, ModelCache::Order::iterator> > ModelCache::_models;
+
+
+ModelCache::ModelPtr ModelCache::get(const string& key) {
+  ForcedMutexLocker lock(_mutex);
+
+  map<string, pair<ModelPtr, Order::iterator> >::iterator it = _models.find(key);
+  if (it == _models.end()) return ModelPtr();
+
+  // mark as most recently used
+  _order.splice(_order.end(), _order, it->second.second);
+  return it->second.first;
+}
+
+
+ModelCache::ModelPtr ModelCache::add(const string& key, const ModelPtr& model) {
+  ForcedMutexLocker lock(_mutex);
+
+  map<string, pair<ModelPtr, Order::iterator> >::iterator it = _models.find(key);
+  if (it != _models.end()) {
+    _order.splice(_order.end(), _order, it->second.second);
+    return it->second.first;
+  }
+
+  _models[key] = make_pair(model, _order.insert(_order.end(), key));
+  evict();
+  return model;
+}
+
+
+void ModelCache::release(ModelPtr& model) {
+  ForcedMutexLocker lock(_mutex);
+
+  // the pointer is reset with the lock held, so that the use count of the model
+  // is up to date when evicting
+  model.reset();
+  evict();
+}
+
+
+void ModelCache::evict() {
+  size_t unused = 0;
+  map<string, pair<ModelPtr, Order::iterator> >::iterator it;
+  for (it = _models.begin(); it != _models.end(); ++it) {
+    if (it->second.first.use_count() == 1) unused += it->second.first->size;
+  }
+
+  Order::iterator key = _order.begin();
+  while (unused > _capacity && key != _order.end()) {
+    it = _models.find(*key);
+    if (it->second.first.use_count() == 1) {
+      unused -= it->second.first->size;
+      _models.erase(it);
+      key = _order.erase(key);
+    }
+    else {
+      ++key;
+    }
+  }
+}
+
+
+void ModelCache::clear() {
+  ForcedMutexLocker lock(_mutex);
+
+  Order::iterator key = _order.begin();
+  while (key != _order.end()) {
+    map<string, pair<ModelPtr, Order::iterator> >::iterator it = _models.find(*key);
+    if (it->second.first.use_count() == 1) {
+      _models.erase(it);
+      key = _order.erase(key);
+    }
+    else {
+      ++key;
+    }
+  }
+}
+
+
+size_t ModelCache::capacity() {
+  ForcedMutexLocker lock(_mutex);
+  return _capacity;
+}
+
+
+void ModelCache::setCapacity(size_t capacity) {
+  ForcedMutexLocker lock(_mutex);
+  _capacity = capacity;
+  evict();
+}
+
+
+int ModelCache::count() {
+  ForcedMutexLocker lock(_mutex);
+  return (int)_models.size();
+}
+
+
+int ModelCache::countInUse() {
+  ForcedMutexLocker lock(_mutex);
+
+  int inUse = 0;
+  map<string, pair<ModelPtr, Order::iterator> >::const_iterator it;
+  for (it = _models.begin(); it != _models.end(); ++it) {
+    if (it->second.first.use_count() > 1) inUse++;
+  }
+  return inUse;
+}
+
+
+size_t ModelCache::size() {
+  ForcedMutexLocker lock(_mutex);
+
+  size_t total = 0;
+  map<string, pair<ModelPtr, Order::iterator> >::const_iterator it;
+  for (it = _models.begin(); it != _models.end(); ++it) {
+    total += it->second.first->size;
+  }
+  return total;
+}
+
+} // namespace essentia
@@ -0,0 +1,119 @@
+/*
+ * Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#ifndef ESSENTIA_MODELCACHE_H
+#define ESSENTIA_MODELCACHE_H
+
+#include <list>
+#include <map>
+#include <memory>
+#include <string>
+#include "types.h"
+#include "threading.h"
+
+namespace essentia {
+
+/**
+ * Base class for the models that can be stored in the ModelCache. Derived
+ * classes release the resources of the model in their destructor.
+ */
+class ESSENTIA_API CachedModel {
+ public:
+  CachedModel() : size(0) {}
+  virtual ~CachedModel() {}
+
+  /**
+   * Approximate memory used by the model, in bytes.
+   */
+  size_t size;
+};
+
+
+/**
+ * Process-wide cache of loaded models (e.g., TensorFlow graphs and their
+ * sessions), so that the algorithms configured with the same model share it
+ * instead of loading it again.
+ *
+ * Models are reference-counted: a model is alive as long as an algorithm holds
+ * a pointer to it. Models that are not used anymore are kept in the cache so
+ * that they can be reused by new instances, until the total size of these unused
+ * models exceeds the capacity of the cache. In that case, the least recently used
+ * ones are evicted. This happens when a model is added to the cache, when it is
+ * released, or when the capacity of the cache is changed. Users of a model must
+ * therefore give it back with release() instead of just dropping their pointer.
+ */
+class ESSENTIA_API ModelCache {
+ public:
+  typedef std::shared_ptr<CachedModel> ModelPtr;
+
+  /**
+   * Returns the model stored under the given key, or an empty pointer if there
+   * is none.
+   */
+  static ModelPtr get(const std::string& key);
+
+  /**
+   * Stores the model under the given key and returns it. If another model was
+   * added under the same key in the meantime, that one is returned instead.
+   */
+  static ModelPtr add(const std::string& key, const ModelPtr& model);
+
+  /**
+   * Resets the given pointer to a model, and evicts the unused models if they do
+   * not fit in the cache anymore.
+   */
+  static void release(ModelPtr& model);
+
+  /**
+   * Removes all the unused models from the cache.
+   */
+  static void clear();
+
+  /**
+   * Maximum size in bytes of the unused models kept in the cache.
+   */
+  static size_t capacity();
+  static void setCapacity(size_t capacity);
+
+  /**
+   * Number of models in the cache, and how many of them are in use.
+   */
+  static int count();
+  static int countInUse();
+
+  /**
+   * Total size in bytes of the models in the cache, whether in use or not.
+   */
+  static size_t size();
+
+ protected:
+  typedef std::list<std::string> Order;
+
+  static void evict();
+
+  static ForcedMutex _mutex;
+  static size_t _capacity;
+  // least recently used first
+  static Order _order;
+  static std::map<std::string, std::pair<ModelPtr, Order::iterator> > _models;
+};
+
+} // namespace essentia
+
+#endif // ESSENTIA_MODELCACHE_H
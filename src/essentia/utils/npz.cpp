@@ -0,0 +1,554 @@
+/*
+ * Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#include "npz.h"
+#include <algorithm>
+#include <cstdlib>
+#include <cstring>
+#include <sstream>
+
+#if HAVE_ZLIB
+#include <zlib.h>
+#endif
+
+using namespace std;
+
+namespace essentia {
+
+// The arrays are written and read as little-endian data, which is the byte
+// order of all the platforms supported by Essentia.
+
+namespace {
+
+const uint32_t LOCAL_HEADER_SIGNATURE = 0x04034b50;
+const uint32_t CENTRAL_HEADER_SIGNATURE = 0x02014b50;
+const uint32_t END_OF_CENTRAL_DIRECTORY_SIGNATURE = 0x06054b50;
+const uint16_t METHOD_STORED = 0;
+const uint16_t METHOD_DEFLATED = 8;
+// DOS date of the members, fixed to 1980-01-01 so that the output only
+// depends on the contents of the arrays
+const uint16_t DOS_DATE = (0 << 9) | (1 << 5) | 1;
+
+vector<uint32_t> crc32Table() {
+  vector<uint32_t> table(256);
+  for (uint32_t i=0; i<256; i++) {
+    uint32_t c = i;
+    for (int k=0; k<8; k++) c = (c & 1) ? 0xedb88320 ^ (c >> 1) : c >> 1;
+    table[i] = c;
+  }
+  return table;
+}
+
+// crc32 as used in zip archives, computed here so that it is also available
+// when building without zlib
+uint32_t computeCrc32(const char* data, size_t size) {
+  static const vector<uint32_t> table = crc32Table();
+
+  uint32_t crc = 0xffffffff;
+  for (size_t i=0; i<size; i++) {
+    crc = table[(crc ^ (uint8_t)data[i]) & 0xff] ^ (crc >> 8);
+  }
+  return crc ^ 0xffffffff;
+}
+
+void write16(ostream& out, uint16_t x) {
+  char b[2] = { char(x & 0xff), char((x >> 8) & 0xff) };
+  out.write(b, 2);
+}
+
+void write32(ostream& out, uint32_t x) {
+  char b[4] = { char(x & 0xff), char((x >> 8) & 0xff),
+                char((x >> 16) & 0xff), char((x >> 24) & 0xff) };
+  out.write(b, 4);
+}
+
+uint16_t read16(const char* b) {
+  return (uint16_t)((uint8_t)b[0] | ((uint8_t)b[1] << 8));
+}
+
+uint32_t read32(const char* b) {
+  return (uint32_t)(uint8_t)b[0] | ((uint32_t)(uint8_t)b[1] << 8) |
+         ((uint32_t)(uint8_t)b[2] << 16) | ((uint32_t)(uint8_t)b[3] << 24);
+}
+
+// returns the (quoted or not) value following `key` in the header dictionary
+// of a .npy file
+string npyHeaderValue(const string& header, const string& key) {
+  string::size_type pos = header.find("'" + key + "'");
+  if (pos == string::npos) {
+    throw EssentiaException("NpyArray: invalid .npy header, missing key '", key, "'");
+  }
+  pos = header.find(':', pos);
+  if (pos == string::npos) {
+    throw EssentiaException("NpyArray: invalid .npy header");
+  }
+  pos = header.find_first_not_of(' ', pos + 1);
+
+  string::size_type end;
+  if (header[pos] == '\'') {
+    end = header.find('\'', pos + 1);
+    return header.substr(pos + 1, end - pos - 1);
+  }
+  if (header[pos] == '(') {
+    end = header.find(')', pos);
+    return header.substr(pos + 1, end - pos - 1);
+  }
+  end = header.find_first_of(",}", pos);
+  return header.substr(pos, end - pos);
+}
+
+} // namespace
+
+
+int64_t NpyArray::size() const {
+  int64_t n = 1;
+  for (size_t i=0; i<shape.size(); i++) n *= shape[i];
+  return n;
+}
+
+
+int NpyArray::itemSize() const {
+  if (descr.size() < 3) {
+    throw EssentiaException("NpyArray: unsupported type '", descr, "'");
+  }
+  return atoi(descr.c_str() + 2);
+}
+
+
+NpyArray NpyArray::fromReals(const vector<int64_t>& shape, const Real* values) {
+  NpyArray array("<f4", shape);
+  if (array.size()) memcpy(&array.data[0], values, array.data.size());
+  return array;
+}
+
+
+NpyArray NpyArray::fromInts(const vector<int64_t>& shape, const vector<int64_t>& values) {
+  NpyArray array("<i8", shape);
+  if (array.size()) memcpy(&array.data[0], &values[0], array.data.size());
+  return array;
+}
+
+
+NpyArray NpyArray::fromStrings(const vector<int64_t>& shape, const vector<string>& values) {
+  // fixed-width byte strings, padded with null characters
+  size_t width = 1;
+  for (size_t i=0; i<values.size(); i++) width = max(width, values[i].size());
+
+  ostringstream descr;
+  descr << "|S" << width;
+  NpyArray array(descr.str(), shape);
+  for (size_t i=0; i<values.size(); i++) {
+    if (!values[i].empty()) memcpy(&array.data[i*width], values[i].data(), values[i].size());
+  }
+  return array;
+}
+
+
+vector<Real> NpyArray::toReals() const {
+  int64_t n = size();
+  vector<Real> values(n);
+  if (descr == "<f4") {
+    if (n) memcpy(&values[0], &data[0], n * sizeof(float));
+  }
+  else if (descr == "<f8") {
+    const double* d = (const double*)&data[0];
+    for (int64_t i=0; i<n; i++) values[i] = (Real)d[i];
+  }
+  else if (descr == "<i8" || descr == "<i4") {
+    vector<int64_t> ints = toInts();
+    for (int64_t i=0; i<n; i++) values[i] = (Real)ints[i];
+  }
+  else {
+    throw EssentiaException("NpyArray: cannot convert an array of type '", descr, "' to Reals");
+  }
+  return values;
+}
+
+
+vector<int64_t> NpyArray::toInts() const {
+  int64_t n = size();
+  vector<int64_t> values(n);
+  if (descr == "<i8") {
+    if (n) memcpy(&values[0], &data[0], n * sizeof(int64_t));
+  }
+  else if (descr == "<i4") {
+    const int32_t* d = (const int32_t*)&data[0];
+    for (int64_t i=0; i<n; i++) values[i] = d[i];
+  }
+  else {
+    throw EssentiaException("NpyArray: cannot convert an array of type '", descr, "' to integers");
+  }
+  return values;
+}
+
+
+vector<string> NpyArray::toStrings() const {
+  if (descr.compare(0, 2, "|S") != 0) {
+    throw EssentiaException("NpyArray: cannot convert an array of type '", descr, "' to strings");
+  }
+  int64_t n = size();
+  int width = itemSize();
+  vector<string> values(n);
+  for (int64_t i=0; i<n; i++) {
+    const char* s = &data[i*width];
+    values[i] = string(s, strnlen(s, width));
+  }
+  return values;
+}
+
+
+string NpyArray::toNpy() const {
+  ostringstream header;
+  header << "{'descr': '" << descr << "', 'fortran_order': False, 'shape': (";
+  for (size_t i=0; i<shape.size(); i++) {
+    header << shape[i] << (shape.size() == 1 ? "," : (i+1 < shape.size() ? ", " : ""));
+  }
+  header << "), }";
+
+  // pad the header with spaces so that the data is 64-byte aligned, as numpy does
+  string h = header.str();
+  size_t total = 10 + h.size() + 1;
+  h += string((64 - total % 64) % 64, ' ') + "\n";
+
+  string npy("\x93NUMPY\x01\x00", 8);
+  npy += char(h.size() & 0xff);
+  npy += char((h.size() >> 8) & 0xff);
+  npy += h;
+  if (!data.empty()) npy.append(&data[0], data.size());
+  return npy;
+}
+
+
+NpyArray NpyArray::fromNpy(const vector<char>& npy) {
+  if (npy.size() < 10 || memcmp(&npy[0], "\x93NUMPY", 6) != 0) {
+    throw EssentiaException("NpyArray: invalid .npy data");
+  }
+
+  // version 1.0 uses a 2-byte header length, versions 2.0 and 3.0 a 4-byte one
+  size_t headerLength, headerStart;
+  if (npy[6] == 1) {
+    headerLength = read16(&npy[8]);
+    headerStart = 10;
+  }
+  else {
+    if (npy.size() < 12) throw EssentiaException("NpyArray: invalid .npy data");
+    headerLength = read32(&npy[8]);
+    headerStart = 12;
+  }
+  if (npy.size() < headerStart + headerLength) {
+    throw EssentiaException("NpyArray: invalid .npy data");
+  }
+  string header(&npy[headerStart], headerLength);
+
+  NpyArray array;
+  array.descr = npyHeaderValue(header, "descr");
+  // native byte order is little-endian
+  if (array.descr.size() > 1 && array.descr[0] == '=') array.descr[0] = '<';
+  if (npyHeaderValue(header, "fortran_order") != "False") {
+    throw EssentiaException("NpyArray: arrays in Fortran order are not supported");
+  }
+
+  istringstream shape(npyHeaderValue(header, "shape"));
+  string dim;
+  while (getline(shape, dim, ',')) {
+    if (dim.find_first_not_of(' ') == string::npos) continue;
+    array.shape.push_back(atoll(dim.c_str()));
+  }
+
+  size_t bytes = array.size() * array.itemSize();
+  if (npy.size() < headerStart + headerLength + bytes) {
+    throw EssentiaException("NpyArray: invalid .npy data, the array is truncated");
+  }
+  array.data.assign(npy.begin() + headerStart + headerLength,
+                    npy.begin() + headerStart + headerLength + bytes);
+  return array;
+}
+
+
+NpzWriter::NpzWriter(const string& filename, bool compress) :
+    _filename(filename), _compress(compress) {
+#if !HAVE_ZLIB
+  if (_compress) {
+    throw EssentiaException("NpzWriter: Essentia was built without zlib, compression is not available");
+  }
+#endif
+  _out.open(filename.c_str(), ios::out | ios::binary | ios::trunc);
+  if (!_out.good()) {
+    throw EssentiaException("NpzWriter: could not open file for writing: ", filename);
+  }
+}
+
+
+NpzWriter::~NpzWriter() {
+  try {
+    close();
+  }
+  catch (EssentiaException&) {}
+}
+
+
+void NpzWriter::add(const string& name, const NpyArray& array) {
+  string npy = array.toNpy();
+  string payload;
+
+  Entry entry;
+  entry.name = name + ".npy";
+  entry.crc = computeCrc32(npy.data(), npy.size());
+  entry.method = METHOD_STORED;
+
+#if HAVE_ZLIB
+  if (_compress) {
+    // raw deflate stream, as expected in zip archives
+    z_stream zs;
+    memset(&zs, 0, sizeof(zs));
+    if (deflateInit2(&zs, Z_DEFAULT_COMPRESSION, Z_DEFLATED, -MAX_WBITS, 8, Z_DEFAULT_STRATEGY) != Z_OK) {
+      throw EssentiaException("NpzWriter: could not initialize zlib");
+    }
+    payload.resize(deflateBound(&zs, npy.size()));
+    zs.next_in = (Bytef*)npy.data();
+    zs.avail_in = npy.size();
+    zs.next_out = (Bytef*)&payload[0];
+    zs.avail_out = payload.size();
+    int result = deflate(&zs, Z_FINISH);
+    payload.resize(zs.total_out);
+    deflateEnd(&zs);
+    if (result != Z_STREAM_END) {
+      throw EssentiaException("NpzWriter: could not compress array '", name, "'");
+    }
+    entry.method = METHOD_DEFLATED;
+  }
+#endif
+  const string& data = entry.method == METHOD_STORED ? npy : payload;
+
+  // zip64 extensions are not supported
+  uint64_t offset = _out.tellp();
+  if (npy.size() > 0xffffffffULL || offset + data.size() > 0xffffffffULL || _entries.size() >= 0xffff) {
+    throw EssentiaException("NpzWriter: '", _filename, "' is too large, files larger than 4GB or "
+                            "with more than 65535 arrays are not supported");
+  }
+  entry.offset = (uint32_t)offset;
+  entry.size = (uint32_t)npy.size();
+  entry.compressedSize = (uint32_t)data.size();
+
+  write32(_out, LOCAL_HEADER_SIGNATURE);
+  write16(_out, 20);  // version needed to extract
+  write16(_out, 0);   // flags
+  write16(_out, entry.method);
+  write16(_out, 0);   // time
+  write16(_out, DOS_DATE);
+  write32(_out, entry.crc);
+  write32(_out, entry.compressedSize);
+  write32(_out, entry.size);
+  write16(_out, entry.name.size());
+  write16(_out, 0);   // extra field length
+  _out.write(entry.name.data(), entry.name.size());
+  _out.write(data.data(), data.size());
+
+  if (!_out.good()) {
+    throw EssentiaException("NpzWriter: error while writing to ", _filename);
+  }
+  _entries.push_back(entry);
+}
+
+
+void NpzWriter::close() {
+  if (!_out.is_open()) return;
+
+  uint64_t start = _out.tellp();
+  for (size_t i=0; i<_entries.size(); i++) {
+    const Entry& entry = _entries[i];
+    write32(_out, CENTRAL_HEADER_SIGNATURE);
+    write16(_out, 20);  // version made by
+    write16(_out, 20);  // version needed to extract
+    write16(_out, 0);   // flags
+    write16(_out, entry.method);
+    write16(_out, 0);   // time
+    write16(_out, DOS_DATE);
+    write32(_out, entry.crc);
+    write32(_out, entry.compressedSize);
+    write32(_out, entry.size);
+    write16(_out, entry.name.size());
+    write16(_out, 0);   // extra field length
+    write16(_out, 0);   // comment length
+    write16(_out, 0);   // disk number
+    write16(_out, 0);   // internal attributes
+    write32(_out, 0);   // external attributes
+    write32(_out, entry.offset);
+    _out.write(entry.name.data(), entry.name.size());
+  }
+  uint64_t end = _out.tellp();
+  if (end > 0xffffffffULL) {
+    _out.close();
+    throw EssentiaException("NpzWriter: '", _filename, "' is too large, files larger than 4GB are not supported");
+  }
+
+  write32(_out, END_OF_CENTRAL_DIRECTORY_SIGNATURE);
+  write16(_out, 0);   // disk number
+  write16(_out, 0);   // disk with the central directory
+  write16(_out, _entries.size());
+  write16(_out, _entries.size());
+  write32(_out, (uint32_t)(end - start));
+  write32(_out, (uint32_t)start);
+  write16(_out, 0);   // comment length
+
+  bool ok = _out.good();
+  _out.close();
+  if (!ok) {
+    throw EssentiaException("NpzWriter: error while writing to ", _filename);
+  }
+}
+
+
+NpzReader::NpzReader(const string& filename) : _filename(filename) {
+  _in.open(filename.c_str(), ios::in | ios::binary);
+  if (!_in.good()) {
+    throw EssentiaException("NpzReader: could not open file: ", filename);
+  }
+
+  // the end of central directory record is at the end of the file, followed
+  // by a comment of up to 65535 bytes
+  _in.seekg(0, ios::end);
+  int64_t fileSize = _in.tellg();
+  int64_t tailSize = min(fileSize, (int64_t)(22 + 0xffff));
+  vector<char> tail(tailSize);
+  _in.seekg(fileSize - tailSize);
+  _in.read(&tail[0], tailSize);
+
+  int64_t eocd = -1;
+  for (int64_t i=tailSize-22; i>=0; i--) {
+    if (read32(&tail[i]) == END_OF_CENTRAL_DIRECTORY_SIGNATURE) {
+      eocd = i;
+      break;
+    }
+  }
+  if (eocd < 0) {
+    throw EssentiaException("NpzReader: '", filename, "' is not a valid .npz file");
+  }
+
+  uint16_t nEntries = read16(&tail[eocd + 10]);
+  uint32_t directorySize = read32(&tail[eocd + 12]);
+  uint32_t directoryOffset = read32(&tail[eocd + 16]);
+  if (directoryOffset == 0xffffffff || nEntries == 0xffff) {
+    throw EssentiaException("NpzReader: '", filename, "' uses zip64 extensions, which are not supported");
+  }
+
+  vector<char> directory(directorySize);
+  _in.seekg(directoryOffset);
+  if (directorySize) _in.read(&directory[0], directorySize);
+  if (!_in.good()) {
+    throw EssentiaException("NpzReader: '", filename, "' is not a valid .npz file");
+  }
+
+  size_t pos = 0;
+  for (int i=0; i<nEntries; i++) {
+    if (pos + 46 > directory.size() || read32(&directory[pos]) != CENTRAL_HEADER_SIGNATURE) {
+      throw EssentiaException("NpzReader: '", filename, "' is not a valid .npz file");
+    }
+    Entry entry;
+    entry.method = read16(&directory[pos + 10]);
+    entry.crc = read32(&directory[pos + 16]);
+    entry.compressedSize = read32(&directory[pos + 20]);
+    entry.size = read32(&directory[pos + 24]);
+    uint16_t nameLength = read16(&directory[pos + 28]);
+    uint16_t extraLength = read16(&directory[pos + 30]);
+    uint16_t commentLength = read16(&directory[pos + 32]);
+    entry.offset = read32(&directory[pos + 42]);
+    string name(&directory[pos + 46], nameLength);
+    pos += 46 + nameLength + extraLength + commentLength;
+
+    // numpy.savez stores the arrays as .npy files
+    if (name.size() > 4 && name.compare(name.size() - 4, 4, ".npy") == 0) {
+      name = name.substr(0, name.size() - 4);
+    }
+    _names.push_back(name);
+    _entries[name] = entry;
+  }
+}
+
+
+vector<string> NpzReader::names() const {
+  return _names;
+}
+
+
+bool NpzReader::contains(const string& name) const {
+  return _entries.find(name) != _entries.end();
+}
+
+
+NpyArray NpzReader::read(const string& name) {
+  map<string, Entry>::const_iterator it = _entries.find(name);
+  if (it == _entries.end()) {
+    throw EssentiaException("NpzReader: there is no array named '", name, "' in ", _filename);
+  }
+  const Entry& entry = it->second;
+
+  // the local header may have a different extra field than the central one
+  char header[30];
+  _in.clear();
+  _in.seekg(entry.offset);
+  _in.read(header, 30);
+  if (!_in.good() || read32(header) != LOCAL_HEADER_SIGNATURE) {
+    throw EssentiaException("NpzReader: '", _filename, "' is not a valid .npz file");
+  }
+  _in.seekg(entry.offset + 30 + read16(header + 26) + read16(header + 28));
+
+  vector<char> payload(entry.compressedSize);
+  if (entry.compressedSize) _in.read(&payload[0], entry.compressedSize);
+  if (!_in.good()) {
+    throw EssentiaException("NpzReader: error while reading '", name, "' from ", _filename);
+  }
+
+  vector<char> npy;
+  if (entry.method == METHOD_STORED) {
+    npy.swap(payload);
+  }
+  else if (entry.method == METHOD_DEFLATED) {
+#if HAVE_ZLIB
+    npy.resize(entry.size);
+    z_stream zs;
+    memset(&zs, 0, sizeof(zs));
+    if (inflateInit2(&zs, -MAX_WBITS) != Z_OK) {
+      throw EssentiaException("NpzReader: could not initialize zlib");
+    }
+    zs.next_in = (Bytef*)&payload[0];
+    zs.avail_in = payload.size();
+    zs.next_out = (Bytef*)&npy[0];
+    zs.avail_out = npy.size();
+    int result = inflate(&zs, Z_FINISH);
+    inflateEnd(&zs);
+    if (result != Z_STREAM_END) {
+      throw EssentiaException("NpzReader: could not decompress '", name, "' from ", _filename);
+    }
+#else
+    throw EssentiaException("NpzReader: Essentia was built without zlib, cannot read the compressed file ", _filename);
+#endif
+  }
+  else {
+    throw EssentiaException("NpzReader: unsupported compression method in ", _filename);
+  }
+
+  if (computeCrc32(npy.empty() ? NULL : &npy[0], npy.size()) != entry.crc) {
+    throw EssentiaException("NpzReader: '", name, "' is corrupted in ", _filename);
+  }
+
+  return NpyArray::fromNpy(npy);
+}
+
+} // namespace essentia
@@ -0,0 +1,162 @@
+/*
+ * Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#ifndef ESSENTIA_NPZ_H
+#define ESSENTIA_NPZ_H
+
+#include <fstream>
+#include <map>
+#include <string>
+#include <vector>
+#include "types.h"
+
+namespace essentia {
+
+/**
+ * An array as stored in a NumPy .npy file: the type descriptor (e.g., "<f4",
+ * "<i8" or "|S12"), the shape, and the raw C-ordered little-endian data.
+ */
+class ESSENTIA_API NpyArray {
+ public:
+  std::string descr;
+  std::vector<int64_t> shape;
+  std::vector<char> data;
+
+  NpyArray() {}
+  NpyArray(const std::string& d, const std::vector<int64_t>& s) : descr(d), shape(s) {
+    data.resize(size() * itemSize());
+  }
+
+  /**
+   * Number of elements of the array.
+   */
+  int64_t size() const;
+
+  /**
+   * Size in bytes of each element of the array.
+   */
+  int itemSize() const;
+
+  static NpyArray fromReals(const std::vector<int64_t>& shape, const Real* values);
+  static NpyArray fromInts(const std::vector<int64_t>& shape, const std::vector<int64_t>& values);
+  static NpyArray fromStrings(const std::vector<int64_t>& shape, const std::vector<std::string>& values);
+
+  /**
+   * Converts the elements of a floating point or integer array to Reals.
+   */
+  std::vector<Real> toReals() const;
+
+  /**
+   * Converts the elements of an integer array to int64.
+   */
+  std::vector<int64_t> toInts() const;
+
+  /**
+   * Converts the elements of a byte string array to strings.
+   */
+  std::vector<std::string> toStrings() const;
+
+  /**
+   * Returns the array serialized in the .npy format.
+   */
+  std::string toNpy() const;
+
+  /**
+   * Parses an array serialized in the .npy format.
+   */
+  static NpyArray fromNpy(const std::vector<char>& npy);
+};
+
+
+/**
+ * Writes arrays to a .npz file, which is a zip archive containing one .npy
+ * file per array, as written by numpy.savez. The members are either stored
+ * as is or compressed with deflate (as numpy.savez_compressed does), which
+ * requires Essentia to be built with zlib.
+ */
+class ESSENTIA_API NpzWriter {
+ public:
+  NpzWriter(const std::string& filename, bool compress=false);
+  ~NpzWriter();
+
+  /**
+   * Adds an array to the file, under the given name (without the .npy extension).
+   */
+  void add(const std::string& name, const NpyArray& array);
+
+  /**
+   * Writes the zip central directory and closes the file. It is called by the
+   * destructor if needed, but errors can only be reported by calling it explicitly.
+   */
+  void close();
+
+ protected:
+  struct Entry {
+    std::string name;
+    uint32_t crc;
+    uint32_t compressedSize;
+    uint32_t size;
+    uint32_t offset;
+    uint16_t method;
+  };
+
+  std::string _filename;
+  std::ofstream _out;
+  bool _compress;
+  std::vector<Entry> _entries;
+};
+
+
+/**
+ * Reads the arrays of a .npz file on demand.
+ */
+class ESSENTIA_API NpzReader {
+ public:
+  NpzReader(const std::string& filename);
+
+  /**
+   * Returns the names of the arrays in the file, without the .npy extension.
+   */
+  std::vector<std::string> names() const;
+
+  bool contains(const std::string& name) const;
+
+  /**
+   * Reads the array with the given name (without the .npy extension).
+   */
+  NpyArray read(const std::string& name);
+
+ protected:
+  struct Entry {
+    uint32_t crc;
+    uint32_t compressedSize;
+    uint32_t size;
+    uint32_t offset;
+    uint16_t method;
+  };
+
+  std::string _filename;
+  std::ifstream _in;
+  std::vector<std::string> _names;
+  std::map<std::string, Entry> _entries;
+};
+
+} // namespace essentia
+
+#endif // ESSENTIA_NPZ_H
@@ -0,0 +1,92 @@
+/*
+ * Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#ifndef ESSENTIA_TENSORFLOWPREDICTSTATS_H
+#define ESSENTIA_TENSORFLOWPREDICTSTATS_H
+
+// Helpers for the algorithms wrapping TensorflowPredict to forward the output
+// pools of its sessions, where it adds the stats of each batch when its
+// `stats` parameter is enabled. The `stats` output of these algorithms is only
+// declared when the stats are enabled, so that the networks and callers not
+// using it do not need to connect it.
+
+#include "streamingalgorithmcomposite.h"
+#include "essentiautil.h"
+#include "pool.h"
+
+namespace essentia {
+
+// Removes the `stats` output from `outputs` and `outputDescription`, if it was declared.
+template <typename T>
+inline void removeStatsOutput(OrderedMap<T>& outputs, DescriptionMap& outputDescription) {
+  int statsIndex = indexOf(outputs.keys(), std::string("stats"));
+  if (statsIndex < 0) return;
+
+  outputs.erase(outputs.begin() + statsIndex);
+  outputDescription.erase("stats");
+}
+
+namespace streaming {
+
+// Declares the `stats` output of `composite` (whose outputs are `outputs`) and
+// attaches it to `poolOut`, the output pool of its inner TensorflowPredict, when
+// `enabled`. Otherwise it is detached and removed.
+inline void configureStatsOutput(AlgorithmComposite& composite, Algorithm::OutputMap& outputs,
+                                 SourceProxy<Pool>& stats, SourceBase& poolOut, bool enabled) {
+  if (!enabled) {
+    stats.detach();
+    removeStatsOutput(outputs, composite.outputDescription);
+    return;
+  }
+
+  if (!contains(outputs, "stats")) {
+    composite.declareOutput(stats, 0, "stats", "the output pool of each TensorFlow session, with its `stats.batchSize`, `stats.latency` and `stats.throughput` (only when `stats` is true)");
+  }
+
+  // the inner network is created again at each configuration, so the output
+  // may still be attached to a previous TensorflowPredict
+  if (stats.proxiedSource() != &poolOut) {
+    stats.detach();
+    attach(poolOut, stats);
+  }
+}
+
+} // namespace streaming
+
+namespace standard {
+
+const char* const tensorflowStatsDescription = "the batch size, latency and throughput of each TensorFlow session (only when `stats` is true)";
+
+// Adds the stats of each batch from the output pools of the TensorFlow sessions
+// (`batchPools`) to `stats`, in the order in which the sessions were run.
+inline void collectStats(const std::vector<Pool>& batchPools, Pool& stats) {
+  const char* statsNames[] = {"stats.batchSize", "stats.latency", "stats.throughput"};
+
+  stats.clear();
+  for (size_t i=0; i<batchPools.size(); i++) {
+    for (int j=0; j<3; j++) {
+      stats.add(statsNames[j], batchPools[i].value<Real>(statsNames[j]));
+    }
+  }
+}
+
+} // namespace standard
+} // namespace essentia
+
+#endif // ESSENTIA_TENSORFLOWPREDICTSTATS_H
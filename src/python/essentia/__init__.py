@@ -139,12 +139,54 @@ INFO = log.info
 
 # we wrap this here so that we can do the decorator trick in all_tests.py
 # FIXME: what decorator trick? is this comment still valid?
-def run(gen):
+def run(gen, threads=1):
+    """Runs the streaming network connected to the generator gen.
+
+    With threads > 1, the independent branches of the network (algorithms
+    that do not depend on each other) are run concurrently on that many
+    threads. The results are the same as when running on a single thread."""
     from essentia.streaming import VectorInput
     # catch this here as the actual type has not been determined yet so trying
     # run it here and now would result in an invalid pointer dereference...
     if isinstance(gen, VectorInput) and not list(gen.connections.values())[0]:
         raise EssentiaError('VectorInput is not connected to anything...')
-    return _essentia.run(gen)
+    return _essentia.run(gen, threads)
+
+
+def modelCacheInfo():
+    """Returns a dict with the state of the process-wide cache of loaded models
+    (e.g., the graphs used by the TensorflowPredict algorithms): the number of
+    'models' in the cache, how many of them are 'inUse' by an algorithm, their
+    total 'size' in bytes, and the 'capacity' in bytes of the cache for unused
+    models."""
+    return _essentia.modelCacheInfo()
+
+def setModelCacheCapacity(capacity):
+    """Sets the maximum size in bytes of the unused models kept in the model
+    cache. The least recently used models are evicted beyond that size. Set it
+    to 0 to release models as soon as no algorithm uses them."""
+    _essentia.setModelCacheCapacity(int(capacity))
+
+def clearModelCache():
+    """Removes all the models that are not in use from the model cache."""
+    _essentia.clearModelCache()
+
+def setTensorflowOptions(**options):
+    """Sets default values for the session parameters of the algorithms running
+    TensorFlow models: intraOpThreads, interOpThreads, threadPool and
+    optimizeGraph. They apply to the algorithms configured afterwards, unless
+    these parameters are given explicitly. For example, to keep inference on two
+    threads shared by all the models:
+
+        essentia.setTensorflowOptions(intraOpThreads=2, interOpThreads=1, threadPool='inference')
+
+    Call it without arguments to go back to TensorFlow's defaults."""
+    from .common import tensorflowOptions
+    names = ('intraOpThreads', 'interOpThreads', 'threadPool', 'optimizeGraph')
+    for name in options:
+        if name not in names:
+            raise ValueError('Unknown TensorFlow option: %s (available options are %s)' % (name, ', '.join(names)))
+    tensorflowOptions.clear()
+    tensorflowOptions.update(options)
 
 log.debug(EPython, 'Successfully imported essentia python module (log fully available and synchronized with the C++ one)')
@@ -15,6 +15,8 @@
 # You should have received a copy of the Affero GNU General Public License
 # version 3 along with this program. If not, see http://www.gnu.org/licenses/
 
+from .utils import frames, frameBlocks
+
 def create_python_algorithms(essentia):
 
     '''
@@ -84,6 +86,8 @@ FrameGenerator inherits all the parameters of the FrameCutter. The way to use it
   for frame in FrameGenerator(audio, frameSize, hopSize):
       do_something()
 
+All the frames can also be obtained at once as a (nFrames, frameSize) matrix with FrameGenerator(...).as_matrix(), or in matrices of at most blockSize frames with FrameGenerator(...).blocks(blockSize). These are read-only strided views on the audio. If some frames need zero-padding at its boundaries (always the case with startFromZero=False), as_matrix() is a view on a zero-padded copy of the audio, while blocks() yields the padded frames in separate copied blocks and keeps the other blocks as views.
+
 ''' }
 
 
@@ -117,6 +121,20 @@ FrameGenerator inherits all the parameters of the FrameCutter. The way to use it
 
         next = __next__  # Python 2
 
+        def as_matrix(self):
+            """Returns all the frames as a single (nFrames, frameSize) read-only
+            array. See essentia.frames."""
+            return frames(self.audio, self.frameSize, self.hopSize,
+                          self.startFromZero, self.validFrameThresholdRatio,
+                          self.lastFrameToEndOfFile)
+
+        def blocks(self, blockSize):
+            """Yields the frames in read-only arrays of at most blockSize frames.
+            See essentia.frameBlocks."""
+            return frameBlocks(self.audio, blockSize, self.frameSize, self.hopSize,
+                               self.startFromZero, self.validFrameThresholdRatio,
+                               self.lastFrameToEndOfFile)
+
         def num_frames(self):
             if self.startFromZero:
                 if not self.lastFrameToEndOfFile:
@@ -140,3 +158,90 @@ FrameGenerator inherits all the parameters of the FrameCutter. The way to use it
 
 
     setattr(essentia, 'FrameGenerator', FrameGenerator)
+
+
+
+    # AudioChunks
+    class AudioChunks(object):
+        __struct__ = { 'name': 'AudioChunks',
+                       'category': 'Input/output',
+                       'inputs': [],
+                       'outputs': [],
+                       'parameters': [
+                           { 'name': 'filename', 'type': 'string', 'range': '',
+                             'default': '', 'description': 'the name of the file from which to read' },
+                           { 'name': 'chunkSize', 'type': 'integer', 'range': '(0,inf)',
+                             'default': '44100', 'description': 'the size of the chunks in samples' },
+                           { 'name': 'hopSize', 'type': 'integer', 'range': '(0,inf)',
+                             'default': 'chunkSize', 'description': 'the number of samples between the beginnings of consecutive chunks' },
+                           { 'name': 'sampleRate', 'type': 'real', 'range': '(0,inf)',
+                             'default': '44100', 'description': 'the desired output sampling rate [Hz]' },
+                           { 'name': 'downmix', 'type': 'string', 'range': '{left,right,mix}',
+                             'default': 'mix', 'description': 'the mixing type for stereo files' },
+                           { 'name': 'resampleQuality', 'type': 'integer', 'range': '[0,4]',
+                             'default': '1', 'description': 'the resampling quality, 0 for best quality, 4 for fast linear approximation' } ],
+                       'description': '''AudioChunks is a Python generator that reads an audio file in chunks of a fixed size. It is not available in C++.
+
+It is equivalent to cutting the output of the MonoLoader in frames of chunkSize samples every hopSize samples, as FrameCutter(startFromZero=True, validFrameThresholdRatio=0) does, but the file is decoded and resampled on demand with the streaming AudioLoader, MonoMixer and Resample algorithms. Only the samples needed for the current chunk are kept in memory, so the memory used does not depend on the duration of the file. This makes it suitable for long recordings (e.g., DJ sets, broadcasts) that would not fit in memory. The way to use it in Python is the following:
+
+  for chunk in AudioChunks(filename, chunkSize=44100 * 60, sampleRate=16000):
+      do_something(chunk)
+
+The chunks are float32 arrays of chunkSize samples. When hopSize is smaller than chunkSize, consecutive chunks overlap by chunkSize - hopSize samples. The last chunk is zero-padded to chunkSize.
+
+''' }
+
+
+        def __init__(self, filename, chunkSize=44100, hopSize=None, sampleRate=44100,
+                     downmix='mix', resampleQuality=1):
+            if chunkSize <= 0:
+                raise ValueError('AudioChunks: chunkSize should be greater than 0')
+            if hopSize is None:
+                hopSize = chunkSize
+            if hopSize <= 0:
+                raise ValueError('AudioChunks: hopSize should be greater than 0')
+
+            self.filename = filename
+            self.chunkSize = chunkSize
+            self.hopSize = hopSize
+            self.sampleRate = sampleRate
+            self.downmix = downmix
+            self.resampleQuality = resampleQuality
+
+        def __iter__(self):
+            from . import _essentia, streaming
+            from .common import Pool
+
+            loader = streaming.MonoLoader(filename=self.filename,
+                                          sampleRate=self.sampleRate,
+                                          downmix=self.downmix,
+                                          resampleQuality=self.resampleQuality)
+            chunker = streaming.FrameCutter(frameSize=self.chunkSize,
+                                            hopSize=self.hopSize,
+                                            startFromZero=True,
+                                            validFrameThresholdRatio=0,
+                                            lastFrameToEndOfFile=False)
+            pool = Pool()
+
+            loader.audio >> chunker.signal
+            chunker.frame >> (pool, 'chunks')
+
+            # Run the network one generator step at a time (i.e., one decoded
+            # packet) and hand over the chunks completed at each step.
+            network = _essentia.runPrepare(loader)
+            try:
+                more = True
+                while more:
+                    more = _essentia.runStep(network)
+
+                    if 'chunks' in pool.descriptorNames():
+                        chunks = pool['chunks']
+                        pool.remove('chunks')
+                        for chunk in chunks:
+                            yield chunk
+            finally:
+                # delete the network before the algorithms it refers to
+                del network
+
+
+    setattr(essentia, 'AudioChunks', AudioChunks)
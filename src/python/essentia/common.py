@@ -35,6 +35,18 @@ def ones(object, **kwargs):
 
 algoDecorator = lambda x: x
 
+# Default values of the TensorFlow session parameters, used by the algorithms
+# declaring them unless they are given explicitly. See essentia.setTensorflowOptions
+tensorflowOptions = {}
+
+def addTensorflowOptions(algo, kwargs):
+    if not tensorflowOptions:
+        return
+    names = algo.parameterNames()
+    for name, val in tensorflowOptions.items():
+        if name in names and name not in kwargs:
+            kwargs[name] = val
+
 
 # An object representing an enum which contains int representations for
 # essentia types. The purpose of this int representation is to have a common
@@ -405,6 +417,12 @@ class Pool:
 
         self.cppPool.__add__(key, str(goalType), convertedVal, validityCheck)
 
+    def extend(self, key, values, validityCheck=False):
+        # adds all the rows of a 2-D array (e.g. the frames of a descriptor) or all
+        # the values of a 1-D array under key in a single call. This is the same as
+        # calling add for each of them, without converting them one by one
+        self.cppPool.__extend__(key, values, validityCheck)
+
     def set(self, key, value, validityCheck=False):
         givenType = determineEdt(value)
 
@@ -531,8 +549,27 @@ class Pool:
 
         return self.cppPool.__value__(key, self.cppPool.__keyType__(key))
 
+    def view(self, key):
+        # same as pool[key] but returns read-only numpy arrays. Series of Reals,
+        # vectors and tensors are not copied: the arrays point to the data
+        # stored in the pool and keep the pool alive. Before the descriptor is
+        # modified (by this Pool, a streaming network or an algorithm), the
+        # data they point to is moved out of the pool, so they keep the values
+        # they had when created. Frames of the same size (vectors of vectors)
+        # are returned as a (frames, size) matrix: the first view moves them to
+        # a single buffer, which then stores them in the pool, so that the next
+        # views do not copy them until new frames are added. Matrices and
+        # tensors are stored separately, so they are copied into a single
+        # array with one row per element
+        if not self.containsKey(key):
+            raise KeyError('no key found named \''+key+'\'')
+
+        return self.cppPool.__view__(key, self.cppPool.__keyType__(key))
+
     def containsKey(self, key):
-        return key in self.descriptorNames()
+        # look the key up in the C++ sub-pools instead of building the list of
+        # all the descriptor names, as it is called for each add/set/merge
+        return self.cppPool.containsKey(key)
 
     def descriptorNames(self, key=None):
         if not key:
@@ -16,13 +16,20 @@
 # version 3 along with this program. If not, see http://www.gnu.org/licenses/
 
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from multiprocessing import Pool
 from multiprocessing import cpu_count
 from subprocess import run, PIPE
 from essentia import EssentiaError
+from datetime import datetime
 from functools import partial
+import json
 import os
 import sys
+import time
+import traceback
+import zlib
 
 
 def _subprocess(cmd, verbose=True):
@@ -44,9 +51,128 @@ def _subprocess(cmd, verbose=True):
     return rc, cmd_str, stderr
 
 
+def _extractor_subprocess(job, extractor_cmd, verbose=True):
+    """Analyzes a file running `extractor_cmd` in a subprocess."""
+    audio_file, out_file = job
+
+    start = time.time()
+    rc, cmd_str, stderr = _subprocess(extractor_cmd + [audio_file, out_file], verbose=verbose)
+
+    return rc, audio_file, out_file, cmd_str, stderr, time.time() - start
+
+
+# Analysis function of the current worker process, see `_init_worker`.
+_worker_extractor = None
+
+
+def _init_worker(factory, factory_kwargs):
+    """Builds the analysis function once per worker process."""
+    global _worker_extractor
+    _worker_extractor = factory(**factory_kwargs)
+
+
+def _worker(audio_file, out_file, verbose=True):
+    """Analyzes a file in a worker process. Returns the same values as `_extractor_subprocess`."""
+    start = time.time()
+    try:
+        _worker_extractor(audio_file, out_file)
+        rc, stderr = 0, ''
+    except Exception:
+        rc, stderr = 1, traceback.format_exc()
+
+    if verbose:
+        if rc == 0:
+            print('"{}"... ok!'.format(audio_file))
+        else:
+            print('"{}"... failed!'.format(audio_file))
+            print(stderr, '\n')
+
+    return rc, audio_file, out_file, audio_file, stderr, time.time() - start
+
+
+def _run_subprocesses(jobs_list, jobs, extractor_cmd, verbose=True):
+    """Runs an extractor subprocess per file, yielding results as they finish."""
+    with Pool(jobs) as p:
+        for out in p.imap_unordered(partial(_extractor_subprocess, extractor_cmd=extractor_cmd,
+                                            verbose=verbose), jobs_list):
+            yield out
+
+
+def _run_workers(jobs_list, jobs, worker, verbose=True):
+    """Analyzes the files in worker processes that build the analysis function
+    returned by `worker[0](**worker[1])` once, and reuse it for all their files.
+    Yields results as they finish."""
+    factory, factory_kwargs = worker
+
+    with ProcessPoolExecutor(jobs, initializer=_init_worker,
+                             initargs=(factory, factory_kwargs)) as executor:
+        futures = {executor.submit(_worker, audio_file, out_file, verbose=verbose): (audio_file, out_file)
+                   for audio_file, out_file in jobs_list}
+
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except BrokenProcessPool:
+                # a worker died (e.g., a crash in a decoder), so the pending
+                # files cannot be analyzed anymore
+                audio_file, out_file = futures[future]
+                yield (1, audio_file, out_file, audio_file,
+                       'the worker process analyzing this file terminated abruptly', 0.)
+
+
+def _parse_shard(shard):
+    """Returns the (index, count) tuple of a shard given as "i/N" or (i, N)."""
+    if isinstance(shard, str):
+        try:
+            shard = tuple(int(x) for x in shard.split('/'))
+        except ValueError:
+            shard = ()
+
+    if len(shard) != 2 or not 0 <= shard[0] < shard[1]:
+        raise EssentiaError('Invalid shard "{}", expected "i/N" with 0 <= i < N'.format(shard))
+
+    return shard
+
+
+def _in_shard(relative_path, shard):
+    """Whether an audio file belongs to the shard. Files are assigned by a hash
+    of their path relative to the audio folder, so that all the machines sharing
+    an audio tree (possibly mounted in different places) agree on the split."""
+    index, count = shard
+    return zlib.crc32(relative_path.encode('utf-8')) % count == index
+
+
+class _Manifest:
+    """Append-only JSON lines file with the status, time and error of each
+    analyzed file. Each line is written as soon as a file is done, so the
+    status of a batch job survives crashes. Resumed jobs append to the same
+    file, the last entry of an audio file being the valid one."""
+
+    def __init__(self, filename):
+        self._file = open(filename, 'a')
+
+    def add(self, audio_file, out_file, ok, elapsed, error=''):
+        entry = {'audio_file': audio_file, 'out_file': out_file,
+                 'status': 'ok' if ok else 'failed', 'time': round(elapsed, 3),
+                 'error': error, 'date': datetime.now().isoformat()}
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
 def _batch_extractor(audio_dir, output_dir, extractor_cmd, output_extension,
                      generate_log=True, audio_types=None, skip_analyzed=False,
-                     jobs=0, verbose=True):
+                     jobs=0, verbose=True, worker=None, shard=None, manifest=True):
+    """Analyzes the audio files in `audio_dir` running `extractor_cmd` in a
+    subprocess per file or, if `worker` is given, in a pool of worker
+    processes (see `_run_workers`).
+
+    With `shard` ("i/N"), only the i-th of N disjoint subsets of the files is
+    analyzed. With `manifest`, the status, time and error of each file are
+    appended to a manifest.jsonl file in `output_dir` as soon as it is done.
+    """
     if not audio_types:
         audio_types = ('.wav', '.aiff', '.flac', '.mp3', '.ogg')
         print("Audio files extensions considered by default: " +
@@ -63,6 +189,14 @@ def _batch_extractor(audio_dir, output_dir, extractor_cmd, output_extension,
     output_dir = os.path.abspath(output_dir)
     audio_dir = os.path.abspath(audio_dir)
 
+    # each shard gets its own manifest and log, so that several machines can
+    # share the output folder
+    suffix = ''
+    if shard is not None:
+        shard = _parse_shard(shard)
+        suffix = '.{}-of-{}'.format(*shard)
+        print("Analyzing shard {} of {}".format(*shard))
+
     if jobs == 0:
         try:
             jobs = cpu_count()
@@ -74,13 +208,18 @@ def _batch_extractor(audio_dir, output_dir, extractor_cmd, output_extension,
 
     skipped_count = 0
     skipped_files = []
-    cmd_lines = []
+    jobs_list = []
     for root, _, filenames in os.walk(audio_dir):
         for filename in filenames:
             if filename.lower().endswith(audio_types):
                 audio_file = os.path.join(audio_dir, root, filename)
                 out_file = os.path.join(output_dir, output_dir, filename)
 
+                if shard and not _in_shard(os.path.relpath(audio_file, audio_dir), shard):
+                    continue
+
+                # outputs are written to a temporary file and renamed once
+                # complete, so an existing output is always a finished one
                 if skip_analyzed:
                     if os.path.isfile( '{}.{}'.format(out_file, output_extension)):
                         print("Found descriptor file for " +
@@ -97,27 +236,37 @@ def _batch_extractor(audio_dir, output_dir, extractor_cmd, output_extension,
                 else:
                     os.makedirs(folder, exist_ok=True)
 
-                cmd_lines.append(extractor_cmd + [audio_file, out_file])
+                jobs_list.append((audio_file, out_file))
 
     # analyze
     log_lines = []
     total, errors, oks = 0, 0, 0
-    if cmd_lines:
-        p = Pool(jobs)
-        outs = p.map(partial(_subprocess, verbose=verbose), cmd_lines)
-
-        total = len(outs)
-        status, cmd, stderr = zip(*outs)
-
-        oks, errors = 0, 0
-        for i, cmd_idx, err in zip(status, cmd, stderr):
-            if i == 0:
-                oks += 1
-                log_lines.append('"{}" ok!'.format(cmd_idx))
-            else:
-                errors += 1
-                log_lines.append('"{}" failed'.format(cmd_idx))
-                log_lines.append('  "{}"'.format(err))
+    if jobs_list:
+        if manifest:
+            os.makedirs(output_dir, exist_ok=True)
+            manifest = _Manifest(os.path.join(output_dir, 'manifest{}.jsonl'.format(suffix)))
+
+        if worker:
+            outs = _run_workers(jobs_list, jobs, worker, verbose=verbose)
+        else:
+            outs = _run_subprocesses(jobs_list, jobs, extractor_cmd, verbose=verbose)
+
+        try:
+            for i, audio_file, out_file, cmd_idx, err, elapsed in outs:
+                total += 1
+                if i == 0:
+                    oks += 1
+                    log_lines.append('"{}" ok!'.format(cmd_idx))
+                else:
+                    errors += 1
+                    log_lines.append('"{}" failed'.format(cmd_idx))
+                    log_lines.append('  "{}"'.format(err))
+
+                if manifest:
+                    manifest.add(audio_file, out_file, i == 0, elapsed, err if i else '')
+        finally:
+            if manifest:
+                manifest.close()
 
     summary = ("Analysis done for {} files. {} files have been skipped due to errors, "
                "{} were successfully processed and {} already existed.\n").format(total, errors, oks, skipped_count)
@@ -127,15 +276,29 @@ def _batch_extractor(audio_dir, output_dir, extractor_cmd, output_extension,
     if generate_log:
         log = [summary] + log_lines
 
-        with open(os.path.join(output_dir, 'log'), 'w') as f:
+        with open(os.path.join(output_dir, 'log' + suffix), 'w') as f:
             f.write('\n'.join(log))
 
 
 def batch_music_extractor(audio_dir, output_dir, generate_log=True, audio_types=None, profile=None,
-                          store_frames=False, skip_analyzed=False, format='yaml', jobs=0):
+                          store_frames=False, skip_analyzed=False, format='yaml', jobs=0,
+                          in_process=False, shard=None, manifest=True, frames_format=None):
     """Processes every audio file matching `audio_types` in `audio_dir` with MusicExtractor.
     The generated .sig yaml/json files are stored in `output_dir` matching the folder
     structure found in `audio_dir`.
+
+    By default, each file is analyzed in a new Python subprocess. With `in_process`,
+    each of the `jobs` worker processes imports Essentia and configures MusicExtractor
+    only once and reuses it for all its files, which is much faster for short files.
+    However, a crash while analyzing a file stops the analysis of all the pending files.
+
+    Use `shard` ("i/N", with 0 <= i < N) to analyze only a part of the files, so that
+    N machines can share the analysis of `audio_dir`. Unless `manifest` is False, the
+    status, time and error of each file are appended to `output_dir`/manifest.jsonl
+    (manifest.i-of-N.jsonl for shards) as soon as it is analyzed.
+
+    With `store_frames`, the frame values are stored in the same `format` unless
+    `frames_format` is given ('yaml', 'json' or 'npz' for the binary NpzOutput format).
     """
 
     extractor_cmd = [sys.executable, os.path.join(os.path.dirname(__file__),
@@ -148,19 +311,33 @@ def batch_music_extractor(audio_dir, output_dir, generate_log=True, audio_types=
 
     if store_frames:
         extractor_cmd += ['--store_frames']
+        if frames_format:
+            extractor_cmd += ['--frames_format', frames_format]
+
+    worker = None
+    if in_process:
+        from essentia.pytools.extractors.music_extractor import music_extractor_worker
+        worker = (music_extractor_worker, {'profile': profile, 'store_frames': store_frames,
+                                           'format': format, 'frames_format': frames_format})
 
     _batch_extractor(audio_dir, output_dir, extractor_cmd, 'sig', generate_log=generate_log,
-                     audio_types=audio_types, skip_analyzed=skip_analyzed, jobs=jobs)
+                     audio_types=audio_types, skip_analyzed=skip_analyzed, jobs=jobs,
+                     worker=worker, shard=shard, manifest=manifest)
 
 
 def batch_melspectrogram(audio_dir, output_dir, generate_log=True, verbose=True, audio_types=None,
                          skip_analyzed=True, jobs=0, sample_rate=None, frame_size=None, hop_size=None,
                          window_type=None, zero_padding=None, low_frequency_bound=None,
                          high_frequency_bound=None, number_bands=None, warping_formula=None,
-                         weighting=None, normalize=None, bands_type=None, compression_type=None):
+                         weighting=None, normalize=None, bands_type=None, compression_type=None,
+                         in_process=False, shard=None, manifest=True):
     """Generates mel bands for every audio file matching `audio_types` in `audio_dir`.
     The generated .npy files are stored in `output_dir` matching the folder
     structure found in `audio_dir`.
+
+    With `in_process`, the files are analyzed in `jobs` worker processes that import
+    Essentia only once instead of in a new subprocess per file. See `batch_music_extractor`
+    for `shard` and `manifest`.
     """
 
     extractor_cmd = [sys.executable, os.path.join(os.path.dirname(__file__),
@@ -212,6 +389,53 @@ def batch_melspectrogram(audio_dir, output_dir, generate_log=True, verbose=True,
     if compression_type:
         extractor_cmd += ['--compression-type', str(compression_type)]
 
+    worker = None
+    if in_process:
+        from essentia.pytools.extractors.melspectrogram import melspectrogram_worker
+        params = {'verbose': verbose, 'sample_rate': sample_rate, 'frame_size': frame_size,
+                  'hop_size': hop_size, 'window_type': window_type, 'zero_padding': zero_padding,
+                  'low_frequency_bound': low_frequency_bound, 'high_frequency_bound': high_frequency_bound,
+                  'number_bands': number_bands, 'warping_formula': warping_formula,
+                  'weighting': weighting, 'normalize': normalize, 'bands_type': bands_type,
+                  'compression_type': compression_type}
+        # same as the command line, unset parameters take the default values
+        worker = (melspectrogram_worker, {k: v for k, v in params.items() if v})
+
     _batch_extractor(audio_dir, output_dir, extractor_cmd, 'npy',
                      generate_log=generate_log, audio_types=audio_types,
-                     skip_analyzed=skip_analyzed, jobs=jobs, verbose=verbose)
+                     skip_analyzed=skip_analyzed, jobs=jobs, verbose=verbose,
+                     worker=worker, shard=shard, manifest=manifest)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="""
+Analyzes all the audio files in a folder with MusicExtractor or computes their mel spectrograms.
+""")
+
+    parser.add_argument('extractor', choices=['music_extractor', 'melspectrogram'],
+                        help='the extractor to use')
+    parser.add_argument('audio_dir', help='folder with the audio files to analyze')
+    parser.add_argument('output_dir', help='folder to store the results')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='number of parallel jobs (default: number of CPUs)')
+    parser.add_argument('--shard', help='only analyze the i-th of N parts of the files (i/N, 0 <= i < N)')
+    parser.add_argument('--skip-analyzed', action='store_true',
+                        help='skip the files which have already been analyzed')
+    parser.add_argument('--in-process', action='store_true',
+                        help='reuse the extractor in a pool of worker processes instead of '
+                             'starting a subprocess per file')
+    parser.add_argument('--no-manifest', action='store_true',
+                        help='do not write the manifest of analyzed files')
+    args = parser.parse_args()
+
+    if args.extractor == 'music_extractor':
+        extractor = batch_music_extractor
+    else:
+        extractor = batch_melspectrogram
+
+    kwargs = {}
+    if args.skip_analyzed:
+        kwargs['skip_analyzed'] = True
+
+    extractor(args.audio_dir, args.output_dir, jobs=args.jobs, in_process=args.in_process,
+              shard=args.shard, manifest=not args.no_manifest, **kwargs)
@@ -0,0 +1,258 @@
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+"""One-to-many cover song identification over an index of reference songs.
+
+An index is a folder with the HPCPs of a set of reference songs:
+
+- `hpcp.f32`: the frames of all the references, concatenated (raw float32
+  values, memory-mapped when querying)
+- `offsets.npy`: index of the first frame of each reference (plus the total
+  number of frames)
+- `global_hpcp.npy`: the global HPCP of each reference, with unit norm
+- `ids.npy`: the ids of the references
+
+`offsets.npy` is written last and defines which references are in the index:
+the frames, global HPCPs and ids written after it by an interrupted
+`build_index` are ignored.
+
+A query is first compared with the global HPCPs of all the references at once,
+which gives their optimal transposition index (OTI) and a cheap similarity to
+prune the candidates. The remaining candidates are scored with
+ChromaCrossSimilarity and CoverSongSimilarity in parallel threads (the
+algorithms release the GIL while computing).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import cpu_count
+from essentia.pytools.io import atomic_output
+import os
+import threading
+import numpy as np
+
+
+def global_hpcp(hpcp):
+    """Returns the global HPCP of a song (the sum of its frames) with unit
+    norm."""
+    g = np.sum(np.asarray(hpcp, dtype=np.float64), axis=0)
+    norm = np.linalg.norm(g)
+    return (g / norm if norm > 0 else g).astype(np.float32)
+
+
+def _save_npy(filename, array):
+    with atomic_output(filename) as tmp_file:
+        # np.save would add an .npy extension to the temporary filename
+        with open(tmp_file, 'wb') as f:
+            np.save(f, array)
+
+
+def _load_index(index_dir):
+    # the references not in offsets.npy were added by an interrupted build_index
+    offsets = np.load(os.path.join(index_dir, 'offsets.npy'))
+    n = len(offsets) - 1
+    global_hpcp = np.load(os.path.join(index_dir, 'global_hpcp.npy'))[:n]
+    ids = np.load(os.path.join(index_dir, 'ids.npy'))[:n]
+    return offsets, global_hpcp, ids
+
+
+def build_index(index_dir, references):
+    """Adds reference songs to an index, creating it if it does not exist.
+
+    Args:
+        index_dir (string): Folder of the index
+        references (iterable): Pairs of (id, hpcp) of the references, where
+            hpcp is a matrix with a row per frame (e.g., computed with
+            HPCP(size=12))
+    Returns:
+        (int): Number of references added
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    hpcp_file = os.path.join(index_dir, 'hpcp.f32')
+
+    if os.path.exists(os.path.join(index_dir, 'offsets.npy')):
+        offsets, globals_, ids = _load_index(index_dir)
+        offsets, ids = offsets.tolist(), ids.tolist()
+        bins = globals_.shape[1] or None
+        globals_ = list(globals_)
+    else:
+        offsets, globals_, ids, bins = [0], [], [], None
+    added = 0
+
+    with open(hpcp_file, 'ab') as f:
+        # drop the frames written by an interrupted run, which are not indexed
+        f.truncate(offsets[-1] * 4 * (bins or 0))
+
+        for ref_id, hpcp in references:
+            hpcp = np.ascontiguousarray(hpcp, dtype=np.float32)
+            if hpcp.ndim != 2 or not len(hpcp):
+                raise ValueError('The HPCP of reference "{}" is not a non-empty matrix'.format(ref_id))
+            if bins is None:
+                bins = hpcp.shape[1]
+            elif hpcp.shape[1] != bins:
+                raise ValueError('The HPCP of reference "{}" has {} bins instead of {}'.format(
+                                 ref_id, hpcp.shape[1], bins))
+
+            f.write(hpcp.tobytes())
+            offsets.append(offsets[-1] + len(hpcp))
+            globals_.append(global_hpcp(hpcp))
+            ids.append(str(ref_id))
+            added += 1
+
+    # offsets.npy commits the new references, so it is written last
+    _save_npy(os.path.join(index_dir, 'global_hpcp.npy'), np.array(globals_, dtype=np.float32).reshape(len(ids), bins or 0))
+    _save_npy(os.path.join(index_dir, 'ids.npy'), np.array(ids, dtype=str))
+    _save_npy(os.path.join(index_dir, 'offsets.npy'), np.array(offsets, dtype=np.int64))
+
+    return added
+
+
+class CoverSongIndex(object):
+    """Finds the covers of a query song in an index written by `build_index`.
+
+    The parameters are the ones of ChromaCrossSimilarity and
+    CoverSongSimilarity. The reference frames are memory-mapped, so that
+    indexes larger than the available memory can be queried.
+    """
+
+    def __init__(self, index_dir, frame_stack_size=9, frame_stack_stride=1,
+                 binarize_percentile=0.095, noti=12, dis_onset=0.5,
+                 dis_extension=0.5, alignment_type='serra09',
+                 distance_type='asymmetric'):
+        self.offsets, self.global_hpcp, ids = _load_index(index_dir)
+        self.ids = ids.tolist()
+
+        bins = self.global_hpcp.shape[1]
+        if self.offsets[-1]:
+            self.frames = np.memmap(os.path.join(index_dir, 'hpcp.f32'), dtype=np.float32, mode='r',
+                                    shape=(int(self.offsets[-1]), bins))
+        else:
+            self.frames = np.zeros((0, bins), dtype=np.float32)
+
+        self.noti = noti
+        self.ccs_params = dict(frameStackSize=frame_stack_size, frameStackStride=frame_stack_stride,
+                               binarizePercentile=binarize_percentile, oti=False)
+        self.css_params = dict(disOnset=dis_onset, disExtension=dis_extension,
+                               alignmentType=alignment_type, distanceType=distance_type,
+                               outputScoreMatrix=False)
+        # the symmetric distance is the alignment score: higher is more similar
+        self.higher_is_closer = distance_type == 'symmetric'
+        self._local = threading.local()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def reference(self, i):
+        """Returns the HPCP of the i-th reference."""
+        return self.frames[self.offsets[i]:self.offsets[i + 1]]
+
+    def candidates(self, hpcp, n=None):
+        """Ranks the references by the similarity of their global HPCP to the
+        one of the query, after transposing them by their OTI.
+
+        Returns:
+            (tuple): The indexes of the `n` most similar references (all of
+                them if not given), their similarities and their OTIs
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=int)
+
+        # dot(g, roll(r, k)) == dot(roll(g, -k), r) for all the references r
+        g = global_hpcp(hpcp)
+        shifts = np.stack([np.roll(g, -k) for k in range(self.noti + 1)], axis=1)
+        scores = np.dot(self.global_hpcp, shifts)
+        otis = np.argmax(scores, axis=1)
+        similarities = scores[np.arange(len(scores)), otis]
+
+        if n is not None and n < len(similarities):
+            indexes = np.argpartition(-similarities, n)[:n]
+        else:
+            indexes = np.arange(len(similarities))
+        indexes = indexes[np.argsort(-similarities[indexes], kind='stable')]
+        return indexes, similarities[indexes], otis[indexes]
+
+    def _algorithms(self):
+        # the algorithms are not thread-safe: each thread gets its own instances
+        if not hasattr(self._local, 'algorithms'):
+            from essentia.standard import ChromaCrossSimilarity, CoverSongSimilarity
+            self._local.algorithms = (ChromaCrossSimilarity(**self.ccs_params),
+                                      CoverSongSimilarity(**self.css_params))
+        return self._local.algorithms
+
+    def distance(self, hpcp, i, oti=0):
+        """Returns the cover song distance between a query and the i-th
+        reference transposed by `oti` (the same as ChromaCrossSimilarity with
+        oti=True followed by CoverSongSimilarity if `oti` is their OTI).
+        Returns None if one of the songs is too short to be compared."""
+        ccs, css = self._algorithms()
+        # transposing the query by -oti gives the same distances as
+        # transposing the reference by oti
+        query = np.ascontiguousarray(np.roll(hpcp, -oti, axis=1), dtype=np.float32)
+        reference = np.ascontiguousarray(self.reference(i))
+        try:
+            _, distance = css(ccs(query, reference))
+        except RuntimeError:
+            return None
+        return float(distance)
+
+    def query(self, hpcp, top_k=10, prefilter=1000, jobs=0):
+        """Finds the references which are most likely covers of a query.
+
+        Args:
+            hpcp (numpy.ndarray): HPCP of the query (a row per frame)
+            top_k (int): Number of references to return
+            prefilter (int): Number of candidates to score with the
+                cross-similarity alignment, among the references with the
+                most similar global HPCP (all the references if None)
+            jobs (int): Number of parallel threads (default: number of CPUs)
+        Returns:
+            (list): Pairs of (id, distance) of the `top_k` closest references,
+                from the closest one
+        """
+        return self.query_batch([hpcp], top_k=top_k, prefilter=prefilter, jobs=jobs)[0]
+
+    def query_batch(self, queries, top_k=10, prefilter=1000, jobs=0):
+        """Runs `query` for several queries, scoring all their candidates in
+        the same pool of threads.
+
+        Returns:
+            (list): The result of `query` for each query
+        """
+        if jobs == 0:
+            try:
+                jobs = cpu_count()
+            except NotImplementedError:
+                jobs = 4
+
+        queries = [np.asarray(hpcp, dtype=np.float32) for hpcp in queries]
+        tasks = []
+        for q, hpcp in enumerate(queries):
+            indexes, _, otis = self.candidates(hpcp, prefilter)
+            tasks += [(q, i, oti) for i, oti in zip(indexes, otis)]
+
+        def score(task):
+            q, i, oti = task
+            return self.distance(queries[q], i, oti)
+
+        results = [[] for _ in queries]
+        with ThreadPoolExecutor(jobs) as executor:
+            for (q, i, _), distance in zip(tasks, executor.map(score, tasks)):
+                if distance is not None:
+                    results[q].append((-distance if self.higher_is_closer else distance, i))
+
+        # references at the same distance are sorted in the order of the index
+        return [[(self.ids[i], -d if self.higher_is_closer else d) for d, i in sorted(r)[:top_k]]
+                for r in results]
@@ -0,0 +1,312 @@
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+"""Columnar datasets of the descriptors computed with `batch_music_extractor`.
+
+A dataset is a folder of part-NNNNN.npz files. Each part holds a batch of
+tracks, with one array per descriptor (column) and the names of the
+descriptor files in `__files__`. Descriptors with the same shape for all the
+tracks of a part are stored as a single array with one row per track. The
+others are concatenated in a flat array, with the shape of each track's value
+in `__shapes__/<descriptor name>` (the same layout as NpzOutput), where the
+tracks without the descriptor have a shape of -1 in all their dimensions. For
+the single arrays, these tracks are flagged in `__missing__/<descriptor name>`.
+"""
+
+from argparse import ArgumentParser
+from fnmatch import fnmatch
+from functools import partial
+from multiprocessing import Pool, cpu_count
+from essentia import log
+from essentia.pytools.io import atomic_output
+import glob
+import os
+import numpy as np
+
+
+def _matches(name, patterns):
+    return any(fnmatch(name, pattern) for pattern in patterns)
+
+
+def _filter(names, include=None, ignore=None):
+    """Returns the names matching any of the `include` patterns (all of them
+    if not given) and none of the `ignore` patterns."""
+    return [name for name in names
+            if (not include or _matches(name, include)) and not (ignore and _matches(name, ignore))]
+
+
+def _load_descriptors(sig_file, include=None, ignore=None):
+    """Reads a descriptor file written by MusicExtractor. Returns a dict with
+    the descriptors as numpy arrays (float32 or unicode), or None with the
+    error message if the file cannot be read. Descriptors which are not
+    numbers, strings or regular arrays of them are ignored."""
+    from essentia.standard import YamlInput
+
+    try:
+        with open(sig_file, 'rb') as f:
+            is_json = f.read(1) == b'{'
+        pool = YamlInput(filename=sig_file, format='json' if is_json else 'yaml')()
+    except (OSError, RuntimeError) as e:
+        return sig_file, None, str(e)
+
+    descriptors = {}
+    for name in _filter(pool.descriptorNames(), include, ignore):
+        value = pool[name]
+        try:
+            if isinstance(value, str) or (isinstance(value, list) and
+                                          all(isinstance(x, str) for x in value)):
+                value = np.array(value, dtype=str)
+            else:
+                value = np.array(value, dtype=np.float32)
+        except ValueError:
+            # ragged values, e.g., a vector of vectors of different sizes
+            continue
+        descriptors[name] = value
+
+    return sig_file, descriptors, None
+
+
+def _find_sig_files(sig_dir):
+    """Returns the descriptor files found in `sig_dir`, skipping the frames."""
+    sig_files = []
+    for root, _, filenames in os.walk(sig_dir):
+        for filename in filenames:
+            if filename.endswith('.sig') and not filename.endswith('.frames.sig'):
+                sig_files.append(os.path.join(root, filename))
+    return sorted(sig_files)
+
+
+def _parts(dataset_dir):
+    return sorted(glob.glob(os.path.join(dataset_dir, 'part-*.npz')))
+
+
+def _next_part_index(dataset_dir):
+    # parts may have been removed, so the number of parts can be an existing index
+    indexes = [int(name[5:-4]) for name in map(os.path.basename, _parts(dataset_dir))
+               if name[5:-4].isdigit()]
+    return max(indexes) + 1 if indexes else 0
+
+
+def _write_part(filename, files, rows):
+    """Writes the descriptors of a batch of tracks as the columns of a part."""
+    arrays = {'__files__': np.array(files, dtype=str)}
+
+    for name in sorted(set().union(*rows)):
+        items = [row.get(name) for row in rows]
+        present = [x for x in items if x is not None]
+        if any(x.dtype.kind == 'U' for x in present):
+            items = [x.astype(str) if x is not None else None for x in items]
+            present = [x for x in items if x is not None]
+        missing = np.array('' if present[0].dtype.kind == 'U' else np.nan, dtype=present[0].dtype)
+
+        shapes = set(x.shape for x in present)
+        if len(shapes) == 1:
+            # missing values are filled with NaN (or empty strings)
+            fill = np.full(present[0].shape, missing, dtype=present[0].dtype)
+            arrays[name] = np.stack([x if x is not None else fill for x in items])
+            if len(present) < len(items):
+                arrays['__missing__/' + name] = np.array([x is None for x in items])
+            continue
+
+        # values of different shapes are concatenated, missing values have a
+        # shape of -1 so that they are not confused with empty arrays
+        if len(set(len(shape) for shape in shapes)) > 1:
+            items = [x.ravel() if x is not None else None for x in items]
+        rank = max(x.ndim for x in items if x is not None)
+        arrays[name] = np.concatenate([x.ravel() for x in items if x is not None])
+        arrays['__shapes__/' + name] = np.array([x.shape if x is not None else (-1,) * rank for x in items],
+                                                dtype=np.int64).reshape(len(items), rank)
+
+    with atomic_output(filename) as tmp_file:
+        # np.savez would add an .npz extension to the temporary filename
+        with open(tmp_file, 'wb') as f:
+            np.savez(f, **arrays)
+
+
+def exported_files(dataset_dir):
+    """Returns the descriptor files already exported to a dataset, relative to
+    the folder they were exported from."""
+    files = []
+    for part in _parts(dataset_dir):
+        with np.load(part) as data:
+            files += data['__files__'].tolist()
+    return files
+
+
+def export_dataset(sig_dir, dataset_dir, include=None, ignore=None, jobs=0,
+                   part_size=1000, verbose=True):
+    """Exports the descriptor (.sig) files found in `sig_dir`, as written by
+    `batch_music_extractor`, to a columnar dataset in `dataset_dir`, which can
+    then be loaded with `load_dataset`.
+
+    The files are read in `jobs` parallel processes (default: number of CPUs)
+    and written in parts of `part_size` tracks as soon as they are read. Only
+    the files which are not in the dataset yet are exported, so running it
+    again after analyzing new files appends them to the dataset. Files which
+    cannot be read are skipped with a warning (and tried again on the next
+    export).
+
+    Args:
+        sig_dir (string): Folder with the descriptor files
+        dataset_dir (string): Folder of the dataset
+        include (list): Descriptor names to export, as wildcard patterns
+            (default: all of them)
+        ignore (list): Descriptor names not to export, as wildcard patterns
+        jobs (int): Number of parallel processes
+        part_size (int): Number of tracks per part
+        verbose (bool): Whether to print the progress
+    Returns:
+        (int): Number of files exported (not counting the skipped ones)
+    """
+    sig_dir = os.path.abspath(sig_dir)
+    os.makedirs(dataset_dir, exist_ok=True)
+
+    done = set(exported_files(dataset_dir))
+    sig_files = [f for f in _find_sig_files(sig_dir) if os.path.relpath(f, sig_dir) not in done]
+    if verbose:
+        print('Exporting {} new descriptor files ({} already in the dataset)'.format(len(sig_files), len(done)))
+    if not sig_files:
+        return 0
+
+    if jobs == 0:
+        try:
+            jobs = cpu_count()
+        except NotImplementedError:
+            jobs = 4
+
+    next_part = _next_part_index(dataset_dir)
+    files, rows = [], []
+    exported = 0
+
+    def flush():
+        nonlocal next_part, exported, files, rows
+        filename = os.path.join(dataset_dir, 'part-{:05d}.npz'.format(next_part))
+        if os.path.exists(filename):
+            raise FileExistsError('Not overwriting {}, which was written by another export'.format(filename))
+        _write_part(filename, files, rows)
+        if verbose:
+            print('Wrote {} tracks to {}'.format(len(files), filename))
+        next_part += 1
+        exported += len(files)
+        files, rows = [], []
+
+    with Pool(jobs) as p:
+        load = partial(_load_descriptors, include=include, ignore=ignore)
+        for sig_file, descriptors, error in p.imap_unordered(load, sig_files, chunksize=16):
+            if descriptors is None:
+                log.warning('Skipping {}, which cannot be read: {}'.format(sig_file, error))
+                continue
+            files.append(os.path.relpath(sig_file, sig_dir))
+            rows.append(descriptors)
+            if len(files) >= part_size:
+                flush()
+
+    if files:
+        flush()
+
+    return exported
+
+
+def _read_column(data, name):
+    """Returns a column of a part, either as an array with a row per track and
+    the flags of the missing rows (or None if there are none) or, if the
+    values have different shapes, as a list of arrays (None if missing)."""
+    values = data[name]
+    if '__shapes__/' + name not in data.files:
+        missing = data['__missing__/' + name] if '__missing__/' + name in data.files else None
+        return values, missing
+
+    shapes = data['__shapes__/' + name]
+    sizes = np.prod(np.maximum(shapes, 0), axis=1, dtype=np.int64)
+    items = np.split(values, np.cumsum(sizes)[:-1]) if len(sizes) else []
+    # shapes of -1 are the tracks without this descriptor
+    return [item.reshape(shape) if (shape >= 0).all() else None
+            for item, shape in zip(items, shapes)], None
+
+
+def _merge_columns(parts, lengths):
+    """Concatenates the values of a column in all the parts, given as returned
+    by `_read_column` (None for the parts which do not have it)."""
+    present = [values for values, _ in (p for p in parts if p is not None)]
+    dense = all(isinstance(p, np.ndarray) for p in present)
+    if dense and len(set(p.shape[1:] for p in present)) == 1 and len(set(p.dtype.kind for p in present)) == 1:
+        missing = '' if present[0].dtype.kind == 'U' else np.nan
+        return np.concatenate([p[0] if p is not None else np.full((n,) + present[0].shape[1:], missing, dtype=present[0].dtype)
+                               for p, n in zip(parts, lengths)])
+
+    result = []
+    for p, n in zip(parts, lengths):
+        if p is None:
+            result += [None] * n
+            continue
+        values, flags = p
+        if flags is None:
+            result += list(values)
+        else:
+            result += [None if flag else value for value, flag in zip(values, flags)]
+    return result
+
+
+def load_dataset(dataset_dir, include=None, ignore=None):
+    """Loads a dataset written by `export_dataset`.
+
+    Args:
+        dataset_dir (string): Folder of the dataset
+        include (list): Descriptor names to load, as wildcard patterns
+            (default: all of them)
+        ignore (list): Descriptor names not to load, as wildcard patterns
+    Returns:
+        (tuple): The list of descriptor files and a dict with the values of
+            each descriptor. These are arrays with a row per file, or lists
+            of arrays if they have different shapes for different files.
+            Missing values are NaN (or empty strings), or None in lists.
+    """
+    files, lengths, columns = [], [], {}
+
+    parts = _parts(dataset_dir)
+    for i, part in enumerate(parts):
+        with np.load(part) as data:
+            part_files = data['__files__'].tolist()
+            files += part_files
+            lengths.append(len(part_files))
+
+            names = [name for name in data.files if not name.startswith('__')]
+            for name in _filter(names, include, ignore):
+                columns.setdefault(name, [None] * len(parts))[i] = _read_column(data, name)
+
+    return files, {name: _merge_columns(values, lengths) for name, values in columns.items()}
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="""
+Exports the descriptor files computed with batch_music_extractor to a columnar dataset
+(a folder of .npz files with an array per descriptor) that can be loaded with
+essentia.pytools.dataset.load_dataset. Files already in the dataset are skipped,
+so running it again appends the new files.
+""")
+
+    parser.add_argument('sig_dir', help='folder with the descriptor files')
+    parser.add_argument('dataset_dir', help='folder of the dataset')
+    parser.add_argument('--include', nargs='+', help='descriptors to export (can use wildcards)')
+    parser.add_argument('--ignore', nargs='+', help='descriptors not to export (can use wildcards)')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='number of parallel jobs (default: number of CPUs)')
+    parser.add_argument('--part-size', type=int, default=1000, help='number of files per part')
+    args = parser.parse_args()
+
+    export_dataset(args.sig_dir, args.dataset_dir, include=args.include, ignore=args.ignore,
+                   jobs=args.jobs, part_size=args.part_size)
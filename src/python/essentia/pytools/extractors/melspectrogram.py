@@ -17,11 +17,13 @@
 
 import argparse
 import os
+from functools import partial
 
 import numpy as np
 
 from essentia import Pool
 from essentia import run
+from essentia.pytools.io import atomic_output
 
 from essentia.streaming import (MonoLoader, FrameCutter, Windowing, Spectrum,
                                 MelBands, UnaryOperator)
@@ -178,7 +180,8 @@ def melspectrogram(filename, npy_file=None, force=False, verbose=False, sample_r
     mel_bands = np.array(pool['mel_bands'])
 
     if npy_file:
-        np.save(npy_file, mel_bands)
+        with atomic_output(npy_file) as tmp_file, open(tmp_file, 'wb') as f:
+            np.save(f, mel_bands)
         
     if verbose:
         print('Done for "{}"'.format(npy_file))
@@ -186,6 +189,15 @@ def melspectrogram(filename, npy_file=None, force=False, verbose=False, sample_r
     return mel_bands
 
 
+def melspectrogram_worker(**kwargs):
+    """Returns a function `f(filename, npy_file)` computing mel spectrograms
+    with the parameters in `kwargs` (see `melspectrogram`). Existing output files
+    are overwritten.
+    """
+    kwargs['force'] = True
+    return partial(melspectrogram, **kwargs)
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         description='Computes the mel spectrogram of a given audio file.')
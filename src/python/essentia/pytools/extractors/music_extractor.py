@@ -15,18 +15,31 @@
 # You should have received a copy of the Affero GNU General Public License
 # version 3 along with this program. If not, see http://www.gnu.org/licenses/
 
-from essentia.standard import MusicExtractor, YamlOutput
+from essentia.standard import MusicExtractor, YamlOutput, NpzOutput
 from essentia import EssentiaError
+from essentia.pytools.io import atomic_output
 from argparse import ArgumentParser
+from functools import partial
 import os
 import sys
 
 
-def music_extractor(audio_file, sig_file, profile=None, store_frames=False, format='yaml'):
-    if profile:
-        extractor = MusicExtractor(profile=profile)
-    else:
-        extractor = MusicExtractor()
+def music_extractor(audio_file, sig_file, profile=None, store_frames=False, format='yaml', extractor=None,
+                    frames_format=None):
+    """Analyzes `audio_file` with MusicExtractor and stores the results in `sig_file`.sig.
+    An already configured `extractor` can be given to reuse it across files, in which
+    case `profile` is ignored.
+
+    With `store_frames`, the frame values are stored in `sig_file`.frames.sig, in the
+    same `format` unless `frames_format` is given. With `frames_format='npz'`, they are
+    stored in the binary `sig_file`.frames.npz instead, which is much smaller and faster
+    to write and read (see NpzOutput).
+    """
+    if extractor is None:
+        if profile:
+            extractor = MusicExtractor(profile=profile)
+        else:
+            extractor = MusicExtractor()
 
     poolStats, poolFrames = extractor(audio_file)
 
@@ -37,10 +50,31 @@ def music_extractor(audio_file, sig_file, profile=None, store_frames=False, form
     elif os.path.isfile(folder):
         raise EssentiaError('Cannot create directory {} .There exist a file with the same name. Aborting analysis.'.format(folder))
 
-    output = YamlOutput(filename=sig_file+'.sig', format=format)
-    output(poolStats)
+    # write the frames first, so that an existing .sig means a complete analysis
     if store_frames:
-        YamlOutput(filename=sig_file + '.frames.sig', format=format)(poolFrames)
+        frames_format = frames_format or format
+        if frames_format == 'npz':
+            with atomic_output(sig_file + '.frames.npz') as tmp_file:
+                NpzOutput(filename=tmp_file)(poolFrames)
+        else:
+            with atomic_output(sig_file + '.frames.sig') as tmp_file:
+                YamlOutput(filename=tmp_file, format=frames_format)(poolFrames)
+
+    with atomic_output(sig_file + '.sig') as tmp_file:
+        YamlOutput(filename=tmp_file, format=format)(poolStats)
+
+
+def music_extractor_worker(profile=None, store_frames=False, format='yaml', frames_format=None):
+    """Returns a function `f(audio_file, sig_file)` analyzing audio files with
+    a single MusicExtractor instance, configured once with `profile`.
+    """
+    if profile:
+        extractor = MusicExtractor(profile=profile)
+    else:
+        extractor = MusicExtractor()
+
+    return partial(music_extractor, store_frames=store_frames, format=format, extractor=extractor,
+                   frames_format=frames_format)
 
 
 if __name__ == '__main__':
@@ -53,6 +87,9 @@ Analyzes an audio file using MusicExtractor.
     parser.add_argument('--profile', help='MusicExtractor profile', required=False)
     parser.add_argument('--store_frames', help='store frames data', action='store_true', required=False)
     parser.add_argument('--format', help='yaml or json', default='yaml', choices=['yaml', 'json'])
+    parser.add_argument('--frames_format', help='format of the frames data (default: same as --format)',
+                        choices=['yaml', 'json', 'npz'], required=False)
     args = parser.parse_args()
 
-    music_extractor(args.audio_file, args.sig_file, profile=args.profile, store_frames=args.store_frames, format=args.format)
+    music_extractor(args.audio_file, args.sig_file, profile=args.profile, store_frames=args.store_frames, format=args.format,
+                    frames_format=args.frames_format)
@@ -16,7 +16,11 @@
 # version 3 along with this program. If not, see http://www.gnu.org/licenses/
 
 import essentia.standard
+from contextlib import contextmanager
+import os
+import struct
 import tempfile
+import zipfile
 import numpy as np
 
 def test_audiofile(filename=None, type='sin440', duration=1):
@@ -47,3 +51,162 @@ def test_audiofile(filename=None, type='sin440', duration=1):
 
     essentia.standard.MonoWriter(filename=filename)(samples)
     return filename
+
+
+@contextmanager
+def atomic_output(filename):
+    """Context manager to write a file atomically.
+    It yields a temporary filename in the same folder as `filename`, which is
+    renamed to `filename` only if the block completes without errors. This way,
+    `filename` either does not exist or is complete, even if the process writing
+    it is killed.
+
+    Args:
+        filename (string): Name of the file to write
+    Returns:
+        (string): Name of the temporary file to write to
+    """
+    folder, name = os.path.split(filename)
+    tmp_filename = os.path.join(folder, '.{}.{}.part'.format(name, os.getpid()))
+
+    try:
+        yield tmp_filename
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+
+def save_pool_npz(pool, filename, compress=False):
+    """Writes a Pool to a binary .npz file with NpzOutput.
+
+    Args:
+        pool (Pool): The pool to write
+        filename (string): Name of the .npz file
+        compress (bool): Whether to compress the descriptors. Compressed
+            descriptors cannot be memory-mapped by NpzPool
+    """
+    essentia.standard.NpzOutput(filename=filename, compress=compress)(pool)
+
+
+def load_pool_npz(filename, descriptor_names=None):
+    """Reads a Pool from a .npz file written by NpzOutput or save_pool_npz.
+
+    Args:
+        filename (string): Name of the .npz file
+        descriptor_names (list): Names of the descriptors to read (default=None,
+            read all of them)
+    Returns:
+        (Pool): The pool with the descriptors
+    """
+    return essentia.standard.NpzInput(filename=filename,
+                                      descriptorNames=descriptor_names or [])()
+
+
+class NpzPool(object):
+    """Read-only, dict-like view of the descriptors in a .npz file written by
+    NpzOutput, which reads each descriptor only when it is accessed.
+
+    Descriptors that are not compressed are memory-mapped unless `mmap` is False,
+    so that accessing a few frames of a large descriptor does not read the whole
+    array from disk. Reals are returned as float32 arrays (a list of arrays for
+    items of different shapes) and strings as str (or lists of str).
+
+    Args:
+        filename (string): Name of the .npz file
+        mmap (bool): Whether to memory-map the descriptors that are not compressed
+    """
+
+    _TYPES_BY_RANK = {'f': ['SingleReal', 'Real', 'VectorReal', 'Array2DReal',
+                            'SingleTensorReal', 'TensorReal'],
+                      'S': ['SingleString', 'String', 'VectorString']}
+
+    def __init__(self, filename, mmap=True):
+        self.filename = filename
+        self.mmap = mmap
+        self._zip = zipfile.ZipFile(filename)
+        self._members = {}
+        for info in self._zip.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            self._members[name] = info
+
+        if '__types__' in self._members:
+            types = self._array('__types__')
+            self._types = [(n.decode('utf-8'), t.decode('utf-8')) for n, t in types]
+        else:
+            self._types = [(n, None) for n in sorted(self._members)
+                           if not n.startswith('__shapes__/')]
+        self._names = [n for n, _ in self._types]
+        self._types = dict(self._types)
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def descriptorNames(self):
+        return list(self._names)
+
+    def keys(self):
+        return self.descriptorNames()
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._types
+
+    def _array(self, name):
+        info = self._members[name]
+        if not self.mmap or info.compress_type != zipfile.ZIP_STORED:
+            with self._zip.open(info) as f:
+                return np.lib.format.read_array(f)
+
+        # the data of stored members is contiguous in the file, right after
+        # the local header and the .npy header
+        with open(self.filename, 'rb') as f:
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+
+        if not dtype.itemsize or 0 in shape:
+            return np.zeros(shape, dtype)
+        return np.memmap(self.filename, dtype=dtype, mode='r', shape=shape, offset=offset,
+                         order='F' if fortran_order else 'C')
+
+    def __getitem__(self, name):
+        if name not in self._types:
+            raise KeyError(name)
+
+        values = self._array(name)
+        kind = 'S' if values.dtype.kind == 'S' else 'f'
+        type = self._types[name] or self._TYPES_BY_RANK[kind][values.ndim]
+
+        if kind == 'S':
+            values = np.char.decode(values, 'utf-8')
+
+        if type.startswith('Single'):
+            return values.item() if values.ndim == 0 else values.tolist() if kind == 'S' else values
+
+        if '__shapes__/' + name in self._members:
+            # items of different shapes, concatenated in a flat array
+            shapes = self._array('__shapes__/' + name)
+            sizes = np.prod(shapes, axis=1)
+            items = np.split(values, np.cumsum(sizes)[:-1])
+            items = [item.reshape(shape) for item, shape in zip(items, shapes)]
+            return [item.tolist() for item in items] if kind == 'S' else items
+
+        return values.tolist() if kind == 'S' else values
@@ -17,7 +17,7 @@
 
 import numpy as np
 import essentia.standard as es
-from essentia import Pool, array
+from essentia import array
 
 
 def nsgcqgram(audio, frameSize=8192, transitionSize=1024, minFrequency=65.41,
@@ -318,18 +318,10 @@ def hpcpgram(audio, sampleRate=44100, frameSize=4096, hopSize=2048, numBins=12,
                    maxFrequency=maxFrequency,
                    minFrequency=minFrequency,
                    size=numBins, **kwargs)
-    pool = Pool()
-    #compute hpcp for each frame and add the results to the pool
-    for frame in frameGenerator:
-        spectrum_mag = spectrum(window(frame))
-        frequencies, magnitudes = spectralPeaks(spectrum_mag)
-        if whitening:
-            w_magnitudes = spectralWhitening(spectrum_mag,
-                                            frequencies,
-                                            magnitudes)
-            hpcp_vector = hpcp(frequencies, w_magnitudes)
-        else:
-            hpcp_vector = hpcp(frequencies, magnitudes)
-        pool.add('tonal.hpcp', hpcp_vector)
-    return pool['tonal.hpcp']
+    # compute hpcp for all the frames at once
+    spectra = spectrum.computeBatch(window.computeBatch(frameGenerator.as_matrix()))
+    frequencies, magnitudes = spectralPeaks.computeBatch(spectra)
+    if whitening:
+        magnitudes = spectralWhitening.computeBatch(spectra, frequencies, magnitudes)
+    return hpcp.computeBatch(frequencies, magnitudes)
 
@@ -22,6 +22,7 @@ from . import common as _c
 import sys as _sys
 from ._essentia import keys as algorithmNames, info as algorithmInfo
 from copy import copy
+import numpy as _np
 
 # given an essentia algorithm name, create the corresponding class
 def _create_essentia_class(name, moduleName = __name__):
@@ -44,6 +45,8 @@ def _create_essentia_class(name, moduleName = __name__):
             self.configure(**kwargs)
 
         def configure(self, **kwargs):
+            _c.addTensorflowOptions(self, kwargs)
+
             # verify that all types match and do any necessary conversions
             for name, val in iteritems(kwargs):
                 goalType = self.paramType(name)
@@ -71,7 +74,7 @@ def _create_essentia_class(name, moduleName = __name__):
 
             # we have to make some exceptions for YamlOutput and PoolAggregator
             # because they expect cpp Pools
-            if name in ('YamlOutput', 'PoolAggregator', 'SvmClassifier', 'PCA', 'GaiaTransform', 'TensorflowPredict'):
+            if name in ('YamlOutput', 'NpzOutput', 'PoolAggregator', 'SvmClassifier', 'PCA', 'GaiaTransform', 'TensorflowPredict'):
                 args = (args[0].cppPool,)
 
             # verify that all types match and do any necessary conversions
@@ -105,9 +108,16 @@ def _create_essentia_class(name, moduleName = __name__):
 
             # we have to make an exceptional case for YamlInput, because we need
             # to wrap the Pool that it outputs w/ our python Pool from common.py
-            if name in ('YamlInput', 'PoolAggregator', 'SvmClassifier', 'PCA', 'GaiaTransform', 'Extractor', 'TensorflowPredict'):
+            if name in ('YamlInput', 'NpzInput', 'PoolAggregator', 'SvmClassifier', 'PCA', 'GaiaTransform', 'Extractor', 'TensorflowPredict',
+                        'TensorflowPredictHeads'):
                 return _c.Pool(results)
 
+            # The TensorFlow predictors also output a Pool with the stats of
+            # each batch when the `stats` parameter is enabled
+            if name in ('TensorflowPredictMusiCNN', 'TensorflowPredictVGGish', 'TensorflowPredictEffnetDiscogs') \
+               and isinstance(results, tuple):
+                return (results[0], _c.Pool(results[1]))
+
             # MusicExtractor and FreesoundExtractor output two pools
             if name in ('MusicExtractor', 'FreesoundExtractor'):
                 return (_c.Pool(results[0]), _c.Pool(results[1]))
@@ -119,6 +129,30 @@ def _create_essentia_class(name, moduleName = __name__):
             else:
                 return results
 
+        def computeBatch(self, *args):
+            # same as calling compute on each row of the inputs and stacking the
+            # results, but looping over the rows in C++. Only works for algorithms
+            # whose inputs are all vectors of Reals (e.g. frames or spectra), and
+            # whose outputs are Reals or vectors of Reals
+            inputNames = self.inputNames()
+
+            if len(args) != len(inputNames):
+                raise ValueError(name+'.computeBatch requires '+str(len(inputNames))+' argument(s), '+str(len(args))+' given')
+
+            convertedArgs = []
+
+            for arg in args:
+                # rows of different sizes (e.g. spectral peaks) are given as a
+                # list of vectors, otherwise as a matrix
+                if type(arg).__module__ == 'numpy' and arg.ndim == 2:
+                    arg = _np.ascontiguousarray(arg, dtype='float32')
+                else:
+                    arg = [_np.ascontiguousarray(row, dtype='float32') for row in arg]
+
+                convertedArgs.append(arg)
+
+            return self.__computeBatch__(*convertedArgs)
+
         def __call__(self, *args):
             return self.compute(*args)
 
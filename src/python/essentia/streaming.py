@@ -173,6 +173,8 @@ def _create_streaming_algo(givenname):
                 setattr(self, n, conn)
 
         def configure(self, **kwargs):
+            _c.addTensorflowOptions(self, kwargs)
+
             # verify that all types match and do any necessary conversions
             for name, val in iteritems(kwargs):
                 goalType = self.paramType(name)
@@ -17,6 +17,9 @@
 
 from . import common as _c
 from . import _essentia
+import math as _math
+import numpy as _np
+from numpy.lib.stride_tricks import as_strided as _as_strided
 
 def isSilent(arg):
     return _essentia.isSilent( _c.convertData(arg, _c.Edt.VECTOR_REAL) )
@@ -123,6 +126,110 @@ def normalize(array):
 def derivative(array):
     return _essentia.derivative(_c.convertData(array, _c.Edt.VECTOR_REAL))
 
+def _framePositions(size, frameSize, hopSize, startFromZero,
+                    validFrameThresholdRatio, lastFrameToEndOfFile):
+    # returns the start of the first frame and the number of frames the
+    # FrameCutter outputs for an input of the given size
+    if startFromZero:
+        first = 0
+    else:
+        first = -((frameSize + 1) // 2)
+
+    if size == 0:
+        return first, 0
+
+    threshold = int(_math.floor(validFrameThresholdRatio*frameSize + 0.5))
+
+    # frames ending before the end of the input are complete and never the last
+    # one, only the last few frames need to go through all the checks below
+    count = 0
+    if first + frameSize < size:
+        count = (size - frameSize - first - 1) // hopSize + 1
+
+    start = first + count*hopSize
+    while start < size:
+        end = min(frameSize, size - start)
+        if end < threshold:
+            break
+
+        count += 1
+        lastFrame = start + end >= size and startFromZero and not lastFrameToEndOfFile
+        if end < frameSize:
+            if startFromZero:
+                lastFrame = not lastFrameToEndOfFile or start >= size
+            else:
+                lastFrame = start + frameSize // 2 >= size
+
+        start += hopSize
+        if lastFrame:
+            break
+
+    return first, count
+
+
+def _cutFrames(audio, start, count, frameSize, hopSize):
+    # returns count frames starting at start as a read-only strided view on
+    # audio. If any of them starts before or ends after the audio, the view is
+    # on a zero-padded copy of the whole region covered by the frames instead
+    if count <= 0:
+        return _np.zeros((0, frameSize), dtype=_np.float32)
+
+    end = start + (count - 1)*hopSize + frameSize
+
+    if start >= 0 and end <= len(audio):
+        buf = audio[start:end]
+    else:
+        buf = _np.zeros(end - start, dtype=_np.float32)
+        lo, hi = max(start, 0), min(end, len(audio))
+        buf[lo - start:hi - start] = audio[lo:hi]
+
+    itemsize = buf.itemsize
+    return _as_strided(buf, shape=(count, frameSize),
+                       strides=(hopSize*itemsize, itemsize), writeable=False)
+
+
+def _paddedFrames(size, start, count, frameSize, hopSize):
+    # returns the number of frames at the beginning and the index of the first
+    # frame at the end that need zero-padding, i.e., that start before 0 or end
+    # after size
+    head = min((-start + hopSize - 1) // hopSize, count) if start < 0 else 0
+    tail = (size - frameSize - start) // hopSize + 1
+    return head, min(max(tail, head), count)
+
+
+def frames(audio, frameSize=1024, hopSize=512, startFromZero=False,
+           validFrameThresholdRatio=0, lastFrameToEndOfFile=False):
+    """Returns all the frames the FrameCutter would output for audio as a single
+    (nFrames, frameSize) read-only array. It is a strided view on audio if no
+    frame needs zero-padding. Otherwise (always the case with startFromZero=False)
+    it is a strided view on a zero-padded copy of audio, see frameBlocks to
+    avoid copying the frames which do not need padding."""
+    audio = _np.ascontiguousarray(audio, dtype=_np.float32)
+    start, count = _framePositions(len(audio), frameSize, hopSize, startFromZero,
+                                   validFrameThresholdRatio, lastFrameToEndOfFile)
+    return _cutFrames(audio, start, count, frameSize, hopSize)
+
+
+def frameBlocks(audio, blockSize, frameSize=1024, hopSize=512, startFromZero=False,
+                validFrameThresholdRatio=0, lastFrameToEndOfFile=False):
+    """Same as frames but yields the frames in blocks of at most blockSize frames.
+    The frames needing zero-padding at the boundaries of audio are yielded in
+    blocks of their own, which are copies, and the other blocks are strided
+    views on audio."""
+    if blockSize < 1:
+        raise ValueError('blockSize should be at least 1')
+
+    audio = _np.ascontiguousarray(audio, dtype=_np.float32)
+    start, count = _framePositions(len(audio), frameSize, hopSize, startFromZero,
+                                   validFrameThresholdRatio, lastFrameToEndOfFile)
+    head, tail = _paddedFrames(len(audio), start, count, frameSize, hopSize)
+
+    for first, last in [(0, head), (head, tail), (tail, count)]:
+        for i in range(first, last, blockSize):
+            yield _cutFrames(audio, start + i*hopSize, min(blockSize, last - i),
+                             frameSize, hopSize)
+
+
 __all__ = [ 'isSilent', 'instantPower',
             'nextPowerTwo', 'isPowerTwo',
             'lin2db', 'db2lin',
@@ -138,4 +245,5 @@ __all__ = [ 'isSilent', 'instantPower',
             'velocity2db', 'db2velocity',
             'postProcessTicks',
             'normalize', 'derivative',
-            'equivalentKey', 'lin2log']
+            'equivalentKey', 'lin2log',
+            'frames', 'frameBlocks']
@@ -22,6 +22,7 @@
 #include "poolstorage.h" // connecting pools
 #include "../algorithms/io/fileoutputproxy.h" // connecting FileOutput algorithm
 #include "bpmutil.h" // postProcessTicks()
+#include "modelcache.h"
 
 static PyObject*
 get_version() {
@@ -837,7 +838,17 @@ static PyObject* nowhereConnect(PyObject* notUsed, PyObject* args) {
 }
 
 
-static PyObject* run(PyObject* notUsed, PyObject* obj) {
+static PyObject* run(PyObject* notUsed, PyObject* args) {
+  PyObject* obj;
+  int nThreads = 1;
+
+  if (!PyArg_ParseTuple(args, "O|i", &obj, &nThreads)) return NULL;
+
+  if (nThreads < 1) {
+    PyErr_SetString(PyExc_ValueError, "run: the number of threads should be at least 1");
+    return NULL;
+  }
+
   if (!PyType_IsSubtype(obj->ob_type, &PyStreamingAlgorithmType) &&
       !PyType_IsSubtype(obj->ob_type, &PyVectorInputType)) {
     PyErr_SetString(PyExc_TypeError, "run must be called with a streaming algorithm");
@@ -846,11 +857,27 @@ static PyObject* run(PyObject* notUsed, PyObject* obj) {
 
   PyStreamingAlgorithm* pyAlg = reinterpret_cast<PyStreamingAlgorithm*>(obj);
 
+  // the network only deals with C++ objects once it is running, so we can let
+  // other Python threads run in the meantime. Note that Pools connected to the
+  // network (through PoolStorage) must not be used by those threads until the
+  // network is done
+  bool failed = false;
+  string error;
+
+  Py_BEGIN_ALLOW_THREADS
   try {
-    scheduler::Network(pyAlg->algo, false).run();
+    scheduler::Network network(pyAlg->algo, false);
+    network.setNumberOfThreads(nThreads);
+    network.run();
   }
   catch (const exception& e) {
-    PyErr_SetString(PyExc_RuntimeError, e.what());
+    failed = true;
+    error = e.what();
+  }
+  Py_END_ALLOW_THREADS
+
+  if (failed) {
+    PyErr_SetString(PyExc_RuntimeError, error.c_str());
     return NULL;
   }
 
@@ -858,6 +885,79 @@ static PyObject* run(PyObject* notUsed, PyObject* obj) {
 }
 
 
+static void deleteNetwork(PyObject* capsule) {
+  delete reinterpret_cast<scheduler::Network*>(PyCapsule_GetPointer(capsule, "essentia.Network"));
+}
+
+
+// runPrepare and runStep run a network one generator step at a time, so that
+// Python code can consume the output of the network while it is running (e.g.,
+// AudioChunks). The network is returned in a capsule that deletes it.
+static PyObject* runPrepare(PyObject* notUsed, PyObject* args) {
+  PyObject* obj;
+  int nThreads = 1;
+
+  if (!PyArg_ParseTuple(args, "O|i", &obj, &nThreads)) return NULL;
+
+  if (nThreads < 1) {
+    PyErr_SetString(PyExc_ValueError, "runPrepare: the number of threads should be at least 1");
+    return NULL;
+  }
+
+  if (!PyType_IsSubtype(obj->ob_type, &PyStreamingAlgorithmType) &&
+      !PyType_IsSubtype(obj->ob_type, &PyVectorInputType)) {
+    PyErr_SetString(PyExc_TypeError, "runPrepare must be called with a streaming algorithm");
+    return NULL;
+  }
+
+  PyStreamingAlgorithm* pyAlg = reinterpret_cast<PyStreamingAlgorithm*>(obj);
+  scheduler::Network* network = 0;
+
+  try {
+    network = new scheduler::Network(pyAlg->algo, false);
+    network->setNumberOfThreads(nThreads);
+    network->runPrepare();
+  }
+  catch (const exception& e) {
+    delete network;
+    PyErr_SetString(PyExc_RuntimeError, e.what());
+    return NULL;
+  }
+
+  return PyCapsule_New(network, "essentia.Network", deleteNetwork);
+}
+
+
+static PyObject* runStep(PyObject* notUsed, PyObject* capsule) {
+  scheduler::Network* network =
+    reinterpret_cast<scheduler::Network*>(PyCapsule_GetPointer(capsule, "essentia.Network"));
+  if (!network) return NULL;
+
+  bool more = false;
+  bool failed = false;
+  string error;
+
+  // same as in run()
+  Py_BEGIN_ALLOW_THREADS
+  try {
+    more = network->runStep();
+  }
+  catch (const exception& e) {
+    failed = true;
+    error = e.what();
+  }
+  Py_END_ALLOW_THREADS
+
+  if (failed) {
+    PyErr_SetString(PyExc_RuntimeError, error.c_str());
+    return NULL;
+  }
+
+  if (more) Py_RETURN_TRUE;
+  Py_RETURN_FALSE;
+}
+
+
 static PyObject* reset(PyObject* notUsed, PyObject* obj) {
   if (!PyType_IsSubtype(obj->ob_type, &PyStreamingAlgorithmType) &&
       !PyType_IsSubtype(obj->ob_type, &PyVectorInputType)) {
@@ -1136,6 +1236,50 @@ postProcessTicks(PyObject* self, PyObject* args) {
 }
 
 
+static PyObject* modelCacheInfo() {
+  PyObject* info = PyDict_New();
+  PyObject* value;
+
+  value = PyInt_FromLong(ModelCache::count());
+  PyDict_SetItemString(info, "models", value);
+  Py_DECREF(value);
+
+  value = PyInt_FromLong(ModelCache::countInUse());
+  PyDict_SetItemString(info, "inUse", value);
+  Py_DECREF(value);
+
+  value = PyLong_FromSize_t(ModelCache::size());
+  PyDict_SetItemString(info, "size", value);
+  Py_DECREF(value);
+
+  value = PyLong_FromSize_t(ModelCache::capacity());
+  PyDict_SetItemString(info, "capacity", value);
+  Py_DECREF(value);
+
+  return info;
+}
+
+static PyObject* setModelCacheCapacity(PyObject* notUsed, PyObject* arg) {
+  if (!PyInt_Check(arg) && !PyLong_Check(arg)) {
+    PyErr_SetString(PyExc_TypeError, (char*)"argument must be an integer");
+    return NULL;
+  }
+
+  long capacity = PyInt_AsLong(arg);
+  if (capacity < 0) {
+    PyErr_SetString(PyExc_ValueError, (char*)"the capacity of the model cache cannot be negative");
+    return NULL;
+  }
+
+  ModelCache::setCapacity((size_t)capacity);
+  Py_RETURN_NONE;
+}
+
+static PyObject* clearModelCache() {
+  ModelCache::clear();
+  Py_RETURN_NONE;
+}
+
 
 static PyMethodDef Essentia__Methods[] = {
   { "debugLevel",      (PyCFunction)debug_level,       METH_NOARGS,  "return the activated debugging modules." },
@@ -1194,7 +1338,9 @@ static PyMethodDef Essentia__Methods[] = {
   { "poolDisconnect",  (PyCFunction)poolDisconnect,      METH_VARARGS, "Disconnects an algorithm's source from a pool under a key name." },
   { "fileOutputDisconnect",  (PyCFunction)fileOutputDisconnect, METH_VARARGS, "Disconnects an algorithm's source from a FileOutput." },
   { "nowhereDisconnect", (PyCFunction)nowhereDisconnect, METH_VARARGS, "Disconnects an algorithm's source from nothing." },
-  { "run",          (PyCFunction)run,                    METH_O, "Runs the given algorithm." },
+  { "run",          (PyCFunction)run,                    METH_VARARGS, "Runs the given algorithm, optionally using several threads." },
+  { "runPrepare",   (PyCFunction)runPrepare,             METH_VARARGS, "Prepares the network of the given algorithm to be run step by step with runStep." },
+  { "runStep",      (PyCFunction)runStep,                METH_O, "Runs one step of a network prepared with runPrepare. Returns False when the stream is over." },
   { "reset",        (PyCFunction)reset,                  METH_O, "Resets the given generator's network." },
   { "keys",         (PyCFunction)keys,                   METH_NOARGS, "returns algorithm names" },
   { "skeys",        (PyCFunction)skeys,                  METH_NOARGS, "returns streaming algorithm names" },
@@ -1202,5 +1348,8 @@ static PyMethodDef Essentia__Methods[] = {
   { "version_git_sha",      (PyCFunction)get_version_git_sha, METH_NOARGS, "returns essentia's version git commit SHA hash" }, 
   { "almostEqualArray", (PyCFunction)almostEqualArray,   METH_VARARGS, "Returns true if two numpy arrays are within a given precision of each other" },
   { "postProcessTicks", (PyCFunction)postProcessTicks,   METH_VARARGS, "Purges ticks array based on ticks amplitude and the preferred period" },
+  { "modelCacheInfo", (PyCFunction)modelCacheInfo,       METH_NOARGS, "returns the number of models in the model cache, how many are in use, their size and the capacity of the cache" },
+  { "setModelCacheCapacity", (PyCFunction)setModelCacheCapacity, METH_O, "sets the maximum size in bytes of the unused models kept in the model cache" },
+  { "clearModelCache", (PyCFunction)clearModelCache,     METH_NOARGS, "removes the unused models from the model cache" },
   { NULL } // Sentinel
 };
@@ -24,6 +24,7 @@
 #include "roguevector.h"
 #include "commonfunctions.h"
 #include "parsing.h"
+#include "threading.h"
 using namespace std;
 using namespace essentia;
 using namespace standard;
@@ -33,8 +34,27 @@ using namespace standard;
 
 
 /**
- * The algorithm structure. Contains a pointer to the C++ algorithm, and a bool
- * indicating whether it has already been configured or not.
+ * Scoped lock on an algorithm's mutex. The mutex is acquired with the GIL
+ * released, otherwise a thread waiting for the algorithm would prevent the
+ * thread currently using it from getting the GIL back to return its results.
+ */
+class AlgorithmLocker {
+ protected:
+  ForcedMutex& _mutex;
+ public:
+  template <typename PyAlgo>
+  AlgorithmLocker(PyAlgo* self) : _mutex(*self->mutex) {
+    Py_BEGIN_ALLOW_THREADS
+    _mutex.lock();
+    Py_END_ALLOW_THREADS
+  }
+  ~AlgorithmLocker() { _mutex.unlock(); }
+};
+
+
+/**
+ * The algorithm structure. Contains a pointer to the C++ algorithm, and the
+ * mutex that serializes its use when the GIL is released.
  */
 class PyAlgorithm {
 
@@ -43,6 +63,11 @@ class PyAlgorithm {
 
   Algorithm* algo;
 
+  // configure(), compute() and reset() release the GIL while the C++ code
+  // runs, so this mutex is what prevents two Python threads from using the
+  // same algorithm instance at the same time
+  ForcedMutex* mutex;
+
   static PyObject* make_new(PyTypeObject* type, PyObject* args, PyObject* kwds);
   static int init(PyAlgorithm *self, PyObject *args, PyObject *kwds);
   static void dealloc(PyObject* self);
@@ -52,6 +77,7 @@ class PyAlgorithm {
   }
 
   static PyObject* reset(PyAlgorithm* self) {
+    AlgorithmLocker lock(self);
     self->algo->reset();
     Py_RETURN_NONE;
   }
@@ -73,6 +99,7 @@ class PyAlgorithm {
 
   static PyObject* configure(PyAlgorithm* self, PyObject* args, PyObject* keywds);
   static PyObject* compute(PyAlgorithm* self, PyObject* args);
+  static PyObject* computeBatch(PyAlgorithm* self, PyObject* args);
   static PyObject* inputType(PyAlgorithm* self, PyObject* name);
   static PyObject* paramType(PyAlgorithm* self, PyObject* name);
   static PyObject* paramValue(PyAlgorithm* self, PyObject* name);
@@ -83,11 +110,14 @@ class PyAlgorithm {
 
 
 PyObject* PyAlgorithm::make_new(PyTypeObject* type, PyObject* args, PyObject* kwds) {
-  return (PyObject*)(type->tp_alloc(type, 0));
+  PyAlgorithm* self = (PyAlgorithm*)(type->tp_alloc(type, 0));
+  if (self) self->mutex = new ForcedMutex();
+  return (PyObject*)self;
 }
 
 void PyAlgorithm::dealloc(PyObject* self) {
   delete ((PyAlgorithm*)self)->algo;
+  delete ((PyAlgorithm*)self)->mutex;
   self->ob_type->tp_free(self);
 }
 
@@ -135,13 +165,26 @@ PyObject* PyAlgorithm::configure(PyAlgorithm* self, PyObject* args, PyObject* ke
     return NULL;
   }
 
-  // actually configure the underlying C++ algorithm
+  // actually configure the underlying C++ algorithm. This can be expensive
+  // (loading models, planning FFTs, ...) and does not touch any Python object,
+  // so let other Python threads run in the meantime
+  AlgorithmLocker lock(self);
+  bool failed = false;
+  string error;
+
+  Py_BEGIN_ALLOW_THREADS
   try {
     self->algo->configure(pm);
   }
   catch (const exception& e) {
+    failed = true;
+    error = e.what();
+  }
+  Py_END_ALLOW_THREADS
+
+  if (failed) {
     ostringstream msg;
-    msg << "Error while configuring " << self->algo->name() << ": " << e.what();
+    msg << "Error while configuring " << self->algo->name() << ": " << error;
     PyErr_SetString(PyExc_RuntimeError, msg.str().c_str());
     return NULL;
   }
@@ -198,6 +241,10 @@ PyObject* PyAlgorithm::compute(PyAlgorithm* self, PyObject* args) {
     return NULL;
   }
 
+  // from now on the algorithm ports point to our temporary variables, make sure
+  // no other thread can use this instance until we are done with them
+  AlgorithmLocker lock(self);
+
   // bind the inputs and outputs
 
   // parse all inputs given by the python interpreter to the corresponding
@@ -340,12 +387,28 @@ PyObject* PyAlgorithm::compute(PyAlgorithm* self, PyObject* args) {
   // are correctly bound), we can safely call the compute() method.
   E_DEBUG(EPyBindings, PY_ALGONAME << ": computing...");
 
+  // the inputs and outputs are C++ variables (or numpy buffers kept alive by
+  // the args tuple), so the GIL can be released while computing. The only
+  // exception is a Pool given as input, as it is shared with the interpreter
+  // and Pool does not do any locking on its own
+  bool releaseGIL = find(givenInputTypes.begin(), givenInputTypes.end(), POOL) == givenInputTypes.end();
+  PyThreadState* threadState = releaseGIL ? PyEval_SaveThread() : NULL;
+  bool failed = false;
+  string error;
+
   try {
     self->algo->compute();
   }
   catch (const exception& e) {
+    failed = true;
+    error = e.what();
+  }
+
+  if (threadState) PyEval_RestoreThread(threadState);
+
+  if (failed) {
     ostringstream msg;
-    msg << "In " << self->algo->name() << ".compute: " << e.what();
+    msg << "In " << self->algo->name() << ".compute: " << error;
     PyErr_SetString(PyExc_RuntimeError, msg.str().c_str());
 
     // clean up temp vars
@@ -393,6 +456,193 @@ PyObject* PyAlgorithm::compute(PyAlgorithm* self, PyObject* args) {
 }
 
 
+/**
+ * Returns pointers to the rows of a batch given to computeBatch, which is either
+ * a 2-D numpy array of Reals or a list of 1-D numpy arrays of Reals (when the
+ * rows do not all have the same size).
+ */
+void batchRows(PyObject* obj, vector<pair<Real*, int> >& rows) {
+  if (PyArray_Check(obj)) {
+    PyArrayObject* array = (PyArrayObject*)obj;
+    if (PyArray_TYPE(array) != NPY_FLOAT || PyArray_NDIM(array) != 2 ||
+        !PyArray_IS_C_CONTIGUOUS(array)) {
+      throw EssentiaException("expected a C-contiguous 2-dimensional numpy array of Reals");
+    }
+    int nrows = PyArray_DIM(array, 0);
+    int ncols = PyArray_DIM(array, 1);
+    Real* data = (Real*)PyArray_DATA(array);
+    for (int i=0; i<nrows; ++i) rows.push_back(make_pair(data + i*ncols, ncols));
+    return;
+  }
+
+  if (PyList_Check(obj)) {
+    int nrows = PyList_Size(obj);
+    for (int i=0; i<nrows; ++i) {
+      PyObject* row = PyList_GET_ITEM(obj, i);
+      if (!PyArray_Check(row) || PyArray_TYPE((PyArrayObject*)row) != NPY_FLOAT ||
+          PyArray_NDIM((PyArrayObject*)row) != 1 || !PyArray_IS_C_CONTIGUOUS((PyArrayObject*)row)) {
+        throw EssentiaException("expected a list of C-contiguous 1-dimensional numpy arrays of Reals");
+      }
+      rows.push_back(make_pair((Real*)PyArray_DATA((PyArrayObject*)row),
+                               (int)PyArray_DIM((PyArrayObject*)row, 0)));
+    }
+    return;
+  }
+
+  throw EssentiaException("expected a 2-dimensional numpy array or a list of numpy arrays, received: ", strtype(obj));
+}
+
+
+PyObject* PyAlgorithm::computeBatch(PyAlgorithm* self, PyObject* args) {
+  E_DEBUG(EPyBindings, PY_ALGONAME << "::computeBatch()");
+
+  vector<PyObject*> arg_list = unpack(args);
+
+  int nInputs = self->algo->inputs().size();
+  vector<string> inputNames = self->algo->inputNames();
+  vector<const type_info*> inputTypes = self->algo->inputTypes();
+  int nOutputs = self->algo->outputs().size();
+  vector<string> outputNames = self->algo->outputNames();
+  vector<const type_info*> outputTypeInfos = self->algo->outputTypes();
+
+  if (int(arg_list.size()) != nInputs) {
+    ostringstream msg;
+    msg << self->algo->name() << ".computeBatch has " << nInputs << " inputs, " << arg_list.size() << " given";
+    PyErr_SetString(PyExc_RuntimeError, msg.str().c_str());
+    return NULL;
+  }
+
+  // only algorithms taking frames and returning values or frames can be batched
+  for (int i=0; i<nInputs; ++i) {
+    if (typeInfoToEdt(*inputTypes[i]) != VECTOR_REAL) {
+      ostringstream msg;
+      msg << self->algo->name() << ".computeBatch does not support inputs of type "
+          << edtToString(typeInfoToEdt(*inputTypes[i])) << " (" << inputNames[i] << ")";
+      PyErr_SetString(PyExc_TypeError, msg.str().c_str());
+      return NULL;
+    }
+  }
+
+  vector<Edt> outputTypes(nOutputs);
+  for (int i=0; i<nOutputs; ++i) {
+    outputTypes[i] = typeInfoToEdt(*outputTypeInfos[i]);
+    if (outputTypes[i] != REAL && outputTypes[i] != VECTOR_REAL) {
+      ostringstream msg;
+      msg << self->algo->name() << ".computeBatch does not support outputs of type "
+          << edtToString(outputTypes[i]) << " (" << outputNames[i] << ")";
+      PyErr_SetString(PyExc_TypeError, msg.str().c_str());
+      return NULL;
+    }
+  }
+
+  // get the rows of all the inputs, they are kept alive by the args tuple
+  vector<vector<pair<Real*, int> > > rows(nInputs);
+  try {
+    for (int i=0; i<nInputs; ++i) {
+      batchRows(arg_list[i], rows[i]);
+      if (rows[i].size() != rows[0].size()) {
+        throw EssentiaException("all inputs should have the same number of rows");
+      }
+    }
+  }
+  catch (const exception& e) {
+    ostringstream msg;
+    msg << "In " << self->algo->name() << ".computeBatch: " << e.what();
+    PyErr_SetString(PyExc_ValueError, msg.str().c_str());
+    return NULL;
+  }
+
+  int nRows = nInputs > 0 ? rows[0].size() : 0;
+
+  AlgorithmLocker lock(self);
+
+  // the input ports point to RogueVectors which are moved from row to row, the
+  // output ports to temporary variables which are appended to the results
+  vector<RogueVector<Real> > inputs(nInputs);
+  for (int i=0; i<nInputs; ++i) self->algo->input(inputNames[i]).set((vector<Real>&)inputs[i]);
+
+  vector<Real> realOutputs(nOutputs);
+  vector<vector<Real> > vectorOutputs(nOutputs);
+  vector<vector<Real> > realResults(nOutputs);
+  vector<vector<vector<Real> > > vectorResults(nOutputs);
+
+  for (int i=0; i<nOutputs; ++i) {
+    OutputBase& port = self->algo->output(outputNames[i]);
+    if (outputTypes[i] == REAL) {
+      port.set(realOutputs[i]);
+      realResults[i].reserve(nRows);
+    }
+    else {
+      port.set(vectorOutputs[i]);
+      vectorResults[i].reserve(nRows);
+    }
+  }
+
+  // none of the data involved is shared with the interpreter
+  bool failed = false;
+  string error;
+
+  Py_BEGIN_ALLOW_THREADS
+  try {
+    for (int r=0; r<nRows; ++r) {
+      for (int i=0; i<nInputs; ++i) {
+        inputs[i].setData(rows[i][r].first);
+        inputs[i].setSize(rows[i][r].second);
+      }
+
+      self->algo->compute();
+
+      for (int i=0; i<nOutputs; ++i) {
+        if (outputTypes[i] == REAL) realResults[i].push_back(realOutputs[i]);
+        else vectorResults[i].push_back(vectorOutputs[i]);
+      }
+    }
+  }
+  catch (const exception& e) {
+    failed = true;
+    error = e.what();
+  }
+  Py_END_ALLOW_THREADS
+
+  if (failed) {
+    ostringstream msg;
+    msg << "In " << self->algo->name() << ".computeBatch: " << error;
+    PyErr_SetString(PyExc_RuntimeError, msg.str().c_str());
+    return NULL;
+  }
+
+  // a single value per row gives a 1-D array, a vector per row a 2-D array (or
+  // a list of arrays if the vectors do not all have the same size)
+  vector<PyObject*> result(nOutputs);
+
+  for (int i=0; i<nOutputs; ++i) {
+    try {
+      if (outputTypes[i] == REAL) {
+        RogueVector<Real>* v = new RogueVector<Real>((uint)nRows, 0.);
+        if (nRows > 0) fastcopy(&(*v)[0], &realResults[i][0], nRows);
+        result[i] = VectorReal::toPythonRef(v);
+      }
+      else {
+        result[i] = VectorVectorReal::toPythonCopy(&vectorResults[i]);
+      }
+    }
+    catch (const exception& e) {
+      for (int j=0; j<i; ++j) Py_DECREF(result[j]);
+      ostringstream msg;
+      msg << "In " << self->algo->name();
+      msg << ".computeBatch: error while converting outputs to python variables: ";
+      msg << e.what();
+      PyErr_SetString(PyExc_TypeError, msg.str().c_str());
+      return NULL;
+    }
+  }
+
+  E_DEBUG(EPyBindings, PY_ALGONAME << "::computeBatch() done!");
+
+  return buildReturnValue(result);
+}
+
+
 PyObject* PyAlgorithm::inputType(PyAlgorithm* self, PyObject* obj) {
   if (!PyString_Check(obj)) {
     PyErr_SetString(PyExc_TypeError, "Algorithm.inputType expects a string as the only argument");
@@ -494,6 +744,8 @@ static PyMethodDef PyAlgorithm_methods[] = {
                       "Configure the algorithm" },
   { "__compute__",    (PyCFunction)PyAlgorithm::compute, METH_VARARGS,
                       "compute the algorithm" },
+  { "__computeBatch__", (PyCFunction)PyAlgorithm::computeBatch, METH_VARARGS,
+                      "compute the algorithm on each row of the inputs" },
   { "inputType",      (PyCFunction)PyAlgorithm::inputType, METH_O,
                       "Returns the type of the input given by its name" },
   { "paramType",      (PyCFunction)PyAlgorithm::paramType, METH_O,
@@ -27,6 +27,8 @@ using namespace essentia;
 PyMethodDef PyPool_methods[] = {
   { "__add__",        (PyCFunction)PyPool::add, METH_VARARGS,
                       "Pool.add(key, value) adds \"value\" to the pool under \"key\"" },
+  { "__extend__",     (PyCFunction)PyPool::extend, METH_VARARGS,
+                      "Pool.extend(key, values) adds each row of \"values\" to the pool under \"key\"" },
   { "__set__",        (PyCFunction)PyPool::set, METH_VARARGS,
                       "Pool.set(key, value) sets \"value\" in the pool under \"key\"" },
   { "__merge__",      (PyCFunction)PyPool::merge, METH_VARARGS,
@@ -36,6 +38,8 @@ PyMethodDef PyPool_methods[] = {
                       "Pool.mergeSingle(key, value) sets \"value\" in the pool under \"key\"" },
   { "__value__",      (PyCFunction)PyPool::value, METH_VARARGS,
                       "Pool.value(key) retrieves a value from the pool under \"key\"" },
+  { "__view__",       (PyCFunction)PyPool::view, METH_VARARGS,
+                      "Pool.view(key) returns a read-only numpy view on the data in the pool under \"key\"" },
   { "isSingleValue",  (PyCFunction)PyPool::isSingleValue, METH_O,
                       "Pool.isSingleValue(key) returns true if the descriptor under \"key\" is a single value descriptor" },
   { "remove",         (PyCFunction)PyPool::remove, METH_O,
@@ -48,6 +52,8 @@ PyMethodDef PyPool_methods[] = {
                       "Pool.descriptorNames(namespace) returns a list of all descriptors in the pool under \"namespace\". If no namespace is supplied it returns a list of all descriptors" },
   { "__keyType__",    (PyCFunction)PyPool::keyType, METH_O,
                       "Returns the type of the data stored under 'key'" },
+  { "containsKey",    (PyCFunction)PyPool::containsKey, METH_O,
+                      "Pool.containsKey(key) returns true if there is a descriptor under \"key\" in the pool" },
   { NULL }  /* Sentinel */
 };
 
@@ -109,6 +115,35 @@ int PyPool::init(PyObject* self, PyObject* args, PyObject* kwds) {
 }
 
 
+/**
+ * Looks for the key in all the sub-pools, and sets tp to the Edt of the sub-pool
+ * it is in. Returns false if the key could not be found.
+ */
+bool findKeyType(const Pool& p, const string& key, Edt& tp) {
+  #define FIND_KEY(subpool, edt)                          \
+  if (p.subpool().find(key) != p.subpool().end()) {       \
+    tp = edt;                                             \
+    return true;                                          \
+  }
+
+  FIND_KEY(getRealPool, VECTOR_REAL);
+  FIND_KEY(getStringPool, VECTOR_STRING);
+  FIND_KEY(getStereoSamplePool, VECTOR_STEREOSAMPLE);
+  FIND_KEY(getVectorRealPool, VECTOR_VECTOR_REAL);
+  FIND_KEY(getVectorStringPool, VECTOR_VECTOR_STRING);
+  FIND_KEY(getArray2DRealPool, VECTOR_MATRIX_REAL);
+  FIND_KEY(getTensorRealPool, VECTOR_TENSOR_REAL);
+  FIND_KEY(getSingleRealPool, REAL);
+  FIND_KEY(getSingleVectorRealPool, VECTOR_REAL);
+  FIND_KEY(getSingleStringPool, STRING);
+  FIND_KEY(getSingleTensorRealPool, TENSOR_REAL);
+
+  #undef FIND_KEY
+
+  return false;
+}
+
+
 PyObject* PyPool::keyType(PyPool* self, PyObject* obj) {
   if (!PyString_Check(obj)) {
     PyErr_SetString(PyExc_TypeError, "expected a string argument");
@@ -116,84 +151,177 @@ PyObject* PyPool::keyType(PyPool* self, PyObject* obj) {
   }
 
   string key = PyString_AS_STRING(obj);
-  Pool& p = *(self->pool);
 
   // search for the key and return the respective Edt of the sub-pool its in
-
-  // search Real sub-pool
-  if (p.getRealPool().find(key) != p.getRealPool().end()) {
-    return PyString_FromString( edtToString(VECTOR_REAL).c_str() );
+  Edt tp;
+  if (findKeyType(*(self->pool), key, tp)) {
+    return PyString_FromString( edtToString(tp).c_str() );
   }
 
-  // search string sub-pool
-  if (p.getStringPool().find(key) != p.getStringPool().end()) {
-    return PyString_FromString( edtToString(VECTOR_STRING).c_str() );
-  }
+  // couldn't find the key
+  ostringstream msg;
+  msg << "'" << key << "' is not a key in the pool" << endl;
+  PyErr_SetString(PyExc_ValueError, msg.str().c_str());
+  return NULL;
+}
 
-  // search StereoSample sub-pool
-  if (p.getStereoSamplePool().find(key) != p.getStereoSamplePool().end()) {
-    return PyString_FromString( edtToString(VECTOR_STEREOSAMPLE).c_str() );
-  }
 
-  // search vector<Real> sub-pool
-  if (p.getVectorRealPool().find(key) != p.getVectorRealPool().end()) {
-    return PyString_FromString( edtToString(VECTOR_VECTOR_REAL).c_str() );
+PyObject* PyPool::containsKey(PyPool* self, PyObject* obj) {
+  if (!PyString_Check(obj)) {
+    PyErr_SetString(PyExc_TypeError, "expected a string argument");
+    return NULL;
   }
 
-  // search vector<string> sub-pool
-  if (p.getVectorStringPool().find(key) != p.getVectorStringPool().end()) {
-    return PyString_FromString( edtToString(VECTOR_VECTOR_STRING).c_str() );
+  Edt tp;
+  if (findKeyType(*(self->pool), PyString_AS_STRING(obj), tp)) {
+    Py_RETURN_TRUE;
   }
+  Py_RETURN_FALSE;
+}
 
-  // search array2d sub-pool
-  if (p.getArray2DRealPool().find(key) != p.getArray2DRealPool().end()) {
-    return PyString_FromString( edtToString(VECTOR_MATRIX_REAL).c_str() );
-  }
+PyObject* PyPool::toPythonRef(Pool* data) {
+  return TO_PYTHON_PROXY(PyPool, data);
+}
 
-  // search tensor sub-pool
-  if (p.getTensorRealPool().find(key) != p.getTensorRealPool().end()) {
-    return PyString_FromString( edtToString(VECTOR_TENSOR_REAL).c_str() );
+Pool* PyPool::fromPythonRef(PyObject* obj) {
+  if (!PyType_IsSubtype(obj->ob_type, &PyPoolType)) {
+    throw EssentiaException("PyPool::fromPythonCopy: argument given is not a PyPool.\n"
+                            "If it actually is one, also make sure your algorithm is among the ones being able to receive a pool as input (as defined in essentia/standard.py)");
   }
 
-  // search single real pool
-  if (p.getSingleRealPool().find(key) != p.getSingleRealPool().end()) {
-    return PyString_FromString( edtToString(REAL).c_str() );
-  }
+  return reinterpret_cast<PyPool*>(obj)->pool;
+}
 
-  // search single vector real pool
-  if (p.getSingleVectorRealPool().find(key) != p.getSingleVectorRealPool().end()) {
-    return PyString_FromString( edtToString(VECTOR_REAL).c_str() );
-  }
 
-  // search single string pool
-  if (p.getSingleStringPool().find(key) != p.getSingleStringPool().end()) {
-    return PyString_FromString( edtToString(STRING).c_str() );
+/**
+ * Data of a descriptor viewed by the numpy arrays returned by Pool.view().
+ * The arrays hold a reference to it (through a capsule, which is their base
+ * object), and it holds a reference to the Pool, so that the Pool stays alive
+ * as long as the arrays do. When the descriptor is about to be modified, the
+ * viewed buffer is moved here (see detachPoolViews), so that the arrays keep
+ * pointing to valid data.
+ */
+class PoolView {
+ public:
+  PyPool* owner;
+  std::string key;
+  Edt type;
+  bool detached;
+  std::vector<Real> vectorData;
+  Tensor<Real> tensorData;
+
+  PoolView(PyPool* owner, const std::string& key, Edt type) :
+    owner(owner), key(key), type(type), detached(false) {}
+};
+
+/**
+ * The pool only notifies its listener while there are views to detach, so
+ * that it costs nothing to the other pools.
+ */
+void updatePoolListener(PyPool* self) {
+  self->pool->setListener(self->views->empty() ? NULL : self->listener);
+}
+
+void destroyPoolView(PyObject* capsule) {
+  PoolView* view = (PoolView*)PyCapsule_GetPointer(capsule, "essentia.PoolView");
+  if (!view->detached) {
+    view->owner->views->erase(view->key);
+    updatePoolListener(view->owner);
   }
+  Py_DECREF(view->owner);
+  delete view;
+}
+
+/**
+ * Moves the buffers viewed by numpy arrays out of the pool for all the
+ * descriptors for which match(key) is true, before these descriptors get
+ * modified. If copyBack is true, the pool keeps a copy of the data, otherwise
+ * the descriptors are left empty (for instance because they are removed).
+ */
+template <typename Predicate>
+void detachPoolViews(PyPool* self, Predicate match, bool copyBack) {
+  if (!self->views) return;
+
+  map<string, PyObject*>::iterator it = self->views->begin();
+  while (it != self->views->end()) {
+    if (!match(it->first)) {
+      ++it;
+      continue;
+    }
+
+    PoolView* view = (PoolView*)PyCapsule_GetPointer(it->second, "essentia.PoolView");
+    Pool& p = *(self->pool);
+    Edt tp;
+    if (!findKeyType(p, view->key, tp)) {
+      // already removed from C++ (e.g., when resetting a network), nothing to
+      // keep alive anymore
+      view->detached = true;
+      self->views->erase(it++);
+      continue;
+    }
+
+    // the pool owns its data, it is only exposed as const. Moving the data
+    // keeps its buffer, and thus the pointers of the numpy arrays, unchanged
+    if (view->type == TENSOR_REAL) {
+      Tensor<Real>& stored = const_cast<Tensor<Real>&>(p.value<Tensor<Real> >(view->key));
+      std::swap(view->tensorData, stored);
+      if (copyBack) stored = view->tensorData;
+    }
+    else {
+      vector<Real>& stored = const_cast<vector<Real>&>(p.value<vector<Real> >(view->key));
+      view->vectorData.swap(stored);
+      if (copyBack) stored = view->vectorData;
+    }
 
-  // search single tensor pool
-  if (p.getSingleTensorRealPool().find(key) != p.getSingleTensorRealPool().end()) {
-    return PyString_FromString( edtToString(TENSOR_REAL).c_str() );
+    view->detached = true;
+    self->views->erase(it++);
   }
 
-  // couldn't find the key
-  ostringstream msg;
-  msg << "'" << key << "' is not a key in the pool" << endl;
-  PyErr_SetString(PyExc_ValueError, msg.str().c_str());
-  return NULL;
+  updatePoolListener(self);
 }
 
-PyObject* PyPool::toPythonRef(Pool* data) {
-  return TO_PYTHON_PROXY(PyPool, data);
-}
+struct MatchKey {
+  string key;
+  MatchKey(const string& key) : key(key) {}
+  bool operator()(const string& name) const { return name == key; }
+};
 
-Pool* PyPool::fromPythonRef(PyObject* obj) {
-  if (!PyType_IsSubtype(obj->ob_type, &PyPoolType)) {
-    throw EssentiaException("PyPool::fromPythonCopy: argument given is not a PyPool.\n"
-                            "If it actually is one, also make sure your algorithm is among the ones being able to receive a pool as input (as defined in essentia/standard.py)");
+struct MatchNamespace {
+  string prefix;
+  MatchNamespace(const string& ns) : prefix(ns + ".") {}
+  bool operator()(const string& name) const { return name.compare(0, prefix.size(), prefix) == 0; }
+};
+
+struct MatchAll {
+  bool operator()(const string&) const { return true; }
+};
+
+
+/**
+ * Detaches the views on the descriptors of a pool before they get modified,
+ * whatever modifies them: Python code, a streaming network writing to the pool
+ * (which runs without the GIL) or an algorithm.
+ */
+class PyPoolListener : public PoolListener {
+ protected:
+  PyPool* _owner;
+
+ public:
+  PyPoolListener(PyPool* owner) : _owner(owner) {}
+
+  void beforeChange(const string& name, bool removed) {
+    PyGILState_STATE gilState = PyGILState_Ensure();
+    detachPoolViews(_owner, MatchKey(name), !removed);
+    PyGILState_Release(gilState);
   }
 
-  return reinterpret_cast<PyPool*>(obj)->pool;
-}
+  void beforeRemoveNamespace(const string& ns) {
+    PyGILState_STATE gilState = PyGILState_Ensure();
+    if (ns.empty()) detachPoolViews(_owner, MatchAll(), false);
+    else detachPoolViews(_owner, MatchNamespace(ns), false);
+    PyGILState_Release(gilState);
+  }
+};
 
 
 PyObject* PyPool::add(PyPool* self, PyObject* pyArgs) {
@@ -265,6 +393,72 @@ PyObject* PyPool::add(PyPool* self, PyObject* pyArgs) {
   Py_RETURN_NONE;
 }
 
+PyObject* PyPool::extend(PyPool* self, PyObject* pyArgs) {
+  vector<PyObject*> args = unpack(pyArgs);
+
+  // make sure we have three args (key, values, validityCheck)
+  if (args.size() != 3) {
+    PyErr_SetString(PyExc_RuntimeError, "3 arguments required (string, array, bool)");
+    return NULL;
+  }
+
+  if (!PyString_Check(args[0])) {
+    PyErr_SetString(PyExc_TypeError, "first argument should be a string");
+    return NULL;
+  }
+
+  if (!PyBool_Check(args[2])) {
+    PyErr_SetString(PyExc_TypeError, "last argument should be a boolean");
+    return NULL;
+  }
+
+  string key = PyString_AsString(args[0]);
+  bool validityCheck = (args[2]==Py_True);
+  Pool& p = *(self->pool);
+
+  // get a C-contiguous array of Reals, this only copies if the given values are
+  // not already stored that way (e.g.: a list or an array of doubles)
+  PyArrayObject* array = (PyArrayObject*)PyArray_FROMANY(args[1], NPY_FLOAT, 1, 2, NPY_ARRAY_IN_ARRAY);
+  if (array == NULL) {
+    return NULL;
+  }
+
+  try {
+    const Real* data = (const Real*)PyArray_DATA(array);
+    int nframes = PyArray_DIM(array, 0);
+
+    // a 1-D array is a sequence of Real values, a 2-D array a sequence of frames
+    if (PyArray_NDIM(array) == 1) {
+      vector<Real> values(data, data + nframes);
+      if (validityCheck && !isValid(values)) {
+        throw EssentiaException("Pool::add value contains invalid numbers (NaN or inf)");
+      }
+      if (nframes > 0) p.append(key, values);
+    }
+    else {
+      int frameSize = PyArray_DIM(array, 1);
+      vector<vector<Real> > frames(nframes);
+      for (int i=0; i<nframes; ++i) {
+        frames[i].assign(data + i*frameSize, data + (i+1)*frameSize);
+      }
+      if (validityCheck && !isValid(frames)) {
+        throw EssentiaException("Pool::add value contains invalid numbers (NaN or inf)");
+      }
+      if (nframes > 0) p.append(key, frames);
+    }
+  }
+  catch (const exception& e) {
+    Py_DECREF(array);
+    ostringstream msg;
+    msg << "error while adding to the Pool: " << e.what();
+    PyErr_SetString(PyExc_RuntimeError, msg.str().c_str());
+    return NULL;
+  }
+
+  Py_DECREF(array);
+  Py_RETURN_NONE;
+}
+
 PyObject* PyPool::set(PyPool* self, PyObject* pyArgs) {
   vector<PyObject*> args = unpack(pyArgs);
 
@@ -547,6 +741,205 @@ PyObject* PyPool::value(PyPool* self, PyObject* pyArgs) {
 }
 
 
+/**
+ * Returns the capsule holding the PoolView of the given descriptor, creating
+ * it if there is no live view on the current data of the descriptor yet.
+ */
+PyObject* poolViewCapsule(PyPool* self, const string& key, Edt type) {
+  if (!self->views) self->views = new map<string, PyObject*>();
+  if (!self->listener) self->listener = new PyPoolListener(self);
+
+  map<string, PyObject*>::iterator it = self->views->find(key);
+  if (it != self->views->end()) {
+    Py_INCREF(it->second);
+    return it->second;
+  }
+
+  PoolView* view = new PoolView(self, key, type);
+  PyObject* capsule = PyCapsule_New(view, "essentia.PoolView", destroyPoolView);
+  if (capsule == NULL) {
+    delete view;
+    throw EssentiaException("Pool.view: could not create the view");
+  }
+  Py_INCREF(self);
+  (*self->views)[key] = capsule;
+  updatePoolListener(self);
+  return capsule;
+}
+
+/**
+ * Wraps the given data, which is owned by the Pool, into a read-only numpy
+ * array without copying it.
+ */
+PyObject* poolDataView(PyPool* self, const string& key, Edt type,
+                       int nd, npy_intp* dims, const Real* data) {
+  PyObject* result = PyArray_New(&PyArray_Type, nd, dims, NPY_FLOAT, NULL, (void*)data, 0,
+                                 NPY_ARRAY_C_CONTIGUOUS | NPY_ARRAY_ALIGNED, NULL);
+  if (result == NULL) {
+    throw EssentiaException("Pool.view: dang null object");
+  }
+
+  PyObject* capsule = poolViewCapsule(self, key, type);
+  if (PyArray_SetBaseObject((PyArrayObject*)result, capsule) < 0) {
+    Py_DECREF(capsule);
+    Py_DECREF(result);
+    throw EssentiaException("Pool.view: could not reference the Pool from the numpy array");
+  }
+
+  return result;
+}
+
+void destroyFramesView(PyObject* capsule) {
+  delete (shared_ptr<const vector<Real> >*)PyCapsule_GetPointer(capsule, "essentia.PoolFrames");
+}
+
+/**
+ * Wraps the frames of a vector of vectors, which the Pool stores one after the
+ * other in a shared buffer (see Pool::contiguousFrames), into a read-only numpy
+ * matrix without copying them. The matrix shares the buffer, which the Pool
+ * never modifies, so it does not need to be detached from the Pool.
+ */
+PyObject* framesView(Pool& p, const string& key) {
+  shared_ptr<const vector<Real> > frames = p.contiguousFrames(key);
+  const vector<vector<Real> >& v = p.value<vector<vector<Real> > >(key);
+  npy_intp dims[2] = { (npy_intp)v.size(), v.empty() ? 0 : (npy_intp)v[0].size() };
+
+  if (frames->empty()) {
+    PyObject* result = PyArray_SimpleNew(2, dims, NPY_FLOAT);
+    if (result == NULL) {
+      throw EssentiaException("Pool.view: dang null object");
+    }
+    PyArray_CLEARFLAGS((PyArrayObject*)result, NPY_ARRAY_WRITEABLE);
+    return result;
+  }
+
+  PyObject* result = PyArray_New(&PyArray_Type, 2, dims, NPY_FLOAT, NULL, (void*)&(*frames)[0], 0,
+                                 NPY_ARRAY_C_CONTIGUOUS | NPY_ARRAY_ALIGNED, NULL);
+  if (result == NULL) {
+    throw EssentiaException("Pool.view: dang null object");
+  }
+
+  shared_ptr<const vector<Real> >* owner = new shared_ptr<const vector<Real> >(frames);
+  PyObject* capsule = PyCapsule_New(owner, "essentia.PoolFrames", destroyFramesView);
+  if (capsule == NULL) {
+    delete owner;
+    Py_DECREF(result);
+    throw EssentiaException("Pool.view: could not create the view");
+  }
+  if (PyArray_SetBaseObject((PyArrayObject*)result, capsule) < 0) {
+    Py_DECREF(capsule);
+    Py_DECREF(result);
+    throw EssentiaException("Pool.view: could not reference the frames from the numpy array");
+  }
+
+  return result;
+}
+
+/**
+ * Copies the elements of a vector of matrices or tensors, which are stored
+ * separately in the Pool, into a single numpy array with one more dimension.
+ * All the elements must have the same shape.
+ */
+template <typename T>
+PyObject* stackedCopy(const vector<T>& elements, int nd, npy_intp* elementDims,
+                      const Real* (*elementData)(const T&)) {
+  vector<npy_intp> dims(1, (npy_intp)elements.size());
+  dims.insert(dims.end(), elementDims, elementDims + nd);
+
+  npy_intp elementSize = 1;
+  for (int i=0; i<nd; i++) elementSize *= elementDims[i];
+
+  PyObject* result = PyArray_SimpleNew(nd + 1, &dims[0], NPY_FLOAT);
+  if (result == NULL) {
+    throw EssentiaException("Pool.view: dang null object");
+  }
+
+  Real* dest = (Real*)PyArray_DATA((PyArrayObject*)result);
+  for (int i=0; i<(int)elements.size(); ++i) {
+    if (elementSize) memcpy(dest + i*elementSize, elementData(elements[i]), elementSize*sizeof(Real));
+  }
+
+  PyArray_CLEARFLAGS((PyArrayObject*)result, NPY_ARRAY_WRITEABLE);
+  return result;
+}
+
+const Real* vectorData(const vector<Real>& v) { return v.empty() ? NULL : &v[0]; }
+const Real* matrixData(const TNT::Array2D<Real>& m) { return (m.dim1() == 0 || m.dim2() == 0) ? NULL : &m[0][0]; }
+const Real* tensorData(const Tensor<Real>& t) { return t.size() == 0 ? NULL : t.data(); }
+
+void checkSameShape(bool same, const string& key) {
+  if (!same) {
+    throw EssentiaException("Pool.view: the elements of '", key,
+                            "' have different shapes and cannot be stacked in a single array");
+  }
+}
+
+
+PyObject* PyPool::view(PyPool* self, PyObject* pyArgs) {
+  vector<PyObject*> args = unpack(pyArgs);
+
+  // make sure we have two arg and they are strings
+  if (args.size() != 2 || !PyString_Check(args[0]) || !PyString_Check(args[1])) {
+    PyErr_SetString(PyExc_RuntimeError, "2 arguments required (string, string)");
+    return NULL;
+  }
+
+  string key = PyString_AS_STRING(args[0]);
+  Edt tp = stringToEdt( PyString_AS_STRING(args[1]) );
+  Pool& p = *(self->pool);
+
+  try {
+    switch (tp) {
+      case VECTOR_REAL: {
+        const vector<Real>& v = p.value<vector<Real> >(key);
+        npy_intp dims[1] = { (npy_intp)v.size() };
+        return poolDataView(self, key, tp, 1, dims, vectorData(v));
+      }
+      case TENSOR_REAL: {
+        const Tensor<Real>& t = p.value<Tensor<Real> >(key);
+        npy_intp dims[TENSORRANK];
+        for (int i=0; i<TENSORRANK; i++) dims[i] = t.dimension(i);
+        return poolDataView(self, key, tp, TENSORRANK, dims, tensorData(t));
+      }
+
+      case VECTOR_VECTOR_REAL: {
+        return framesView(p, key);
+      }
+
+      // the elements of these types are stored separately, so they can only be
+      // returned as a single array by copying them
+      case VECTOR_MATRIX_REAL: {
+        const vector<TNT::Array2D<Real> >& v = p.value<vector<TNT::Array2D<Real> > >(key);
+        npy_intp dims[2] = { v.empty() ? 0 : v[0].dim1(), v.empty() ? 0 : v[0].dim2() };
+        for (int i=0; i<(int)v.size(); ++i) checkSameShape(v[i].dim1() == dims[0] && v[i].dim2() == dims[1], key);
+        return stackedCopy(v, 2, dims, matrixData);
+      }
+      case VECTOR_TENSOR_REAL: {
+        const vector<Tensor<Real> >& v = p.value<vector<Tensor<Real> > >(key);
+        npy_intp dims[TENSORRANK];
+        for (int d=0; d<TENSORRANK; d++) dims[d] = v.empty() ? 0 : v[0].dimension(d);
+        for (int i=0; i<(int)v.size(); ++i) {
+          for (int d=0; d<TENSORRANK; d++) checkSameShape(v[i].dimension(d) == dims[d], key);
+        }
+        return stackedCopy(v, TENSORRANK, dims, tensorData);
+      }
+
+      default:
+        ostringstream msg;
+        msg << "Pool.view does not support the type: " << edtToString(tp);
+        PyErr_SetString(PyExc_TypeError, msg.str().c_str());
+        return NULL;
+    }
+  }
+  catch (const exception& e) {
+    ostringstream msg;
+    msg << "error while retrieving value from Pool: " << e.what();
+    PyErr_SetString(PyExc_RuntimeError, msg.str().c_str());
+    return NULL;
+  }
+}
+
+
 PyObject* PyPool::remove(PyPool* self, PyObject* obj) {
   // make sure first arg is a string
   if (!PyString_Check(obj)) {
@@ -554,7 +947,8 @@ PyObject* PyPool::remove(PyPool* self, PyObject* obj) {
     return NULL;
   }
 
-  self->pool->remove(PyString_AS_STRING(obj));
+  string key = PyString_AS_STRING(obj);
+  self->pool->remove(key);
   Py_RETURN_NONE;
 }
 
@@ -577,7 +971,8 @@ PyObject* PyPool::removeNamespace(PyPool* self, PyObject* obj) {
     return NULL;
   }
 
-  self->pool->removeNamespace(PyString_AS_STRING(obj));
+  string ns = PyString_AS_STRING(obj);
+  self->pool->removeNamespace(ns);
   Py_RETURN_NONE;
 }
 
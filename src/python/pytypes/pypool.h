@@ -21,6 +21,7 @@
 #define ESSENTIA_PYTHON_PYPOOL_H
 
 #include <Python.h>
+#include <map>
 #include "pool.h"
 #include "typewrapper.h"
 
@@ -36,8 +37,25 @@ class PyPool {
  public:
   PyObject_HEAD
   essentia::Pool* pool;
+  // capsules of the data viewed by numpy arrays (see Pool.view), by key
+  std::map<std::string, PyObject*>* views;
+  // detaches the views before the pool modifies their data
+  essentia::PoolListener* listener;
 
-  BASIC_MEMORY_MANAGEMENT(PyPool, pool);
+  static PyObject* make_new(PyTypeObject* type, PyObject* args, PyObject* kwds) {
+    return (PyObject*)(type->tp_alloc(type, 0));
+  }
+
+  static void dealloc(PyObject* self) {
+    // the views hold a reference to the pool, there are none left here
+    delete reinterpret_cast<PyPool*>(self)->views;
+    reinterpret_cast<PyPool*>(self)->views = NULL;
+    delete reinterpret_cast<PyPool*>(self)->pool;
+    reinterpret_cast<PyPool*>(self)->pool = NULL;
+    delete reinterpret_cast<PyPool*>(self)->listener;
+    reinterpret_cast<PyPool*>(self)->listener = NULL;
+    self->ob_type->tp_free((PyObject*)self);
+  }
 
   static PyObject* make_new_from_data(PyTypeObject* type, PyObject* args,
                                       PyObject* kwds, essentia::Pool* data) {
@@ -51,10 +69,12 @@ class PyPool {
   static PyObject* toPythonRef(essentia::Pool* data);
   static essentia::Pool* fromPythonRef(PyObject* obj);
   static PyObject* add(PyPool* self, PyObject* pyArgs);
+  static PyObject* extend(PyPool* self, PyObject* pyArgs);
   static PyObject* set(PyPool* self, PyObject* pyArgs);
   static PyObject* merge(PyPool* self, PyObject* pyArgs);
   static PyObject* mergeSingle(PyPool* self, PyObject* pyArgs);
   static PyObject* value(PyPool* self, PyObject* pyArgs);
+  static PyObject* view(PyPool* self, PyObject* pyArgs);
   static PyObject* getItem(PyPool* self, PyObject* key);
   static PyObject* isSingleValue(PyPool* self, PyObject* key);
   static PyObject* remove(PyPool* self, PyObject* pyArgs);
@@ -62,6 +82,7 @@ class PyPool {
   static PyObject* descriptorNames(PyPool* self, PyObject* pyArgs);
   static PyObject* clear(PyPool* self);
   static PyObject* keyType(PyPool* self, PyObject* obj);
+  static PyObject* containsKey(PyPool* self, PyObject* obj);
 };
 
 
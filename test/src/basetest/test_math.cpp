@@ -40,3 +40,75 @@ TEST(Math, NextPowerOfTwo) {
   EXPECT_EQ(2*n, nextPowerTwo(n+1));
 
 }
+
+TEST(Math, Percentile) {
+  // same values as numpy.percentile (linear interpolation)
+  Real values[] = { 5, 1, 4, 2, 3 };
+  vector<Real> v(values, values + 5);
+  EXPECT_EQ(3, percentile(v, 50));
+  EXPECT_EQ(2, percentile(v, 25));
+  EXPECT_EQ(1, percentile(v, 0));
+  EXPECT_EQ(5, percentile(v, 100));
+  EXPECT_FLOAT_EQ(1.4, percentile(v, 10));
+
+  vector<Real> even(values, values + 4);
+  EXPECT_FLOAT_EQ(3.0, percentile(even, 50));
+
+  vector<Real> single(1, 7);
+  EXPECT_EQ(7, percentile(single, 0));
+  EXPECT_EQ(7, percentile(single, 50));
+  EXPECT_EQ(7, percentile(single, 100));
+
+  EXPECT_THROW(percentile(vector<Real>(), 50), EssentiaException);
+}
+
+TEST(Math, RowPercentiles) {
+  // (2, 3) matrix in row-major order
+  Real values[] = { 3, 1, 2,
+                    4, 6, 5 };
+  vector<Real> matrix(values, values + 6);
+
+  Real expectedMedians[] = { 2, 5 };
+  vector<Real> medians = rowPercentiles(matrix, 2, 3, 50);
+  EXPECT_VEC_EQ(medians, vector<Real>(expectedMedians, expectedMedians + 2));
+
+  // the columns are the rows of the transposed matrix
+  Real expectedTransposed[] = { 3, 4,
+                                1, 6,
+                                2, 5 };
+  vector<Real> transposed = transposeMatrix(matrix, 2, 3);
+  EXPECT_VEC_EQ(transposed, vector<Real>(expectedTransposed, expectedTransposed + 6));
+
+  Real expectedColumnMedians[] = { 3.5, 3.5, 3.5 };
+  vector<Real> columnMedians = rowPercentiles(transposed, 3, 2, 50);
+  EXPECT_VEC_EQ(columnMedians, vector<Real>(expectedColumnMedians, expectedColumnMedians + 3));
+
+  EXPECT_THROW(rowPercentiles(matrix, 3, 3, 50), EssentiaException);
+}
+
+TEST(Math, PairwiseDistance) {
+  Real a[] = { 3, 4 };
+  Real b[] = { 0, 0 };
+  vector<vector<Real> > m;
+  m.push_back(vector<Real>(a, a + 2));
+  m.push_back(vector<Real>(b, b + 2));
+
+  vector<vector<Real> > d = pairwiseDistance(m, m);
+  EXPECT_EQ(0, d[0][0]);
+  EXPECT_EQ(5, d[0][1]);
+  EXPECT_EQ(5, d[1][0]);
+  EXPECT_EQ(0, d[1][1]);
+
+  // identical rows with a large norm should be at a distance of exactly zero,
+  // even though the rounding errors of |a|^2 + |b|^2 - 2ab are not
+  vector<vector<Real> > frames(10, vector<Real>(108));
+  for (int i=0; i<(int)frames.size(); i++) {
+    for (int j=0; j<(int)frames[i].size(); j++) {
+      frames[i][j] = 0.5 + 0.5 * sin(Real(1 + i) * j);
+    }
+  }
+  vector<vector<Real> > distances = pairwiseDistance(frames, frames);
+  for (int i=0; i<(int)frames.size(); i++) {
+    EXPECT_EQ(0, distances[i][i]);
+  }
+}
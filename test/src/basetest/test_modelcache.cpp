@@ -0,0 +1,131 @@
+/*
+ * Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+ *
+ * This file is part of Essentia
+ *
+ * Essentia is free software: you can redistribute it and/or modify it under
+ * the terms of the GNU Affero General Public License as published by the Free
+ * Software Foundation (FSF), either version 3 of the License, or (at your
+ * option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+ * FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+ * details.
+ *
+ * You should have received a copy of the Affero GNU General Public License
+ * version 3 along with this program.  If not, see http://www.gnu.org/licenses/
+ */
+
+#include "essentia_gtest.h"
+#include "modelcache.h"
+using namespace std;
+using namespace essentia;
+
+
+class TestModel : public CachedModel {
+ public:
+  static int alive;
+  TestModel(size_t s) { size = s; alive++; }
+  ~TestModel() { alive--; }
+};
+
+int TestModel::alive = 0;
+
+
+class ModelCacheTest : public ::testing::Test {
+ protected:
+  size_t _capacity;
+
+  void SetUp() {
+    _capacity = ModelCache::capacity();
+    ModelCache::clear();
+  }
+
+  void TearDown() {
+    ModelCache::setCapacity(_capacity);
+    ModelCache::clear();
+  }
+};
+
+
+TEST_F(ModelCacheTest, SharedByKey) {
+  EXPECT_FALSE(ModelCache::get("a") != NULL);
+
+  ModelCache::ModelPtr a = ModelCache::add("a", ModelCache::ModelPtr(new TestModel(10)));
+  EXPECT_EQ(ModelCache::get("a"), a);
+  EXPECT_FALSE(ModelCache::get("b") != NULL);
+
+  // adding twice the same key keeps the first model
+  ModelCache::ModelPtr a2 = ModelCache::add("a", ModelCache::ModelPtr(new TestModel(20)));
+  EXPECT_EQ(a2, a);
+  EXPECT_EQ(ModelCache::count(), 1);
+  EXPECT_EQ(ModelCache::size(), (size_t)10);
+}
+
+TEST_F(ModelCacheTest, InUseModelsAreNotEvicted) {
+  ModelCache::ModelPtr a = ModelCache::add("a", ModelCache::ModelPtr(new TestModel(10)));
+  ModelCache::add("b", ModelCache::ModelPtr(new TestModel(10)));
+
+  // "b" is not used by anyone, so it does not fit in the cache
+  ModelCache::setCapacity(0);
+  EXPECT_EQ(ModelCache::count(), 1);
+  EXPECT_EQ(ModelCache::countInUse(), 1);
+  EXPECT_EQ(ModelCache::get("a"), a);
+  EXPECT_EQ(TestModel::alive, 1);
+
+  a.reset();
+  ModelCache::clear();
+  EXPECT_EQ(ModelCache::count(), 0);
+  EXPECT_EQ(TestModel::alive, 0);
+}
+
+TEST_F(ModelCacheTest, EvictLeastRecentlyUsed) {
+  ModelCache::setCapacity(25);
+
+  ModelCache::add("a", ModelCache::ModelPtr(new TestModel(10)));
+  ModelCache::add("b", ModelCache::ModelPtr(new TestModel(10)));
+  ModelCache::get("a");
+  ModelCache::add("c", ModelCache::ModelPtr(new TestModel(10)));
+  ModelCache::add("d", ModelCache::ModelPtr(new TestModel(0)));
+
+  EXPECT_EQ(ModelCache::count(), 3);
+  EXPECT_TRUE(ModelCache::get("a") != NULL);
+  EXPECT_FALSE(ModelCache::get("b") != NULL);
+  EXPECT_TRUE(ModelCache::get("c") != NULL);
+
+  ModelCache::setCapacity(10);
+  EXPECT_EQ(ModelCache::count(), 1);
+  EXPECT_TRUE(ModelCache::get("c") != NULL);
+}
+
+TEST_F(ModelCacheTest, EvictOnRelease) {
+  ModelCache::ModelPtr a = ModelCache::add("a", ModelCache::ModelPtr(new TestModel(10)));
+  ModelCache::ModelPtr b = ModelCache::add("b", ModelCache::ModelPtr(new TestModel(10)));
+
+  // both models are in use, so they are kept even if they do not fit
+  ModelCache::setCapacity(15);
+  EXPECT_EQ(ModelCache::count(), 2);
+
+  // "a" still fits in the cache once released
+  ModelCache::release(a);
+  EXPECT_FALSE(a != NULL);
+  EXPECT_EQ(ModelCache::count(), 2);
+  EXPECT_EQ(ModelCache::countInUse(), 1);
+
+  // both unused models do not fit, the least recently used one is evicted
+  ModelCache::release(b);
+  EXPECT_EQ(ModelCache::count(), 1);
+  EXPECT_EQ(TestModel::alive, 1);
+  EXPECT_TRUE(ModelCache::get("b") != NULL);
+
+  // a model is only evicted when its last user releases it
+  ModelCache::setCapacity(0);
+  ModelCache::ModelPtr c = ModelCache::add("c", ModelCache::ModelPtr(new TestModel(10)));
+  ModelCache::ModelPtr c2 = ModelCache::get("c");
+  ModelCache::release(c);
+  EXPECT_EQ(ModelCache::count(), 1);
+  ModelCache::release(c2);
+  EXPECT_EQ(ModelCache::count(), 0);
+  EXPECT_EQ(TestModel::alive, 0);
+}
@@ -21,6 +21,7 @@
 #include "network.h"
 #include "networkparser.h"
 #include "graphutils.h"
+#include "vectorinput.h"
 using namespace std;
 using namespace essentia;
 using namespace essentia::streaming;
@@ -891,6 +892,141 @@ TEST(Network, DiamondShape3) {
 }
 
 
+TEST(Network, ExecutionLevels) {
+  AlgorithmFactory& factory = AlgorithmFactory::instance();
+
+  Algorithm* A = factory.create("A");
+  Algorithm* DiamondShape = factory.create("DiamondShapeAlgo");
+  Pool pool;
+
+  A->output("out") >> DiamondShape->input("src");
+  DiamondShape->output("dest") >> PC(pool, "freqs");
+
+  Network n(A);
+  n.setNumberOfThreads(4);
+  n.runPrepare();
+
+  const vector<vector<Algorithm*> >& levels = n.executionLevels();
+
+  ASSERT_EQ((size_t)6, levels.size());
+  EXPECT_EQ((size_t)1, levels[0].size());
+  EXPECT_EQ("A", levels[0][0]->name());
+  EXPECT_EQ("FrameCutter", levels[1][0]->name());
+  EXPECT_EQ("Spectrum", levels[2][0]->name());
+  ASSERT_EQ((size_t)2, levels[3].size());
+  EXPECT_TRUE((levels[3][0]->name() == "PitchYinFFT" && levels[3][1]->name() == "SpectralPeaks") ||
+              (levels[3][0]->name() == "SpectralPeaks" && levels[3][1]->name() == "PitchYinFFT"));
+  EXPECT_EQ("HarmonicPeaks", levels[4][0]->name());
+  EXPECT_EQ((size_t)2, levels[5].size());
+}
+
+TEST(Network, SequentialExecutionLevels) {
+  AlgorithmFactory& factory = AlgorithmFactory::instance();
+
+  Algorithm* A = factory.create("A");
+  Algorithm* DiamondShape = factory.create("DiamondShapeAlgo");
+  Pool pool;
+
+  A->output("out") >> DiamondShape->input("src");
+  DiamondShape->output("dest") >> PC(pool, "freqs");
+
+  // no levels when running on a single thread
+  Network n(A);
+  n.runPrepare();
+  EXPECT_TRUE(n.executionLevels().empty());
+
+  ASSERT_THROW(n.setNumberOfThreads(0), EssentiaException);
+}
+
+void runSpectralNetwork(const vector<Real>& signal, Pool& pool, int nThreads) {
+  AlgorithmFactory& factory = AlgorithmFactory::instance();
+
+  Algorithm* gen      = new VectorInput<Real>(&signal);
+  Algorithm* fc       = factory.create("FrameCutter", "frameSize", 1024, "hopSize", 256);
+  Algorithm* w        = factory.create("Windowing");
+  Algorithm* spec     = factory.create("Spectrum");
+  Algorithm* mfcc     = factory.create("MFCC");
+  Algorithm* centroid = factory.create("Centroid", "range", 22050.);
+  Algorithm* peaks    = factory.create("SpectralPeaks");
+  Algorithm* rms      = factory.create("RMS");
+
+  gen->output("data")          >>  fc->input("signal");
+  fc->output("frame")          >>  w->input("frame");
+  fc->output("frame")          >>  rms->input("array");
+  w->output("frame")           >>  spec->input("frame");
+  spec->output("spectrum")     >>  mfcc->input("spectrum");
+  spec->output("spectrum")     >>  centroid->input("array");
+  spec->output("spectrum")     >>  peaks->input("spectrum");
+  mfcc->output("mfcc")         >>  PC(pool, "mfcc");
+  mfcc->output("bands")        >>  NOWHERE;
+  centroid->output("centroid") >>  PC(pool, "centroid");
+  peaks->output("frequencies") >>  PC(pool, "peaks.frequencies");
+  peaks->output("magnitudes")  >>  PC(pool, "peaks.magnitudes");
+  rms->output("rms")           >>  PC(pool, "rms");
+
+  Network n(gen);
+  n.setNumberOfThreads(nThreads);
+  n.run();
+}
+
+TEST(Network, ParallelRun) {
+  vector<Real> signal(44100);
+  for (int i=0; i<(int)signal.size(); i++) {
+    signal[i] = sin(2*M_PI*440*i/44100.) + 0.5*sin(2*M_PI*1234*i/44100.);
+  }
+
+  Pool expected, found;
+  runSpectralNetwork(signal, expected, 1);
+  runSpectralNetwork(signal, found, 4);
+
+  vector<string> names = expected.descriptorNames();
+  ASSERT_EQ(names, found.descriptorNames());
+
+  EXPECT_VEC_EQ(expected.value<vector<Real> >("centroid"), found.value<vector<Real> >("centroid"));
+  EXPECT_VEC_EQ(expected.value<vector<Real> >("rms"), found.value<vector<Real> >("rms"));
+  EXPECT_MATRIX_EQ(expected.value<vector<vector<Real> > >("mfcc"), found.value<vector<vector<Real> > >("mfcc"));
+  EXPECT_MATRIX_EQ(expected.value<vector<vector<Real> > >("peaks.frequencies"),
+                   found.value<vector<vector<Real> > >("peaks.frequencies"));
+  EXPECT_MATRIX_EQ(expected.value<vector<vector<Real> > >("peaks.magnitudes"),
+                   found.value<vector<vector<Real> > >("peaks.magnitudes"));
+}
+
+
+TEST(Network, SetNumberOfThreadsAfterPrepare) {
+  vector<Real> signal(44100);
+  for (int i=0; i<(int)signal.size(); i++) {
+    signal[i] = sin(2*M_PI*440*i/44100.);
+  }
+
+  AlgorithmFactory& factory = AlgorithmFactory::instance();
+  Pool expected, found;
+  runSpectralNetwork(signal, expected, 1);
+
+  Algorithm* gen  = new VectorInput<Real>(&signal);
+  Algorithm* fc   = factory.create("FrameCutter", "frameSize", 1024, "hopSize", 256);
+  Algorithm* rms  = factory.create("RMS");
+  Algorithm* rms2 = factory.create("RMS");
+
+  gen->output("data")  >> fc->input("signal");
+  fc->output("frame")  >> rms->input("array");
+  fc->output("frame")  >> rms2->input("array");
+  rms->output("rms")   >> PC(found, "rms");
+  rms2->output("rms")  >> NOWHERE;
+
+  Network n(gen);
+  n.setNumberOfThreads(4);
+  n.runPrepare();
+  ASSERT_FALSE(n.executionLevels().empty());
+
+  // the pool is gone until the next runPrepare(), the network runs sequentially
+  n.setNumberOfThreads(2);
+  EXPECT_TRUE(n.executionLevels().empty());
+  while (n.runStep());
+
+  EXPECT_VEC_EQ(expected.value<vector<Real> >("rms"), found.value<vector<Real> >("rms"));
+}
+
+
 TEST(Network, TeeProxyComposite) {
   AlgorithmFactory& factory = AlgorithmFactory::instance();
 
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+
+from essentia_test import *
+
+
+class TestComputeBatch(TestCase):
+
+    def frames(self, n=20, size=1024):
+        numpy.random.seed(0)
+        return numpy.random.uniform(-1, 1, (n, size)).astype(numpy.float32)
+
+    def testVectorOutputs(self):
+        frames = self.frames()
+        w = Windowing()
+        spec = Spectrum()
+        mfcc = MFCC()
+
+        spectra = spec.computeBatch(w.computeBatch(frames))
+        bands, mfccs = mfcc.computeBatch(spectra)
+
+        self.assertEqual(spectra.shape, (len(frames), 513))
+        for i, frame in enumerate(frames):
+            expected = spec(w(frame))
+            self.assertEqualVector(spectra[i], expected)
+            expectedBands, expectedMfcc = mfcc(expected)
+            self.assertAlmostEqualVector(bands[i], expectedBands)
+            self.assertAlmostEqualVector(mfccs[i], expectedMfcc)
+
+    def testRealOutputs(self):
+        frames = self.frames()
+        found = RMS().computeBatch(frames)
+        self.assertEqual(found.shape, (len(frames),))
+        self.assertAlmostEqualVector(found, [RMS()(f) for f in frames])
+
+
+    def testRaggedRows(self):
+        spectra = Spectrum().computeBatch(self.frames())
+        frequencies, magnitudes = SpectralPeaks().computeBatch(spectra)
+        found = HPCP().computeBatch(frequencies, magnitudes)
+
+        for i, s in enumerate(spectra):
+            f, m = SpectralPeaks()(s)
+            self.assertEqualVector(frequencies[i], f)
+            self.assertEqualVector(magnitudes[i], m)
+            self.assertAlmostEqualVector(found[i], HPCP()(f, m))
+
+    def testEmpty(self):
+        self.assertEqual(len(RMS().computeBatch(zeros((0, 10)))), 0)
+
+    def testInvalid(self):
+        # wrong number of inputs
+        self.assertRaises(ValueError, Spectrum().computeBatch)
+        # inputs with different number of rows
+        self.assertRaises(ValueError, HPCP().computeBatch, zeros((2, 10)), zeros((3, 10)))
+        # unsupported types
+        self.assertRaises(TypeError, FFT().computeBatch, self.frames())
+        # errors while computing
+        self.assertRaises(RuntimeError, Windowing().computeBatch, zeros((2, 1)))
+
+
+suite = allTests(TestComputeBatch)
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=2).run(suite)
@@ -130,6 +130,193 @@ class TestPool(TestCase):
         self.assertRaises(KeyError, p.__getitem__, 'bar.bar')
         self.assertTrue(not p.containsKey('bar.bar'))
 
+    def testContainsKey(self):
+        p = Pool()
+        p.add('real', 1.0)
+        p.add('string', 'a')
+        p.add('vector', [1.0, 2.0])
+        p.add('matrix', array([[1.0, 2.0]]))
+        p.add('stereo', (3, 6))
+        p.set('single.real', 1.0)
+        p.set('single.string', 'a')
+        p.set('single.vector', [1.0])
+
+        for key in p.descriptorNames():
+            self.assertTrue(p.containsKey(key))
+
+        # namespaces are not keys
+        self.assertFalse(p.containsKey('single'))
+        self.assertFalse(p.containsKey('real.real'))
+
+        p.remove('real')
+        self.assertFalse(p.containsKey('real'))
+        p.clear()
+        self.assertFalse(p.containsKey('string'))
+
+    def testExtend(self):
+        frames = numpy.random.rand(10, 13).astype(numpy.float32)
+
+        expected = Pool()
+        for frame in frames:
+            expected.add('mfcc', frame)
+        expected.add('rms', 0.5)
+        expected.add('rms', 0.25)
+
+        p = Pool()
+        p.extend('mfcc', frames[:4])
+        p.extend('mfcc', frames[4:].tolist())
+        p.extend('rms', [0.5, 0.25])
+
+        self.assertEqualMatrix(p['mfcc'], expected['mfcc'])
+        self.assertEqualVector(p['rms'], expected['rms'])
+
+        # extend and add can be used on the same key
+        p.add('mfcc', frames[0])
+        self.assertEqual(len(p['mfcc']), 11)
+
+        # adding nothing does not create the key
+        p.extend('empty', zeros((0, 13)))
+        self.assertFalse(p.containsKey('empty'))
+
+    def testExtendInvalid(self):
+        p = Pool()
+        p.add('real', 1.0)
+        self.assertRaises(RuntimeError, p.extend, 'real', zeros((2, 3)))
+        self.assertRaises(RuntimeError, p.extend, 'nan', array([[1, float('nan')]]), True)
+        self.assertRaises(ValueError, p.extend, 'cube', zeros((2, 2, 2)))
+
+    def testView(self):
+        frames = numpy.random.rand(5, 4).astype(numpy.float32)
+        p = Pool()
+        p.extend('rms', [1, 2, 3])
+        p.extend('frames', frames)
+        p.add('matrices', frames)
+        p.add('matrices', frames * 2)
+        p.set('single.vector', [4, 5])
+
+        for key in p.descriptorNames():
+            found = p.view(key)
+            self.assertEqualMatrix(numpy.atleast_2d(found.reshape(len(found), -1)),
+                                   numpy.atleast_2d(numpy.array(p[key]).reshape(len(found), -1)))
+            self.assertFalse(found.flags.writeable)
+
+        # frames are stacked in a single matrix
+        self.assertEqual(p.view('frames').shape, (5, 4))
+        self.assertEqualMatrix(p.view('frames'), frames)
+        self.assertEqual(p.view('matrices').shape, (2, 5, 4))
+
+        # series of Reals, vectors and frames are not copied
+        for key in ['rms', 'single.vector', 'frames']:
+            self.assertTrue(p.view(key).base is not None)
+            self.assertFalse(p.view(key).flags.owndata)
+
+        # the view keeps the pool alive
+        rms = p.view('rms')
+        del p
+        self.assertEqualVector(rms, [1, 2, 3])
+
+    def testViewStacked(self):
+        p = Pool()
+        p.extend('frames', numpy.zeros((0, 3), dtype=numpy.float32))
+        self.assertFalse(p.containsKey('frames'))
+
+        p.add('frames', [1, 2, 3])
+        p.add('frames', [4, 5, 6])
+        frames = p.view('frames')
+        self.assertEqualMatrix(frames, [[1, 2, 3], [4, 5, 6]])
+        # the frames are now stored in the viewed buffer, so they are not
+        # copied again
+        self.assertTrue(numpy.shares_memory(frames, p.view('frames')))
+        self.assertEqualMatrix(p['frames'], [[1, 2, 3], [4, 5, 6]])
+
+        # adding frames gives a new buffer to the next views only
+        p.add('frames', [7, 8, 9])
+        self.assertEqualMatrix(frames, [[1, 2, 3], [4, 5, 6]])
+        frames2 = p.view('frames')
+        self.assertEqualMatrix(frames2, [[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+        self.assertFalse(numpy.shares_memory(frames, frames2))
+
+        # the buffer outlives the descriptor and the pool
+        p.merge('frames', [[0, 0, 0]], 'replace')
+        self.assertEqualMatrix(p['frames'], [[0, 0, 0]])
+        p.remove('frames')
+        del p
+        self.assertEqualMatrix(frames2, [[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+
+        p = Pool()
+
+        # frames of different sizes cannot be stacked
+        p.add('ragged', [1, 2])
+        p.add('ragged', [1, 2, 3])
+        self.assertRaises(RuntimeError, p.view, 'ragged')
+
+    def testViewLifetime(self):
+        p = Pool()
+        p.extend('rms', numpy.arange(10, dtype=numpy.float32))
+        p.set('single.vector', [4, 5])
+        p.set('single.tensor', numpy.ones((1, 2, 3, 4), dtype=numpy.float32))
+
+        rms = p.view('rms')
+        rms2 = p.view('rms')
+        vector = p.view('single.vector')
+        tensor = p.view('single.tensor')
+
+        # adding to the descriptor may reallocate its data: the views keep the
+        # previous data while the pool gets the new values
+        for i in range(1000):
+            p.add('rms', 10 + i)
+        self.assertEqualVector(rms, numpy.arange(10))
+        self.assertEqualVector(rms2, numpy.arange(10))
+        self.assertEqualVector(p['rms'], numpy.arange(1010))
+        self.assertEqualVector(p.view('rms'), numpy.arange(1010))
+
+        # views taken after the modification point to the pool again
+        rms = p.view('rms')
+        p.remove('rms')
+        self.assertEqualVector(rms, numpy.arange(1010))
+        self.assertFalse(p.containsKey('rms'))
+
+        p.set('single.vector', [6, 7, 8])
+        self.assertEqualVector(vector, [4, 5])
+        self.assertEqualVector(p['single.vector'], [6, 7, 8])
+
+        p.clear()
+        self.assertEqualVector(tensor.flatten(), numpy.ones(24))
+        self.assertEqual(p.descriptorNames(), [])
+
+        p.add('ns.rms', 1)
+        rms = p.view('ns.rms')
+        p.removeNamespace('ns')
+        del p
+        self.assertEqualVector(rms, [1])
+
+    def testViewStreaming(self):
+        p = Pool()
+        p.extend('values', [1, 2])
+        p.extend('frames', [[1, 2], [3, 4]])
+
+        gen = VectorInput(numpy.arange(5, dtype=numpy.float32))
+        gen.data >> (p, 'values')
+        frameGen = VectorInput(numpy.arange(8, dtype=numpy.float32).reshape(4, 2))
+        frameGen.data >> (p, 'frames')
+
+        # the views taken after connecting the network are detached when the
+        # network writes to the pool
+        values = p.view('values')
+        frames = p.view('frames')
+        run(gen)
+        run(frameGen)
+        self.assertEqualVector(values, [1, 2])
+        self.assertEqualVector(p['values'], [1, 2, 0, 1, 2, 3, 4])
+        self.assertEqualMatrix(frames, [[1, 2], [3, 4]])
+        self.assertEqualMatrix(p.view('frames'), [[1, 2], [3, 4], [0, 1], [2, 3], [4, 5], [6, 7]])
+
+    def testViewUnsupported(self):
+        p = Pool()
+        p.add('string', 'foo')
+        self.assertRaises(TypeError, p.view, 'string')
+        self.assertRaises(KeyError, p.view, 'missing')
+
     def testRemove(self):
         expectedVal = 123.456
 
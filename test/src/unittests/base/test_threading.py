@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+
+from essentia_test import *
+import essentia
+from essentia.streaming import VectorInput, FrameCutter as sFrameCutter, \
+                               Windowing as sWindowing, Spectrum as sSpectrum, \
+                               MFCC as sMFCC, Centroid as sCentroid, RMS as sRMS
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TestThreading(TestCase):
+
+    def frames(self, n=64, size=1024):
+        numpy.random.seed(0)
+        return [array(numpy.random.uniform(-1, 1, size)) for _ in range(n)]
+
+    def testOneInstancePerThread(self):
+        frames = self.frames()
+        expected = [Spectrum()(Windowing()(f)) for f in frames]
+
+        def spectrum(frame):
+            return Spectrum()(Windowing()(frame))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            found = list(pool.map(spectrum, frames))
+
+        for e, f in zip(expected, found):
+            self.assertEqualVector(e, f)
+
+    def testSharedInstance(self):
+        # concurrent calls on the same instance are serialized by the bindings
+        frames = self.frames()
+        w = Windowing()
+        spec = Spectrum()
+        expected = [spec(w(f)) for f in frames]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            found = list(pool.map(lambda f: spec(w(f)), frames))
+
+        for e, f in zip(expected, found):
+            self.assertEqualVector(e, f)
+
+    def testConfigureInThreads(self):
+        sizes = [64, 128, 256, 512] * 4
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            found = list(pool.map(lambda s: Spectrum(size=s)(zeros(s)), sizes))
+
+        for s, f in zip(sizes, found):
+            self.assertEqual(len(f), s // 2 + 1)
+
+    def testStreamingRunInThreads(self):
+        signals = [array(numpy.random.uniform(-1, 1, 44100)) for _ in range(4)]
+
+        def analyze(signal):
+            pool = Pool()
+            gen = VectorInput(signal)
+            fc = sFrameCutter(frameSize=1024, hopSize=512)
+            w = sWindowing()
+            spec = sSpectrum()
+            gen.data >> fc.signal
+            fc.frame >> w.frame >> spec.frame
+            spec.spectrum >> (pool, 'spectrum')
+            essentia.run(gen)
+            return pool['spectrum']
+
+        expected = [analyze(s) for s in signals]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            found = list(pool.map(analyze, signals))
+
+        for e, f in zip(expected, found):
+            self.assertEqualMatrix(e, f)
+
+    def testParallelNetwork(self):
+        signal = array(numpy.random.uniform(-1, 1, 44100))
+
+        def analyze(threads):
+            pool = Pool()
+            gen = VectorInput(signal)
+            fc = sFrameCutter(frameSize=1024, hopSize=256)
+            w = sWindowing()
+            spec = sSpectrum()
+            mfcc = sMFCC()
+            centroid = sCentroid(range=22050)
+            rms = sRMS()
+            gen.data >> fc.signal
+            fc.frame >> w.frame >> spec.frame
+            fc.frame >> rms.array
+            rms.rms >> (pool, 'rms')
+            spec.spectrum >> mfcc.spectrum
+            spec.spectrum >> centroid.array
+            centroid.centroid >> (pool, 'centroid')
+            mfcc.mfcc >> (pool, 'mfcc')
+            mfcc.bands >> None
+            essentia.run(gen, threads=threads)
+            return pool
+
+        expected = analyze(1)
+        found = analyze(4)
+
+        self.assertEqual(sorted(expected.descriptorNames()), sorted(found.descriptorNames()))
+        self.assertEqualVector(expected['rms'], found['rms'])
+        self.assertEqualVector(expected['centroid'], found['centroid'])
+        self.assertEqualMatrix(expected['mfcc'], found['mfcc'])
+
+    def testComputeErrorInThread(self):
+        def compute():
+            return Spectrum()(array([]))
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            self.assertRaises(RuntimeError, pool.submit(compute).result)
+
+
+suite = allTests(TestThreading)
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=2).run(suite)
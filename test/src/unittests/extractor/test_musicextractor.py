@@ -18,6 +18,10 @@
 # version 3 along with this program. If not, see http://www.gnu.org/licenses/
 
 from essentia_test import *
+import essentia.streaming as es
+import os
+import shutil
+import tempfile
 
 
 class TestMusicExtractor(TestCase):
@@ -55,6 +59,64 @@ class TestMusicExtractor(TestCase):
         self.assertAlmostEqualFixedPrecision(pool['metadata.audio_properties.length'], 45.43, 2)
         self.assertAlmostEqualFixedPrecision(pool['metadata.audio_properties.analysis.length'], 30., 2)
 
+    def loaderDescriptors(self, filename, **loaderParams):
+        # Computes a few descriptors with the loaders that MusicExtractor used
+        # before decoding the audio only once: the replay gain on the
+        # EqloudLoader audio, and the frame descriptors on the EasyLoader
+        # audio normalized with it
+        replayGain = ReplayGain()(EqloudLoader(filename=filename, **loaderParams)())
+
+        loader = es.EasyLoader(filename=filename, replayGain=replayGain, **loaderParams)
+        fc = es.FrameCutter(frameSize=2048, hopSize=1024, silentFrames='keep')
+        w = es.Windowing(type='blackmanharris62', zeroPadding=0)
+        spectrum = es.Spectrum()
+        energy = es.Energy()
+        zcr = es.ZeroCrossingRate()
+        pool = Pool()
+
+        loader.audio >> fc.signal
+        fc.frame >> w.frame >> spectrum.frame
+        spectrum.spectrum >> energy.array
+        energy.energy >> (pool, 'lowlevel.spectral_energy')
+        fc.frame >> zcr.signal
+        zcr.zeroCrossingRate >> (pool, 'lowlevel.zerocrossingrate')
+        run(loader)
+
+        return replayGain, pool
+
+    def assertSameAsLoaders(self, filename, downmix, startTime, endTime):
+        # frames with noise added are random, keep them as they are
+        pool, poolFrames = MusicExtractor(startTime=startTime, endTime=endTime,
+                                          lowlevelSilentFrames='keep')(filename)
+        replayGain, expected = self.loaderDescriptors(filename, downmix=downmix,
+                                                      startTime=startTime, endTime=endTime)
+
+        self.assertAlmostEqual(pool['metadata.audio_properties.replay_gain'], replayGain, 1e-6)
+        for name in expected.descriptorNames():
+            self.assertAlmostEqualVector(poolFrames[name], expected[name], 1e-5)
+
+    def testLoaders(self):
+        # MusicExtractor decodes the audio once and feeds it to the analysis
+        # through the same chain as the loaders, the results must not change
+        inputFilename = join(testdata.audio_dir, 'recorded', 'musicbox.wav')
+        self.assertSameAsLoaders(inputFilename, 'mix', 10, 40)
+
+    def testLoadersLeftChannel(self):
+        # The channels of this file cancel each other out when mixed, so the
+        # replay gain falls back to the left channel, and the file is
+        # decoded again with that downmix
+        audio, sampleRate = AudioLoader(filename=join(testdata.audio_dir, 'recorded', 'musicbox.wav'))()[:2]
+        left, _ = StereoDemuxer()(audio)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'opposite.wav')
+            AudioWriter(filename=filename, format='wav', sampleRate=sampleRate)(StereoMuxer()(left, -left))
+            self.assertTrue(numpy.max(numpy.abs(MonoLoader(filename=filename, downmix='mix')())) < 1e-4)
+
+            self.assertSameAsLoaders(filename, 'left', 10, 40)
+        finally:
+            shutil.rmtree(tmpdir)
+
 
 suite = allTests(TestMusicExtractor)
 
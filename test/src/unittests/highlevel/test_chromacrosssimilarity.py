@@ -58,6 +58,20 @@ class TestChromaCrossSimilarity(TestCase):
         self.assertAlmostEqual(np.mean(self.expected_oti_simmatrix), np.mean(sim_matrix))
         self.assertAlmostEqualMatrix(self.expected_oti_simmatrix, sim_matrix)
 
+    def testOTIBinaryShifts(self):
+        """Test otiBinary=True against a numpy implementation of the OTI of every pair of frames"""
+        rng = np.random.RandomState(0)
+        query = array(rng.rand(20, 12))
+        reference = array(rng.rand(15, 12))
+        expected = np.zeros((len(query), len(reference)))
+        for i in range(len(query)):
+            for j in range(len(reference)):
+                values = [np.dot(query[i], np.roll(reference[j], k)) for k in range(13)]
+                expected[i, j] = np.argmax(values) in (0, 1)
+
+        csm = ChromaCrossSimilarity(otiBinary=True, frameStackSize=1)
+        self.assertEqualMatrix(csm(query, reference), expected)
+
     def testRegressionStreaming(self):
         """Tests streaming ChromaCrossSimilarity algo with 'otiBinary=True' against the standard mode algorithm with 'otiBinary=True' """
         # compute chromacrosssimilarity matrix using streaming mode
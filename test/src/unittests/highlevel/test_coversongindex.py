@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+from essentia_test import *
+from essentia.pytools.cover_index import build_index, CoverSongIndex
+import essentia.pytools.cover_index as cover_index
+from unittest import mock
+import shutil
+import tempfile
+
+
+class TestCoverSongIndex(TestCase):
+    '''Unit tests for the one-to-many cover song search of essentia.pytools.cover_index'''
+
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        rng = numpy.random.RandomState(0)
+        self.query = rng.rand(60, 12).astype(numpy.float32)
+        self.references = [('ref%d' % i, rng.rand(rng.randint(40, 80), 12)) for i in range(20)]
+        # a cover of the query, transposed and with some noise
+        cover = numpy.roll(self.query[5:], 3, axis=1) + 0.1 * rng.rand(55, 12)
+        self.references.insert(7, ('cover', cover))
+
+    def tearDown(self):
+        shutil.rmtree(self.index_dir)
+
+    def testRegression(self):
+        self.assertEqual(build_index(self.index_dir, self.references[:10]), 10)
+        # adding references to an existing index
+        self.assertEqual(build_index(self.index_dir, self.references[10:]), 11)
+
+        index = CoverSongIndex(self.index_dir)
+        self.assertEqual(len(index), 21)
+        self.assertEqual(index.ids[7], 'cover')
+        self.assertAlmostEqualMatrix(index.reference(7), self.references[7][1])
+
+        # the distances are the ones of the pairwise algorithms with oti=True
+        csm = ChromaCrossSimilarity(oti=True)
+        css = CoverSongSimilarity()
+        expected = sorted([(ref_id, css(csm(self.query, array(hpcp)))[1]) for ref_id, hpcp in self.references],
+                          key=lambda x: x[1])
+
+        result = index.query(self.query, top_k=5, prefilter=None, jobs=2)
+        self.assertEqual([ref_id for ref_id, _ in result], [ref_id for ref_id, _ in expected[:5]])
+        self.assertAlmostEqualVector([d for _, d in result], [d for _, d in expected[:5]])
+        self.assertEqual(result[0][0], 'cover')
+
+    def testPrefilter(self):
+        build_index(self.index_dir, self.references)
+        index = CoverSongIndex(self.index_dir)
+
+        indexes, similarities, otis = index.candidates(self.query, 3)
+        self.assertEqual(len(indexes), 3)
+        self.assertEqual(indexes[0], 7)
+        # the cover is transposed 3 semitones up, so its OTI is -3
+        self.assertEqual(otis[0], 9)
+        self.assertTrue(all(numpy.diff(similarities) <= 0))
+
+        results = index.query_batch([self.query, self.references[3][1]], top_k=1, prefilter=3)
+        self.assertEqual(results[0][0][0], 'cover')
+        self.assertEqual(results[1][0][0], 'ref3')
+
+    def testInterruptedBuild(self):
+        build_index(self.index_dir, self.references[:2])
+
+        # interrupt a build before it writes offsets.npy
+        save_npy = cover_index._save_npy
+        def failing_save_npy(filename, array):
+            if filename.endswith('offsets.npy'):
+                raise KeyboardInterrupt()
+            save_npy(filename, array)
+
+        with mock.patch.object(cover_index, '_save_npy', failing_save_npy):
+            self.assertRaises(KeyboardInterrupt, lambda: build_index(self.index_dir, self.references[2:4]))
+
+        # the references of the interrupted build are not in the index
+        index = CoverSongIndex(self.index_dir)
+        self.assertEqual(index.ids, ['ref0', 'ref1'])
+        self.assertEqual(len(index.global_hpcp), 2)
+
+        # and they can be added again
+        self.assertEqual(build_index(self.index_dir, self.references[2:5]), 3)
+        index = CoverSongIndex(self.index_dir)
+        self.assertEqual(index.ids, [ref_id for ref_id, _ in self.references[:5]])
+        self.assertEqual(len(index.offsets), 6)
+        for i in range(5):
+            self.assertAlmostEqualMatrix(index.reference(i), self.references[i][1])
+
+    def testEmptyIndex(self):
+        self.assertEqual(build_index(self.index_dir, []), 0)
+        index = CoverSongIndex(self.index_dir)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(len(index.candidates(self.query)[0]), 0)
+        self.assertEqual(index.query(self.query), [])
+
+        # references can be added to an empty index
+        self.assertEqual(build_index(self.index_dir, self.references[:3]), 3)
+        index = CoverSongIndex(self.index_dir)
+        self.assertEqual(index.global_hpcp.shape, (3, 12))
+        self.assertEqual(len(index.candidates(self.query)[0]), 3)
+
+    def testInvalidReference(self):
+        self.assertRaises(ValueError, lambda: build_index(self.index_dir, [('a', numpy.ones((5, 12))),
+                                                                            ('b', numpy.ones((5, 24)))]))
+        self.assertRaises(ValueError, lambda: build_index(self.index_dir, [('a', numpy.ones((0, 12)))]))
+
+
+suite = allTests(TestCoverSongIndex)
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=2).run(suite)
@@ -63,6 +63,45 @@ class TestCoverSongSimilarity(TestCase):
 
         self.assertAlmostEqualFixedPrecision(self.expected_distance, pool['distance'][-1])
 
+    def referenceScoreMatrix(self, sim, alignment_type, dis_onset=0.5, dis_extension=0.5):
+        '''Straightforward implementation of the smith-waterman recursions described in [2] and [3]'''
+        gamma = lambda value: dis_onset if value == 1 else dis_extension
+        score = numpy.zeros(sim.shape)
+        for i in range(2 if alignment_type == 'serra09' else 3, sim.shape[0]):
+            for j in range(2 if alignment_type == 'serra09' else 3, sim.shape[1]):
+                if alignment_type == 'serra09':
+                    previous = [(score[i-1, j-1], sim[i-1, j-1]), (score[i-2, j-1], sim[i-2, j-1]), (score[i-1, j-2], sim[i-1, j-2])]
+                else:
+                    previous = [(score[i-1, j-1], sim[i-1, j-1]),
+                                (score[i-2, j-1] + sim[i-1, j], sim[i-2, j-1]),
+                                (score[i-1, j-2] + sim[i, j-1], sim[i-1, j-2]),
+                                (score[i-3, j-1] + sim[i-2, j] + sim[i-1, j], sim[i-3, j-1]),
+                                (score[i-1, j-3] + sim[i, j-2] + sim[i, j-1], sim[i-1, j-3])]
+                if sim[i, j] == 1:
+                    score[i, j] = max(s for s, _ in previous) + 1
+                else:
+                    score[i, j] = max([0] + [s - gamma(v) for s, v in previous])
+        return score
+
+    def testOutputScoreMatrix(self):
+        sim_matrix = (numpy.random.RandomState(0).rand(50, 70) > 0.8).astype(numpy.float32)
+        for alignment_type in ['serra09', 'chen17']:
+            expected = self.referenceScoreMatrix(sim_matrix, alignment_type)
+            score_matrix, distance = CoverSongSimilarity(alignmentType=alignment_type)(sim_matrix)
+            self.assertAlmostEqualMatrix(score_matrix, expected)
+            self.assertAlmostEqual(distance, numpy.sqrt(70) / expected.max())
+
+            # only the distance is computed, without keeping the score matrix
+            score_matrix, distance = CoverSongSimilarity(alignmentType=alignment_type, outputScoreMatrix=False,
+                                                         distanceType='symmetric')(sim_matrix)
+            self.assertEqual(len(score_matrix), 0)
+            self.assertAlmostEqual(distance, expected.max())
+
+    def testNonBinary(self):
+        sim_matrix = array(self.sim_matrix)
+        sim_matrix[3, 4] = 2
+        self.assertComputeFails(CoverSongSimilarity(), sim_matrix)
+
 
 suite = allTests(TestCoverSongSimilarity)
 
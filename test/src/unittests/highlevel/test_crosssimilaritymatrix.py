@@ -52,6 +52,29 @@ class TestCrossSimilarityMatrix(TestCase):
         result = csm(self.query_feature, self.reference_feature)
         self.assertAlmostEqualMatrix(self.expected_sim_matrix_binary, result)
 
+    def testZeroSelfDistances(self):
+        # identical stacked frames (9 x 12 = 108 dimensions) should be at a
+        # distance of exactly zero
+        rng = numpy.random.RandomState(0)
+        feature = array(rng.rand(30, 12))
+        csm = CrossSimilarityMatrix(binarize=False, frameStackStride=1, frameStackSize=9)
+        result = csm(feature, feature)
+        self.assertEqualVector(numpy.diag(result), numpy.zeros(len(result)))
+
+    def testBinaryPercentiles(self):
+        # compare with a numpy implementation, with percentiles that fall
+        # exactly on a value (integer ranks) along both axes
+        rng = numpy.random.RandomState(0)
+        query = array(rng.rand(21, 12))
+        reference = array(rng.rand(11, 12))
+        distances = numpy.sqrt(((query[:, None, :].astype(numpy.float64) - reference[None, :, :]) ** 2).sum(axis=2))
+        thresholdQuery = numpy.percentile(distances, 50, axis=1)
+        thresholdReference = numpy.percentile(distances, 50, axis=0)
+        expected = ((distances <= thresholdQuery[:, None]) & (distances <= thresholdReference[None, :])).astype(numpy.float32)
+
+        csm = CrossSimilarityMatrix(binarize=True, binarizePercentile=0.5, frameStackStride=1, frameStackSize=1)
+        self.assertEqualMatrix(csm(query, reference), expected)
+
 
 suite = allTests(TestCrossSimilarityMatrix)
 
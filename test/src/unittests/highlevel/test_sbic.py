@@ -21,6 +21,130 @@
 
 from numpy import array
 from essentia_test import *
+import math
+
+float32 = numpy.float32
+
+
+def _logDet(window):
+    # original per-window log-determinant: the sums of each feature are
+    # accumulated in single precision, frame after frame
+    if window.shape[1] < 1:
+        return float32(0)
+    mp = numpy.cumsum(window, axis=1, dtype=float32)[:, -1]
+    vp = numpy.cumsum(window * window, axis=1, dtype=float32)[:, -1]
+    z = float32(1.0 / float(window.shape[1]))
+    zz = z * z
+    logd = float32(0)
+    for i in range(window.shape[0]):
+        diag_cov = vp[i] * z - mp[i] * mp[i] * zz
+        logd += float32(math.log(diag_cov)) if float(diag_cov) > 1e-5 else float32(-5)
+    return logd
+
+
+def _bicChangeSearch(window, inc, current, cp, cpw):
+    nFrames = window.shape[1]
+    penalty = cpw * cp * float32(math.log(float32(nFrames)))
+    dmin = float32(numpy.finfo(float32).max)
+    seg = 0
+    shift = inc - 1
+    s = _logDet(window)
+    while shift < nFrames - inc:
+        n1 = shift + 1
+        s1 = _logDet(window[:, :shift + 1])
+        n2 = nFrames - n1
+        s2 = _logDet(window[:, shift + 1:])
+        d = float32(0.5) * (float32(n1) * s1 + float32(n2) * s2 - float32(nFrames) * s + penalty)
+        if d < dmin:
+            seg = shift
+            dmin = d
+        shift += inc
+    if dmin > 0:
+        return 0
+    return current + seg
+
+
+def _deltaBic(window, segPoint, cp, cpw):
+    nFrames = window.shape[1]
+    s = _logDet(window)
+    s1 = _logDet(window[:, :int(segPoint) + 1])
+    s2 = _logDet(window[:, int(segPoint + 1):])
+    return float32(0.5) * (segPoint * s1 + (float32(nFrames) - segPoint) * s2 - float32(nFrames) * s +
+                           cpw * cp * float32(math.log(float32(nFrames))))
+
+
+def sbicOriginal(features, size1=300, inc1=60, size2=200, inc2=20, cpw=1.5, minLength=10):
+    # Python port of the original SBic, which copied every window and summed
+    # it again for each candidate split point. Used as a reference to check
+    # that the segmentation does not change
+    features = numpy.asarray(features, dtype=float32)
+    nFeatures, nFrames = features.shape
+    cpw = float32(cpw)
+    if nFrames <= minLength - 1:
+        return [0, nFrames - 1]
+    cp = float32(2 * nFeatures)
+    segmentation = []
+
+    # first pass - coarse segmentation
+    currSeg = 0
+    endSeg = -1
+    while endSeg < nFrames - 1:
+        endSeg = min(endSeg + size1, nFrames - 1)
+        i = _bicChangeSearch(features[:, currSeg:endSeg + 1], inc1, currSeg, cp, cpw)
+        if i:
+            segmentation.append(i)
+            currSeg = i + inc1
+            endSeg = currSeg - 1
+
+    # second pass - fine segmentation
+    halfSize = size2 // 2
+    currIdx = 0
+    while currIdx < len(segmentation):
+        currSeg = max(int(segmentation[currIdx] - halfSize), 0)
+        endSeg = min(currSeg + size2 - 1, nFrames - 1)
+        i = _bicChangeSearch(features[:, currSeg:endSeg + 1], inc2, currSeg, cp, cpw)
+        if i:
+            prevSeg = 0 if currIdx == 0 else segmentation[currIdx - 1]
+            nextSeg = nFrames - 1 if currIdx + 1 >= len(segmentation) else segmentation[currIdx + 1]
+            if prevSeg <= i <= nextSeg:
+                segmentation[currIdx] = i
+            else:
+                del segmentation[currIdx]
+                currIdx -= 1
+        currIdx += 1
+
+    # third pass - segment validation
+    segmentation = [0] + segmentation + [nFrames - 1]
+    if len(segmentation) == 2:
+        return segmentation
+    while len(segmentation) > 1 and segmentation[1] < minLength:
+        del segmentation[1]
+    i = 2
+    while i < len(segmentation) - 1:
+        if segmentation[i] - segmentation[i - 1] < minLength:
+            if segmentation[i - 1] - segmentation[i - 2] <= segmentation[i + 1] - segmentation[i]:
+                del segmentation[i - 1]
+            else:
+                del segmentation[i]
+            i -= 1
+        i += 1
+    if len(segmentation) > 2 and segmentation[-1] - segmentation[-2] < minLength:
+        del segmentation[-2]
+
+    currSeg = 0
+    i = 1
+    while i < len(segmentation) - 1:
+        endSeg = segmentation[i + 1]
+        if _deltaBic(features[:, currSeg:endSeg + 1], float32(segmentation[i] - segmentation[i - 1]), cp, cpw) > 0:
+            del segmentation[i]
+            continue
+        currSeg = segmentation[i] + 1
+        i += 1
+    # in case the end of the file was erased
+    if segmentation[-1] != nFrames - 1:
+        segmentation.append(nFrames - 1)
+    return segmentation
+
 
 class TestSBic(TestCase):
 
@@ -147,12 +271,74 @@ class TestSBic(TestCase):
             features_transpose.append(featureVals)
 
         features_transpose = array(features_transpose)
-        segments = SBic(cpw=1.5, size1=1000, inc1=300, size2=600, inc2=50)(features_transpose)
+        segments = SBic(cpw=1.5, size1=1000, inc1=300, size2=600, inc2=50,
+                        cumulativeSums=False)(features_transpose)
         # The expected values were recomputed from commit
-        # 68548001e93c094537b7364c99e63c5402fdf744
+        # 68548001e93c094537b7364c99e63c5402fdf744, which summed every window
+        # in single precision
         expected = [0., 49., 997., 1746., 2895., 3344., 3943., 4196.]
         self.assertEqualVector(segments, expected)
 
+    def piecewiseFeatures(self):
+        # three segments of gaussian noise with different means and variances
+        rng = numpy.random.RandomState(0)
+        return array(numpy.concatenate([rng.randn(4, 400) * std + mean for mean, std in [(0, 1), (5, 2), (-3, 0.5)]], axis=1))
+
+    def offsetFeatures(self, seed):
+        # MFCC-like features: three segments with a large offset on the first
+        # coefficient (as c0 usually has)
+        rng = numpy.random.RandomState(seed)
+        segments = []
+        for n in [300, 250, 350]:
+            mean = rng.randn(13, 1) * 5
+            mean[0] -= 600
+            std = rng.uniform(0.5, 3, (13, 1))
+            segments.append(rng.randn(13, n) * std + mean)
+        return array(numpy.concatenate(segments, axis=1))
+
+    def testPiecewiseStationary(self):
+        features = self.piecewiseFeatures()
+
+        # The expected values were computed with the original implementation,
+        # and are the same with the cumulative sums
+        self.assertEqualVector(SBic()(features), [0, 398, 817, 1199])
+        self.assertEqualVector(SBic(size1=200, inc1=20, size2=100, inc2=5)(features), [0, 398, 802, 1199])
+
+    def testLargeOffset(self):
+        features = self.offsetFeatures(0)
+
+        # The expected values were computed with the original implementation,
+        # and are the same with the cumulative sums
+        self.assertEqualVector(SBic()(features), [0, 298, 557, 899])
+        self.assertEqualVector(SBic(size1=200, inc1=20, size2=100, inc2=5)(features), [0, 298, 552, 899])
+
+    def testOriginalAlgorithm(self):
+        # Without cumulativeSums, the sums of the windows are accumulated in
+        # single precision in the same order as the original implementation,
+        # so that the segmentation is exactly the same, even for features
+        # with a large offset
+        fixtures = [self.piecewiseFeatures()] + [self.offsetFeatures(seed) for seed in [0, 3, 7, 13, 24]]
+        fixtures.append(array([[1] * 200 + [0] * 200] * 2))
+
+        for features in fixtures:
+            for params in [{}, {'size1': 200, 'inc1': 20, 'size2': 100, 'inc2': 5}]:
+                self.assertEqualVector(SBic(cumulativeSums=False, **params)(features), sbicOriginal(features, **params))
+
+    def testCumulativeSums(self):
+        fixtures = [self.piecewiseFeatures(), self.offsetFeatures(0), array([[1] * 200 + [0] * 200] * 2)]
+
+        for features in fixtures:
+            for params in [{}, {'size1': 200, 'inc1': 20, 'size2': 100, 'inc2': 5}]:
+                self.assertEqualVector(SBic(**params)(features), SBic(cumulativeSums=False, **params)(features))
+
+        # The single precision sums of the original implementation find a
+        # spurious change at the beginning of this one, because of the
+        # large offset of the first coefficient
+        features = self.offsetFeatures(3)
+        params = {'size1': 200, 'inc1': 20, 'size2': 100, 'inc2': 5}
+        self.assertEqualVector(SBic(**params)(features), [0, 298, 547, 899])
+        self.assertEqualVector(SBic(cumulativeSums=False, **params)(features), [0, 59, 296, 550, 899])
+
     def atestMinLengthEqualToAudioFrames(self):
         audio = MonoLoader(filename = join(testdata.audio_dir, 'recorded',\
                            'britney.wav'),
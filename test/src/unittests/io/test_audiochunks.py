@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+
+from essentia_test import *
+
+
+class TestAudioChunks(TestCase):
+
+    filename = join(testdata.audio_dir, 'recorded', 'cat_purrrr.wav')
+
+    def testMatchesMonoLoader(self):
+        for sampleRate in (44100, 16000):
+            audio = MonoLoader(filename=self.filename, sampleRate=sampleRate)()
+            chunks = list(AudioChunks(self.filename, chunkSize=10000, sampleRate=sampleRate))
+
+            for chunk in chunks:
+                self.assertEqual(chunk.dtype, numpy.float32)
+                self.assertEqual(len(chunk), 10000)
+
+            # the chunks cover the whole signal and the last one is zero-padded
+            self.assertEqual(len(chunks), (len(audio) + 9999) // 10000)
+            found = numpy.concatenate(chunks)
+            self.assertAlmostEqualVector(found[:len(audio)], audio)
+            self.assertEqualVector(found[len(audio):], numpy.zeros(len(found) - len(audio)))
+
+    def testOverlap(self):
+        audio = MonoLoader(filename=self.filename)()
+        chunkSize, hopSize = 8192, 2048
+
+        for i, chunk in enumerate(AudioChunks(self.filename, chunkSize=chunkSize, hopSize=hopSize)):
+            expected = audio[i * hopSize:i * hopSize + chunkSize]
+            self.assertAlmostEqualVector(chunk[:len(expected)], expected)
+
+        self.assertTrue((i + 1) * hopSize >= len(audio) - chunkSize)
+
+    def testEarlyStop(self):
+        # the generator can be abandoned before the end of the file
+        chunks = AudioChunks(self.filename, chunkSize=1024)
+        for i, chunk in enumerate(chunks):
+            if i == 2: break
+
+        self.assertEqual(len(next(iter(chunks))), 1024)
+
+    def testInvalidParam(self):
+        self.assertRaises(ValueError, AudioChunks, self.filename, chunkSize=0)
+        self.assertRaises(ValueError, AudioChunks, self.filename, hopSize=-1)
+
+    def testInvalidFile(self):
+        self.assertRaises(EssentiaException, lambda: list(AudioChunks('unknown.wav')))
+
+
+suite = allTests(TestAudioChunks)
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=2).run(suite)
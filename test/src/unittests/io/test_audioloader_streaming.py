@@ -266,6 +266,35 @@ class TestAudioLoader_Streaming(TestCase):
         # An exception should be thrown if the required audioStream is out of bounds
         self.assertConfigureFails(sAudioLoader(), {'filename': join(testdata.audio_dir, 'generated', 'multistream', 'multistream1.mka'), 'audioStream': 2})
 
+    def testSlice(self):
+        # the slice obtained by seeking should be exactly the same as the
+        # corresponding part of the whole file for formats with exact timestamps
+        from essentia.standard import AudioLoader as stdAudioLoader
+        dir = join(testdata.audio_dir, 'recorded')
+        for filename in ['dubstep.wav', 'dubstep.flac']:
+            audio, sr, _, _, _, _ = stdAudioLoader(filename=join(dir, filename))()
+            for startTime, endTime in [(0., 1.5), (2.3, 3.), (4.1, -1)]:
+                slice, _, _, _, _, _ = stdAudioLoader(filename=join(dir, filename),
+                                                      startTime=startTime,
+                                                      endTime=endTime)()
+                start = int(startTime * sr + 0.5)
+                end = int(endTime * sr + 0.5) if endTime >= 0 else len(audio)
+                self.assertEqualMatrix(slice, audio[start:end])
+
+    def testSliceMD5(self):
+        # the checksum is always computed over the whole payload
+        from essentia.standard import AudioLoader as stdAudioLoader
+        filename = join(testdata.audio_dir, 'recorded', 'dubstep.wav')
+        _, _, _, md5, _, _ = stdAudioLoader(filename=filename, computeMD5=True,
+                                            startTime=1., endTime=2.)()
+        self.assertEqual(md5, "bf0f4d0613fab0fa5268ece9b043c441")
+
+    def testInvalidSlice(self):
+        filename = join(testdata.audio_dir, 'recorded', 'dubstep.wav')
+        self.assertConfigureFails(sAudioLoader(), {'filename': filename, 'startTime': -1})
+        self.assertConfigureFails(sAudioLoader(), {'filename': filename, 'startTime': 2, 'endTime': 1})
+        self.assertConfigureFails(sAudioLoader(), {'filename': filename, 'endTime': -2})
+
 
 suite = allTests(TestAudioLoader_Streaming)
 
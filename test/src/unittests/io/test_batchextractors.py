@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+from essentia_test import *
+from essentia.pytools.batch_extractors import _batch_extractor, _run_workers, _parse_shard, _in_shard
+from essentia.pytools.io import atomic_output
+import json
+import os
+import shutil
+import tempfile
+import time
+
+
+def stubExtractor(go_file=None):
+    # Analysis function built once per worker process, in place of
+    # MusicExtractor. The files are not read, their names tell what to do
+    def extractor(audio_file, out_file):
+        name = os.path.basename(audio_file)
+        if name.startswith('bad'):
+            raise ValueError('cannot analyze ' + name)
+        if name.startswith('crash'):
+            os._exit(1)
+        if name.startswith('slow'):
+            # wait until the results of the other files have been received
+            start = time.time()
+            while not os.path.exists(go_file):
+                if time.time() - start > 30:
+                    raise RuntimeError('the results of the other files were not received')
+                time.sleep(0.01)
+        with open(out_file + '.sig', 'w') as f:
+            f.write(name)
+
+    return extractor
+
+
+class TestBatchExtractors(TestCase):
+    '''Unit tests for the worker processes, shards and manifests of
+    essentia.pytools.batch_extractors'''
+
+    def setUp(self):
+        self.audio_dir = tempfile.mkdtemp()
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.audio_dir)
+        shutil.rmtree(self.output_dir)
+
+    def writeAudioFiles(self, names):
+        # empty files, the stub extractor does not read them
+        for name in names:
+            open(os.path.join(self.audio_dir, name), 'w').close()
+
+    def batchExtractor(self, **kwargs):
+        _batch_extractor(self.audio_dir, self.output_dir, None, 'sig', jobs=2, verbose=False,
+                         worker=(stubExtractor, {}), **kwargs)
+
+    def readOutput(self, name):
+        with open(os.path.join(self.output_dir, name)) as f:
+            return f.read()
+
+    def testCompletionOrder(self):
+        go_file = os.path.join(self.output_dir, 'go')
+        jobs_list = [(os.path.join(self.audio_dir, name), os.path.join(self.output_dir, name))
+                     for name in ['slow.wav', 'fast0.wav', 'fast1.wav', 'fast2.wav']]
+
+        # the slow file only finishes once the results of the fast ones have
+        # been received, which only happens if they are yielded as they finish
+        results = []
+        for result in _run_workers(jobs_list, 2, (stubExtractor, {'go_file': go_file}), verbose=False):
+            results.append(result)
+            if len(results) == 3:
+                open(go_file, 'w').close()
+
+        self.assertEqual([os.path.basename(r[1]) for r in results],
+                         ['fast0.wav', 'fast1.wav', 'fast2.wav', 'slow.wav'])
+
+        for rc, audio_file, out_file, _, err, elapsed in results:
+            self.assertEqual((rc, err), (0, ''))
+            self.assertTrue(elapsed >= 0)
+            with open(out_file + '.sig') as f:
+                self.assertEqual(f.read(), os.path.basename(audio_file))
+
+    def testErrors(self):
+        self.writeAudioFiles(['good0.wav', 'good1.wav', 'bad.wav', 'notes.txt'])
+        self.batchExtractor()
+        log = self.readOutput('log')
+
+        summary = ("Analysis done for 3 files. 1 files have been skipped due to errors, "
+                   "2 were successfully processed and 0 already existed.\n")
+        self.assertTrue(log.startswith(summary))
+
+        # the traceback of the worker is in the log
+        bad_file = os.path.join(self.audio_dir, 'bad.wav')
+        self.assertTrue('"{}" failed'.format(bad_file) in log)
+        self.assertTrue('ValueError: cannot analyze bad.wav' in log)
+        for name in ['good0.wav', 'good1.wav']:
+            self.assertTrue('"{}" ok!'.format(os.path.join(self.audio_dir, name)) in log)
+
+        self.assertEqual(sorted(f for f in os.listdir(self.output_dir) if f.endswith('.sig')),
+                         ['good0.wav.sig', 'good1.wav.sig'])
+
+    def testCrash(self):
+        # a worker that dies fails its file and all the pending ones, but the
+        # analysis finishes with a log
+        self.writeAudioFiles(['crash.wav', 'good.wav'])
+        self.batchExtractor()
+        log = self.readOutput('log')
+
+        self.assertTrue(log.startswith('Analysis done for 2 files.'))
+        self.assertTrue('"{}" failed'.format(os.path.join(self.audio_dir, 'crash.wav')) in log)
+        self.assertTrue('terminated abruptly' in log)
+
+    def testParseShard(self):
+        self.assertEqual(_parse_shard('0/1'), (0, 1))
+        self.assertEqual(_parse_shard('3/4'), (3, 4))
+        self.assertEqual(_parse_shard((1, 2)), (1, 2))
+
+        for shard in ['4/4', '-1/4', '1/0', '1', '1/2/3', 'a/b', '', '1/', (2, 2), (0,)]:
+            self.assertRaises(EssentiaError, _parse_shard, shard)
+
+    def testShards(self):
+        files = [os.path.join('folder%d' % (i % 7), 'track%d.mp3' % i) for i in range(1000)]
+
+        for count in [1, 2, 3, 8]:
+            shards = [[f for f in files if _in_shard(f, (index, count))] for index in range(count)]
+
+            # each file is in exactly one shard
+            self.assertEqual(sorted(sum(shards, [])), sorted(files))
+            if count > 1:
+                for shard in shards:
+                    self.assertTrue(0 < len(shard) < len(files))
+
+    def testShardedAnalysis(self):
+        names = ['track%d.wav' % i for i in range(20)]
+        self.writeAudioFiles(names)
+
+        analyzed = []
+        for index in range(3):
+            self.batchExtractor(shard='{}/3'.format(index))
+            manifest = self.readOutput('manifest.{}-of-3.jsonl'.format(index))
+            analyzed += [os.path.basename(json.loads(line)['audio_file']) for line in manifest.splitlines()]
+            self.assertTrue(self.readOutput('log.{}-of-3'.format(index)).startswith('Analysis done'))
+
+        self.assertEqual(sorted(analyzed), sorted(names))
+
+    def testManifest(self):
+        self.writeAudioFiles(['good0.wav', 'good1.wav', 'bad.wav'])
+        self.batchExtractor()
+
+        entries = [json.loads(line) for line in self.readOutput('manifest.jsonl').splitlines()]
+
+        # one line per finished file
+        self.assertEqual(sorted(os.path.basename(e['audio_file']) for e in entries),
+                         ['bad.wav', 'good0.wav', 'good1.wav'])
+
+        for entry in entries:
+            name = os.path.basename(entry['audio_file'])
+            self.assertEqual(entry['out_file'], os.path.join(self.output_dir, name))
+            self.assertTrue(entry['time'] >= 0)
+            if name == 'bad.wav':
+                self.assertEqual(entry['status'], 'failed')
+                self.assertTrue('ValueError: cannot analyze bad.wav' in entry['error'])
+            else:
+                self.assertEqual(entry['status'], 'ok')
+                self.assertEqual(entry['error'], '')
+
+        # resumed analyses append to the manifest
+        self.batchExtractor(skip_analyzed=True)
+        entries = [json.loads(line) for line in self.readOutput('manifest.jsonl').splitlines()]
+        self.assertEqual(len(entries), 4)
+        self.assertEqual(os.path.basename(entries[-1]['audio_file']), 'bad.wav')
+
+        self.batchExtractor(manifest=False)
+        self.assertEqual(len(self.readOutput('manifest.jsonl').splitlines()), 4)
+
+    def testAtomicOutput(self):
+        filename = os.path.join(self.output_dir, 'out.txt')
+
+        with atomic_output(filename) as tmp_file:
+            with open(tmp_file, 'w') as f:
+                f.write('done')
+            self.assertFalse(os.path.exists(filename))
+        self.assertEqual(self.readOutput('out.txt'), 'done')
+
+        # the output is neither written nor overwritten if the block raises,
+        # and the temporary file is removed
+        def write(filename, text):
+            with atomic_output(filename) as tmp_file:
+                with open(tmp_file, 'w') as f:
+                    f.write(text)
+                raise ValueError('interrupted')
+
+        self.assertRaises(ValueError, write, os.path.join(self.output_dir, 'failed.txt'), 'partial')
+        self.assertRaises(ValueError, write, filename, 'partial')
+
+        self.assertEqual(os.listdir(self.output_dir), ['out.txt'])
+        self.assertEqual(self.readOutput('out.txt'), 'done')
+
+
+suite = allTests(TestBatchExtractors)
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+from essentia_test import *
+from essentia.pytools.dataset import export_dataset, load_dataset, exported_files
+import os
+import shutil
+import tempfile
+
+
+class TestDataset(TestCase):
+    '''Unit tests for the columnar datasets of essentia.pytools.dataset'''
+
+    def setUp(self):
+        self.sig_dir = tempfile.mkdtemp()
+        self.dataset_dir = os.path.join(tempfile.mkdtemp(), 'dataset')
+
+    def tearDown(self):
+        shutil.rmtree(self.sig_dir)
+        shutil.rmtree(os.path.dirname(self.dataset_dir))
+
+    def writeSig(self, name, i, beats=True, fmt='json'):
+        # descriptors as written by MusicExtractor: numbers, fixed-size
+        # vectors, vectors of different sizes and strings
+        p = Pool()
+        p.set('lowlevel.loudness', float(i))
+        p.set('tonal.hpcp.mean', numpy.arange(12, dtype=numpy.float32) + i)
+        p.set('tonal.key', 'ABCDEFG'[i % 7])
+        if beats:
+            p.set('rhythm.beats_position', numpy.arange(i + 1, dtype=numpy.float32))
+        YamlOutput(filename=os.path.join(self.sig_dir, name + '.sig'), format=fmt)(p)
+
+    def testColumns(self):
+        for i in range(5):
+            self.writeSig('track%d' % i, i, beats=(i != 2), fmt='yaml' if i % 2 else 'json')
+        # frames files are not exported
+        self.writeSig('track0.frames', 0)
+
+        self.assertEqual(export_dataset(self.sig_dir, self.dataset_dir, jobs=2, part_size=3, verbose=False), 5)
+        files, columns = load_dataset(self.dataset_dir)
+
+        self.assertEqual(sorted(files), ['track%d.sig' % i for i in range(5)])
+        order = [int(f[5]) for f in files]
+
+        # dense columns have a row per file
+        self.assertEqualVector(columns['lowlevel.loudness'], order)
+        self.assertEqual(columns['tonal.hpcp.mean'].shape, (5, 12))
+        self.assertEqualVector(columns['tonal.hpcp.mean'][:, 0], order)
+
+        # strings
+        self.assertEqual(list(columns['tonal.key']), ['ABCDEFG'[i] for i in order])
+
+        # ragged columns are lists, with None where the descriptor is missing
+        beats = columns['rhythm.beats_position']
+        self.assertEqual(len(beats), 5)
+        for i, value in zip(order, beats):
+            if i == 2:
+                self.assertEqual(value, None)
+            else:
+                self.assertEqualVector(value, numpy.arange(i + 1))
+
+        _, columns = load_dataset(self.dataset_dir, include=['tonal.*'], ignore=['tonal.key'])
+        self.assertEqual(list(columns.keys()), ['tonal.hpcp.mean'])
+
+    def testMissingDense(self):
+        # missing values of dense columns are NaN (or empty strings)
+        self.writeSig('a', 1)
+        p = Pool()
+        p.set('lowlevel.loudness', 2.)
+        YamlOutput(filename=os.path.join(self.sig_dir, 'b.sig'), format='json')(p)
+
+        export_dataset(self.sig_dir, self.dataset_dir, jobs=1, verbose=False)
+        files, columns = load_dataset(self.dataset_dir)
+        self.assertEqual(files, ['a.sig', 'b.sig'])
+        self.assertEqualVector(columns['lowlevel.loudness'], [1, 2])
+        self.assertEqualVector(columns['tonal.hpcp.mean'][0], numpy.arange(12) + 1)
+        self.assertTrue(numpy.isnan(columns['tonal.hpcp.mean'][1]).all())
+        self.assertEqual(list(columns['tonal.key']), ['B', ''])
+        # a ragged column with a single value per part is stored as a dense one
+        self.assertEqualVector(columns['rhythm.beats_position'][0], [0, 1])
+        self.assertTrue(numpy.isnan(columns['rhythm.beats_position'][1]).all())
+
+    def testIncrementalExport(self):
+        for i in range(3):
+            self.writeSig('track%d' % i, i)
+        self.assertEqual(export_dataset(self.sig_dir, self.dataset_dir, jobs=1, verbose=False), 3)
+
+        # only the new files are exported, to a new part
+        for i in range(3, 5):
+            self.writeSig('track%d' % i, i, beats=(i == 3))
+        self.assertEqual(export_dataset(self.sig_dir, self.dataset_dir, jobs=1, verbose=False), 2)
+        self.assertEqual(export_dataset(self.sig_dir, self.dataset_dir, jobs=1, verbose=False), 0)
+        self.assertEqual(sorted(exported_files(self.dataset_dir)), ['track%d.sig' % i for i in range(5)])
+
+        files, columns = load_dataset(self.dataset_dir)
+        self.assertEqual(len(files), 5)
+        self.assertEqual(len(columns['lowlevel.loudness']), 5)
+        # the second part only has this descriptor for one of the files, as
+        # a single array, but it is still None for the other one in the list
+        beats = columns['rhythm.beats_position']
+        self.assertEqual([value is None for value in beats], [f == 'track4.sig' for f in files])
+        self.assertEqualVector(beats[files.index('track3.sig')], numpy.arange(4))
+
+        # no file has this descriptor in the third part
+        for i in range(5, 7):
+            self.writeSig('track%d' % i, i, beats=False)
+        self.assertEqual(export_dataset(self.sig_dir, self.dataset_dir, jobs=1, verbose=False), 2)
+        files, columns = load_dataset(self.dataset_dir)
+        beats = columns['rhythm.beats_position']
+        self.assertEqual([value is None for value in beats], [int(f[5]) >= 4 for f in files])
+
+    def testRemovedPart(self):
+        for i in range(3):
+            self.writeSig('track%d' % i, i)
+        self.assertEqual(export_dataset(self.sig_dir, self.dataset_dir, jobs=1, part_size=1, verbose=False), 3)
+        self.assertEqual(sorted(os.listdir(self.dataset_dir)), ['part-%05d.npz' % i for i in range(3)])
+
+        # the files of a removed part are exported again to a new part,
+        # without overwriting the last one
+        removed = load_dataset(self.dataset_dir)[0][0]
+        os.remove(os.path.join(self.dataset_dir, 'part-00000.npz'))
+        self.writeSig('track3', 3)
+        self.assertEqual(export_dataset(self.sig_dir, self.dataset_dir, jobs=1, part_size=1, verbose=False), 2)
+
+        self.assertEqual(sorted(os.listdir(self.dataset_dir)), ['part-%05d.npz' % i for i in range(1, 5)])
+        self.assertEqual(sorted(exported_files(self.dataset_dir)), ['track%d.sig' % i for i in range(4)])
+        self.assertTrue(removed in load_dataset(self.dataset_dir)[0][2:])
+
+    def testUnreadableFile(self):
+        self.writeSig('a', 0)
+        with open(os.path.join(self.sig_dir, 'b.sig'), 'w') as f:
+            f.write('{ not json')
+        self.writeSig('c', 2)
+
+        self.assertEqual(export_dataset(self.sig_dir, self.dataset_dir, jobs=1, verbose=False), 2)
+        files, columns = load_dataset(self.dataset_dir)
+        self.assertEqual(files, ['a.sig', 'c.sig'])
+        self.assertEqualVector(columns['lowlevel.loudness'], [0, 2])
+
+
+suite = allTests(TestDataset)
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+
+
+from essentia_test import *
+from essentia.pytools.io import NpzPool, save_pool_npz, load_pool_npz
+import os
+import tempfile
+
+
+class TestNpzInput(TestCase):
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix='.npz')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def testNumpySavez(self):
+        # the types are deduced from the arrays
+        numpy.savez(self.filename, real=numpy.float64(1.5), reals=[1, 2, 3],
+                    frames=numpy.ones((4, 2)), matrices=numpy.zeros((2, 3, 3)),
+                    name=numpy.bytes_('foo'), names=numpy.array([b'a', b'bc']))
+        p = NpzInput(filename=self.filename)()
+        self.assertEqual(p['real'], 1.5)
+        self.assertEqualVector(p['reals'], [1, 2, 3])
+        self.assertEqualMatrix(p['frames'], numpy.ones((4, 2)))
+        self.assertEqual(len(p['matrices']), 2)
+        self.assertEqualMatrix(p['matrices'][1], numpy.zeros((3, 3)))
+        self.assertEqual(p['name'], 'foo')
+        self.assertEqual(p['names'], ['a', 'bc'])
+
+    def testNumpySavezCompressed(self):
+        numpy.savez_compressed(self.filename, frames=numpy.arange(10.).reshape(5, 2))
+        p = NpzInput(filename=self.filename)()
+        self.assertEqualMatrix(p['frames'], numpy.arange(10.).reshape(5, 2))
+
+    def testDescriptorNames(self):
+        p = Pool()
+        p.add('a', 1.)
+        p.add('b.c', [1., 2.])
+        p.add('b.c', [3.])
+        save_pool_npz(p, self.filename)
+        result = load_pool_npz(self.filename, ['b.c'])
+        self.assertEqual(result.descriptorNames(), ['b.c'])
+        self.assertEqualVector(result['b.c'][1], [3.])
+        self.assertRaises(RuntimeError, lambda: load_pool_npz(self.filename, ['missing']))
+
+    def testNpzPool(self):
+        p = Pool()
+        p.set('single', 2.)
+        p.set('label', 'rock')
+        p.add('frames', [1., 2.])
+        p.add('frames', [3., 4.])
+        p.add('ragged', [1., 2.])
+        p.add('ragged', [3.])
+        p.add('strings', ['a', 'b'])
+        p.add('strings', ['c'])
+        save_pool_npz(p, self.filename)
+
+        with NpzPool(self.filename) as data:
+            self.assertEqual(sorted(data.keys()), ['frames', 'label', 'ragged', 'single', 'strings'])
+            self.assertEqual(data['single'], 2.)
+            self.assertEqual(data['label'], 'rock')
+            # stored descriptors are memory-mapped
+            self.assertTrue(isinstance(data['frames'], numpy.memmap))
+            self.assertEqualMatrix(data['frames'], [[1, 2], [3, 4]])
+            self.assertEqual(len(data['ragged']), 2)
+            self.assertEqualVector(data['ragged'][0], [1, 2])
+            self.assertEqualVector(data['ragged'][1], [3])
+            self.assertEqual(data['strings'], [['a', 'b'], ['c']])
+            self.assertRaises(KeyError, lambda: data['missing'])
+
+    def testNpzPoolCompressed(self):
+        p = Pool()
+        p.add('frames', [1., 2.])
+        save_pool_npz(p, self.filename, compress=True)
+        with NpzPool(self.filename) as data:
+            self.assertFalse(isinstance(data['frames'], numpy.memmap))
+            self.assertEqualMatrix(data['frames'], [[1, 2]])
+
+    def testInvalidFile(self):
+        self.assertRaises(RuntimeError, lambda: NpzInput(filename='unknown.npz')())
+        with open(self.filename, 'w') as f:
+            f.write('not a zip file')
+        self.assertRaises(RuntimeError, lambda: NpzInput(filename=self.filename)())
+
+
+suite = allTests(TestNpzInput)
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2006-2021  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+
+
+from essentia_test import *
+import os
+import tempfile
+
+
+def createPool():
+    p = Pool()
+    p.set('single.real', 3.5)
+    p.set('single.string', 'essentia')
+    p.set('single.vector_real', [1., 2., 3.])
+    p.add('real', 1.)
+    p.add('real', -2.)
+    p.add('string', 'foo')
+    p.add('string', 'barbaz')
+    p.add('frames.regular', [1., 2., 3.])
+    p.add('frames.regular', [4., 5., 6.])
+    p.add('frames.ragged', [1., 2.])
+    p.add('frames.ragged', [3., 4., 5.])
+    p.add('frames.ragged', [])
+    p.add('vector_string', ['a', 'b'])
+    p.add('vector_string', ['c'])
+    p.add('matrix', array([[1., 2.], [3., 4.]]))
+    p.add('matrix', array([[5., 6., 7.]]))
+    p.add('stereo', (1., 2.))
+    p.add('stereo', (3., 4.))
+    return p
+
+
+def flatten(value):
+    # all the values of a descriptor, with the size of each nested item
+    if isinstance(value, str):
+        return [value]
+    if numpy.isscalar(value):
+        return [float(value)]
+    result = [len(value)]
+    for item in value:
+        result += flatten(item)
+    return result
+
+
+class TestNpzOutput(TestCase):
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix='.npz')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def assertEqualPools(self, p1, p2):
+        self.assertEqual(sorted(p1.descriptorNames()), sorted(p2.descriptorNames()))
+        for name in p1.descriptorNames():
+            self.assertEqual(flatten(p1[name]), flatten(p2[name]))
+
+    def testRoundTrip(self):
+        p = createPool()
+        NpzOutput(filename=self.filename)(p)
+        self.assertEqualPools(NpzInput(filename=self.filename)(), p)
+
+    def testCompress(self):
+        p = createPool()
+        NpzOutput(filename=self.filename, compress=True)(p)
+        self.assertEqualPools(NpzInput(filename=self.filename)(), p)
+
+    def testNumpyLoad(self):
+        # the file is a regular .npz file, which can be read with numpy
+        NpzOutput(filename=self.filename)(createPool())
+        data = numpy.load(self.filename)
+        self.assertEqual(data['single.real'].dtype, numpy.float32)
+        self.assertEqual(data['single.real'].shape, ())
+        self.assertEqualMatrix(data['frames.regular'], [[1, 2, 3], [4, 5, 6]])
+        self.assertEqualVector(data['frames.ragged'], [1, 2, 3, 4, 5])
+        self.assertEqualMatrix(data['__shapes__/frames.ragged'], [[2], [3], [0]])
+        self.assertEqualVector(data['string'], [b'foo', b'barbaz'])
+        self.assertEqualMatrix(data['stereo'], [[1, 2], [3, 4]])
+        self.assertTrue([b'frames.regular', b'VectorReal'] in data['__types__'].tolist())
+
+    def testTensors(self):
+        p = Pool()
+        tensor = numpy.arange(24, dtype='float32').reshape(1, 2, 3, 4)
+        p.set('single.tensor', tensor)
+        p.add('tensor', tensor)
+        p.add('tensor', tensor + 1)
+        NpzOutput(filename=self.filename)(p)
+        result = NpzInput(filename=self.filename)()
+        self.assertEqualVector(result['single.tensor'].flatten(), tensor.flatten())
+        self.assertEqualVector(numpy.array(result['tensor']).flatten(),
+                               numpy.array([tensor, tensor + 1]).flatten())
+
+    def testEmptyPool(self):
+        NpzOutput(filename=self.filename)(Pool())
+        self.assertEqual(NpzInput(filename=self.filename)().descriptorNames(), [])
+
+    def testInvalidFile(self):
+        self.assertRaises(RuntimeError, lambda: NpzOutput(filename=''))
+        self.assertRaises(RuntimeError, lambda: NpzOutput(filename='/nonexistent/dir/file.npz')(Pool()))
+
+
+suite = allTests(TestNpzOutput)
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=2).run(suite)
@@ -379,6 +379,48 @@ stereosample: [{left: 3, right: 6}, {left: -1, right: 2}]
         # Also assert that the array was correctly written
         self.assertEqual([1], actual['array'])
 
+    def testShortestFloats(self):
+        p = Pool()
+        p.add('rational', 0.1)
+        p.add('rational', -3.145)
+        p.add('rational', 1/3.)
+        p.set('big', 1.5e30)
+
+        YamlOutput(filename='test.yaml', writeVersion=False)(p)
+        self.assertEqual(getYaml('test.yaml'), '''
+big: 1.49999994701e+30
+
+rational: [0.10000000149, -3.14499998093, 0.333333343267]
+''')
+
+        YamlOutput(filename='test.yaml', writeVersion=False, shortestFloats=True)(p)
+        self.assertEqual(getYaml('test.yaml'), '''
+big: 1.5e+30
+
+rational: [0.1, -3.145, 0.33333334]
+''')
+
+    def testDoubleCheck(self):
+        p = Pool()
+        for i in range(10000):
+            p.add('frames', [i / 3., -float(i)])
+        p.add('name', 'foo')
+
+        YamlOutput(filename='test.yaml', doubleCheck=True)(p)
+        result = YamlInput(filename='test.yaml')()
+        self.assertEqualMatrix(result['frames'], p['frames'])
+        os.remove('test.yaml')
+
+        YamlOutput(filename='test.json', format='json', doubleCheck=True)(p)
+        result = YamlInput(filename='test.json', format='json')()
+        self.assertEqualMatrix(result['frames'], p['frames'])
+        os.remove('test.json')
+
+    def testUnwritableFile(self):
+        p = Pool()
+        p.add('foo', 1.)
+        self.assertRaises(RuntimeError, lambda: YamlOutput(filename='/nonexistent/dir/test.yaml')(p))
+
 
 suite = allTests(TestYamlOutput)
 
@@ -235,6 +235,122 @@ class TestTensorFlowPredict(TestCase):
 
         self.assertEqualMatrix(firstResult, secondResult)
 
+    def testSharedModel(self):
+        # Instances configured with the same model share it through the model cache.
+        import essentia
+        model_name = join(filedir(), "tensorflowpredict", "identity.pb")
+        batch = numpy.reshape(numpy.arange(4, dtype="float32"), (1, 1, 2, 2))
+
+        pool = Pool()
+        pool.set("model/Placeholder", batch)
+
+        essentia.clearModelCache()
+        models = essentia.modelCacheInfo()["models"]
+
+        params = {"graphFilename": model_name,
+                  "inputs": ["model/Placeholder"],
+                  "outputs": ["model/Identity"]}
+        first = TensorflowPredict(**params)
+        second = TensorflowPredict(**params)
+
+        info = essentia.modelCacheInfo()
+        self.assertEqual(info["models"], models + 1)
+        self.assertGreater(info["size"], 0)
+        self.assertAlmostEqualMatrix(first(pool)["model/Identity"], second(pool)["model/Identity"])
+
+        del first, second
+        essentia.clearModelCache()
+        self.assertEqual(essentia.modelCacheInfo()["models"], models)
+
+    def testModelCacheRelease(self):
+        # A model that does not fit in the cache anymore is evicted as soon as
+        # the last instance using it releases it.
+        import essentia
+        model_name = join(filedir(), "tensorflowpredict", "identity.pb")
+        params = {"graphFilename": model_name,
+                  "inputs": ["model/Placeholder"],
+                  "outputs": ["model/Identity"]}
+
+        essentia.clearModelCache()
+        info = essentia.modelCacheInfo()
+        try:
+            predictor = TensorflowPredict(**params)
+
+            # the model is in use, so it is kept
+            essentia.setModelCacheCapacity(1)
+            self.assertEqual(essentia.modelCacheInfo()["models"], info["models"] + 1)
+
+            del predictor
+            self.assertEqual(essentia.modelCacheInfo()["models"], info["models"])
+        finally:
+            essentia.setModelCacheCapacity(info["capacity"])
+
+    def testSessionOptions(self):
+        model_name = join(filedir(), "tensorflowpredict", "identity.pb")
+        batch = numpy.reshape(numpy.arange(4, dtype="float32"), (1, 1, 2, 2))
+
+        pool = Pool()
+        pool.set("model/Placeholder", batch)
+
+        params = {"graphFilename": model_name,
+                  "inputs": ["model/Placeholder"],
+                  "outputs": ["model/Identity"]}
+        expected = TensorflowPredict(**params)(pool)["model/Identity"]
+
+        found = TensorflowPredict(intraOpThreads=1,
+                                  interOpThreads=1,
+                                  threadPool="test",
+                                  optimizeGraph=False,
+                                  **params)(pool)["model/Identity"]
+        self.assertAlmostEqualMatrix(found, expected)
+
+    def testGlobalSessionOptions(self):
+        import essentia
+        model_name = join(filedir(), "tensorflowpredict", "identity.pb")
+
+        self.assertRaises(ValueError, essentia.setTensorflowOptions, threads=1)
+
+        essentia.setTensorflowOptions(intraOpThreads=2, threadPool="test")
+        try:
+            model = TensorflowPredict(graphFilename=model_name,
+                                      inputs=["model/Placeholder"],
+                                      outputs=["model/Identity"],
+                                      threadPool="other")
+            self.assertEqual(model.paramValue("intraOpThreads"), 2)
+            # explicit values take precedence over the global ones
+            self.assertEqual(model.paramValue("threadPool"), "other")
+        finally:
+            essentia.setTensorflowOptions()
+
+        model = TensorflowPredict()
+        self.assertEqual(model.paramValue("intraOpThreads"), 0)
+
+    def testStats(self):
+        model_name = join(filedir(), "tensorflowpredict", "identity.pb")
+        model = TensorflowPredict(graphFilename=model_name,
+                                  inputs=["model/Placeholder"],
+                                  outputs=["model/Identity"],
+                                  stats=True)
+
+        # The input tensors are reused while the shape does not change.
+        for batch_size in (3, 3, 5):
+            batch = numpy.ones((batch_size, 1, 2, 2), dtype="float32") * batch_size
+
+            pool = Pool()
+            pool.set("model/Placeholder", batch)
+            poolOut = model(pool)
+
+            self.assertAlmostEqualMatrix(poolOut["model/Identity"], batch)
+            self.assertEqual(poolOut["stats.batchSize"], batch_size)
+            self.assertGreater(poolOut["stats.latency"], 0)
+            self.assertGreater(poolOut["stats.throughput"], 0)
+
+        # Stats are not stored by default.
+        model.configure(graphFilename=model_name,
+                        inputs=["model/Placeholder"],
+                        outputs=["model/Identity"])
+        self.assertFalse("stats.latency" in model(pool).descriptorNames())
+
     def testImplicitOutputTensorIndex(self):
         model = join(filedir(), "tensorflowpredict", "identity.pb")
         batch = numpy.reshape(numpy.arange(4, dtype="float32"), (1, 1, 2, 2))
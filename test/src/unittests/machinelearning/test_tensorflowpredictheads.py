@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2006-2022  Music Technology Group - Universitat Pompeu Fabra
+#
+# This file is part of Essentia
+#
+# Essentia is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the Affero GNU General Public License
+# version 3 along with this program. If not, see http://www.gnu.org/licenses/
+
+
+from essentia_test import *
+
+
+class TestTensorFlowPredictHeads(TestCase):
+
+    def __init__(self, args):
+        super().__init__(args)
+
+        numpy.random.seed(6)
+        # Synthetic MusiCNN-like embeddings to speed up the tests.
+        self.embeddings = numpy.random.rand(10, 200).astype("float32")
+
+        self.head_model_name = join(testdata.models_dir, 'classification_heads', 'emomusic-msd-musicnn-1.pb')
+        self.head_input_name = "flatten_in_input"
+        self.head_output_name = "dense_out"
+
+    def expected(self, **kwargs):
+        classification_head = TensorflowPredict2D(
+            graphFilename=self.head_model_name,
+            input=self.head_input_name,
+            output=self.head_output_name,
+            **kwargs
+        )
+        return classification_head(self.embeddings)
+
+    def testRegression(self):
+        heads = TensorflowPredictHeads(
+            graphFilenames=[self.head_model_name] * 2,
+            names=['first', 'second'],
+            input=self.head_input_name,
+            outputs=[self.head_output_name],
+        )
+
+        found = heads(self.embeddings)
+        expected = self.expected()
+
+        self.assertEqual(sorted(found.descriptorNames()), ['first', 'second'])
+        self.assertAlmostEqualMatrix(found['first'], expected)
+        self.assertAlmostEqualMatrix(found['second'], expected)
+
+    def testDefaultNames(self):
+        heads = TensorflowPredictHeads(
+            graphFilenames=[self.head_model_name],
+            input=self.head_input_name,
+            outputs=[self.head_output_name],
+        )
+
+        found = heads(self.embeddings)
+        self.assertEqual(found.descriptorNames(), ['emomusic-msd-musicnn-1'])
+
+    def testBatchSize(self):
+        expected = self.expected()
+        for batchSize in [-1, 1, 3, 64]:
+            heads = TensorflowPredictHeads(
+                graphFilenames=[self.head_model_name],
+                names=['head'],
+                input=self.head_input_name,
+                outputs=[self.head_output_name],
+                batchSize=batchSize,
+            )
+            self.assertAlmostEqualMatrix(heads(self.embeddings)['head'], expected)
+
+    def testRepeatedCalls(self):
+        heads = TensorflowPredictHeads(
+            graphFilenames=[self.head_model_name],
+            names=['head'],
+            input=self.head_input_name,
+            outputs=[self.head_output_name],
+        )
+        first = heads(self.embeddings)['head']
+        second = heads(self.embeddings)['head']
+        self.assertEqualMatrix(first, second)
+
+    def testEmptyModelNames(self):
+        # With no models the algorithm should skip the configuration without errors.
+        self.assertConfigureSuccess(TensorflowPredictHeads(), {})
+        self.assertConfigureSuccess(TensorflowPredictHeads(), {'graphFilenames': []})
+
+    def testInvalidParam(self):
+        self.assertConfigureFails(TensorflowPredictHeads(), {'graphFilenames': [self.head_model_name] * 2,
+                                                             'input': self.head_input_name,
+                                                             'outputs': [self.head_output_name],
+                                                             })  # duplicated names
+        self.assertConfigureFails(TensorflowPredictHeads(), {'graphFilenames': [self.head_model_name],
+                                                             'names': ['a', 'b'],
+                                                             'input': self.head_input_name,
+                                                             'outputs': [self.head_output_name],
+                                                             })
+        self.assertConfigureFails(TensorflowPredictHeads(), {'graphFilenames': ['unavailable_model.pb'],
+                                                             })  # the model does not exist
+
+    def testNotConfigured(self):
+        self.assertComputeFails(TensorflowPredictHeads(), self.embeddings)
+
+
+suite = allTests(TestTensorFlowPredictHeads)
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=2).run(suite)
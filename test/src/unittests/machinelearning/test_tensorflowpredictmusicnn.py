@@ -19,6 +19,7 @@
 
 
 from essentia_test import *
+import essentia.streaming as streaming
 import sys
 import os
 
@@ -49,6 +50,66 @@ class TestTensorFlowPredictMusiCNN(TestCase):
 
         self.assertAlmostEqualVector(found, expected, 1e-5)
 
+    def testStats(self):
+        model_name = join(testdata.models_dir, 'musicnn', 'genre_dortmund_musicnn_msd.pb')
+
+        # Using 10 seconds of synthetic noise (5 patches) to speed up the test.
+        audio = numpy.random.RandomState(0).rand(160000).astype('float32')
+        model = TensorflowPredictMusiCNN(graphFilename=model_name, batchSize=2, stats=True)
+        self.assertEqual(model.outputNames(), ['predictions', 'stats'])
+
+        # The stats are computed for each batch and do not change the predictions.
+        predictions, stats = model(audio)
+        expected = TensorflowPredictMusiCNN(graphFilename=model_name, batchSize=2)(audio)
+        self.assertAlmostEqualMatrix(predictions, expected)
+
+        n_batches = (len(predictions) + 1) // 2
+        self.assertEqual(list(stats['stats.batchSize']), [2] * (len(predictions) // 2) + [1] * (len(predictions) % 2))
+        self.assertEqual(len(stats['stats.latency']), n_batches)
+        self.assertTrue(all(stats['stats.latency'] > 0))
+        self.assertTrue(all(stats['stats.throughput'] > 0))
+
+        # The stats are not accumulated between computations.
+        _, stats = model(audio)
+        self.assertEqual(len(stats['stats.batchSize']), n_batches)
+
+        # The output is removed when the stats are disabled.
+        model.configure(graphFilename=model_name, batchSize=2)
+        self.assertEqual(model.outputNames(), ['predictions'])
+        self.assertAlmostEqualMatrix(model(audio), expected)
+
+        # And declared again when they are enabled, also when reconfiguring
+        # with the stats already enabled.
+        for _ in range(2):
+            model.configure(graphFilename=model_name, batchSize=2, stats=True)
+            self.assertEqual(model.outputNames(), ['predictions', 'stats'])
+            predictions, stats = model(audio)
+            self.assertAlmostEqualMatrix(predictions, expected)
+            self.assertEqual(len(stats['stats.batchSize']), n_batches)
+
+    def testStatsStreaming(self):
+        model_name = join(testdata.models_dir, 'musicnn', 'genre_dortmund_musicnn_msd.pb')
+        audio = numpy.random.RandomState(0).rand(160000).astype('float32')
+        expected = TensorflowPredictMusiCNN(graphFilename=model_name, batchSize=2)(audio)
+
+        model = streaming.TensorflowPredictMusiCNN(graphFilename=model_name, batchSize=2)
+        self.assertEqual(model.outputNames(), ['predictions'])
+
+        # The stats output can be enabled, reconfigured and disabled again.
+        for stats in [True, True, False, True]:
+            model.configure(graphFilename=model_name, batchSize=2, stats=stats)
+            self.assertEqual(model.outputNames(), ['predictions', 'stats'] if stats else ['predictions'])
+
+        vectorInput = streaming.VectorInput(audio)
+        pool = Pool()
+        vectorInput.data >> model.signal
+        model.predictions >> (pool, 'predictions')
+        model.stats >> (pool, 'stats')
+        run(vectorInput)
+
+        self.assertAlmostEqualMatrix(pool['predictions'], expected)
+        self.assertEqual(len(pool['stats']), (len(expected) + 1) // 2)
+
     def testEmptyModelName(self):
         # With empty model names the algorithm should skip the configuration without errors.
         self.assertConfigureSuccess(TensorflowPredictMusiCNN(), {})
@@ -17,17 +17,57 @@
 # You should have received a copy of the Affero GNU General Public License
 # version 3 along with this program. If not, see http://www.gnu.org/licenses/
 
-# The unit test for "BeatTrackerMultiFeature" is taken care of in the file test_rhythmextractor2013.py.
-# This file is included here as a "dummy" to maintain consistency in file to file correspondence
-# between unit test and the algorithm.
+# The regression tests for "BeatTrackerMultiFeature" on real audio are taken care
+# of in the file test_rhythmextractor2013.py.
 
 from numpy import *
 from essentia_test import *
+from essentia.streaming import BeatTrackerMultiFeature as sBeatTrackerMultiFeature
+
 
 class TestBeatTrackerMultiFeature(TestCase):
-    
-    def testDummy(self):
-        self.assertEqual(0,0)
+
+    def clickTrack(self):
+        # clicks every 0.5 s (120 bpm) with some noise
+        signal = zeros(44100 * 10)
+        signal[::22050] = 1
+        return array(signal + 0.01 * random.RandomState(1).randn(len(signal)))
+
+    def testClickTrack(self):
+        ticks, confidence = BeatTrackerMultiFeature()(self.clickTrack())
+        self.assertEqual(len(ticks), 19)
+        self.assertAlmostEqualVector(diff(ticks), [0.5] * 18, 0.05)
+        self.assertTrue(confidence > 3.5)
+
+    def testStreaming(self):
+        # the onset detection branches run in parallel threads, the results
+        # should not depend on it
+        signal = self.clickTrack()
+        beatTracker = BeatTrackerMultiFeature()
+        ticks, confidence = beatTracker(signal)
+        beatTracker.reset()
+        self.assertEqualVector(beatTracker(signal)[0], ticks)
+
+        gen = VectorInput(signal)
+        beatTracker = sBeatTrackerMultiFeature()
+        pool = Pool()
+        gen.data >> beatTracker.signal
+        beatTracker.ticks >> (pool, 'ticks')
+        beatTracker.confidence >> (pool, 'confidence')
+        run(gen)
+
+        self.assertEqualVector(pool['ticks'], ticks)
+        self.assertEqual(pool['confidence'], confidence)
+
+    def testEmpty(self):
+        ticks, confidence = BeatTrackerMultiFeature()(array([]))
+        self.assertEqualVector(ticks, [])
+        self.assertEqual(confidence, 0)
+
+    def testShortSignal(self):
+        ticks, confidence = BeatTrackerMultiFeature()(array(random.RandomState(1).randn(3000)))
+        self.assertEqualVector(ticks, [])
+        self.assertEqual(confidence, 0)
 
 
 suite = allTests(TestBeatTrackerMultiFeature)
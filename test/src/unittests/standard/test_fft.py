@@ -89,6 +89,22 @@ class TestFFT(TestCase):
 
         self.assertAlmostEqualVector(FFT()(inputSignal), expected, 1e-2)
 
+    def testSharedPlans(self):
+        # instances of the same size share their plan, make sure they don't
+        # share anything else, also when changing sizes back and forth
+        numpy.random.seed(0)
+        signals = [numpy.random.uniform(-1, 1, size).astype('f4') for size in (256, 512, 256, 1024)]
+        ffts = [FFT(size=len(s)) for s in signals]
+        first = [fft(s) for fft, s in zip(ffts, signals)]
+
+        for fft, s, expected in zip(ffts, signals, first):
+            self.assertAlmostEqualVector(fft(s), numpy.fft.rfft(s), 1e-3)
+            self.assertEqualVector(fft(s), expected)
+
+        fft = FFT()
+        for s, expected in zip(signals, first):
+            self.assertEqualVector(fft(s), expected)
+
 
 
 
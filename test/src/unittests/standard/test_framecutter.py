@@ -20,6 +20,7 @@
 
 
 from essentia_test import *
+import essentia
 
 
 def cutFrames(params, input=list(range(100))):
@@ -425,6 +426,74 @@ class TestFrameCutter(TestCase):
         self.cutAudioFile("1989_samples.wav", 512, 8192, False, 1)
 
 
+    def testAsMatrix(self):
+        audio = array(numpy.random.uniform(-1, 1, 3000))
+        for frameSize, hopSize in [(1024, 512), (512, 128), (100, 333), (4096, 1024)]:
+            for startFromZero in [True, False]:
+                for lastFrameToEndOfFile in [True, False]:
+                    for ratio in [0, 0.2, 0.5]:
+                        framegen = FrameGenerator(audio, frameSize=frameSize, hopSize=hopSize,
+                                                  startFromZero=startFromZero,
+                                                  validFrameThresholdRatio=ratio,
+                                                  lastFrameToEndOfFile=lastFrameToEndOfFile)
+                        expected = [frame for frame in framegen]
+                        found = framegen.as_matrix()
+                        self.assertEqual(found.shape, (len(expected), frameSize))
+                        self.assertEqualMatrix(found, expected)
+
+                        blocks = list(framegen.blocks(3))
+                        self.assertTrue(all(len(b) <= 3 for b in blocks))
+                        if blocks:
+                            self.assertEqualMatrix(numpy.concatenate(blocks), expected)
+
+    def testAsMatrixEmpty(self):
+        self.assertEqual(essentia.frames(array([]), 100, 60).shape, (0, 100))
+        self.assertEqual(list(essentia.frameBlocks(array([]), 10, 100, 60)), [])
+
+    def testFramesAreViews(self):
+        audio = array(numpy.random.uniform(-1, 1, 4096))
+        found = essentia.frames(audio, frameSize=1024, hopSize=512, startFromZero=True)
+        self.assertTrue(numpy.shares_memory(found, audio))
+        self.assertFalse(found.flags.writeable)
+
+        # only the blocks with zero-padded frames are copies
+        blocks = list(essentia.frameBlocks(audio, 2, frameSize=1024, hopSize=512))
+        self.assertFalse(numpy.shares_memory(blocks[0], audio))
+        self.assertTrue(numpy.shares_memory(blocks[1], audio))
+        self.assertFalse(numpy.shares_memory(blocks[-1], audio))
+
+    def testPaddedFramesAreCopies(self):
+        audio = array(numpy.random.uniform(-1, 1, 4096))
+        frameSize, hopSize = 1024, 256
+
+        # frames starting before 0 or ending after the audio need zero-padding
+        positions = [-512 + i*hopSize for i in range(len(essentia.frames(audio, frameSize, hopSize)))]
+        padded = [p < 0 or p + frameSize > len(audio) for p in positions]
+
+        # with startFromZero=False the first frames are always padded, the
+        # whole matrix is then a copy
+        found = essentia.frames(audio, frameSize, hopSize, startFromZero=False)
+        self.assertFalse(numpy.shares_memory(found, audio))
+
+        for blockSize in [1, 3, 100]:
+            blocks = list(essentia.frameBlocks(audio, blockSize, frameSize, hopSize, startFromZero=False))
+            self.assertEqualMatrix(numpy.concatenate(blocks), found)
+
+            # blocks only hold padded frames, or frames viewing the audio
+            i = 0
+            for block in blocks:
+                self.assertTrue(len(block) <= blockSize)
+                blockPadded = padded[i:i + len(block)]
+                self.assertEqual(len(set(blockPadded)), 1)
+                self.assertEqual(numpy.shares_memory(block, audio), not blockPadded[0])
+                if not blockPadded[0]:
+                    for j, frame in enumerate(block):
+                        start = positions[i + j]
+                        self.assertTrue(numpy.shares_memory(frame, audio[start:start + frameSize]))
+                i += len(block)
+            self.assertEqual(i, len(found))
+
+
 
 suite = allTests(TestFrameCutter)
 
@@ -274,6 +274,28 @@ class TestVectorRealToTensor(TestCase):
             expected_shape_first = [batch_size, 1, patch_size, frame_size]
             self.assertEqualVector(batches[0].shape, expected_shape_first)
 
+    def testMaxLatency(self):
+        # Test that incomplete batches are pushed when the patches wait too long.
+        frame_size, patch_size, batch_size, n_patches = 1, 3, 100, 10
+        shape = [batch_size, 1, patch_size, frame_size]
+        n_samples = n_patches * patch_size * frame_size
+
+        # With a negligible latency every patch is pushed as soon as possible.
+        params = {"shape": shape, "lastPatchMode": "discard",
+                  "lastBatchMode": "push", "maxLatency": 1e-9}
+        batches = self.streamingPipeline(n_samples, params)
+
+        self.assertEqual(len(batches), n_patches)
+        for batch in batches:
+            self.assertEqualVector(batch.shape, [1, 1, patch_size, frame_size])
+
+        # With a long latency the patches wait for the end of the stream.
+        params["maxLatency"] = 1000
+        batches = self.streamingPipeline(n_samples, params)
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqualVector(batches[0].shape, [n_patches, 1, patch_size, frame_size])
+
 
 suite = allTests(TestVectorRealToTensor)
 